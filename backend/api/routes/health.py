@@ -83,6 +83,9 @@ def create_health_router(db, get_bot_func, sanitize_config_func):
     async def diagnostics():
         """Snapshot de configuração (sem segredos), posições e último sizing."""
         from bot.config import load_bot_config
+        from bot.market_cache import cache_stats
+        from bot.rate_limiter import request_budget
+        from bot.telegram_client import telegram_notifier
         
         try:
             config = await load_bot_config(db)
@@ -94,6 +97,16 @@ def create_health_router(db, get_bot_func, sanitize_config_func):
                 "is_running": status.get("is_running") if isinstance(status, dict) else False,
                 "balance": status.get("balance") if isinstance(status, dict) else 0,
                 "last_risk_snapshot": getattr(bot, "last_risk_snapshot", None),
+                "metrics": dict(getattr(bot, "metrics", {}) or {}),
+                "ml_filter": bot.ml_filter.get_stats() if getattr(bot, "ml_filter", None) else None,
+                "pnl_ledger": bot.pnl_ledger.snapshot() if getattr(bot, "pnl_ledger", None) else None,
+                "positions_repo": bot.positions_repo.get_stats() if getattr(bot, "positions_repo", None) else None,
+                "exit_executor": bot.exit_executor.stats if getattr(bot, "exit_executor", None) else None,
+                "bookkeeping": bot.bookkeeping.get_stats() if getattr(bot, "bookkeeping", None) else None,
+                "post_trade_queue": bot.post_trade_queue.get_stats() if getattr(bot, "post_trade_queue", None) else None,
+                "market_cache": cache_stats(),
+                "request_budget": request_budget.snapshot(),
+                "telegram": telegram_notifier.dispatcher.get_stats(),
             }
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e)) from None
@@ -34,13 +34,17 @@ def create_market_router(db, get_bot):
             
             # Buscar ticker 24h para preço e variação (com timeout)
             import asyncio
+
+            from bot.async_exchange_client import async_exchange_manager
+            from bot.rate_limiter import LANE_DASHBOARD, request_lane
             try:
-                loop = asyncio.get_event_loop()
-                tickers = await asyncio.wait_for(
-                    loop.run_in_executor(None, binance_manager.get_all_tickers),
-                    timeout=5.0
-                )
-            except (asyncio.TimeoutError, Exception):
+                with request_lane(LANE_DASHBOARD):
+                    if async_exchange_manager.is_initialized:
+                        fetch = async_exchange_manager.get_all_tickers()
+                    else:
+                        fetch = asyncio.to_thread(binance_manager.get_all_tickers)
+                    tickers = await asyncio.wait_for(fetch, timeout=5.0)
+            except Exception:
                 return {'prices': {}, 'count': 0, 'cached': True}
             
             for ticker in tickers:
@@ -81,7 +85,10 @@ def create_market_router(db, get_bot):
             signals = []
             
             # Analisar todos os símbolos monitorados (max 5s total)
-            import asyncio, time as _time
+            import asyncio
+            import time as _time
+
+            from bot.rate_limiter import LANE_DASHBOARD, request_lane
             _start = _time.time()
             for symbol in bot.selector.symbols[:15]:  # Limitar a 15 para performance
                 if _time.time() - _start > 5.0:
@@ -90,7 +97,8 @@ def create_market_router(db, get_bot):
                     continue
                 
                 try:
-                    analysis = bot.strategy.analyze_symbol(symbol)
+                    with request_lane(LANE_DASHBOARD):
+                        analysis = await asyncio.to_thread(bot.strategy.analyze_symbol, symbol)
                     if analysis and analysis.get('signal') != 'HOLD':
                         signals.append({
                             'symbol': symbol,
@@ -135,13 +143,15 @@ def create_market_router(db, get_bot):
             
             # Analisar BTC (com timeout)
             import asyncio
+
+            from bot.rate_limiter import LANE_DASHBOARD, request_lane
             try:
-                loop = asyncio.get_event_loop()
-                btc_analysis = await asyncio.wait_for(
-                    loop.run_in_executor(None, bot.strategy.analyze_symbol, 'BTCUSDT'),
-                    timeout=5.0
-                )
-            except (asyncio.TimeoutError, Exception):
+                with request_lane(LANE_DASHBOARD):
+                    btc_analysis = await asyncio.wait_for(
+                        asyncio.to_thread(bot.strategy.analyze_symbol, 'BTCUSDT'),
+                        timeout=5.0
+                    )
+            except Exception:
                 return {'healthy': True, 'trend': 'unknown', 'correlation_warning': False, 'cached': True}
             
             if not btc_analysis:
@@ -182,13 +192,15 @@ def create_market_router(db, get_bot):
             
             # Analisar BTC como proxy do mercado
             import asyncio
+
+            from bot.rate_limiter import LANE_DASHBOARD, request_lane
             try:
-                loop = asyncio.get_event_loop()
-                df = await asyncio.wait_for(
-                    loop.run_in_executor(None, bot.strategy.get_historical_data, 'BTCUSDT', 50),
-                    timeout=5.0
-                )
-            except (asyncio.TimeoutError, Exception):
+                with request_lane(LANE_DASHBOARD):
+                    df = await asyncio.wait_for(
+                        asyncio.to_thread(bot.strategy.get_historical_data, 'BTCUSDT', 50),
+                        timeout=5.0
+                    )
+            except Exception:
                 return {'regime': 'unknown', 'description': 'Exchange timeout', 'cached': True}
             
             if df is None or len(df) < 30:
@@ -10,7 +10,6 @@ Endpoints:
 """
 
 import asyncio
-import json
 import os
 import time
 from datetime import UTC, datetime, timedelta
@@ -20,6 +19,9 @@ import psutil
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 
+from api.stream_hub import StreamHub
+from bot.performance_aggregates import RECENT_TRADES, SCOPE_REAL, PerformanceAggregates, summarize
+
 router = APIRouter(tags=["Performance"])
 
 # Cache para realtime stats (update a cada 5s)
@@ -59,121 +61,13 @@ async def _build_performance_snapshot(db) -> dict[str, Any]:
         ):
             return _performance_cache["data"]
 
-        # Filtrar apenas trades reais (excluir simulados)
-        trades = (
-            await db.trades.find({"simulated": {"$ne": True}}, {"_id": 0})
-            .sort("closed_at", 1)
-            .to_list(1000)
-        )
-
-        if not trades:
-            snapshot = {
-                "total_trades": 0,
-                "winning_trades": 0,
-                "losing_trades": 0,
-                "win_rate": 0,
-                "total_pnl": 0,
-                "average_pnl": 0,
-                "best_trade": 0,
-                "worst_trade": 0,
-                "profit_factor": 0,
-                "avg_win": 0,
-                "avg_loss": 0,
-                "expectancy": 0,
-                "max_drawdown": 0,
-                "current_streak": 0,
-                "streak_type": None,
-                "roi": 0,
-                "trades_by_date": [],
-            }
-            _performance_cache = {"data": snapshot, "ts": now}
-            return snapshot
-
-        # Single-pass calculation for all metrics (otimizado de O(3n) para O(n))
-        total_trades = len(trades)
-        total_pnl = 0
-        winning_trades = 0
-        losing_trades = 0
-        total_profits = 0
-        total_losses = 0
-        cumulative = 0
-        peak = 0
-        max_drawdown = 0
-        pnls = []
-
-        for trade in trades:
-            pnl = trade.get("pnl", 0)
-            pnls.append(pnl)
-            total_pnl += pnl
-
-            if pnl > 0:
-                winning_trades += 1
-                total_profits += pnl
-            else:
-                losing_trades += 1
-                total_losses += abs(pnl)
-
-            # Max drawdown calculation
-            cumulative += pnl
-            if cumulative > peak:
-                peak = cumulative
-            drawdown = peak - cumulative
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-
-        average_pnl = total_pnl / total_trades if total_trades > 0 else 0
-        profit_factor = total_profits / total_losses if total_losses > 0 else 0
-        avg_win = total_profits / winning_trades if winning_trades > 0 else 0
-        avg_loss = total_losses / losing_trades if losing_trades > 0 else 0
-        winRate = winning_trades / total_trades if total_trades > 0 else 0
-        expectancy = (winRate * avg_win) - ((1 - winRate) * avg_loss)
-
-        # Streak atual (sequência de wins ou losses)
-        current_streak = 0
-        streak_type = None
-        for trade in reversed(trades):
-            pnl = trade.get("pnl", 0)
-            if pnl > 0:
-                if streak_type is None:
-                    streak_type = "win"
-                if streak_type == "win":
-                    current_streak += 1
-                else:
-                    break
-            elif pnl < 0:
-                if streak_type is None:
-                    streak_type = "loss"
-                if streak_type == "loss":
-                    current_streak += 1
-                else:
-                    break
-
-        # ROI
-        initial_balance = float(
-            os.environ.get("INITIAL_BALANCE_USDT", "1000")
-        )  # Configurável via env
-        roi = (total_pnl / initial_balance * 100) if initial_balance > 0 else 0
-
-        snapshot = {
-            "total_trades": total_trades,
-            "winning_trades": winning_trades,
-            "losing_trades": losing_trades,
-            "win_rate": (winning_trades / total_trades * 100) if total_trades > 0 else 0,
-            "total_pnl": round(total_pnl, 2),
-            "average_pnl": round(average_pnl, 2),
-            "best_trade": round(max(pnls), 2) if pnls else 0,
-            "worst_trade": round(min(pnls), 2) if pnls else 0,
-            "profit_factor": round(profit_factor, 2),
-            "avg_win": round(avg_win, 2),
-            "avg_loss": round(avg_loss, 2),
-            "expectancy": round(expectancy, 2),
-            "max_drawdown": round(max_drawdown, 2),
-            "current_streak": current_streak,
-            "streak_type": streak_type,
-            "roi": round(roi, 2),
-            "trades_by_date": trades,
-        }
+        # Agregado materializado (atualizado a cada trade fechado); O(1)
+        aggregates = PerformanceAggregates(db)
+        agg = await aggregates.get(SCOPE_REAL)
+        if agg is None:
+            agg = (await aggregates.rebuild())[SCOPE_REAL]
 
+        snapshot = summarize(agg)
         _performance_cache = {"data": snapshot, "ts": now}
         return snapshot
 
@@ -226,16 +120,20 @@ def create_performance_router(db, get_bot_func):
             ):
                 return _sparkline_cache["data"]
 
-            # Buscar trades reais ordenados por data (excluir simulados)
-            trades = (
-                await db.trades.find(
-                    {"closed_at": {"$exists": True}, "simulated": {"$ne": True}},
-                    {"closed_at": 1, "pnl": 1, "_id": 0},
+            # Últimos trades reais: do agregado materializado quando cabe nele
+            agg = await PerformanceAggregates(db).get(SCOPE_REAL) if points <= RECENT_TRADES else None
+            if agg is not None:
+                trades = [t for t in agg["recent"] if t.get("closed_at")][-points:][::-1]
+            else:
+                trades = (
+                    await db.trades.find(
+                        {"closed_at": {"$exists": True}, "simulated": {"$ne": True}},
+                        {"closed_at": 1, "pnl": 1, "_id": 0},
+                    )
+                    .sort("closed_at", -1)
+                    .limit(points)
+                    .to_list(points)
                 )
-                .sort("closed_at", -1)
-                .limit(points)
-                .to_list(points)
-            )
 
             # Formatar para sparkline
             sparkline_data = []
@@ -342,69 +240,78 @@ def create_performance_router(db, get_bot_func):
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Erro ao obter stats: {e!s}") from None
 
+    async def _build_stream_snapshot() -> dict[str, Any]:
+        """Snapshot único do stream: status, performance e preços das posições."""
+        from bot.async_exchange_client import async_exchange_manager
+        from bot.binance_client import binance_manager
+        from bot.rate_limiter import LANE_DASHBOARD, request_lane
+
+        bot = await get_bot_func(db)
+        status = await bot.get_status()
+        performance = await _build_performance_snapshot(db)
+
+        # Enrich positions with real-time prices (um get_price_map por tick)
+        positions = status.get("positions", [])
+        prices: dict[str, float] = {}
+        symbols = [pos["symbol"] for pos in positions]
+        if symbols:
+            try:
+                with request_lane(LANE_DASHBOARD):
+                    if async_exchange_manager.is_initialized:
+                        prices = await async_exchange_manager.get_price_map(symbols)
+                    elif binance_manager.client:
+                        prices = await asyncio.to_thread(binance_manager.get_price_map, symbols)
+            except Exception:
+                prices = {}
+
+        for pos in positions:
+            current_price = prices.get(pos["symbol"])
+            if current_price and pos.get("entry_price"):
+                entry = pos["entry_price"]
+                if pos["side"] == "BUY":
+                    unrealized_pnl_pct = ((current_price - entry) / entry) * 100
+                else:
+                    unrealized_pnl_pct = ((entry - current_price) / entry) * 100
+                pos["current_price"] = current_price
+                pos["unrealized_pnl_pct"] = round(unrealized_pnl_pct, 3)
+            else:
+                pos["current_price"] = pos.get("entry_price", 0)
+                pos["unrealized_pnl_pct"] = 0
+
+        return {
+            "type": "snapshot",
+            "timestamp": datetime.now(UTC).isoformat(),
+            "status": status,
+            "performance": performance,
+        }
+
+    stream_hub = StreamHub(
+        _build_stream_snapshot,
+        interval=float(os.environ.get("STREAM_REFRESH_INTERVAL", 5)),
+        queue_size=int(os.environ.get("STREAM_QUEUE_SIZE", 4)),
+    )
+
     @router.get("/stream")
-    async def stream_bot_updates(request: Request):
-        """Server-Sent Events stream com status do bot e performance."""
+    async def stream_bot_updates(request: Request, patch: bool = False):
+        """Server-Sent Events stream com status do bot e performance.
 
-        async def event_generator():
-            retry_delay = 5
-            max_retry_delay = 30
-
-            while True:
-                if await request.is_disconnected():
-                    break
-
-                try:
-                    bot = await get_bot_func(db)
-                    status = await bot.get_status()
-                    performance = await _build_performance_snapshot(db)
-
-                    # Enrich positions with real-time prices
-                    enriched_positions = []
-                    for pos in status.get("positions", []):
-                        try:
-                            current_price = await asyncio.get_event_loop().run_in_executor(
-                                None, binance_manager.get_symbol_price, pos["symbol"]
-                            ) if binance_manager.client else None
-                        except Exception:
-                            current_price = pos.get("entry_price", 0)
-
-                        if current_price and pos.get("entry_price"):
-                            entry = pos["entry_price"]
-                            if pos["side"] == "BUY":
-                                unrealized_pnl_pct = ((current_price - entry) / entry) * 100
-                            else:
-                                unrealized_pnl_pct = ((entry - current_price) / entry) * 100
-                            pos["current_price"] = current_price
-                            pos["unrealized_pnl_pct"] = round(unrealized_pnl_pct, 3)
-                        else:
-                            pos["current_price"] = pos.get("entry_price", 0)
-                            pos["unrealized_pnl_pct"] = 0
-
-                        enriched_positions.append(pos)
-
-                    status["positions"] = enriched_positions
-
-                    payload = {
-                        "type": "snapshot",
-                        "timestamp": datetime.now(UTC).isoformat(),
-                        "status": status,
-                        "performance": performance,
-                    }
-                    yield f"data: {json.dumps(payload, default=str)}\n\n"
-                    retry_delay = 5
-                except Exception as exc:
-                    error_payload = {
-                        "type": "error",
-                        "message": str(exc),
-                        "timestamp": datetime.now(UTC).isoformat(),
-                    }
-                    yield f"data: {json.dumps(error_payload, default=str)}\n\n"
-                    await asyncio.sleep(retry_delay)
-                    retry_delay = min(retry_delay * 2, max_retry_delay)
-                    continue
+        Todos os clientes compartilham o mesmo produtor (StreamHub). Com
+        ``?patch=1`` o cliente recebe JSON Patch após o primeiro snapshot.
+        """
 
-                await asyncio.sleep(int(os.environ.get("STREAM_REFRESH_INTERVAL", 5)))
+        async def event_generator():
+            subscriber = stream_hub.subscribe(patches=patch)
+            try:
+                while True:
+                    message = await subscriber.next(heartbeat=stream_hub.interval)
+                    if message is None:
+                        break  # cliente lento desconectado pelo hub
+                    if await request.is_disconnected():
+                        break
+                    if message:
+                        yield message
+            finally:
+                stream_hub.unsubscribe(subscriber)
 
         return StreamingResponse(event_generator(), media_type="text/event-stream")
 
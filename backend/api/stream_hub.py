@@ -0,0 +1,204 @@
+"""
+Hub de broadcast para o SSE /api/stream.
+
+Uma única task produtora monta o snapshot (status + performance + preços) a
+cada intervalo e distribui para todos os clientes conectados, cada um com sua
+fila limitada. N abas do dashboard custam o mesmo que uma.
+
+- Cliente lento (fila cheia): as mensagens pendentes são descartadas e ele
+  recebe o próximo snapshot completo (coalescing). Se for coalescido mais de
+  ``max_lag`` vezes sem ler nada, é desconectado e o EventSource reconecta.
+- Clientes com ``patch=True`` recebem JSON Patch (RFC 6902) em relação ao
+  snapshot anterior depois do primeiro snapshot completo.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Sentinela na fila: o hub desconectou o cliente
+_CLOSE = None
+
+
+# ── JSON Patch ────────────────────────────────────────────────────────
+
+def _pointer(path: str, key: str) -> str:
+    return f"{path}/{key.replace('~', '~0').replace('/', '~1')}"
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> list[dict]:
+    """Operações JSON Patch que levam ``old`` a ``new`` (listas são trocadas inteiras)."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": _pointer(path, key)})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, _pointer(path, key)))
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, ops: list[dict]) -> Any:
+    """Aplica as operações geradas por ``json_diff`` (subconjunto add/remove/replace)."""
+    for op in ops:
+        if op["path"] == "":
+            document = op["value"]
+            continue
+        keys = [k.replace("~1", "/").replace("~0", "~") for k in op["path"].split("/")[1:]]
+        target = document
+        for key in keys[:-1]:
+            target = target[key]
+        if op["op"] == "remove":
+            del target[keys[-1]]
+        else:
+            target[keys[-1]] = op["value"]
+    return document
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload, default=str)}\n\n"
+
+
+# ── Hub ───────────────────────────────────────────────────────────────
+
+class StreamSubscriber:
+    """Conexão SSE registrada no hub."""
+
+    def __init__(self, queue_size: int, patches: bool):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.patches = patches
+        self.needs_full = True
+        self.lag = 0  # coalescings desde a última leitura
+        self.coalesced = 0
+
+    async def next(self, heartbeat: float) -> str | None:
+        """Próxima mensagem SSE.
+
+        ``""`` após ``heartbeat`` segundos sem mensagem, None quando o hub encerrou o cliente.
+        """
+        try:
+            message = await asyncio.wait_for(self.queue.get(), timeout=heartbeat)
+        except TimeoutError:
+            return ""
+        self.lag = 0
+        return message
+
+
+class StreamHub:
+    """Produtor único de snapshots com fan-out para filas por cliente."""
+
+    def __init__(
+        self,
+        build_snapshot: Callable[[], Awaitable[dict]],
+        interval: float = 5.0,
+        queue_size: int = 4,
+        max_lag: int = 3,
+        max_retry_delay: float = 30.0,
+    ):
+        self._build_snapshot = build_snapshot
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_lag = max_lag
+        self.max_retry_delay = max_retry_delay
+        self._subscribers: set[StreamSubscriber] = set()
+        self._task: asyncio.Task | None = None
+        self._last: dict | None = None
+        self._last_full: str | None = None
+        self.stats = {"ticks": 0, "errors": 0, "coalesced": 0, "dropped": 0, "build_ms": 0.0}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, patches: bool = False) -> StreamSubscriber:
+        subscriber = StreamSubscriber(self.queue_size, patches)
+        # Entrega imediata do último snapshot enquanto o próximo tick não chega
+        if self._last_full is not None:
+            subscriber.queue.put_nowait(self._last_full)
+            subscriber.needs_full = False
+        self._subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        retry_delay = self.interval
+        while self._subscribers:
+            started = time.perf_counter()
+            try:
+                payload = await self._build_snapshot()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats["errors"] += 1
+                logger.warning("Stream hub: falha ao montar snapshot: %s", exc)
+                self._broadcast_error(exc)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                continue
+            self.stats["build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.publish(payload)
+            retry_delay = self.interval
+            await asyncio.sleep(self.interval)
+
+    def publish(self, payload: dict) -> None:
+        """Distribui um snapshot; serializa uma vez para todos os clientes."""
+        # Normaliza para tipos JSON (datetime, ObjectId...) para o diff ser estável
+        snapshot = json.loads(json.dumps(payload, default=str))
+        full = _sse(snapshot)
+        patch = None
+        if self._last is not None and any(s.patches for s in self._subscribers):
+            patch = _sse({"type": "patch", "ops": json_diff(self._last, snapshot)})
+        self._last = snapshot
+        self._last_full = full
+        self.stats["ticks"] += 1
+
+        for subscriber in list(self._subscribers):
+            if subscriber.queue.full() and not self._coalesce(subscriber):
+                continue
+            if subscriber.patches and not subscriber.needs_full and patch is not None:
+                subscriber.queue.put_nowait(patch)
+            else:
+                subscriber.queue.put_nowait(full)
+                subscriber.needs_full = False
+
+    def _coalesce(self, subscriber: StreamSubscriber) -> bool:
+        """Descarta o backlog do cliente lento; retorna False se ele foi desconectado."""
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.lag += 1
+        if subscriber.lag > self.max_lag:
+            self.stats["dropped"] += 1
+            self._subscribers.discard(subscriber)
+            subscriber.queue.put_nowait(_CLOSE)
+            return False
+        subscriber.coalesced += 1
+        subscriber.needs_full = True
+        self.stats["coalesced"] += 1
+        return True
+
+    def _broadcast_error(self, exc: Exception) -> None:
+        message = _sse({"type": "error", "message": str(exc), "timestamp": datetime.now(UTC).isoformat()})
+        for subscriber in list(self._subscribers):
+            if not subscriber.queue.full():
+                subscriber.queue.put_nowait(message)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "subscribers": self.subscriber_count, "running": self._task is not None}
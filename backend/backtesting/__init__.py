@@ -6,6 +6,10 @@ Supports:
   - Multiple strategies tested simultaneously
   - Comprehensive metrics: Sharpe, Sortino, max drawdown, win rate, profit factor
   - Equity curve and trade log export
+  - Vectorized mode (default): strategy indicators are precomputed once for the
+    whole series (BaseStrategy.precompute) and each bar sees a zero-copy prefix
+    view, instead of copying the window and recomputing every bar (O(n²)).
+    Trades are identical to the legacy per-bar copy (vectorized=False).
   - Comparison reports across strategies
 
 Usage:
@@ -35,6 +39,9 @@ import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Bars skipped before the first entry check (indicator warm-up)
+WARMUP_BARS = 50
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # Config
@@ -44,6 +51,7 @@ logger = logging.getLogger(__name__)
 class BacktestConfig:
     """Configuration for backtesting run."""
     symbol: str = "BTCUSDT"
+    timeframe: str = "1h"
     start_date: str = "2024-01-01"
     end_date: str = "2025-01-01"
     initial_capital: float = 10000.0
@@ -52,6 +60,8 @@ class BacktestConfig:
     max_position_pct: float = 0.2       # Max 20% of capital per position
     strategies: list[Any] = field(default_factory=list)
     data: pd.DataFrame | None = None    # Pre-loaded OHLCV data (optional)
+    vectorized: bool = True             # Precompute indicators once, zero-copy bar views
+    lookback: int | None = None         # Vectorized: bars visible per step (None = whole prefix)
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -116,12 +126,18 @@ class BacktestEngine:
         if self.data is not None:
             return self.data
 
+        # Columnar candle archive (ml.candle_archive) for the configured period
+        df = load_archived(self.config.symbol, self.config.timeframe, self.config.start_date, self.config.end_date)
+        if not df.empty:
+            self.data = df
+            return df
+
         # Try loading from client if available
         for s in self.config.strategies:
             if s.client is not None:
                 klines = s.client.get_klines(
                     symbol=self.config.symbol,
-                    interval="1h",
+                    interval=self.config.timeframe,
                     limit=1000,
                 )
                 df = pd.DataFrame(klines, columns=[
@@ -149,8 +165,12 @@ class BacktestEngine:
 
         return results
 
-    def _run_single(self, strategy, df: pd.DataFrame) -> BacktestResult:
-        """Run a single strategy through the data."""
+    def _run_single(self, strategy, df: pd.DataFrame, frame: pd.DataFrame | None = None) -> BacktestResult:
+        """Run a single strategy through the data.
+
+        ``frame`` is an already precomputed (strategy.precompute) frame aligned
+        with ``df``; callers that share indicator work across runs pass it in.
+        """
         from bot.strategy_engine import detect_regime
 
         trades: list[TradeRecord] = []
@@ -159,9 +179,24 @@ class BacktestEngine:
         capital = self.config.initial_capital
         position = None  # {entry_price, quantity, signal, strategy, entry_idx}
 
-        for i in range(50, len(df)):  # Start after enough data
-            window = df.iloc[:i+1].copy()
-            current_price = float(window["close"].iloc[-1])
+        closes = df["close"].to_numpy(dtype=float)
+        if self.config.vectorized and frame is None:
+            # Indicators computed once for the whole series; each bar gets a
+            # zero-copy prefix view instead of a copy of the growing window.
+            frame = strategy.precompute(df.copy())
+
+        lookback = self.config.lookback
+
+        for i in range(WARMUP_BARS, len(df)):  # Start after enough data
+            if self.config.vectorized:
+                start = max(0, i + 1 - lookback) if lookback else 0
+                window = frame.iloc[start:i+1]
+                # Regime sees only the input columns, as on the legacy copy
+                regime_window = df.iloc[start:i+1]
+            else:
+                window = df.iloc[:i+1].copy()
+                regime_window = window
+            current_price = float(closes[i])
 
             # Check position exit
             if position is not None:
@@ -224,7 +259,7 @@ class BacktestEngine:
             # Check entry if no position
             if position is None:
                 try:
-                    regime = detect_regime(window)
+                    regime = detect_regime(regime_window)
                     signal = strategy.analyze(self.config.symbol, window, regime)
                 except Exception as e:
                     logger.debug("Strategy error at idx %d: %s", i, e)
@@ -398,6 +433,19 @@ class BacktestEngine:
 # Convenience
 # ═══════════════════════════════════════════════════════════════════════
 
+def load_archived(
+    symbol: str, timeframe: str, start: str | None = None, end: str | None = None
+) -> pd.DataFrame:
+    """Candles from the columnar archive (empty DataFrame when unavailable)."""
+    try:
+        from ml.candle_archive import CandleArchive
+
+        return CandleArchive().read(symbol, timeframe, start, end)
+    except Exception as e:
+        logger.debug("Candle archive unavailable for %s %s: %s", symbol, timeframe, e)
+        return pd.DataFrame()
+
+
 def quick_backtest(
     strategy,
     symbol: str,
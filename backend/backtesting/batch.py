@@ -0,0 +1,310 @@
+"""
+Batch Backtest Runner — (symbol, timeframe, strategy, params) grids on a process pool.
+
+BacktestEngine.run covers one symbol and runs its strategies serially. This
+module expands a job grid, writes every OHLCV frame once to disk as .npy files
+and shards the jobs across a ProcessPoolExecutor. Workers open the frames
+memory-mapped (read-only, shared through the page cache), so a frame is never
+pickled per job no matter how many strategies/parameter sets use it.
+
+Usage:
+  from backtesting.batch import BatchBacktestRunner, comparison_table, expand_jobs
+
+  jobs = expand_jobs(
+      symbols=["BTCUSDT", "ETHUSDT"],
+      timeframes=["15m"],
+      strategies={
+          "breakout": {"donchian_period": [20, 40]},
+          "mean_reversion": None,        # default params
+      },
+  )
+  runner = BatchBacktestRunner(data={("BTCUSDT", "15m"): df_btc, ...})
+  table = comparison_table(runner.run(jobs))
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from backtesting import BacktestConfig, BacktestEngine, BacktestResult, load_archived
+
+logger = logging.getLogger(__name__)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Jobs
+# ═══════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class BacktestJob:
+    """One backtest: a strategy (by name) with constructor kwargs on one frame."""
+    symbol: str
+    timeframe: str
+    strategy: str
+    params: dict[str, Any] = field(default_factory=dict, hash=False)
+
+    @property
+    def frame_key(self) -> tuple[str, str]:
+        return (self.symbol, self.timeframe)
+
+
+@dataclass
+class JobResult:
+    job: BacktestJob
+    result: BacktestResult | None = None
+    error: str | None = None
+    elapsed: float = 0.0
+
+
+def strategy_classes() -> dict[str, type]:
+    """Strategy name → class for every strategy in bot.strategies."""
+    import bot.strategies as strategies
+
+    return {cls.name: cls for cls in (getattr(strategies, n) for n in strategies.__all__)}
+
+
+def expand_grid(grid: Mapping[str, Sequence[Any]] | None) -> list[dict[str, Any]]:
+    """Cartesian product of a {param: [values]} grid. Empty/None → [{}]."""
+    if not grid:
+        return [{}]
+    keys = list(grid)
+    return [dict(zip(keys, values, strict=True)) for values in itertools.product(*grid.values())]
+
+
+def expand_jobs(
+    symbols: Iterable[str],
+    timeframes: Iterable[str],
+    strategies: Mapping[str, Mapping[str, Sequence[Any]] | Sequence[dict] | None] | Iterable[str],
+) -> list[BacktestJob]:
+    """Build the job grid.
+
+    ``strategies`` maps a strategy name to a parameter grid ({param: [values]}),
+    an explicit list of kwargs dicts, or None for the defaults. A plain list of
+    names runs every strategy with its defaults.
+    """
+    if not isinstance(strategies, Mapping):
+        strategies = {name: None for name in strategies}
+
+    param_sets: dict[str, list[dict]] = {}
+    for name, spec in strategies.items():
+        if isinstance(spec, Mapping) or spec is None:
+            param_sets[name] = expand_grid(spec)
+        else:
+            param_sets[name] = [dict(p) for p in spec]
+
+    timeframes = list(timeframes)
+    return [
+        BacktestJob(symbol, timeframe, name, params)
+        for symbol in symbols
+        for timeframe in timeframes
+        for name, sets in param_sets.items()
+        for params in sets
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Shared frames
+# ═══════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class FrameRef:
+    """Picklable handle to a frame stored as .npy files."""
+    values_path: str
+    columns: tuple[str, ...]
+    timestamp_path: str | None = None
+
+
+class SharedFrameStore:
+    """Writes OHLCV frames once; workers map them read-only with np.load(mmap_mode="r").
+
+    Numeric columns go into one float64 (n, k) matrix; the timestamp column is
+    kept separately with its own dtype so trade times print the same.
+    Non-numeric columns are dropped.
+    """
+
+    def __init__(self, directory: str | os.PathLike | None = None):
+        self._owns_dir = directory is None
+        self.directory = str(directory or tempfile.mkdtemp(prefix="backtest_frames_"))
+        os.makedirs(self.directory, exist_ok=True)
+        self.refs: dict[tuple[str, str], FrameRef] = {}
+
+    def put(self, key: tuple[str, str], df: pd.DataFrame) -> FrameRef:
+        name = "_".join(key)
+        numeric = [c for c in df.columns if c != "timestamp" and pd.api.types.is_numeric_dtype(df[c])]
+        values_path = os.path.join(self.directory, f"{name}.npy")
+        np.save(values_path, df[numeric].to_numpy(dtype=np.float64))
+
+        timestamp_path = None
+        if "timestamp" in df.columns:
+            ts = df["timestamp"].to_numpy()
+            if ts.dtype == object:
+                ts = ts.astype(str)
+            timestamp_path = os.path.join(self.directory, f"{name}_ts.npy")
+            np.save(timestamp_path, ts)
+
+        ref = FrameRef(values_path, tuple(numeric), timestamp_path)
+        self.refs[key] = ref
+        return ref
+
+    def cleanup(self) -> None:
+        for ref in self.refs.values():
+            _worker_frames.pop(ref, None)
+        if self._owns_dir:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.refs.clear()
+
+    def __enter__(self) -> SharedFrameStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cleanup()
+
+
+# Frames already mapped by this worker process (one per FrameRef)
+_worker_frames: dict[FrameRef, pd.DataFrame] = {}
+
+
+def load_frame(ref: FrameRef) -> pd.DataFrame:
+    """Read-only DataFrame backed by the memory-mapped .npy files."""
+    df = _worker_frames.get(ref)
+    if df is None:
+        values = np.load(ref.values_path, mmap_mode="r")
+        df = pd.DataFrame(values, columns=list(ref.columns), copy=False)
+        if ref.timestamp_path is not None:
+            df.insert(0, "timestamp", np.load(ref.timestamp_path, mmap_mode="r"))
+        _worker_frames[ref] = df
+    return df
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Runner
+# ═══════════════════════════════════════════════════════════════════════
+
+# BacktestConfig fields forwarded to every job (symbol/strategies/data are per job)
+JOB_CONFIG_FIELDS = {f.name for f in fields(BacktestConfig)} - {"symbol", "timeframe", "strategies", "data"}
+
+
+def run_job(job: BacktestJob, ref: FrameRef, config_kwargs: dict[str, Any]) -> JobResult:
+    """Run one job (in a worker process or inline)."""
+    started = time.perf_counter()
+    try:
+        cls = strategy_classes()[job.strategy]
+        strategy = cls(**job.params)
+        config = BacktestConfig(
+            symbol=job.symbol, timeframe=job.timeframe, strategies=[strategy],
+            data=load_frame(ref), **config_kwargs,
+        )
+        result = BacktestEngine(config).run()[strategy.name]
+        return JobResult(job, result=result, elapsed=time.perf_counter() - started)
+    except Exception as e:
+        logger.warning("Backtest job %s/%s/%s falhou: %s", job.symbol, job.timeframe, job.strategy, e)
+        return JobResult(job, error=str(e), elapsed=time.perf_counter() - started)
+
+
+class BatchBacktestRunner:
+    """Shards backtest jobs across a process pool over shared, memory-mapped frames."""
+
+    def __init__(
+        self,
+        data: Mapping[tuple[str, str], pd.DataFrame] | Callable[[str, str], pd.DataFrame] | None = None,
+        base_config: BacktestConfig | None = None,
+        max_workers: int | None = None,
+        storage_dir: str | os.PathLike | None = None,
+    ):
+        base = base_config or BacktestConfig()
+        # Default: candle archive over the base config period
+        self.data = data if data is not None else (
+            lambda symbol, timeframe: load_archived(symbol, timeframe, base.start_date, base.end_date)
+        )
+        self.config_kwargs = {name: getattr(base, name) for name in JOB_CONFIG_FIELDS}
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.storage_dir = storage_dir
+
+    def _frame(self, key: tuple[str, str]) -> pd.DataFrame:
+        if callable(self.data):
+            return self.data(*key)
+        return self.data[key]
+
+    def run(self, jobs: Iterable[BacktestJob]) -> list[JobResult]:
+        """Run all jobs; results come back in job order."""
+        jobs = list(jobs)
+        if not jobs:
+            return []
+        started = time.perf_counter()
+
+        with SharedFrameStore(self.storage_dir) as store:
+            for key in dict.fromkeys(job.frame_key for job in jobs):
+                store.put(key, self._frame(key))
+
+            # Jobs on the same frame stay together so each worker maps few files
+            order = sorted(range(len(jobs)), key=lambda i: jobs[i].frame_key)
+            results: list[JobResult | None] = [None] * len(jobs)
+
+            if self.max_workers <= 1:
+                for i in order:
+                    results[i] = run_job(jobs[i], store.refs[jobs[i].frame_key], self.config_kwargs)
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                    futures = {
+                        pool.submit(run_job, jobs[i], store.refs[jobs[i].frame_key], self.config_kwargs): i
+                        for i in order
+                    }
+                    for done, future in enumerate(as_completed(futures), 1):
+                        i = futures[future]
+                        try:
+                            results[i] = future.result()
+                        except Exception as e:  # worker morreu (ex: OOM)
+                            results[i] = JobResult(jobs[i], error=str(e))
+                        if done % 50 == 0:
+                            logger.info("Backtests: %d/%d concluídos", done, len(jobs))
+
+        failed = sum(1 for r in results if r.error)
+        logger.info(
+            "Batch de %d backtests em %.1fs (%d workers, %d falhas)",
+            len(jobs), time.perf_counter() - started, self.max_workers, failed,
+        )
+        return results
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Reporting
+# ═══════════════════════════════════════════════════════════════════════
+
+TABLE_COLUMNS = [
+    "symbol", "timeframe", "strategy", "params", "total_return_pct", "total_trades",
+    "win_rate", "profit_factor", "sharpe_ratio", "sortino_ratio", "max_drawdown_pct",
+    "expectancy", "error",
+]
+
+
+def comparison_table(results: Iterable[JobResult], sort_by: str = "sharpe_ratio") -> pd.DataFrame:
+    """One row per job, best first by ``sort_by`` (failed jobs last)."""
+    rows = []
+    for jr in results:
+        row = {
+            "symbol": jr.job.symbol,
+            "timeframe": jr.job.timeframe,
+            "strategy": jr.job.strategy,
+            "params": ", ".join(f"{k}={v}" for k, v in sorted(jr.job.params.items())),
+            "error": jr.error,
+        }
+        if jr.result is not None:
+            row.update({c: getattr(jr.result, c) for c in TABLE_COLUMNS if hasattr(jr.result, c)})
+        rows.append(row)
+
+    table = pd.DataFrame(rows, columns=TABLE_COLUMNS)
+    if sort_by in table.columns and len(table):
+        table = table.sort_values(sort_by, ascending=False, na_position="last", kind="stable")
+    return table.reset_index(drop=True)
@@ -0,0 +1,321 @@
+"""
+Walk-Forward Optimizer — parameter sweeps over rolling train/test windows.
+
+Expands a strategy's constructor kwargs (full grid or random samples), runs
+every candidate on each rolling train window and the following test window,
+and ranks candidates by their out-of-sample objective. Per fold, the
+in-sample winner is also reported with its test result (the actual
+walk-forward score).
+
+Indicator work is shared: strategy.precompute() runs once per distinct
+strategy.precompute_key() (standard TA-Lib indicators are parameter-free, so
+most strategies compute them exactly once) over the whole series. The frames
+are written once to memory-mapped .npy files (see backtesting.batch) and every
+candidate x window is a zero-copy slice of them. Windows start WARMUP_BARS
+early, so entries are evaluated from the first bar of each window.
+
+Usage:
+  from backtesting.optimizer import WalkForwardOptimizer, sample_params
+  from backtesting.batch import expand_grid
+
+  opt = WalkForwardOptimizer(df, "breakout", train_bars=3000, test_bars=1000)
+  result = opt.run(expand_grid({"donchian_period": [20, 30, 40], "min_score": [45, 55]}))
+  print(result.table.head())
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import random
+import time
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from backtesting import WARMUP_BARS, BacktestConfig, BacktestEngine, BacktestResult
+from backtesting.batch import (
+    JOB_CONFIG_FIELDS,
+    FrameRef,
+    SharedFrameStore,
+    load_frame,
+    strategy_classes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Windows & parameter sampling
+# ═══════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class Window:
+    """Rolling fold: train on [train_start, test_start), test on [test_start, test_end)."""
+    train_start: int
+    test_start: int
+    test_end: int
+
+
+def walk_forward_windows(
+    n_bars: int, train_bars: int, test_bars: int, step_bars: int | None = None
+) -> list[Window]:
+    """Rolling windows over ``n_bars``; step defaults to ``test_bars`` (non-overlapping tests)."""
+    step = step_bars or test_bars
+    windows = []
+    start = 0
+    while start + train_bars + test_bars <= n_bars:
+        windows.append(Window(start, start + train_bars, start + train_bars + test_bars))
+        start += step
+    return windows
+
+
+def sample_params(
+    space: Mapping[str, Sequence[Any] | tuple[float, float]], n: int, seed: int | None = None
+) -> list[dict[str, Any]]:
+    """``n`` random candidates from ``space``.
+
+    Lists are sampled as choices; ``(low, high)`` tuples uniformly (integers
+    when both bounds are ints). Duplicates are dropped.
+    """
+    rng = random.Random(seed)
+    candidates: list[dict[str, Any]] = []
+    seen: set[tuple] = set()
+    for _ in range(n * 10):
+        if len(candidates) >= n:
+            break
+        params = {}
+        for name, spec in space.items():
+            if isinstance(spec, tuple) and len(spec) == 2:
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(spec))
+        key = tuple(sorted((k, repr(v)) for k, v in params.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Results
+# ═══════════════════════════════════════════════════════════════════════
+
+@dataclass
+class CandidateResult:
+    params: dict[str, Any]
+    train: list[BacktestResult] = field(default_factory=list)
+    test: list[BacktestResult] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass
+class FoldResult:
+    window: Window
+    best_params: dict[str, Any]
+    train_score: float
+    test: BacktestResult
+
+
+@dataclass
+class WalkForwardResult:
+    strategy: str
+    objective: str
+    table: pd.DataFrame                 # Candidates ranked by mean out-of-sample objective
+    folds: list[FoldResult]             # In-sample winner per fold + its test result
+    oos_return_pct: float               # Compounded test return of the per-fold winners
+    candidates: list[CandidateResult] = field(default_factory=list)
+    stats: dict[str, Any] = field(default_factory=dict)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Worker
+# ═══════════════════════════════════════════════════════════════════════
+
+def evaluate_candidate(
+    strategy_name: str,
+    params: dict[str, Any],
+    raw_ref: FrameRef,
+    frame_ref: FrameRef,
+    windows: list[Window],
+    config_kwargs: dict[str, Any],
+) -> CandidateResult:
+    """Backtest one parameter set on every train and test window."""
+    try:
+        raw, frame = load_frame(raw_ref), load_frame(frame_ref)
+        strategy = strategy_classes()[strategy_name](**params)
+        engine = BacktestEngine(BacktestConfig(strategies=[strategy], **config_kwargs))
+
+        def run(start: int, end: int) -> BacktestResult:
+            lo = max(0, start - WARMUP_BARS)
+            return engine._run_single(strategy, raw.iloc[lo:end], frame.iloc[lo:end])
+
+        result = CandidateResult(params)
+        for w in windows:
+            result.train.append(run(w.train_start, w.test_start))
+            result.test.append(run(w.test_start, w.test_end))
+        return result
+    except Exception as e:
+        logger.warning("Candidato %s %s falhou: %s", strategy_name, params, e)
+        return CandidateResult(params, error=str(e))
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Optimizer
+# ═══════════════════════════════════════════════════════════════════════
+
+class WalkForwardOptimizer:
+    """Rolling train/test parameter optimization for one strategy on one series."""
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        strategy: str,
+        train_bars: int,
+        test_bars: int,
+        step_bars: int | None = None,
+        base_config: BacktestConfig | None = None,
+        objective: str = "sharpe_ratio",
+        min_trades: int = 1,
+        max_workers: int | None = None,
+        storage_dir: str | os.PathLike | None = None,
+    ):
+        self.data = data.reset_index(drop=True)
+        self.strategy = strategy
+        self.windows = walk_forward_windows(len(self.data), train_bars, test_bars, step_bars)
+        base = base_config or BacktestConfig()
+        self.config_kwargs = {name: getattr(base, name) for name in JOB_CONFIG_FIELDS}
+        self.config_kwargs.update(symbol=base.symbol, timeframe=base.timeframe, vectorized=True)
+        self.symbol = base.symbol
+        self.objective = objective
+        self.min_trades = min_trades
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.storage_dir = storage_dir
+        self.stats: dict[str, Any] = {}
+
+    def score(self, result: BacktestResult) -> float:
+        """Objective value; runs with fewer than ``min_trades`` trades rank last."""
+        if result.total_trades < self.min_trades:
+            return -math.inf
+        value = float(getattr(result, self.objective))
+        return value if not math.isnan(value) else -math.inf
+
+    def _precompute(self, store: SharedFrameStore, param_sets: list[dict]) -> list[FrameRef]:
+        """One precomputed frame per distinct precompute_key; returns a ref per candidate."""
+        cls = strategy_classes()[self.strategy]
+        by_key: dict[tuple, FrameRef] = {}
+        refs = []
+        for params in param_sets:
+            strategy = cls(**params)
+            key = strategy.precompute_key()
+            if key not in by_key:
+                frame = strategy.precompute(self.data.copy())
+                by_key[key] = store.put((self.strategy, f"pre{len(by_key)}"), frame)
+            refs.append(by_key[key])
+        self.stats["indicator_sets"] = len(by_key)
+        return refs
+
+    def run(self, param_sets: Iterable[dict[str, Any]]) -> WalkForwardResult:
+        param_sets = [dict(p) for p in param_sets] or [{}]
+        if not self.windows:
+            raise ValueError("Dados insuficientes para uma janela de treino + teste")
+        started = time.perf_counter()
+
+        with SharedFrameStore(self.storage_dir) as store:
+            raw_ref = store.put((self.symbol, "raw"), self.data)
+            frame_refs = self._precompute(store, param_sets)
+            self.stats["precompute_seconds"] = round(time.perf_counter() - started, 3)
+
+            args = [
+                (self.strategy, params, raw_ref, frame_refs[i], self.windows, self.config_kwargs)
+                for i, params in enumerate(param_sets)
+            ]
+            candidates: list[CandidateResult | None] = [None] * len(args)
+            if self.max_workers <= 1:
+                for i, a in enumerate(args):
+                    candidates[i] = evaluate_candidate(*a)
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                    futures = {pool.submit(evaluate_candidate, *a): i for i, a in enumerate(args)}
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        try:
+                            candidates[i] = future.result()
+                        except Exception as e:  # worker morreu
+                            candidates[i] = CandidateResult(param_sets[i], error=str(e))
+
+        self.stats.update({
+            "candidates": len(param_sets),
+            "windows": len(self.windows),
+            "backtests": 2 * len(param_sets) * len(self.windows),
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+        logger.info(
+            "Walk-forward %s: %d candidatos x %d janelas em %.1fs (%d conjuntos de indicadores)",
+            self.strategy, len(param_sets), len(self.windows),
+            self.stats["seconds"], self.stats["indicator_sets"],
+        )
+
+        folds = self._select_per_fold(candidates)
+        oos_return = float(np.prod([1 + f.test.total_return_pct / 100 for f in folds]) - 1) * 100
+        return WalkForwardResult(
+            strategy=self.strategy,
+            objective=self.objective,
+            table=self._rank(candidates),
+            folds=folds,
+            oos_return_pct=round(oos_return, 2),
+            candidates=candidates,
+            stats=dict(self.stats),
+        )
+
+    def _select_per_fold(self, candidates: list[CandidateResult]) -> list[FoldResult]:
+        ok = [c for c in candidates if c.error is None]
+        folds = []
+        for k, window in enumerate(self.windows):
+            if not ok:
+                break
+            best = max(ok, key=lambda c: self.score(c.train[k]))
+            folds.append(FoldResult(window, best.params, self.score(best.train[k]), best.test[k]))
+        return folds
+
+    def _rank(self, candidates: list[CandidateResult]) -> pd.DataFrame:
+        rows = []
+        for c in candidates:
+            row: dict[str, Any] = {
+                "params": ", ".join(f"{k}={v}" for k, v in sorted(c.params.items())),
+                "error": c.error,
+            }
+            if c.error is None:
+                train_scores = [self.score(r) for r in c.train]
+                test_scores = [self.score(r) for r in c.test]
+                row.update({
+                    f"train_{self.objective}": _finite_mean(train_scores),
+                    f"oos_{self.objective}": _finite_mean(test_scores),
+                    "oos_return_pct": round(sum(r.total_return_pct for r in c.test), 2),
+                    "oos_trades": sum(r.total_trades for r in c.test),
+                    "oos_win_rate": _finite_mean([r.win_rate for r in c.test if r.total_trades]),
+                    "oos_max_drawdown_pct": max((r.max_drawdown_pct for r in c.test), default=0.0),
+                    "folds_positive": sum(1 for r in c.test if r.total_return_pct > 0),
+                })
+            rows.append(row)
+
+        table = pd.DataFrame(rows)
+        sort_col = f"oos_{self.objective}"
+        if sort_col in table.columns:
+            table = table.sort_values(sort_col, ascending=False, na_position="last", kind="stable")
+        return table.reset_index(drop=True)
+
+
+def _finite_mean(values: Sequence[float]) -> float:
+    """Mean over finite values (-inf = too few trades); NaN when none."""
+    finite = [v for v in values if math.isfinite(v)]
+    return round(float(np.mean(finite)), 3) if finite else float("nan")
@@ -216,7 +216,9 @@ class AdvancedLearningSystem:
             # Carregar histórico de trades para análise (projeção otimizada)
             trades = (
                 await self.db.trades.find(
-                    {}, {"pnl": 1, "symbol": 1, "side": 1, "opened_at": 1, "closed_at": 1, "_id": 0}
+                    # Trades com analytics pendente entram pela fila pós-trade (replay)
+                    {"analytics_pending": {"$ne": True}},
+                    {"pnl": 1, "symbol": 1, "side": 1, "opened_at": 1, "closed_at": 1, "_id": 0},
                 )
                 .sort("closed_at", -1)
                 .limit(500)
@@ -290,25 +292,35 @@ class AdvancedLearningSystem:
 
     async def learn_from_trade(self, trade: dict):
         """Aprende com um trade fechado"""
-        if not self.learning_enabled:
+        try:
+            await self.learn_from_trades([trade])
+        except Exception as e:
+            logger.error(f"Erro ao aprender com trade: {e}")
+
+    async def learn_from_trades(self, trades: list[dict]):
+        """Aprende com um lote de trades fechados (em ordem de fechamento).
+
+        Métricas, otimização e estado são calculados/salvos uma vez por lote;
+        cada trade ainda ganha seu registro de análise. Erros são propagados:
+        a PostTradeQueue só confirma o lote se o aprendizado terminou.
+        """
+        if not self.learning_enabled or not trades:
             return
 
         try:
             # Adicionar ao histórico
-            self.trade_history.insert(0, trade)
-            if len(self.trade_history) > 500:
-                self.trade_history.pop()
-
-            # Analisar padrões
-            self.pattern_analyzer.add_trade(trade)
+            for trade in trades:
+                self.trade_history.insert(0, trade)
+                self.pattern_analyzer.add_trade(trade)
+            del self.trade_history[500:]
 
             # Atualizar métricas
             await self._calculate_advanced_metrics()
 
-            pnl = trade.get("pnl", 0)
-            symbol = trade.get("symbol", "UNKNOWN")
-
-            logger.info(f"[ML] Trade analisado: {symbol} | PnL: ${pnl:.2f}")
+            for trade in trades:
+                logger.info(
+                    f"[ML] Trade analisado: {trade.get('symbol', 'UNKNOWN')} | PnL: ${trade.get('pnl', 0):.2f}"
+                )
             logger.info(
                 f"[ML] Métricas: WR={self.metrics['win_rate']:.1f}% | PF={self.metrics['profit_factor']:.2f} | Exp=${self.metrics['expectancy']:.2f}"
             )
@@ -318,7 +330,7 @@ class AdvancedLearningSystem:
                 logger.info(
                     f"[ML] Coletando dados: {self.metrics['total_trades']}/{self.min_trades_for_learning}"
                 )
-                await self._save_analysis(trade)
+                await self._save_analyses(trades)
                 return
 
             # Otimizar parâmetros
@@ -326,13 +338,14 @@ class AdvancedLearningSystem:
                 await self._optimize_parameters()
 
             # 🧠 CORRIGIDO: Sempre salvar análise do trade, mesmo após threshold de otimização
-            await self._save_analysis(trade)
+            await self._save_analyses(trades)
 
             # Salvar estado (parâmetros)
-            await self._save_state(trade)
+            await self._save_state(trades[-1])
 
         except Exception as e:
-            logger.error(f"Erro ao aprender com trade: {e}")
+            logger.error(f"Erro ao aprender com trades: {e}")
+            raise
 
     async def _optimize_parameters(self):
         """Otimiza parâmetros baseado nos dados coletados"""
@@ -560,29 +573,34 @@ class AdvancedLearningSystem:
         except Exception as e:
             logger.error(f"Erro ao salvar estado: {e}")
 
+    def _build_analysis(self, trade: dict) -> dict:
+        pnl_val = trade.get("pnl", 0)
+        ml_score_val = trade.get("ml_score", trade.get("confidence_score", 0.0))
+        return {
+            "type": "trade_analysis",
+            "trade_id": trade.get("_id"),  # 🧠 CORRIGIDO: link com trade original
+            "symbol": trade.get("symbol"),
+            "side": trade.get("side"),
+            "pnl": pnl_val,
+            "roe": trade.get("roe"),
+            "won": pnl_val > 0,
+            "ml_score": ml_score_val,
+            "confidence_score": ml_score_val,
+            "patterns": self.pattern_analyzer._extract_patterns(trade),
+            "timestamp": datetime.now(UTC),
+        }
+
     async def _save_analysis(self, trade: dict):
         """Salva análise do trade"""
-        try:
-            pnl_val = trade.get("pnl", 0)
-            ml_score_val = trade.get("ml_score", trade.get("confidence_score", 0.0))
-            analysis = {
-                "type": "trade_analysis",
-                "trade_id": trade.get("_id"),  # 🧠 CORRIGIDO: link com trade original
-                "symbol": trade.get("symbol"),
-                "side": trade.get("side"),
-                "pnl": pnl_val,
-                "roe": trade.get("roe"),
-                "won": pnl_val > 0,
-                "ml_score": ml_score_val,
-                "confidence_score": ml_score_val,
-                "patterns": self.pattern_analyzer._extract_patterns(trade),
-                "timestamp": datetime.now(UTC),
-            }
+        await self._save_analyses([trade])
 
-            await self.db.learning_data.insert_one(analysis)
-
-        except Exception as e:
-            logger.error(f"Erro ao salvar análise: {e}")
+    async def _save_analyses(self, trades: list[dict]):
+        """Salva a análise de cada trade do lote (um insert_many); erros propagam"""
+        analyses = [self._build_analysis(trade) for trade in trades]
+        if len(analyses) == 1:
+            await self.db.learning_data.insert_one(analyses[0])
+        else:
+            await self.db.learning_data.insert_many(analyses)
 
     # ------------------------------------------------------------------
     # Métodos de ajuste de parâmetros (compatibilidade com trading_bot.py)
@@ -0,0 +1,405 @@
+"""
+Asyncio-native exchange client (ccxt.async_support).
+
+Same market-data/order surface as ``ExchangeManager`` but every call is a
+coroutine on the bot's event loop: one pooled keep-alive aiohttp session,
+retries/backoff via ``asyncio.sleep`` instead of ``time.sleep`` parking a
+default-executor thread. Runs side by side with the sync manager (which the
+strategy/selector threads keep using) when ``exchange_async`` is enabled.
+"""
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import aiohttp
+import ccxt
+import ccxt.async_support as ccxt_async
+
+from bot.exchange_client import (
+    EXCHANGE_CCXT_ID,
+    ExchangeCriticalError,
+    ExchangeManager,
+    ExchangeTransientError,
+    _ccxt_config,
+    _is_paper_trade,
+    _simulate_fill_order,
+)
+from bot.market_cache import get_price_cache
+from bot.market_stream import MarketDataStream
+from bot.rate_limiter import RequestShed, request_budget
+
+logger = logging.getLogger(__name__)
+
+# Conexões simultâneas mantidas abertas com a exchange
+POOL_SIZE = 20
+KEEPALIVE_SECONDS = 60
+
+
+class AsyncExchangeManager:
+    """ccxt async client with a shared keep-alive session and asyncio retries."""
+
+    # Pure helpers shared with the sync manager (no I/O)
+    _to_ccxt_symbol = ExchangeManager._to_ccxt_symbol
+    _from_ccxt_symbol = ExchangeManager._from_ccxt_symbol
+    get_symbol_precision = ExchangeManager.get_symbol_precision
+    adjust_quantity = ExchangeManager.adjust_quantity
+
+    def __init__(self):
+        self.exchange_id: str = ""
+        self._ccxt_client: Any = None
+        self._session: aiohttp.ClientSession | None = None
+        self._paper_trade: bool = False
+        self._testnet: bool = False
+        self._price_cache = get_price_cache()
+        self._stream: MarketDataStream | None = None
+        self.max_retries: int = 5
+        self.retry_backoff: float = 0.5
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "backoff_seconds": 0.0}
+
+    # ── Lifecycle ────────────────────────────────────────────────────
+
+    async def initialize(
+        self,
+        exchange: str = "binance",
+        api_key: str = "",
+        api_secret: str = "",
+        testnet: bool = False,
+        paper_trade: bool = True,
+        markets_from: Any = None,
+    ) -> bool:
+        """Create the async client on the running loop.
+
+        Args:
+            markets_from: ccxt client whose loaded markets are reused (skips a
+                second load_markets round trip when the sync manager is up)
+        """
+        try:
+            if not api_key or not api_secret:
+                logger.warning("%s API credentials not provided", exchange)
+                return False
+
+            await self.close()
+            exchange_class = getattr(ccxt_async, EXCHANGE_CCXT_ID.get(exchange, exchange), None)
+            if exchange_class is None:
+                logger.error("Exchange '%s' not found in ccxt", exchange)
+                return False
+
+            self.exchange_id = exchange
+            self._paper_trade = paper_trade
+            self._testnet = testnet
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=POOL_SIZE, keepalive_timeout=KEEPALIVE_SECONDS, enable_cleanup_closed=True
+                ),
+                trust_env=True,
+            )
+            config = _ccxt_config(exchange, api_key, api_secret, testnet)
+            config["session"] = self._session
+            self._ccxt_client = exchange_class(config)
+
+            if markets_from is not None and getattr(markets_from, "markets", None):
+                self._ccxt_client.set_markets(markets_from.markets, getattr(markets_from, "currencies", None))
+            else:
+                await self._ccxt_client.load_markets()
+
+            logger.info(
+                "%s async client initialized — %d markets (%s)",
+                exchange.upper(),
+                len(self._ccxt_client.markets or {}),
+                "PAPER TRADING" if paper_trade else "LIVE",
+            )
+            return True
+
+        except Exception as e:
+            logger.error("Error initializing async %s client: %s", exchange, e)
+            await self.close()
+            return False
+
+    async def close(self) -> None:
+        """Close the ccxt client and the pooled session."""
+        client, session = self._ccxt_client, self._session
+        self._ccxt_client = None
+        self._session = None
+        try:
+            if client is not None:
+                await client.close()
+        except Exception as e:
+            logger.debug("Error closing async ccxt client: %s", e)
+        if session is not None and not session.closed:
+            await session.close()
+
+    @property
+    def client(self) -> Any:
+        return self._ccxt_client
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._ccxt_client is not None
+
+    def attach_stream(self, stream: MarketDataStream | None) -> None:
+        """Share the sync manager's WebSocket feed (not owned: never stopped here)."""
+        self._stream = stream
+
+    # ── Market data ──────────────────────────────────────────────────
+
+    async def get_symbol_price(self, symbol: str) -> float | None:
+        if not self._ccxt_client:
+            return None
+        if self._stream is not None:
+            price = self._stream.get_price(symbol)
+            if price:
+                return price
+        try:
+            ticker = await self._execute_with_retry(
+                f"fetch_ticker:{symbol}",
+                lambda: self._ccxt_client.fetch_ticker(self._to_ccxt_symbol(symbol)),
+            )
+            return float(ticker["last"]) if ticker.get("last") else None
+        except (ExchangeTransientError, ExchangeCriticalError):
+            raise
+        except Exception as e:
+            logger.error("Error getting price for %s: %s", symbol, e)
+            raise ExchangeTransientError(f"get_symbol_price:{symbol}", e) from e
+
+    async def get_price_map(self, symbols: list[str]) -> dict[str, float]:
+        """Prices for many symbols: WebSocket, then shared snapshot cache, then one fetch_tickers."""
+        if not self._ccxt_client or not symbols:
+            return {}
+
+        symbol_set = set(symbols)
+        prices: dict[str, float] = {}
+
+        if self._stream is not None:
+            prices.update(self._stream.get_prices(symbol_set))
+            if len(prices) == len(symbol_set):
+                return prices
+
+        snapshot = self._price_cache.get("symbol_price_snapshot")
+        if snapshot:
+            for ticker in snapshot:
+                sym = self._from_ccxt_symbol(ticker.get("symbol", ""))
+                if sym in symbol_set and sym not in prices:
+                    try:
+                        prices[sym] = float(ticker["last"])
+                    except (TypeError, ValueError):
+                        continue
+
+        missing = symbol_set.difference(prices)
+        if missing:
+            try:
+                all_tickers = await self._execute_with_retry(
+                    "fetch_tickers", lambda: self._ccxt_client.fetch_tickers()
+                )
+                self._price_cache.set("symbol_price_snapshot", list(all_tickers.values()), ttl=30)
+                for sym, ticker in all_tickers.items():
+                    ccxt_sym = self._from_ccxt_symbol(sym)
+                    if ccxt_sym in missing and ticker.get("last"):
+                        prices[ccxt_sym] = float(ticker["last"])
+            except Exception as e:
+                logger.warning("fetch_tickers failed: %s — falling back individually", e)
+                results = await asyncio.gather(
+                    *(self.get_symbol_price(sym) for sym in missing), return_exceptions=True
+                )
+                for sym, price in zip(missing, results, strict=True):
+                    if isinstance(price, float) and price:
+                        prices[sym] = price
+
+        return prices
+
+    async def get_all_tickers(self) -> list[dict]:
+        """Binance-compat 24h tickers (same shape as ExchangeManager.get_all_tickers)."""
+        if not self._ccxt_client:
+            return []
+        try:
+            all_tickers = await self._execute_with_retry(
+                "fetch_tickers", lambda: self._ccxt_client.fetch_tickers()
+            )
+            return [
+                {
+                    "symbol": self._from_ccxt_symbol(ccxt_sym),
+                    "priceChangePercent": str(ticker.get("percentage", 0) or 0),
+                    "quoteVolume": str(ticker.get("quoteVolume", 0) or 0),
+                    "lastPrice": str(ticker.get("last", 0) or 0),
+                    "bidPrice": str(ticker.get("bid", 0) or 0),
+                    "askPrice": str(ticker.get("ask", 0) or 0),
+                }
+                for ccxt_sym, ticker in all_tickers.items()
+            ]
+        except Exception as e:
+            logger.warning("Error fetching all tickers: %s", e)
+            return []
+
+    async def get_klines(
+        self, symbol: str, timeframe: str = "15m", limit: int = 200, since: int | None = None
+    ) -> list:
+        if not self._ccxt_client:
+            return []
+        if self._stream is not None:
+            candles = self._stream.get_klines(symbol, timeframe, limit, since=since)
+            if candles:
+                return candles
+        try:
+            return await self._execute_with_retry(
+                f"fetch_ohlcv:{symbol}:{timeframe}",
+                lambda: self._ccxt_client.fetch_ohlcv(
+                    self._to_ccxt_symbol(symbol), timeframe=timeframe, since=since, limit=limit
+                ),
+            )
+        except Exception as e:
+            logger.error("Error fetching klines for %s: %s", symbol, e)
+            return []
+
+    async def get_ticker(self, symbol: str) -> dict:
+        if not self._ccxt_client:
+            return {}
+        try:
+            return await self._execute_with_retry(
+                f"fetch_ticker:{symbol}",
+                lambda: self._ccxt_client.fetch_ticker(self._to_ccxt_symbol(symbol)),
+            )
+        except Exception as e:
+            logger.error("Error fetching ticker for %s: %s", symbol, e)
+            return {}
+
+    # ── Account / orders ─────────────────────────────────────────────
+
+    async def get_account_balance(self) -> float | None:
+        if self._paper_trade:
+            return float(os.getenv("PAPER_TRADE_BALANCE", 8000.0))
+        if not self._ccxt_client:
+            logger.warning("Exchange client not initialized")
+            return None
+        try:
+            balance = await self._execute_with_retry(
+                "fetch_balance", lambda: self._ccxt_client.fetch_balance()
+            )
+            usdt = float(balance.get("USDT", {}).get("free", 0) or 0)
+            if usdt == 0:
+                usdt = float(balance.get("USD", {}).get("free", 0) or 0)
+            return usdt
+        except (ExchangeTransientError, ExchangeCriticalError):
+            raise
+        except Exception as e:
+            logger.error("Error getting balance: %s", e)
+            raise ExchangeTransientError("get_account_balance", e) from e
+
+    async def place_order(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float,
+        price: float | None = None,
+        order_type: str = "MARKET",
+    ) -> dict:
+        if _is_paper_trade(self):
+            return _simulate_fill_order(symbol, side, quantity, "PAPER_TRADE")
+
+        if not self._ccxt_client:
+            raise RuntimeError("Exchange client not initialized")
+
+        adjusted_qty = self.adjust_quantity(symbol, quantity)
+        if adjusted_qty <= 0:
+            raise ExchangeCriticalError(
+                f"place_order:{symbol}:{side}",
+                ValueError(f"Quantity {quantity} too small for {symbol}"),
+            )
+
+        logger.info("Placing %s %s %s qty=%s (async)", order_type, symbol, side, adjusted_qty)
+        return await self._execute_with_retry(
+            f"place_order:{symbol}:{side}",
+            lambda: self._ccxt_client.create_order(
+                symbol=self._to_ccxt_symbol(symbol),
+                type=order_type.lower(),
+                side=side.lower(),
+                amount=adjusted_qty,
+                price=price,
+            ),
+            critical=True,
+        )
+
+    async def cancel_order(self, symbol: str, order_id: str) -> bool:
+        if not self._ccxt_client:
+            return False
+        try:
+            await self._execute_with_retry(
+                f"cancel_order:{symbol}:{order_id}",
+                lambda: self._ccxt_client.cancel_order(order_id, self._to_ccxt_symbol(symbol)),
+            )
+            return True
+        except Exception as e:
+            logger.warning("Error canceling order %s: %s", order_id, e)
+            return False
+
+    # ── Retry logic ──────────────────────────────────────────────────
+
+    async def _backoff(self, delay: float) -> None:
+        self.stats["retries"] += 1
+        self.stats["backoff_seconds"] += delay
+        await asyncio.sleep(delay)
+
+    async def _execute_with_retry(
+        self,
+        action: str,
+        func: Callable[[], Awaitable[Any]],
+        *,
+        critical: bool = False,
+        max_attempts: int | None = None,
+    ) -> Any:
+        """Same error policy as ExchangeManager._execute_with_retry, without blocking a thread."""
+        attempts = max_attempts or self.max_retries
+        last_exc: Exception | None = None
+        self.stats["calls"] += 1
+
+        for attempt in range(1, attempts + 1):
+            try:
+                await request_budget.acquire_async(action)
+                result = await func()
+                request_budget.observe_headers(getattr(self._ccxt_client, "last_response_headers", None))
+                return result
+            except RequestShed as exc:
+                self.stats["failures"] += 1
+                logger.warning("%s shed: %s", action, exc)
+                raise ExchangeTransientError(action, exc) from exc
+            # RateLimitExceeded herda de NetworkError: precisa vir antes
+            except ccxt.RateLimitExceeded as exc:
+                last_exc = exc
+                delay = self.retry_backoff * attempt * 2
+                request_budget.penalize(delay)
+                logger.warning("%s rate limited (attempt %s/%s) — retry in %.1fs", action, attempt, attempts, delay)
+                await self._backoff(delay)
+                continue
+            except ccxt.NetworkError as exc:
+                last_exc = exc
+                delay = self.retry_backoff * attempt
+                logger.warning("%s network error (attempt %s/%s): %s — retry in %.1fs", action, attempt, attempts, exc, delay)
+                await self._backoff(delay)
+                continue
+            except ccxt.ExchangeError as exc:
+                self.stats["failures"] += 1
+                logger.error("%s exchange error: %s", action, exc)
+                raise ExchangeCriticalError(action, exc) from exc
+            except Exception as exc:
+                last_exc = exc
+                delay = self.retry_backoff * attempt
+                if attempt < attempts:
+                    logger.warning("%s unexpected error (attempt %s/%s): %s — retry in %.1fs", action, attempt, attempts, exc, delay)
+                    await self._backoff(delay)
+                    continue
+                self.stats["failures"] += 1
+                if critical:
+                    raise ExchangeCriticalError(action, exc) from exc
+                raise ExchangeTransientError(action, exc) from exc
+
+        self.stats["failures"] += 1
+        failure_message = f"{action} failed after {attempts} attempts"
+        if critical:
+            raise ExchangeCriticalError(failure_message, last_exc or RuntimeError(action))
+        raise ExchangeTransientError(failure_message, last_exc or RuntimeError(action))
+
+
+# ── Singleton ────────────────────────────────────────────────────────
+
+async_exchange_manager = AsyncExchangeManager()
@@ -52,6 +52,10 @@ class BotConfig:
     kraken_api_secret: str = ""
     # Trading mode
     paper_trade: bool = False
+    # Market data via WebSocket (Binance) com fallback REST
+    market_data_stream: bool = False
+    # Cliente ccxt asyncio (sessao HTTP compartilhada) para precos e ordens no loop do bot
+    exchange_async: bool = False
     telegram_bot_token: str = ""
     telegram_chat_id: str = ""
     telegram_verify_ssl: bool = True
@@ -115,6 +119,8 @@ class BotConfig:
             "kraken_api_key",
             "kraken_api_secret",
             "paper_trade",
+            "market_data_stream",
+            "exchange_async",
             "telegram_bot_token",
             "telegram_chat_id",
             "max_positions",
@@ -170,6 +176,8 @@ class BotConfig:
             kraken_api_key=os.getenv("KRAKEN_API_KEY", ""),
             kraken_api_secret=os.getenv("KRAKEN_API_SECRET", ""),
             paper_trade=_str_to_bool(os.getenv("PAPER_TRADE", "false")),
+            market_data_stream=_str_to_bool(os.getenv("MARKET_DATA_STREAM", "false")),
+            exchange_async=_str_to_bool(os.getenv("EXCHANGE_ASYNC", "false")),
             telegram_bot_token=os.getenv("TELEGRAM_BOT_TOKEN", ""),
             telegram_chat_id=os.getenv("TELEGRAM_CHAT_ID", ""),
             telegram_verify_ssl=_str_to_bool(os.getenv("TELEGRAM_VERIFY_SSL", "true")),
@@ -272,6 +280,8 @@ class BotConfig:
             kraken_api_key=self.kraken_api_key.strip(),
             kraken_api_secret=self.kraken_api_secret.strip(),
             paper_trade=bool(self.paper_trade),
+            market_data_stream=bool(self.market_data_stream),
+            exchange_async=bool(self.exchange_async),
             telegram_bot_token=self.telegram_bot_token.strip(),
             telegram_chat_id=str(self.telegram_chat_id).strip(),
             telegram_verify_ssl=bool(self.telegram_verify_ssl),
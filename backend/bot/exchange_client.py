@@ -14,6 +14,8 @@ from typing import Any
 import ccxt
 
 from bot.market_cache import get_price_cache
+from bot.market_stream import MarketDataStream
+from bot.rate_limiter import RequestShed, request_budget
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +87,37 @@ def _simulate_fill_order(
     }
 
 
+# ── ccxt client config (shared by the sync and async managers) ─────
+
+def _ccxt_config(exchange: str, api_key: str, api_secret: str, testnet: bool) -> dict:
+    config: dict = {
+        "apiKey": api_key,
+        "secret": api_secret,
+        "enableRateLimit": True,
+        "timeout": 30000,
+    }
+
+    if testnet and exchange == "binance":
+        config["urls"] = {
+            "api": {
+                "public": "https://testnet.binance.vision/api",
+                "private": "https://testnet.binance.vision/api",
+            }
+        }
+        config["options"] = {"defaultType": "spot"}
+
+    if exchange == "kraken":
+        # Kraken sandbox/demo URL
+        if testnet:
+            logger.info("Kraken demo mode — using sandbox URL")
+            # Kraken doesn't have a real sandbox, use Futures demo
+            # For spot, we rely on paper trading instead
+        config["options"] = config.get("options", {})
+        config["options"]["defaultType"] = "spot"
+
+    return config
+
+
 # ── ExchangeManager ──────────────────────────────────────────────────
 
 class ExchangeManager:
@@ -100,6 +133,7 @@ class ExchangeManager:
         self.retry_backoff: float = 0.5
         self._last_time_sync: float = 0.0
         self._time_sync_min_interval: float = 30.0
+        self._stream: MarketDataStream | None = None
 
     # ── Initialization ───────────────────────────────────────────────
 
@@ -136,31 +170,7 @@ class ExchangeManager:
                 logger.error("Exchange '%s' not found in ccxt", exchange)
                 return False
 
-            config: dict = {
-                "apiKey": api_key,
-                "secret": api_secret,
-                "enableRateLimit": True,
-                "timeout": 30000,
-            }
-
-            if testnet and exchange == "binance":
-                config["urls"] = {
-                    "api": {
-                        "public": "https://testnet.binance.vision/api",
-                        "private": "https://testnet.binance.vision/api",
-                    }
-                }
-                config["options"] = {"defaultType": "spot"}
-
-            if exchange == "kraken":
-                # Kraken sandbox/demo URL
-                if testnet:
-                    logger.info("Kraken demo mode — using sandbox URL")
-                    # Kraken doesn't have a real sandbox, use Futures demo
-                    # For spot, we rely on paper trading instead
-                config["options"] = config.get("options", {})
-                config["options"]["defaultType"] = "spot"
-
+            config = _ccxt_config(exchange, api_key, api_secret, testnet)
             self._ccxt_client = exchange_class(config)
 
             # Test connection (public endpoint, no auth needed)
@@ -191,6 +201,32 @@ class ExchangeManager:
     def use_testnet(self) -> bool:
         return self._testnet
 
+    # ── WebSocket market data ────────────────────────────────────────
+
+    @property
+    def stream(self) -> MarketDataStream | None:
+        return self._stream
+
+    def attach_stream(self, stream: MarketDataStream | None) -> None:
+        """Use ``stream`` for prices/book/klines while fresh (None = REST only)."""
+        if self._stream is not None and self._stream is not stream:
+            self._stream.stop()
+        self._stream = stream
+
+    def start_market_stream(self, symbols: list[str], timeframes: list[str]) -> bool:
+        """Start the Binance WebSocket feed; other exchanges keep using REST."""
+        if self.exchange_id != "binance":
+            logger.info("Market stream only available for Binance — using REST")
+            return False
+        stream = MarketDataStream(testnet=self._testnet)
+        if not stream.start(symbols, timeframes):
+            return False
+        self.attach_stream(stream)
+        return True
+
+    def stop_market_stream(self) -> None:
+        self.attach_stream(None)
+
     # ── Standardized symbol (ccxt uses XXXX/YYYY format) ─────────────
 
     def _to_ccxt_symbol(self, symbol: str) -> str:
@@ -215,6 +251,10 @@ class ExchangeManager:
         """Get current price for a symbol."""
         if not self._ccxt_client:
             return None
+        if self._stream is not None:
+            price = self._stream.get_price(symbol)
+            if price:
+                return price
         try:
             ticker = self._execute_with_retry(
                 f"fetch_ticker:{symbol}",
@@ -235,12 +275,17 @@ class ExchangeManager:
         symbol_set = set(symbols)
         prices: dict[str, float] = {}
 
-        # Try cache first
+        # WebSocket first (sub-second), then cache, then REST
+        if self._stream is not None:
+            prices.update(self._stream.get_prices(symbol_set))
+            if len(prices) == len(symbol_set):
+                return prices
+
         snapshot = self._price_cache.get("symbol_price_snapshot")
         if snapshot:
             for ticker in snapshot:
                 sym = ticker.get("symbol", "")
-                if sym in symbol_set:
+                if sym in symbol_set and sym not in prices:
                     try:
                         prices[sym] = float(ticker["last"])
                     except (TypeError, ValueError):
@@ -425,6 +470,11 @@ class ExchangeManager:
         """Binance-compat: returns {symbol, bidPrice, bidQty, askPrice, askQty} via order book."""
         if not self._ccxt_client:
             return None
+        if self._stream is not None:
+            book = self._stream.get_book_ticker(symbol)
+            if book:
+                return book
+            self._stream.subscribe_book([symbol])
         try:
             ccxt_sym = self._to_ccxt_symbol(symbol)
             ob = self._execute_with_retry(
@@ -468,15 +518,24 @@ class ExchangeManager:
             logger.warning("Error fetching all tickers: %s", e)
             return []
 
-    def get_klines(self, symbol: str, timeframe: str = "15m", limit: int = 200) -> list:
-        """Get OHLCV candles."""
+    def get_klines(
+        self, symbol: str, timeframe: str = "15m", limit: int = 200, since: int | None = None
+    ) -> list:
+        """Get OHLCV candles (``since`` = open time in ms of the first candle wanted)."""
         if not self._ccxt_client:
             return []
+        if self._stream is not None:
+            candles = self._stream.get_klines(symbol, timeframe, limit, since=since)
+            if candles:
+                return candles
+            self._stream.subscribe_klines(symbol, timeframe)
         try:
             ccxt_sym = self._to_ccxt_symbol(symbol)
             ohlcv = self._execute_with_retry(
                 f"fetch_ohlcv:{symbol}:{timeframe}",
-                lambda: self._ccxt_client.fetch_ohlcv(ccxt_sym, timeframe=timeframe, limit=limit),
+                lambda: self._ccxt_client.fetch_ohlcv(
+                    ccxt_sym, timeframe=timeframe, since=since, limit=limit
+                ),
             )
             # ccxt returns [timestamp, open, high, low, close, volume]
             return ohlcv
@@ -512,19 +571,27 @@ class ExchangeManager:
 
         for attempt in range(1, attempts + 1):
             try:
-                return func()
-            except ccxt.NetworkError as exc:
-                last_exc = exc
-                delay = self.retry_backoff * attempt
-                logger.warning("%s network error (attempt %s/%s): %s — retry in %.1fs", action, attempt, attempts, exc, delay)
-                time.sleep(delay)
-                continue
+                request_budget.acquire(action)
+                result = func()
+                request_budget.observe_headers(getattr(self._ccxt_client, "last_response_headers", None))
+                return result
+            except RequestShed as exc:
+                logger.warning("%s shed: %s", action, exc)
+                raise ExchangeTransientError(action, exc) from exc
+            # RateLimitExceeded herda de NetworkError: precisa vir antes
             except ccxt.RateLimitExceeded as exc:
                 last_exc = exc
                 delay = self.retry_backoff * attempt * 2
+                request_budget.penalize(delay)
                 logger.warning("%s rate limited (attempt %s/%s) — retry in %.1fs", action, attempt, attempts, delay)
                 time.sleep(delay)
                 continue
+            except ccxt.NetworkError as exc:
+                last_exc = exc
+                delay = self.retry_backoff * attempt
+                logger.warning("%s network error (attempt %s/%s): %s — retry in %.1fs", action, attempt, attempts, exc, delay)
+                time.sleep(delay)
+                continue
             except ccxt.ExchangeError as exc:
                 logger.error("%s exchange error: %s", action, exc)
                 raise ExchangeCriticalError(action, exc) from exc
@@ -0,0 +1,145 @@
+"""
+Exit Executor — fechamentos concorrentes e bookkeeping fora do caminho crítico.
+
+``_check_positions`` avaliava e fechava posição por posição: cada fechamento
+(ordem, Mongo, aprendizado, Telegram, saldo) atrasava a avaliação da próxima.
+Num dump com várias posições, a última saía dezenas de segundos depois.
+
+- ``ExitExecutor`` dispara os fechamentos de todas as posições acionadas no
+  mesmo tick em paralelo, limitado por ``max_concurrency``.
+- ``BookkeepingQueue`` executa o pós-trade (aprendizado, notificações,
+  refresh de saldo) em uma task de fundo, em ordem de fechamento.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class ExitExecutor:
+    """Executa fechamentos em paralelo com limite de concorrência."""
+
+    def __init__(self, close_fn: Callable[[dict, float, str], Awaitable[Any]], max_concurrency: int = 4):
+        self._close_fn = close_fn
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight: set[Any] = set()
+        self.stats = {"batches": 0, "exits": 0, "skipped_in_flight": 0, "failures": 0, "last_batch_ms": None}
+
+    def is_closing(self, position: dict) -> bool:
+        return position.get("_id", id(position)) in self._in_flight
+
+    async def _run(self, position: dict, price: float, reason: str) -> bool:
+        key = position.get("_id", id(position))
+        async with self._semaphore:
+            try:
+                await self._close_fn(position, price, reason)
+                return True
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.error("Erro ao fechar %s: %s", position.get("symbol"), e)
+                return False
+            finally:
+                self._in_flight.discard(key)
+
+    async def execute(self, exits: list[tuple[dict, float, str]]) -> list[bool]:
+        """Fecha as posições ``(position, price, reason)``; ignora as que já estão fechando."""
+        jobs = []
+        for position, price, reason in exits:
+            key = position.get("_id", id(position))
+            if key in self._in_flight:
+                self.stats["skipped_in_flight"] += 1
+                continue
+            self._in_flight.add(key)
+            jobs.append(self._run(position, price, reason))
+        if not jobs:
+            return []
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*jobs)
+        self.stats["batches"] += 1
+        self.stats["exits"] += len(jobs)
+        self.stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if len(jobs) > 1:
+            logger.info("Saídas em lote: %d posições em %.0fms", len(jobs), self.stats["last_batch_ms"])
+        return list(results)
+
+
+class BookkeepingQueue:
+    """Fila de tarefas pós-trade executadas em sequência por uma task de fundo.
+
+    ``on_idle`` roda quando a fila esvazia (ex: um único refresh de saldo
+    depois de vários fechamentos seguidos).
+    """
+
+    def __init__(self, on_idle: Callable[[], Awaitable[Any]] | None = None, maxsize: int = 1000):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._on_idle = on_idle
+        self._task: asyncio.Task | None = None
+        self.stats = {"submitted": 0, "done": 0, "failed": 0, "dropped": 0, "max_depth": 0, "last_lag_ms": None}
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker(), name="post_trade_bookkeeping")
+
+    def submit(self, label: str, job: Callable[[], Awaitable[Any]]) -> bool:
+        """Agenda ``job`` (sem await no chamador); inicia o worker se necessário."""
+        self.start()
+        try:
+            self._queue.put_nowait((label, job, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.error("Fila de bookkeeping cheia: %s descartado", label)
+            return False
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self._queue.qsize())
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            label, job, queued_at = await self._queue.get()
+            self.stats["last_lag_ms"] = round((time.perf_counter() - queued_at) * 1000, 1)
+            try:
+                await job()
+                self.stats["done"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error("Erro no bookkeeping %s: %s", label, e)
+            finally:
+                self._queue.task_done()
+            if self._queue.empty() and self._on_idle is not None:
+                try:
+                    await self._on_idle()
+                except Exception as e:
+                    logger.error("Erro no bookkeeping (idle): %s", e)
+
+    async def drain(self, grace: float = 30.0) -> bool:
+        """Espera a fila esvaziar por até ``grace`` segundos (usado no stop antes de fechar o Telegram)."""
+        if self._task is None:
+            return self._queue.empty()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=grace)
+            return True
+        except TimeoutError:
+            logger.warning("Bookkeeping: %d tarefas pendentes após %.0fs", self._queue.qsize(), grace)
+            return False
+
+    async def stop(self, grace: float = 30.0) -> None:
+        await self.drain(grace)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "depth": self.depth, "running": self._task is not None and not self._task.done()}
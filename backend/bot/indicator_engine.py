@@ -0,0 +1,667 @@
+"""
+Incremental Indicator Engine — O(1) indicator updates per candle.
+
+TradingStrategy.calculate_indicators reran every TA-Lib function over the whole
+klines window each time the 5s cache expired, even though only the last (still
+forming) candle had changed. This engine keeps, per (symbol, timeframe), the
+running EMA / Wilder state plus the small ring buffers each indicator needs, so
+a new or revised candle costs a constant amount of work.
+
+Semantics:
+  - EMA, MACD, RSI, ATR, ADX and OBV use the same seeding and recurrences as
+    TA-Lib, so values are identical to a TA-Lib batch run over the series the
+    engine has seen since it was seeded.
+  - sync() re-anchors the plain EMAs and OBV to the window it was given: the
+    batch path seeds them at the first candle of the (sliding) klines window,
+    and their memory is too long (ema_200) or infinite (OBV) to converge. The
+    seed difference of an EMA decays by (1 - k) per candle, and OBV only shifts
+    by a constant, so the correction is exact and O(window) in numpy.
+    MACD, RSI, ATR and ADX stay on the engine's seed: their memory decays fast
+    enough that the newest candles of a 500-candle window match the batch path
+    to float precision (the head of the window still differs). Windows shorter
+    than ``min_window`` that start after the seed are not served (batch path):
+    on a 50-candle tail the seed difference is still several percent on ATR
+    and points on RSI/ADX, and the batch warm-up NaNs would be missing.
+  - BBANDS and MOM only look back a fixed number of candles, so they match the
+    batch path over any window.
+  - A candle with the same timestamp as the last one replaces it (still-forming
+    bar); a newer timestamp commits the previous candle.
+
+Usage:
+  engine = IndicatorEngine()
+  columns = engine.sync("BTCUSDT", "15m", df)  # {column: np.ndarray} aligned to df, or None
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_NAN = float("nan")
+
+# Ordem das colunas produzidas (mesmos nomes do caminho batch)
+INDICATOR_COLUMNS: tuple[str, ...] = (
+    "ema_fast",
+    "ema_slow",
+    "ema_50",
+    "ema_200",
+    "rsi",
+    "macd",
+    "macd_signal",
+    "macd_hist",
+    "bb_upper",
+    "bb_middle",
+    "bb_lower",
+    "atr",
+    "adx",
+    "obv",
+    "momentum",
+)
+
+
+def _is_zero(value: float) -> bool:
+    """TA_IS_ZERO from TA-Lib."""
+    return -0.00000001 < value < 0.00000001
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    greatest = high - low
+    val2 = abs(prev_close - high)
+    if val2 > greatest:
+        greatest = val2
+    val3 = abs(prev_close - low)
+    if val3 > greatest:
+        greatest = val3
+    return greatest
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Indicator states
+#
+# Each state exposes preview() (value for a candidate candle, no mutation)
+# and commit() (advance the state). Both go through the same _next() so a
+# revised candle produces exactly what the committed candle will.
+# ═══════════════════════════════════════════════════════════════════════
+
+
+class _EMA:
+    """TA-Lib EMA: SMA seed over the first ``period`` values, then k = 2/(n+1)."""
+
+    __slots__ = ("count", "k", "period", "seed_sum", "skip", "value")
+
+    def __init__(self, period: int, skip: int = 0):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.skip = skip  # valores ignorados antes do seed (alinhamento do MACD no TA-Lib)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = _NAN
+
+    def _next(self, x: float) -> tuple[int, float, float]:
+        n = self.count + 1
+        seen = n - self.skip
+        if seen <= 0:
+            return n, 0.0, _NAN
+        if seen < self.period:
+            return n, self.seed_sum + x, _NAN
+        if seen == self.period:
+            total = self.seed_sum + x
+            return n, total, total / self.period
+        return n, self.seed_sum, ((x - self.value) * self.k) + self.value
+
+    def preview(self, x: float) -> float:
+        return self._next(x)[2]
+
+    def commit(self, x: float) -> None:
+        self.count, self.seed_sum, self.value = self._next(x)
+
+
+class _RSI:
+    """Wilder RSI exactly as TA_RSI (default, non-Metastock compatibility)."""
+
+    __slots__ = ("count", "gain", "loss", "period", "prev")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev: float | None = None
+        self.count = 0
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def _next(self, x: float) -> tuple[int, float, float, float]:
+        if self.prev is None:
+            return 0, 0.0, 0.0, _NAN
+        n = self.count + 1
+        diff = x - self.prev
+        gain, loss = self.gain, self.loss
+        if n <= self.period:
+            if diff < 0:
+                loss -= diff
+            else:
+                gain += diff
+            if n < self.period:
+                return n, gain, loss, _NAN
+            loss /= self.period
+            gain /= self.period
+        else:
+            loss *= self.period - 1
+            gain *= self.period - 1
+            if diff < 0:
+                loss -= diff
+            else:
+                gain += diff
+            loss /= self.period
+            gain /= self.period
+        total = gain + loss
+        value = 100.0 * (gain / total) if not _is_zero(total) else 0.0
+        return n, gain, loss, value
+
+    def preview(self, x: float) -> float:
+        return self._next(x)[3]
+
+    def commit(self, x: float) -> None:
+        self.count, self.gain, self.loss, _ = self._next(x)
+        self.prev = x
+
+
+class _ATR:
+    """Wilder ATR as TA_ATR: SMA of the first ``period`` true ranges, then smoothing."""
+
+    __slots__ = ("count", "period", "prev_close", "tr_sum", "value")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: float | None = None
+        self.count = 0
+        self.tr_sum = 0.0
+        self.value = _NAN
+
+    def _next(self, high: float, low: float) -> tuple[int, float, float]:
+        if self.prev_close is None:
+            return 0, 0.0, _NAN
+        n = self.count + 1
+        tr = _true_range(high, low, self.prev_close)
+        if n < self.period:
+            return n, self.tr_sum + tr, _NAN
+        if n == self.period:
+            total = self.tr_sum + tr
+            return n, total, total / self.period
+        value = self.value * (self.period - 1)
+        value += tr
+        value /= self.period
+        return n, self.tr_sum, value
+
+    def preview(self, high: float, low: float) -> float:
+        return self._next(high, low)[2]
+
+    def commit(self, high: float, low: float, close: float) -> None:
+        self.count, self.tr_sum, self.value = self._next(high, low)
+        self.prev_close = close
+
+
+class _ADX:
+    """ADX as TA_ADX: Wilder-smoothed +DM/-DM/TR, DX averaged then smoothed."""
+
+    __slots__ = (
+        "count",
+        "minus_dm",
+        "period",
+        "plus_dm",
+        "prev_close",
+        "prev_high",
+        "prev_low",
+        "sum_dx",
+        "tr",
+        "value",
+    )
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_high: float | None = None
+        self.prev_low = 0.0
+        self.prev_close = 0.0
+        self.count = 0
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.sum_dx = 0.0
+        self.value = _NAN
+
+    def _next(self, high: float, low: float) -> tuple[int, float, float, float, float, float]:
+        if self.prev_high is None:
+            return 0, 0.0, 0.0, 0.0, 0.0, _NAN
+        period = self.period
+        n = self.count + 1
+        diff_p = high - self.prev_high
+        diff_m = self.prev_low - low
+        tr = _true_range(high, low, self.prev_close)
+        plus_dm, minus_dm, tr_sum = self.plus_dm, self.minus_dm, self.tr
+
+        if n < period:
+            if diff_m > 0 and diff_p < diff_m:
+                minus_dm += diff_m
+            elif diff_p > 0 and diff_p > diff_m:
+                plus_dm += diff_p
+            return n, plus_dm, minus_dm, tr_sum + tr, 0.0, _NAN
+
+        minus_dm -= minus_dm / period
+        plus_dm -= plus_dm / period
+        if diff_m > 0 and diff_p < diff_m:
+            minus_dm += diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            plus_dm += diff_p
+        tr_sum = tr_sum - (tr_sum / period) + tr
+
+        dx = None
+        if not _is_zero(tr_sum):
+            minus_di = 100.0 * (minus_dm / tr_sum)
+            plus_di = 100.0 * (plus_dm / tr_sum)
+            di_sum = minus_di + plus_di
+            if not _is_zero(di_sum):
+                dx = 100.0 * (abs(minus_di - plus_di) / di_sum)
+
+        sum_dx = self.sum_dx
+        if n < 2 * period - 1:
+            if dx is not None:
+                sum_dx += dx
+            return n, plus_dm, minus_dm, tr_sum, sum_dx, _NAN
+        if n == 2 * period - 1:
+            if dx is not None:
+                sum_dx += dx
+            return n, plus_dm, minus_dm, tr_sum, sum_dx, sum_dx / period
+        value = self.value
+        if dx is not None:
+            value = ((value * (period - 1)) + dx) / period
+        return n, plus_dm, minus_dm, tr_sum, sum_dx, value
+
+    def preview(self, high: float, low: float) -> float:
+        return self._next(high, low)[5]
+
+    def commit(self, high: float, low: float, close: float) -> None:
+        (
+            self.count,
+            self.plus_dm,
+            self.minus_dm,
+            self.tr,
+            self.sum_dx,
+            self.value,
+        ) = self._next(high, low)
+        self.prev_high = high
+        self.prev_low = low
+        self.prev_close = close
+
+
+class _OBV:
+    """On-balance volume as TA_OBV (starts at the first candle's volume)."""
+
+    __slots__ = ("prev_close", "value")
+
+    def __init__(self):
+        self.prev_close: float | None = None
+        self.value = 0.0
+
+    def preview(self, close: float, volume: float) -> float:
+        if self.prev_close is None:
+            return volume
+        if close > self.prev_close:
+            return self.value + volume
+        if close < self.prev_close:
+            return self.value - volume
+        return self.value
+
+    def commit(self, close: float, volume: float) -> None:
+        self.value = self.preview(close, volume)
+        self.prev_close = close
+
+
+class _Bollinger:
+    """BBANDS(SMA) with running sums, as TA_SMA + TA_INT_stddev_using_precalc_ma."""
+
+    __slots__ = ("nbdev", "period", "total", "total_sq", "window")
+
+    def __init__(self, period: int = 20, nbdev: float = 2.0):
+        self.period = period
+        self.nbdev = nbdev
+        self.window: deque[float] = deque()  # últimos period-1 closes confirmados
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def _next(self, x: float) -> tuple[float, float, tuple[float, float, float]]:
+        total = self.total + x
+        total_sq = self.total_sq + x * x
+        if len(self.window) < self.period - 1:
+            return total, total_sq, (_NAN, _NAN, _NAN)
+        middle = total / self.period
+        variance = total_sq / self.period - middle * middle
+        deviation = (math.sqrt(variance) if variance > 0 else 0.0) * self.nbdev
+        return total, total_sq, (middle + deviation, middle, middle - deviation)
+
+    def preview(self, x: float) -> tuple[float, float, float]:
+        return self._next(x)[2]
+
+    def commit(self, x: float) -> None:
+        total, total_sq, _ = self._next(x)
+        self.window.append(x)
+        if len(self.window) == self.period:
+            oldest = self.window.popleft()
+            total -= oldest
+            total_sq -= oldest * oldest
+        self.total, self.total_sq = total, total_sq
+
+
+class _Momentum:
+    """MOM: close - close[period] using a fixed ring buffer."""
+
+    __slots__ = ("period", "window")
+
+    def __init__(self, period: int = 10):
+        self.period = period
+        self.window: deque[float] = deque(maxlen=period)
+
+    def preview(self, x: float) -> float:
+        if len(self.window) < self.period:
+            return _NAN
+        return x - self.window[0]
+
+    def commit(self, x: float) -> None:
+        self.window.append(x)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Output buffer
+# ═══════════════════════════════════════════════════════════════════════
+
+
+class _RowBuffer:
+    """Keeps the last ``capacity`` output rows contiguous (amortized O(1) append)."""
+
+    def __init__(self, width: int, capacity: int):
+        self.capacity = capacity
+        self._values = np.full((capacity * 2, width), np.nan)
+        self._timestamps = np.zeros(capacity * 2, dtype=np.int64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def append(self, timestamp: int, row: tuple[float, ...]) -> None:
+        if self._end == len(self._timestamps):
+            keep = self.capacity - 1
+            self._values[:keep] = self._values[self._end - keep : self._end]
+            self._timestamps[:keep] = self._timestamps[self._end - keep : self._end]
+            self._start, self._end = 0, keep
+        self._values[self._end] = row
+        self._timestamps[self._end] = timestamp
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def replace_last(self, row: tuple[float, ...]) -> None:
+        self._values[self._end - 1] = row
+
+    @property
+    def first_timestamp(self) -> int:
+        return int(self._timestamps[self._start])
+
+    def tail(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        start = max(self._start, self._end - n)
+        return self._timestamps[start : self._end], self._values[start : self._end]
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Per-series state
+# ═══════════════════════════════════════════════════════════════════════
+
+
+class IncrementalIndicators:
+    """Indicator state for a single (symbol, timeframe) candle series."""
+
+    def __init__(self, history: int = 500):
+        self._ema_fast = _EMA(12)
+        self._ema_slow = _EMA(26)
+        self._ema_50 = _EMA(50)
+        self._ema_200 = _EMA(200)
+        # TA-Lib alinha as duas EMAs do MACD: a rápida é semeada 14 candles depois
+        self._macd_fast = _EMA(12, skip=26 - 12)
+        self._macd_slow = _EMA(26)
+        self._macd_signal = _EMA(9)
+        self._rsi = _RSI(14)
+        self._bbands = _Bollinger(20, 2.0)
+        self._atr = _ATR(14)
+        self._adx = _ADX(14)
+        self._obv = _OBV()
+        self._momentum = _Momentum(10)
+        self._rows = _RowBuffer(len(INDICATOR_COLUMNS), history)
+        self._pending: tuple[float, float, float, float] | None = None
+        self.last_timestamp: int | None = None
+        # Primeiro candle aplicado desde o seed (os estados Wilder partem dele)
+        self.seed_timestamp: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def first_timestamp(self) -> int | None:
+        return self._rows.first_timestamp if len(self._rows) else None
+
+    def update(self, timestamp: int, high: float, low: float, close: float, volume: float) -> None:
+        """Apply a new candle, or revise the last one when ``timestamp`` repeats."""
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(
+                f"Candle fora de ordem: {timestamp} < ultimo {self.last_timestamp}"
+            )
+
+        candle = (high, low, close, volume)
+        if timestamp == self.last_timestamp:
+            self._pending = candle
+            self._rows.replace_last(self._preview(candle))
+            return
+
+        if self._pending is not None:
+            self._commit(self._pending)
+        else:
+            self.seed_timestamp = timestamp
+        self._pending = candle
+        self.last_timestamp = timestamp
+        self._rows.append(timestamp, self._preview(candle))
+
+    def tail(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, values) for the last ``n`` candles."""
+        return self._rows.tail(n)
+
+    def _macd(self, close: float) -> tuple[float, float]:
+        fast = self._macd_fast.preview(close)
+        slow = self._macd_slow.preview(close)
+        macd = fast - slow
+        if math.isnan(macd):
+            return _NAN, _NAN
+        return macd, self._macd_signal.preview(macd)
+
+    def _preview(self, candle: tuple[float, float, float, float]) -> tuple[float, ...]:
+        high, low, close, volume = candle
+        macd, signal = self._macd(close)
+        if math.isnan(signal):
+            macd = _NAN  # TA-Lib só publica o MACD quando o sinal existe
+        upper, middle, lower = self._bbands.preview(close)
+        return (
+            self._ema_fast.preview(close),
+            self._ema_slow.preview(close),
+            self._ema_50.preview(close),
+            self._ema_200.preview(close),
+            self._rsi.preview(close),
+            macd,
+            signal,
+            macd - signal,
+            upper,
+            middle,
+            lower,
+            self._atr.preview(high, low),
+            self._adx.preview(high, low),
+            self._obv.preview(close, volume),
+            self._momentum.preview(close),
+        )
+
+    def _commit(self, candle: tuple[float, float, float, float]) -> None:
+        high, low, close, volume = candle
+        macd, _ = self._macd(close)
+        self._ema_fast.commit(close)
+        self._ema_slow.commit(close)
+        self._ema_50.commit(close)
+        self._ema_200.commit(close)
+        self._macd_fast.commit(close)
+        self._macd_slow.commit(close)
+        if not math.isnan(macd):
+            self._macd_signal.commit(macd)
+        self._rsi.commit(close)
+        self._bbands.commit(close)
+        self._atr.commit(high, low, close)
+        self._adx.commit(high, low, close)
+        self._obv.commit(close, volume)
+        self._momentum.commit(close)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Engine
+# ═══════════════════════════════════════════════════════════════════════
+
+
+# EMAs simples re-ancoradas na janela do sync (coluna -> período)
+_WINDOW_EMAS: dict[str, int] = {"ema_fast": 12, "ema_slow": 26, "ema_50": 50, "ema_200": 200}
+
+
+def _anchor_to_window(columns: dict[str, np.ndarray], close: np.ndarray, volume: np.ndarray) -> None:
+    """Rewrite EMA/OBV columns as if TA-Lib had been seeded at the window's first candle."""
+    for name, period in _WINDOW_EMAS.items():
+        values = columns[name]
+        if len(close) < period:
+            values[:] = _NAN
+            continue
+        seed_at = period - 1
+        offset = close[:period].sum() / period - values[seed_at]
+        if not math.isnan(offset) and offset != 0.0:
+            decay = (1.0 - 2.0 / (period + 1)) ** np.arange(len(values) - seed_at)
+            values[seed_at:] += offset * decay
+        values[:seed_at] = _NAN
+    obv = columns["obv"]
+    if len(obv):
+        obv += volume[0] - obv[0]  # TA_OBV começa no volume do primeiro candle
+
+
+def _timestamps_to_int(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype("int64").to_numpy()
+    return pd.to_numeric(values).to_numpy(dtype=np.int64)
+
+
+class IndicatorEngine:
+    """Registry of incremental indicator states keyed by (symbol, timeframe).
+
+    Thread-safe: the selector analyzes symbols from a thread pool and BTCUSDT
+    is read by several of them, so each series has its own lock.
+    """
+
+    def __init__(self, history: int = 500, min_window: int = 200):
+        self.history = max(50, int(history))
+        # Janelas menores que isso só são atendidas se começarem no seed
+        self.min_window = min(int(min_window), self.history)
+        self._series: dict[tuple[str, str], IncrementalIndicators] = {}
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+        self.stats = {"seeds": 0, "candles_applied": 0, "fallbacks": 0}
+
+    def _lock_for(self, key: tuple[str, str]) -> threading.Lock:
+        with self._registry_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def sync(self, symbol: str, timeframe: str, df: pd.DataFrame) -> dict[str, np.ndarray] | None:
+        """Bring the series up to date with ``df`` and return indicator columns.
+
+        Only candles at or after the last known timestamp are applied. The
+        state is reseeded when ``df`` reaches further back than the retained
+        history or does not line up with it (gap, rewritten history).
+
+        Returns None when ``df`` cannot be served (older than the state, longer
+        than ``history``, unordered, or shorter than ``min_window`` while the
+        state reaches further back) so the caller can use the batch path.
+        """
+        if df is None or df.empty or "timestamp" not in df.columns:
+            return None
+        if len(df) > self.history:
+            self.stats["fallbacks"] += 1
+            return None
+
+        timestamps = _timestamps_to_int(df["timestamp"])
+        if len(timestamps) > 1 and np.any(np.diff(timestamps) <= 0):
+            self.stats["fallbacks"] += 1
+            return None
+
+        high = df["high"].to_numpy(dtype=float)
+        low = df["low"].to_numpy(dtype=float)
+        close = df["close"].to_numpy(dtype=float)
+        volume = df["volume"].to_numpy(dtype=float)
+
+        key = (symbol, timeframe)
+        with self._lock_for(key):
+            series = self._series.get(key)
+            start = 0
+            if series is not None and series.last_timestamp is not None:
+                last = series.last_timestamp
+                if timestamps[-1] < last:
+                    self.stats["fallbacks"] += 1
+                    return None
+                pos = int(np.searchsorted(timestamps, last))
+                lines_up = pos < len(timestamps) and timestamps[pos] == last
+                if lines_up and timestamps[0] >= series.first_timestamp:
+                    if timestamps[0] > series.seed_timestamp and len(timestamps) < self.min_window:
+                        # MACD/Wilder ainda carregam o seed: não convergiram na janela curta
+                        self.stats["fallbacks"] += 1
+                        return None
+                    start = pos
+                else:
+                    series = None
+
+            for attempt in range(2):
+                if series is None:
+                    series = IncrementalIndicators(self.history)
+                    self._series[key] = series
+                    self.stats["seeds"] += 1
+                    start = 0
+                for i in range(start, len(timestamps)):
+                    series.update(int(timestamps[i]), high[i], low[i], close[i], volume[i])
+                self.stats["candles_applied"] += len(timestamps) - start
+
+                tail_ts, values = series.tail(len(timestamps))
+                if np.array_equal(tail_ts, timestamps):
+                    columns = {name: values[:, j].copy() for j, name in enumerate(INDICATOR_COLUMNS)}
+                    _anchor_to_window(columns, close, volume)
+                    return columns
+                if attempt == 0:
+                    logger.debug("[Indicators] %s %s desalinhado - reseed", symbol, timeframe)
+                    series = None
+
+        self.stats["fallbacks"] += 1
+        return None
+
+    def reset(self, symbol: str | None = None, timeframe: str | None = None) -> None:
+        """Drop state for one series (or everything when no symbol is given)."""
+        with self._registry_lock:
+            if symbol is None:
+                self._series.clear()
+                return
+            for key in list(self._series):
+                if key[0] == symbol and (timeframe is None or key[1] == timeframe):
+                    del self._series[key]
+
+    def get_stats(self) -> dict[str, int]:
+        return {**self.stats, "series": len(self._series)}
@@ -0,0 +1,207 @@
+"""
+Kline Store — per-(symbol, timeframe) candle history with delta fetches.
+
+get_historical_data used to download the whole _KLINES_CACHE_SIZE history
+every time the 5s MarketDataCache entry expired. The store keeps the history
+in memory (optionally mirrored to disk) and only asks the exchange for
+candles from the last stored open time onwards, so a refresh downloads the
+still-forming bar plus whatever closed since — usually 1-2 candles.
+
+Layout por série: np.ndarray (n, 6) float64 — timestamp(ms), open, high, low, close, volume.
+
+Usage:
+  store = KlineStore(client)                       # client.get_klines(symbol, timeframe=, limit=, since=)
+  df = store.get_frame("BTCUSDT", "15m", limit=200)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+KLINE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+_TIMEFRAME_UNITS_MS = {
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """'15m' -> 900000. Raises ValueError for unknown units."""
+    unit = timeframe[-1]
+    if unit not in _TIMEFRAME_UNITS_MS or not timeframe[:-1].isdigit():
+        raise ValueError(f"Timeframe invalido: {timeframe}")
+    return int(timeframe[:-1]) * _TIMEFRAME_UNITS_MS[unit]
+
+
+class KlineStore:
+    """Candle history per (symbol, timeframe), refreshed incrementally."""
+
+    def __init__(
+        self,
+        client,
+        max_candles: int = 1000,
+        storage_dir: str | Path | None = None,
+    ):
+        self.client = client
+        self.max_candles = max(10, int(max_candles))
+        if storage_dir is None:
+            storage_dir = os.environ.get("KLINE_STORE_DIR") or None
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        if self.storage_dir is not None:
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        self._series: dict[tuple[str, str], np.ndarray] = {}
+        # Maior limit já pedido por série — evita refetch completo quando o
+        # par simplesmente não tem histórico suficiente (listagem recente)
+        self._full_limit: dict[tuple[str, str], int] = {}
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+        self.stats = {"full_fetches": 0, "delta_fetches": 0, "candles_fetched": 0}
+
+    def _lock_for(self, key: tuple[str, str]) -> threading.Lock:
+        with self._registry_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    # ── Public API ────────────────────────────────────────────────────
+
+    def get_frame(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame | None:
+        """Refresh the series and return its last ``limit`` candles as a DataFrame."""
+        data = self.refresh(symbol, timeframe, limit)
+        if data is None or len(data) == 0:
+            return None
+        return self._to_frame(data[-limit:])
+
+    def refresh(self, symbol: str, timeframe: str, limit: int) -> np.ndarray | None:
+        """Bring (symbol, timeframe) up to date and return the stored array."""
+        key = (symbol, timeframe)
+        limit = min(max(1, int(limit)), self.max_candles)
+        with self._lock_for(key):
+            data = self._series.get(key)
+            if data is None:
+                data = self._load(key)
+
+            if self._needs_full_fetch(key, data, limit, timeframe):
+                fetched = self._fetch(symbol, timeframe, limit=limit)
+                self.stats["full_fetches"] += 1
+                if fetched is None:
+                    return data
+                self._full_limit[key] = limit
+                merged = fetched
+            else:
+                last_ts = int(data[-1, 0])
+                expected = (self._now_ms() - last_ts) // timeframe_to_ms(timeframe) + 2
+                fetched = self._fetch(symbol, timeframe, limit=int(expected), since=last_ts)
+                self.stats["delta_fetches"] += 1
+                if fetched is None:
+                    return data
+                merged = self._merge(data, fetched)
+
+            merged = merged[-self.max_candles :]
+            self._series[key] = merged
+            if data is None or len(data) == 0 or merged[-1, 0] != data[-1, 0]:
+                # Persistir apenas quando um candle novo abriu
+                self._save(key, merged)
+            return merged
+
+    def clear(self, symbol: str | None = None) -> None:
+        """Drop in-memory history (disk files are kept)."""
+        with self._registry_lock:
+            for key in list(self._series):
+                if symbol is None or key[0] == symbol:
+                    self._series.pop(key, None)
+                    self._full_limit.pop(key, None)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "series": len(self._series)}
+
+    # ── Internals ─────────────────────────────────────────────────────
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    def _needs_full_fetch(
+        self, key: tuple[str, str], data: np.ndarray | None, limit: int, timeframe: str
+    ) -> bool:
+        if data is None or len(data) == 0:
+            return True
+        if len(data) < limit and self._full_limit.get(key, 0) < limit:
+            return True
+        # Muito tempo parado: mais rápido baixar a janela inteira do que paginar
+        missed = (self._now_ms() - int(data[-1, 0])) // timeframe_to_ms(timeframe)
+        return missed >= limit
+
+    def _fetch(
+        self, symbol: str, timeframe: str, limit: int, since: int | None = None
+    ) -> np.ndarray | None:
+        if since is None:
+            klines = self.client.get_klines(symbol, timeframe=timeframe, limit=limit)
+        else:
+            klines = self.client.get_klines(symbol, timeframe=timeframe, limit=limit, since=since)
+        if not klines:
+            logger.debug("[KlineStore] Sem candles para %s %s (since=%s)", symbol, timeframe, since)
+            return None
+        try:
+            data = np.asarray([row[:6] for row in klines], dtype=float)
+        except (TypeError, ValueError) as e:
+            logger.warning("[KlineStore] Candles invalidos para %s %s: %s", symbol, timeframe, e)
+            return None
+        self.stats["candles_fetched"] += len(data)
+        return data
+
+    @staticmethod
+    def _merge(data: np.ndarray, fetched: np.ndarray) -> np.ndarray:
+        """Replace stored candles from the first fetched open time onwards."""
+        cut = int(np.searchsorted(data[:, 0], fetched[0, 0]))
+        return np.concatenate([data[:cut], fetched])
+
+    @staticmethod
+    def _to_frame(data: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame(data, columns=KLINE_COLUMNS)
+        df["timestamp"] = df["timestamp"].astype(np.int64)
+        return df
+
+    def _path(self, key: tuple[str, str]) -> Path | None:
+        if self.storage_dir is None:
+            return None
+        return self.storage_dir / f"{key[0]}_{key[1]}.npy"
+
+    def _load(self, key: tuple[str, str]) -> np.ndarray | None:
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            data = np.load(path)
+            if data.ndim != 2 or data.shape[1] != len(KLINE_COLUMNS):
+                return None
+            logger.debug("[KlineStore] %d candles carregados de %s", len(data), path)
+            return data
+        except Exception as e:
+            logger.warning("[KlineStore] Erro ao carregar %s: %s", path, e)
+            return None
+
+    def _save(self, key: tuple[str, str], data: np.ndarray) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, data)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning("[KlineStore] Erro ao salvar %s: %s", path, e)
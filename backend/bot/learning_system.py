@@ -8,6 +8,8 @@ import os
 import statistics
 from datetime import UTC, datetime
 
+from bot.performance_aggregates import SCOPE_ALL, PerformanceAggregates
+
 logger = logging.getLogger(__name__)
 
 
@@ -116,7 +118,25 @@ class BotLearningSystem:
     async def _update_performance_metrics(self):
         """Atualizar metricas baseado em todos os trades"""
         try:
-            # Buscar ultimos 1000 trades (projeção otimizada - só pnl necessário)
+            # Agregado materializado (bot.performance_aggregates): O(1), sem limite de 1000
+            agg = await PerformanceAggregates(self.db).get(SCOPE_ALL)
+            if agg and agg.get("total_trades"):
+                wins = agg["winning_trades"]
+                losses = agg["losing_trades"]
+                self.performance_metrics["total_trades"] = agg["total_trades"]
+                self.performance_metrics["winning_trades"] = wins
+                self.performance_metrics["losing_trades"] = losses
+                self.performance_metrics["win_rate"] = wins / agg["total_trades"] * 100
+                if wins:
+                    self.performance_metrics["avg_profit"] = agg["gross_profit"] / wins
+                if losses:
+                    self.performance_metrics["avg_loss"] = agg["gross_loss"] / losses
+                logger.info(
+                    f"Metricas atualizadas: {self.performance_metrics['total_trades']} trades, Win Rate: {self.performance_metrics['win_rate']:.1f}%"
+                )
+                return
+
+            # Fallback (agregado ainda não construído): ultimos 1000 trades
             trades = (
                 await self.db.trades.find({}, {"pnl": 1, "_id": 0})
                 .sort("timestamp", -1)
@@ -1,133 +1,299 @@
 """
 Market Data Cache - Otimização de Performance
 Reduz chamadas à API da Binance em 70%
+
+Thread-safe, com TTL por entrada, despejo LRU limitado por número de entradas
+e por bytes aproximados (DataFrames de klines são grandes) e carga
+single-flight: misses simultâneos da mesma chave compartilham um único fetch.
 """
 
 import logging
+import os
+import sys
+import threading
 import time
+from collections import OrderedDict
 from typing import Any
 
+import numpy as np
+import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def approx_size(value: Any) -> int:
+    """Tamanho aproximado em bytes (DataFrames/arrays pelo buffer, containers rasos)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items()
+        )
+    if isinstance(value, list | tuple):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(v) if not isinstance(v, dict) else approx_size(v) for v in value
+        )
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'ttl', 'size')
+
+    def __init__(self, value: Any, ttl: float, size: int):
+        self.value = value
+        self.ttl = ttl
+        self.expires_at = time.monotonic() + ttl
+        self.size = size
+
+
+class _Flight:
+    """Carga em andamento de uma chave; os demais chamadores esperam o resultado"""
+    __slots__ = ('done', 'value')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
 class MarketDataCache:
-    """Cache simples com TTL para dados de mercado"""
-    
-    def __init__(self, ttl_seconds=5):
+    """Cache LRU thread-safe com TTL e carga single-flight para dados de mercado"""
+
+    def __init__(
+        self,
+        ttl_seconds=5,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        name: str = "market",
+    ):
         """
         Initialize cache
-        
+
         Args:
             ttl_seconds: Time to live em segundos (padrão: 5s)
+            max_entries: Número máximo de entradas antes do despejo LRU
+            max_bytes: Limite aproximado de memória ocupada pelos valores
+            name: Nome usado em logs e estatísticas
         """
-        self.cache: dict[str, dict[str, Any]] = {}
         self.ttl = ttl_seconds
-        
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.name = name
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, _Flight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'loads': 0,
+            'load_errors': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'load_ms_total': 0.0,
+            'load_ms_max': 0.0,
+        }
+
+    # ── Internos (chamados com o lock) ────────────────────────────────
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _lookup(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() > entry.expires_at:
+            self._remove(key)
+            self._counters['expirations'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def _store(self, key: str, value: Any, ttl: float | None) -> None:
+        if key in self._entries:
+            self._remove(key)
+        entry = _Entry(value, ttl if ttl is not None else self.ttl, approx_size(value))
+        self._entries[key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def _evict(self) -> None:
+        if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        # Expiradas primeiro; depois as menos usadas recentemente
+        self._clear_expired_locked()
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters['evictions'] += 1
+
+    def _clear_expired_locked(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now > entry.expires_at]
+        for key in expired:
+            self._remove(key)
+        self._counters['expirations'] += len(expired)
+        return len(expired)
+
+    # ── API ───────────────────────────────────────────────────────────
+
     def get(self, key: str) -> Any | None:
         """
         Buscar valor do cache
-        
+
         Args:
             key: Chave do cache
-            
+
         Returns:
             Valor armazenado ou None se expirado/não existe
         """
-        if key not in self.cache:
-            return None
-            
-        entry = self.cache[key]
-        
-        # Verificar se expirou (usa TTL por entrada ou global)
-        entry_ttl = entry.get('ttl', self.ttl)
-        if time.time() - entry['timestamp'] > entry_ttl:
-            del self.cache[key]
-            return None
-            
-        return entry['value']
-    
+        with self._lock:
+            value = self._lookup(key)
+            self._counters['hits' if value is not None else 'misses'] += 1
+            return value
+
     def set(self, key: str, value: Any, ttl: int | None = None) -> None:
         """
         Armazenar valor no cache
-        
+
         Args:
             key: Chave do cache
             value: Valor a armazenar
             ttl: TTL específico para esta entrada (opcional, usa o TTL global se None)
         """
-        self.cache[key] = {
-            'value': value,
-            'timestamp': time.time(),
-            'ttl': ttl if ttl is not None else self.ttl,
-        }
-    
-    def get_or_set(self, key: str, fetch_func) -> Any | None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_set(self, key: str, fetch_func, ttl: int | None = None) -> Any | None:
         """
         Busca valor do cache ou executa fetch_func para preencher.
+
+        Misses simultâneos da mesma chave aguardam o fetch do primeiro
+        chamador em vez de repetirem a chamada à exchange.
         """
-        value = self.get(key)
-        if value is not None:
-            return value
-        
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self._counters['hits'] += 1
+                return value
+            self._counters['misses'] += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.value
+
+        started = time.perf_counter()
+        value = None
         try:
             value = fetch_func()
         except Exception as exc:
             logger.error(f"Erro ao buscar valor para cache {key}: {exc}")
-            return None
-        
-        if value is not None:
-            self.set(key, value)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                counters = self._counters
+                counters['loads'] += 1
+                counters['load_ms_total'] += elapsed_ms
+                counters['load_ms_max'] = max(counters['load_ms_max'], elapsed_ms)
+                if value is None:
+                    counters['load_errors'] += 1
+                else:
+                    self._store(key, value, ttl)
+                del self._inflight[key]
+            flight.value = value
+            flight.done.set()
         return value
-    
+
     def clear(self) -> None:
         """Limpar todo o cache"""
-        self.cache.clear()
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
         logger.info("Cache limpo")
-    
+
     def clear_expired(self) -> int:
         """
         Limpar entradas expiradas
-        
+
         Returns:
             Número de entradas removidas
         """
-        now = time.time()
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if now - entry['timestamp'] > entry.get('ttl', self.ttl)
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
-            
-        if expired_keys:
-            logger.debug(f"Removed {len(expired_keys)} expired cache entries")
-            
-        return len(expired_keys)
-    
+        with self._lock:
+            removed = self._clear_expired_locked()
+
+        if removed:
+            logger.debug(f"Removed {removed} expired cache entries")
+
+        return removed
+
     def stats(self) -> dict[str, Any]:
         """
         Estatísticas do cache
-        
+
         Returns:
             Dict com estatísticas
         """
-        now = time.time()
-        valid_entries = sum(
-            1 for entry in self.cache.values()
-            if now - entry['timestamp'] <= entry.get('ttl', self.ttl)
-        )
-        
+        with self._lock:
+            now = time.monotonic()
+            total = len(self._entries)
+            valid_entries = sum(1 for entry in self._entries.values() if now <= entry.expires_at)
+            counters = dict(self._counters)
+            size_bytes = self._bytes
+            inflight = len(self._inflight)
+
+        lookups = counters['hits'] + counters['misses']
+        loads = counters['loads']
         return {
-            'total_entries': len(self.cache),
+            'name': self.name,
+            'total_entries': total,
             'valid_entries': valid_entries,
-            'expired_entries': len(self.cache) - valid_entries,
-            'ttl_seconds': self.ttl
+            'expired_entries': total - valid_entries,
+            'ttl_seconds': self.ttl,
+            'max_entries': self.max_entries,
+            'approx_bytes': size_bytes,
+            'max_bytes': self.max_bytes,
+            'inflight': inflight,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'hit_rate': round(counters['hits'] / lookups * 100, 2) if lookups else 0.0,
+            'coalesced': counters['coalesced'],
+            'loads': loads,
+            'load_errors': counters['load_errors'],
+            'evictions': counters['evictions'],
+            'expirations': counters['expirations'],
+            'avg_load_ms': round(counters['load_ms_total'] / loads, 2) if loads else None,
+            'max_load_ms': round(counters['load_ms_max'], 2),
         }
 
+
+def _limits() -> dict[str, int]:
+    return {
+        'max_entries': int(os.getenv('MARKET_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+        'max_bytes': int(float(os.getenv('MARKET_CACHE_MAX_MB', DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024),
+    }
+
+
 # Singleton global para reutilização
-_global_cache = MarketDataCache(ttl_seconds=5)
-_price_ticker_cache = MarketDataCache(ttl_seconds=3)
-_stats_ticker_cache = MarketDataCache(ttl_seconds=10)
+_global_cache = MarketDataCache(ttl_seconds=5, name="klines", **_limits())
+_price_ticker_cache = MarketDataCache(ttl_seconds=3, name="price", **_limits())
+_stats_ticker_cache = MarketDataCache(ttl_seconds=10, name="stats_24h", **_limits())
 
 def get_cache() -> MarketDataCache:
     """Get global cache instance"""
@@ -140,3 +306,7 @@ def get_price_cache() -> MarketDataCache:
 def get_stats_cache() -> MarketDataCache:
     """Cache para estatísticas 24h (get_ticker)."""
     return _stats_ticker_cache
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """Contadores de todos os caches globais (exposto em /api/diagnostics)."""
+    return {cache.name: cache.stats() for cache in (_global_cache, _price_ticker_cache, _stats_ticker_cache)}
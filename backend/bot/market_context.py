@@ -0,0 +1,71 @@
+"""
+Market Context — snapshot do BTC calculado uma vez por ciclo de scan.
+
+Regime, tendência e retornos do BTC eram recalculados para cada símbolo
+analisado (e de novo no filtro de liquidez e no health check do bot). O
+contexto é montado no início do scan por ``TradingStrategy.build_market_context``
+e repassado para a análise de cada símbolo.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+BTC_SYMBOL = "BTCUSDT"
+CORRELATION_LOOKBACK = 30
+
+
+def returns_correlation(symbol_close: pd.Series, btc_returns: pd.Series) -> float:
+    """Correlação dos retornos de um ativo com os do BTC (0.5 = neutro se indefinida)."""
+    symbol_returns = symbol_close.pct_change().dropna()
+
+    # Alinhar tamanhos (por posição: os índices dos dois frames não coincidem)
+    min_len = min(len(symbol_returns), len(btc_returns))
+    correlation = symbol_returns.tail(min_len).reset_index(drop=True).corr(
+        btc_returns.tail(min_len).reset_index(drop=True)
+    )
+    return float(correlation) if not pd.isna(correlation) else 0.5
+
+
+@dataclass
+class MarketContext:
+    """Estado do BTC compartilhado por todas as análises de um ciclo."""
+
+    btc_regime: dict
+    btc_bearish: bool
+    btc_returns: pd.Series | None
+    btc_analysis: dict | None = None
+    built_at: float = field(default_factory=time.monotonic)
+    # Vetor de correlações do universo, preenchido à medida que os símbolos são analisados
+    correlations: dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.built_at
+
+    def correlation(self, symbol: str, symbol_df: pd.DataFrame | None) -> float:
+        """Correlação do símbolo com o BTC usando os retornos do snapshot."""
+        if "BTC" in symbol:
+            return 1.0
+        with self._lock:
+            cached = self.correlations.get(symbol)
+        if cached is not None:
+            return cached
+
+        if (
+            self.btc_returns is None
+            or symbol_df is None
+            or len(symbol_df) < 10
+            or len(self.btc_returns) < 9
+        ):
+            return 0.5  # Default neutro
+
+        result = returns_correlation(symbol_df["close"].tail(CORRELATION_LOOKBACK), self.btc_returns)
+        with self._lock:
+            self.correlations[symbol] = result
+        return result
@@ -0,0 +1,357 @@
+"""
+Market Data Stream — Binance WebSocket feed for prices, book tickers and klines.
+
+ExchangeManager polls REST for tickers, order books and candles; between two
+polls _check_positions is blind. This module keeps an in-process market state
+fed by Binance combined streams:
+
+  !miniTicker@arr        → last price of every symbol (1s)
+  <symbol>@bookTicker    → best bid/ask (real time)
+  <symbol>@kline_<tf>    → forming candle (~2s)
+
+ExchangeManager serves get_price_map / get_orderbook_ticker / get_klines from
+this state while the connection is fresh and falls back to REST otherwise.
+
+The stream runs its own asyncio loop in a daemon thread, so it can be used from
+the synchronous ExchangeManager and from the bot's worker threads alike.
+New subscriptions are coalesced into a single SUBSCRIBE message per flush
+(Binance drops connections sending more than 5 messages/s).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+
+try:
+    import websockets
+
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:  # pragma: no cover - dependência opcional
+    websockets = None
+    WEBSOCKETS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443/stream"
+BINANCE_TESTNET_STREAM_URL = "wss://testnet.binance.vision/stream"
+
+MINI_TICKER_STREAM = "!miniTicker@arr"
+
+
+class MarketDataStream:
+    """In-process market state fed by Binance combined WebSocket streams."""
+
+    def __init__(
+        self,
+        url: str | None = None,
+        testnet: bool = False,
+        max_age: float = 5.0,
+        kline_history: int = 500,
+        flush_interval: float = 0.5,
+        max_backoff: float = 60.0,
+    ):
+        self.url = url or (BINANCE_TESTNET_STREAM_URL if testnet else BINANCE_STREAM_URL)
+        self.max_age = max_age
+        self.kline_history = kline_history
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._streams: set[str] = {MINI_TICKER_STREAM}
+        self._pending: set[str] = set()
+        self._prices: dict[str, float] = {}
+        self._books: dict[str, dict] = {}
+        self._klines: dict[tuple[str, str], deque] = {}
+        self._listeners: list[Callable[[], None]] = []
+
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop_event: asyncio.Event | None = None
+        self._ws = None
+        self._connected = False
+        self._last_message = 0.0
+        self._request_id = 0
+        self.stats = {"messages": 0, "connects": 0, "errors": 0, "subscribe_messages": 0}
+
+    # ── Lifecycle ─────────────────────────────────────────────────────
+
+    def start(self, symbols: Iterable[str] = (), timeframes: Iterable[str] = ()) -> bool:
+        """Start the background connection (idempotent)."""
+        if not WEBSOCKETS_AVAILABLE:
+            logger.warning("[Stream] websockets não instalado - usando apenas REST")
+            return False
+        symbols = list(symbols)
+        self.subscribe_book(symbols)
+        for timeframe in timeframes:
+            for symbol in symbols:
+                self.subscribe_klines(symbol, timeframe)
+
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        self._thread = threading.Thread(target=self._run, name="market-stream", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Close the connection and stop the background thread."""
+        loop, stop_event = self._loop, self._stop_event
+        if loop is not None and stop_event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(stop_event.set)
+            ws = self._ws
+            if ws is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(ws.close(), loop)
+                except RuntimeError:
+                    pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def is_fresh(self) -> bool:
+        """Connected and received something within ``max_age`` seconds."""
+        return self._connected and (time.monotonic() - self._last_message) <= self.max_age
+
+    # ── Subscriptions ─────────────────────────────────────────────────
+
+    def subscribe_book(self, symbols: Iterable[str]) -> None:
+        self._add_streams(f"{symbol.lower()}@bookTicker" for symbol in symbols)
+
+    def subscribe_klines(self, symbol: str, timeframe: str) -> None:
+        self._add_streams([f"{symbol.lower()}@kline_{timeframe}"])
+
+    def _add_streams(self, streams: Iterable[str]) -> None:
+        with self._lock:
+            new = set(streams) - self._streams
+            if not new:
+                return
+            self._streams |= new
+            self._pending |= new
+
+    # ── Tick listeners ────────────────────────────────────────────────
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Call ``callback()`` (from the stream thread) when a last price changes.
+
+        bookTicker and kline messages do not notify: the position monitor reads
+        last prices, so waking it for an unchanged price is wasted work.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify_listeners(self) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.debug("[Stream] Listener falhou: %s", e)
+
+    # ── Reads (thread-safe) ───────────────────────────────────────────
+
+    def get_prices(self, symbols: Iterable[str]) -> dict[str, float]:
+        """Last traded prices for the requested symbols (only when fresh)."""
+        if not self.is_fresh():
+            return {}
+        with self._lock:
+            return {s: self._prices[s] for s in symbols if s in self._prices}
+
+    def get_price(self, symbol: str) -> float | None:
+        return self.get_prices([symbol]).get(symbol)
+
+    def get_book_ticker(self, symbol: str) -> dict | None:
+        """Binance-compat book ticker {symbol, bidPrice, bidQty, askPrice, askQty}."""
+        if not self.is_fresh():
+            return None
+        with self._lock:
+            book = self._books.get(symbol)
+            return dict(book) if book else None
+
+    def get_klines(
+        self, symbol: str, timeframe: str, limit: int, since: int | None = None
+    ) -> list | None:
+        """Candles in ccxt format, or None when the stream cannot cover the request.
+
+        With ``since`` the stream must hold that candle (true for incremental
+        refreshes right after subscribing); without it, at least ``limit`` candles.
+        """
+        if not self.is_fresh():
+            return None
+        with self._lock:
+            candles = self._klines.get((symbol, timeframe))
+            if not candles:
+                return None
+            if since is not None:
+                if candles[0][0] > since:
+                    return None
+                rows = [list(c) for c in candles if c[0] >= since]
+                return rows[:limit]
+            if len(candles) < limit:
+                return None
+            return [list(c) for c in list(candles)[-limit:]]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "connected": self._connected,
+                "streams": len(self._streams),
+                "prices": len(self._prices),
+                "age_seconds": round(time.monotonic() - self._last_message, 2)
+                if self._last_message
+                else None,
+            }
+
+    # ── Message handling ──────────────────────────────────────────────
+
+    def handle_message(self, raw: str | bytes) -> None:
+        """Apply one combined-stream message to the state."""
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            self.stats["errors"] += 1
+            return
+        self._last_message = time.monotonic()
+        self.stats["messages"] += 1
+
+        data = message.get("data", message) if isinstance(message, dict) else message
+        if isinstance(data, list):
+            with self._lock:
+                changed = [self._apply_mini_ticker(ticker) for ticker in data]
+            if any(changed):
+                self._notify_listeners()
+            return
+        if not isinstance(data, dict):
+            return
+
+        event = data.get("e")
+        changed = False
+        with self._lock:
+            if event == "kline":
+                self._apply_kline(data)
+            elif event == "24hrMiniTicker":
+                changed = self._apply_mini_ticker(data)
+            elif "b" in data and "a" in data and "s" in data:
+                self._books[data["s"]] = {
+                    "symbol": data["s"],
+                    "bidPrice": str(data["b"]),
+                    "bidQty": str(data.get("B", "0")),
+                    "askPrice": str(data["a"]),
+                    "askQty": str(data.get("A", "0")),
+                }
+        if changed:
+            self._notify_listeners()
+
+    def _apply_mini_ticker(self, ticker: dict) -> bool:
+        """Store the last price; True when it changed."""
+        try:
+            symbol, price = ticker["s"], float(ticker["c"])
+        except (KeyError, TypeError, ValueError):
+            self.stats["errors"] += 1
+            return False
+        if self._prices.get(symbol) == price:
+            return False
+        self._prices[symbol] = price
+        return True
+
+    def _apply_kline(self, data: dict) -> None:
+        try:
+            k = data["k"]
+            candle = [
+                int(k["t"]),
+                float(k["o"]),
+                float(k["h"]),
+                float(k["l"]),
+                float(k["c"]),
+                float(k["v"]),
+            ]
+            key = (k.get("s") or data["s"], k["i"])
+        except (KeyError, TypeError, ValueError):
+            self.stats["errors"] += 1
+            return
+
+        candles = self._klines.get(key)
+        if candles is None:
+            candles = self._klines[key] = deque(maxlen=self.kline_history)
+        if candles and candles[-1][0] == candle[0]:
+            candles[-1] = candle
+        elif not candles or candle[0] > candles[-1][0]:
+            candles.append(candle)
+
+    # ── Connection loop ───────────────────────────────────────────────
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            logger.error("[Stream] Loop encerrado com erro: %s", e)
+
+    def _build_url(self) -> str:
+        with self._lock:
+            streams = sorted(self._streams)
+            self._pending.clear()
+        return f"{self.url}?streams={'/'.join(streams)}"
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            try:
+                async with websockets.connect(self._build_url(), ping_interval=20, max_size=2**22) as ws:
+                    self._ws = ws
+                    self._connected = True
+                    self._last_message = time.monotonic()
+                    self.stats["connects"] += 1
+                    backoff = 1.0
+                    logger.info("[Stream] Conectado (%d streams)", len(self._streams))
+                    flusher = asyncio.create_task(self._flush_subscriptions(ws))
+                    try:
+                        async for raw in ws:
+                            self.handle_message(raw)
+                    finally:
+                        flusher.cancel()
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    logger.warning("[Stream] Conexão perdida: %s", e)
+            finally:
+                self._ws = None
+                self._connected = False
+                # Candles recebidos antes da queda podem ter buracos: recomeçar
+                with self._lock:
+                    self._klines.clear()
+
+            if self._stop_event.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=backoff)
+            except TimeoutError:
+                pass
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _flush_subscriptions(self, ws) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            with self._lock:
+                pending = sorted(self._pending)
+                self._pending.clear()
+            if not pending:
+                continue
+            self._request_id += 1
+            await ws.send(
+                json.dumps({"method": "SUBSCRIBE", "params": pending, "id": self._request_id})
+            )
+            self.stats["subscribe_messages"] += 1
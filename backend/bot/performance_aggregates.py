@@ -0,0 +1,204 @@
+"""
+Performance Aggregates — métricas de trades mantidas incrementalmente.
+
+Em vez de reler ``db.trades`` (limitado a 1000 docs) a cada request, cada
+trade fechado é aplicado a um documento materializado em
+``performance_aggregates``: somas, pico de equity, drawdown máximo, estado do
+streak, buckets diários e os últimos trades para o gráfico do dashboard.
+
+Há um documento por escopo: ``real`` (exclui simulados, usado pelo dashboard)
+e ``all`` (todos os trades, usado pelo sistema de aprendizado). As escritas
+usam versão otimista, então bot e rebuild podem rodar em processos distintos.
+``rebuild`` recalcula tudo a partir de ``db.trades`` (scripts/rebuild_performance.py).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import UTC, datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SCOPE_REAL = "real"
+SCOPE_ALL = "all"
+RECENT_TRADES = 200
+MAX_WRITE_ATTEMPTS = 5
+
+# Campos do trade mantidos em ``recent`` (o suficiente para gráfico e sparkline)
+RECENT_FIELDS = ("symbol", "side", "pnl", "roe", "status", "closed_at", "close_reason")
+
+
+def empty_aggregates(scope: str) -> dict[str, Any]:
+    return {
+        "_id": scope,
+        "version": 0,
+        "total_trades": 0,
+        "winning_trades": 0,
+        "losing_trades": 0,
+        "total_pnl": 0.0,
+        "gross_profit": 0.0,
+        "gross_loss": 0.0,  # soma dos pnl <= 0 (negativa)
+        "best_trade": None,
+        "worst_trade": None,
+        "equity": 0.0,
+        "peak_equity": 0.0,
+        "max_drawdown": 0.0,
+        "streak_type": None,
+        "current_streak": 0,
+        "daily": {},
+        "recent": [],
+        "last_closed_at": None,
+        "updated_at": None,
+    }
+
+
+def _day(closed_at: Any) -> str:
+    if isinstance(closed_at, datetime):
+        return closed_at.date().isoformat()
+    if isinstance(closed_at, str) and len(closed_at) >= 10:
+        return closed_at[:10]
+    return datetime.now(UTC).date().isoformat()
+
+
+def apply_trade(agg: dict[str, Any], trade: dict[str, Any]) -> dict[str, Any]:
+    """Aplica um trade fechado ao agregado (in-place; ordem cronológica)."""
+    pnl = float(trade.get("pnl", 0) or 0)
+
+    agg["total_trades"] += 1
+    agg["total_pnl"] += pnl
+    if pnl > 0:
+        agg["winning_trades"] += 1
+        agg["gross_profit"] += pnl
+    else:
+        agg["losing_trades"] += 1
+        agg["gross_loss"] += pnl
+    agg["best_trade"] = pnl if agg["best_trade"] is None else max(agg["best_trade"], pnl)
+    agg["worst_trade"] = pnl if agg["worst_trade"] is None else min(agg["worst_trade"], pnl)
+
+    # Drawdown sobre a curva de PnL acumulado
+    agg["equity"] += pnl
+    agg["peak_equity"] = max(agg["peak_equity"], agg["equity"])
+    agg["max_drawdown"] = max(agg["max_drawdown"], agg["peak_equity"] - agg["equity"])
+
+    # Streak: pnl == 0 não continua nem quebra a sequência
+    if pnl != 0:
+        kind = "win" if pnl > 0 else "loss"
+        if agg["streak_type"] == kind:
+            agg["current_streak"] += 1
+        else:
+            agg["streak_type"] = kind
+            agg["current_streak"] = 1
+
+    closed_at = trade.get("closed_at")
+    bucket = agg["daily"].setdefault(_day(closed_at), {"trades": 0, "wins": 0, "pnl": 0.0})
+    bucket["trades"] += 1
+    bucket["wins"] += 1 if pnl > 0 else 0
+    bucket["pnl"] += pnl
+
+    summary = {field: trade.get(field) for field in RECENT_FIELDS if field in trade}
+    if isinstance(summary.get("closed_at"), datetime):
+        summary["closed_at"] = summary["closed_at"].isoformat()
+    agg["recent"].append(summary)
+    del agg["recent"][:-RECENT_TRADES]
+
+    agg["last_closed_at"] = summary.get("closed_at")
+    return agg
+
+
+def summarize(agg: dict[str, Any] | None) -> dict[str, Any]:
+    """Formato de resposta do /api/performance a partir do agregado."""
+    agg = agg or empty_aggregates(SCOPE_REAL)
+    total = agg["total_trades"]
+    wins = agg["winning_trades"]
+    losses = agg["losing_trades"]
+    gross_loss = abs(agg["gross_loss"])
+
+    win_rate = wins / total if total else 0
+    avg_win = agg["gross_profit"] / wins if wins else 0
+    avg_loss = gross_loss / losses if losses else 0
+    expectancy = (win_rate * avg_win) - ((1 - win_rate) * avg_loss)
+
+    initial_balance = float(os.environ.get("INITIAL_BALANCE_USDT", "1000"))
+    roi = (agg["total_pnl"] / initial_balance * 100) if initial_balance > 0 else 0
+
+    return {
+        "total_trades": total,
+        "winning_trades": wins,
+        "losing_trades": losses,
+        "win_rate": win_rate * 100,
+        "total_pnl": round(agg["total_pnl"], 2),
+        "average_pnl": round(agg["total_pnl"] / total, 2) if total else 0,
+        "best_trade": round(agg["best_trade"] or 0, 2),
+        "worst_trade": round(agg["worst_trade"] or 0, 2),
+        "profit_factor": round(agg["gross_profit"] / gross_loss, 2) if gross_loss > 0 else 0,
+        "avg_win": round(avg_win, 2),
+        "avg_loss": round(avg_loss, 2),
+        "expectancy": round(expectancy, 2),
+        "max_drawdown": round(agg["max_drawdown"], 2),
+        "current_streak": agg["current_streak"] if total else 0,
+        "streak_type": agg["streak_type"],
+        "roi": round(roi, 2),
+        "trades_by_date": list(agg["recent"]),
+        "daily_pnl": [
+            {"date": day, **{k: round(v, 2) if k == "pnl" else v for k, v in bucket.items()}}
+            for day, bucket in sorted(agg["daily"].items())
+        ],
+    }
+
+
+class PerformanceAggregates:
+    """Leitura O(1) e atualização incremental dos agregados no MongoDB (motor)."""
+
+    def __init__(self, db):
+        self.collection = db.performance_aggregates
+        self.trades = db.trades
+
+    async def get(self, scope: str = SCOPE_REAL) -> dict[str, Any] | None:
+        return await self.collection.find_one({"_id": scope})
+
+    async def record_trade(self, trade: dict[str, Any]) -> None:
+        """Chamado depois de ``db.trades.insert_one``; atualiza os escopos aplicáveis."""
+        scopes = [SCOPE_ALL] if trade.get("simulated") else [SCOPE_ALL, SCOPE_REAL]
+        for scope in scopes:
+            await self._update(scope, trade)
+
+    async def _update(self, scope: str, trade: dict[str, Any]) -> None:
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            current = await self.get(scope)
+            if current is None:
+                # Sem documento ainda: reconstruir inclui o trade recém-inserido
+                await self.rebuild(scopes=[scope])
+                return
+            version = current["version"]
+            updated = apply_trade(current, trade)
+            updated["version"] = version + 1
+            updated["updated_at"] = datetime.now(UTC).isoformat()
+            result = await self.collection.replace_one({"_id": scope, "version": version}, updated)
+            if result.matched_count:
+                return
+        logger.warning("Agregado %s: conflito de versão persistente, reconstruindo", scope)
+        await self.rebuild(scopes=[scope])
+
+    async def rebuild(self, scopes: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        """Recalcula os agregados varrendo ``db.trades`` em ordem de fechamento."""
+        scopes = scopes or [SCOPE_REAL, SCOPE_ALL]
+        aggregates = {scope: empty_aggregates(scope) for scope in scopes}
+        projection = {field: 1 for field in (*RECENT_FIELDS, "simulated")}
+        projection["_id"] = 0
+
+        async for trade in self.trades.find({}, projection).sort("closed_at", 1):
+            for scope, agg in aggregates.items():
+                if scope == SCOPE_REAL and trade.get("simulated"):
+                    continue
+                apply_trade(agg, trade)
+
+        now = datetime.now(UTC).isoformat()
+        for scope, agg in aggregates.items():
+            previous = await self.get(scope)
+            agg["version"] = (previous or {}).get("version", 0) + 1
+            agg["updated_at"] = now
+            await self.collection.replace_one({"_id": scope}, agg, upsert=True)
+            logger.info("Agregado %s reconstruído: %d trades", scope, agg["total_trades"])
+        return aggregates
@@ -0,0 +1,111 @@
+"""
+PnL Ledger — PnL realizado do dia e da semana (UTC) em memória.
+
+Os limites de perda diária/semanal eram checados com duas consultas em
+``db.trades`` a cada 60s (cache). O ledger é semeado uma vez no ``initialize``
+com os trades da semana corrente, recebe cada trade fechado em
+``_close_position`` e guarda um bucket por dia: a virada de dia/semana só
+descarta buckets antigos, sem reconsultar o Mongo.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def _as_datetime(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=UTC)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+    return None
+
+
+def week_start(day: date) -> date:
+    """Segunda-feira da semana (mesma convenção do limite semanal)."""
+    return day - timedelta(days=day.weekday())
+
+
+class PnLLedger:
+    """Buckets diários de PnL realizado da semana UTC corrente (thread-safe)."""
+
+    def __init__(self):
+        self._days: dict[date, float] = {}
+        self._trades: dict[date, int] = {}
+        self._week: date = week_start(datetime.now(UTC).date())
+        self._lock = threading.Lock()
+        self.seeded = False
+
+    def _roll(self, today: date) -> None:
+        week = week_start(today)
+        if week != self._week:
+            self._week = week
+            self._days = {d: v for d, v in self._days.items() if d >= week}
+            self._trades = {d: v for d, v in self._trades.items() if d >= week}
+
+    def record(self, pnl: float, closed_at: Any = None, now: datetime | None = None) -> None:
+        """Registra o PnL de um trade fechado (ignorado se for de semana anterior)."""
+        now = now or datetime.now(UTC)
+        closed = _as_datetime(closed_at) or now
+        day = closed.astimezone(UTC).date()
+        with self._lock:
+            self._roll(now.date())
+            if day < self._week:
+                return
+            self._days[day] = self._days.get(day, 0.0) + float(pnl or 0.0)
+            self._trades[day] = self._trades.get(day, 0) + 1
+
+    def day_pnl(self, now: datetime | None = None) -> float:
+        today = (now or datetime.now(UTC)).date()
+        with self._lock:
+            self._roll(today)
+            return self._days.get(today, 0.0)
+
+    def week_pnl(self, now: datetime | None = None) -> float:
+        today = (now or datetime.now(UTC)).date()
+        with self._lock:
+            self._roll(today)
+            return sum(v for d, v in self._days.items() if d <= today)
+
+    async def seed(self, db, now: datetime | None = None) -> None:
+        """Carrega os trades fechados desde o início da semana UTC (uma consulta)."""
+        now = now or datetime.now(UTC)
+        start = datetime.combine(week_start(now.date()), datetime.min.time(), tzinfo=UTC)
+        trades = await db.trades.find(
+            {"closed_at": {"$gte": start.isoformat()}}, {"pnl": 1, "closed_at": 1, "_id": 0}
+        ).to_list(None)
+        with self._lock:
+            self._week = start.date()
+            self._days.clear()
+            self._trades.clear()
+        for trade in trades:
+            self.record(trade.get("pnl", 0), trade.get("closed_at"), now=now)
+        self.seeded = True
+        logger.info(
+            "PnL ledger semeado: %d trades na semana (dia=%.2f semana=%.2f)",
+            len(trades),
+            self.day_pnl(now),
+            self.week_pnl(now),
+        )
+
+    def snapshot(self, now: datetime | None = None) -> dict[str, Any]:
+        today = (now or datetime.now(UTC)).date()
+        with self._lock:
+            self._roll(today)
+            return {
+                "day_pnl": round(self._days.get(today, 0.0), 2),
+                "week_pnl": round(sum(v for d, v in self._days.items() if d <= today), 2),
+                "trades_today": self._trades.get(today, 0),
+                "trades_week": sum(self._trades.values()),
+                "week_start": self._week.isoformat(),
+                "seeded": self.seeded,
+            }
@@ -0,0 +1,332 @@
+"""
+Positions Repository — posições abertas em memória com write-through no MongoDB.
+
+O loop relia todas as posições abertas do Mongo duas vezes por ciclo e o
+monitor gravava cada passo do trailing stop com um ``update_one``. Aqui a
+memória é a fonte autoritativa do processo:
+
+- abrir/atualizar/fechar grava no Mongo na hora (write-through);
+- ajustes de trailing são marcados como sujos e gravados em lote
+  (``bulk_write``) a cada ``flush_interval`` — vários passos da mesma posição
+  viram uma escrita;
+- edições externas (scripts, dashboard) chegam por change stream quando o
+  Mongo é replica set, ou pela reconciliação periódica.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo de espera pelo eco de uma escrita própria no change stream
+# (updates sem modificação não geram evento; a marcação não pode ficar presa)
+ECHO_TTL = 10.0
+
+
+class PositionsRepository:
+    """Conjunto de posições abertas (ordem de abertura) sincronizado com ``db.positions``."""
+
+    def __init__(
+        self,
+        collection,
+        flush_interval: float | None = None,
+        reconcile_interval: float | None = None,
+        limit: int = 500,
+    ):
+        self.collection = collection
+        self.flush_interval = flush_interval or float(os.getenv("POSITIONS_FLUSH_INTERVAL", "1.0"))
+        self.reconcile_interval = reconcile_interval or float(
+            os.getenv("POSITIONS_RECONCILE_INTERVAL", "60")
+        )
+        self.limit = limit
+        # Lista viva (TradingBot.positions aponta para ela) + índice por _id
+        self.positions: list[dict] = []
+        self._by_id: dict[Any, dict] = {}
+        # _id -> campos com escrita pendente (coalescidos até o próximo flush)
+        self._dirty: dict[Any, set[str]] = {}
+        # _ids alterados localmente durante uma reconciliação em andamento
+        self._touched: set[Any] | None = None
+        # _id -> [eventos de eco esperados, prazo] das escritas deste processo
+        self._echoes: dict[Any, list] = {}
+        self._tasks: list[asyncio.Task] = []
+        self.change_stream_active = False
+        self.stats = {
+            "flushes": 0,
+            "batched_updates": 0,
+            "coalesced_updates": 0,
+            "reconciles": 0,
+            "external_changes": 0,
+            "write_errors": 0,
+        }
+
+    # ── Leitura ──────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def snapshot(self) -> list[dict]:
+        return list(self.positions)
+
+    def symbols(self) -> list[str]:
+        return [pos["symbol"] for pos in self.positions]
+
+    def has_symbol(self, symbol: str) -> bool:
+        return any(pos["symbol"] == symbol for pos in self.positions)
+
+    # ── Estado local ─────────────────────────────────────────────────
+
+    def _touch(self, position_id: Any) -> None:
+        if self._touched is not None:
+            self._touched.add(position_id)
+
+    def _expect_echo(self, position_id: Any) -> None:
+        """Registra que a próxima mudança de ``position_id`` no stream é nossa."""
+        if not self.change_stream_active:
+            return
+        echo = self._echoes.setdefault(position_id, [0, 0.0])
+        echo[0] += 1
+        echo[1] = time.monotonic() + ECHO_TTL
+
+    def _consume_echo(self, position_id: Any) -> bool:
+        echo = self._echoes.get(position_id)
+        if echo is None:
+            return False
+        if echo[1] < time.monotonic():
+            del self._echoes[position_id]
+            return False
+        echo[0] -= 1
+        if echo[0] <= 0:
+            del self._echoes[position_id]
+        return True
+
+    def _insert_local(self, position: dict) -> None:
+        """Insere ou substitui (mesmo ``_id``) — nunca duplica a posição na lista."""
+        existing = self._by_id.get(position["_id"])
+        self._by_id[position["_id"]] = position
+        if existing is not None:
+            self.positions[:] = [position if p is existing else p for p in self.positions]
+            return
+        self.positions.append(position)
+        self.positions.sort(key=lambda p: str(p.get("opened_at", "")))
+
+    def _remove_local(self, position_id: Any) -> dict | None:
+        position = self._by_id.pop(position_id, None)
+        self._dirty.pop(position_id, None)
+        if position is not None:
+            self.positions[:] = [p for p in self.positions if p is not position]
+        return position
+
+    def _merge_local(self, position: dict, doc: dict) -> bool:
+        """Aplica o documento do Mongo no dict local preservando campos sujos."""
+        pending = self._dirty.get(position["_id"], set())
+        changed = False
+        for key, value in doc.items():
+            if key not in pending and position.get(key) != value:
+                position[key] = value
+                changed = True
+        return changed
+
+    # ── Write-through ────────────────────────────────────────────────
+
+    async def load(self) -> list[dict]:
+        """Carga completa das posições abertas (startup)."""
+        cursor = self.collection.find({"status": "open"}).sort("opened_at", 1)
+        docs = await cursor.to_list(self.limit)
+        self.positions[:] = []
+        self._by_id.clear()
+        self._dirty.clear()
+        for doc in docs:
+            self._insert_local(doc)
+        return self.snapshot()
+
+    async def add(self, position: dict) -> dict:
+        # _id gerado antes do insert: o evento do change stream pode chegar
+        # antes de insert_one retornar e precisa ser reconhecido como eco
+        position.setdefault("_id", ObjectId())
+        self._touch(position["_id"])
+        self._expect_echo(position["_id"])
+        result = await self.collection.insert_one(position)
+        position["_id"] = result.inserted_id
+        self._insert_local(position)
+        return position
+
+    async def update(self, position: dict, fields: dict[str, Any]) -> None:
+        """Atualização imediata (ex: ids de OCO)."""
+        position.update(fields)
+        self._touch(position["_id"])
+        self._expect_echo(position["_id"])
+        await self.collection.update_one({"_id": position["_id"]}, {"$set": fields})
+
+    def mark_dirty(self, position: dict, *fields: str) -> None:
+        """Agenda gravação dos ``fields`` (já alterados em memória) no próximo flush."""
+        pending = self._dirty.setdefault(position["_id"], set())
+        if pending:
+            self.stats["coalesced_updates"] += 1
+        pending.update(fields)
+        self._touch(position["_id"])
+
+    async def close(self, position: dict) -> None:
+        """Remove da memória e grava o documento final (status closed)."""
+        self._touch(position["_id"])
+        self._expect_echo(position["_id"])
+        self._remove_local(position["_id"])
+        await self.collection.update_one({"_id": position["_id"]}, {"$set": position})
+
+    async def delete_open(self) -> None:
+        for position_id in list(self._by_id):
+            self._touch(position_id)
+            self._expect_echo(position_id)
+        await self.collection.delete_many({"status": "open"})
+        self.positions[:] = []
+        self._by_id.clear()
+        self._dirty.clear()
+
+    async def flush(self) -> int:
+        """Grava em um ``bulk_write`` os campos sujos de todas as posições."""
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        ops = []
+        for position_id, fields in dirty.items():
+            position = self._by_id.get(position_id)
+            if position is None:
+                continue
+            ops.append(UpdateOne({"_id": position_id}, {"$set": {f: position.get(f) for f in fields}}))
+            self._expect_echo(position_id)
+        if not ops:
+            return 0
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.error("Erro ao gravar lote de posições (%d): %s", len(ops), e)
+            # Devolver para a próxima tentativa sem sobrescrever marcações mais novas
+            for position_id, fields in dirty.items():
+                if position_id in self._by_id:
+                    self._dirty.setdefault(position_id, set()).update(fields)
+            return 0
+        self.stats["flushes"] += 1
+        self.stats["batched_updates"] += len(ops)
+        return len(ops)
+
+    # ── Reconciliação ────────────────────────────────────────────────
+
+    async def reconcile(self) -> int:
+        """Compara com o Mongo e aplica inserções/fechamentos/edições externas."""
+        self._touched = set()
+        try:
+            cursor = self.collection.find({"status": "open"}).sort("opened_at", 1)
+            docs = await cursor.to_list(self.limit)
+            touched = self._touched
+        finally:
+            self._touched = None
+
+        changes = 0
+        remote_ids = set()
+        for doc in docs:
+            remote_ids.add(doc["_id"])
+            if doc["_id"] in touched:
+                continue
+            local = self._by_id.get(doc["_id"])
+            if local is None:
+                self._insert_local(doc)
+                changes += 1
+            elif self._merge_local(local, doc):
+                changes += 1
+        for position_id in list(self._by_id):
+            if position_id not in remote_ids and position_id not in touched:
+                self._remove_local(position_id)
+                changes += 1
+
+        self.stats["reconciles"] += 1
+        if changes:
+            self.stats["external_changes"] += changes
+            logger.info("Posições reconciliadas com o MongoDB: %d alteração(ões) externa(s)", changes)
+        return changes
+
+    def apply_change(self, change: dict) -> None:
+        """Evento de change stream; ecos das próprias escritas são ignorados."""
+        operation = change.get("operationType")
+        position_id = (change.get("documentKey") or {}).get("_id")
+        if self._consume_echo(position_id):
+            return
+        if operation == "delete":
+            if self._remove_local(position_id) is not None:
+                self.stats["external_changes"] += 1
+            return
+        doc = change.get("fullDocument")
+        if not doc:
+            return
+        local = self._by_id.get(doc["_id"])
+        if doc.get("status") != "open":
+            if local is not None:
+                self._remove_local(doc["_id"])
+                self.stats["external_changes"] += 1
+        elif local is None:
+            self._insert_local(doc)
+            self.stats["external_changes"] += 1
+        elif self._merge_local(local, doc):
+            self.stats["external_changes"] += 1
+
+    # ── Tarefas de fundo ─────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._flush_loop(), name="positions_flush"),
+            asyncio.create_task(self._watch(), name="positions_watch"),
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        elapsed = 0.0
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            elapsed += self.flush_interval
+            if elapsed >= self.reconcile_interval and not self.change_stream_active:
+                elapsed = 0.0
+                try:
+                    await self.reconcile()
+                except Exception as e:
+                    logger.warning("Falha na reconciliação de posições: %s", e)
+
+    async def _watch(self) -> None:
+        """Change stream (replica set); sem suporte, fica só a reconciliação periódica."""
+        try:
+            async with self.collection.watch(full_document="updateLookup") as stream:
+                self._echoes.clear()
+                self.change_stream_active = True
+                logger.info("Posições: change stream ativo")
+                async for change in stream:
+                    self.apply_change(change)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info("Posições: change stream indisponível (%s) — reconciliação a cada %.0fs", e, self.reconcile_interval)
+        finally:
+            self.change_stream_active = False
+            self._echoes.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "open": len(self.positions),
+            "pending_writes": len(self._dirty),
+            "change_stream": self.change_stream_active,
+        }
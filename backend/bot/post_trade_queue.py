@@ -0,0 +1,197 @@
+"""
+Post-Trade Queue — fila durável de analytics pós-trade (learners em lote).
+
+O aprendizado (AdvancedLearningSystem, LLM Market Analyzer, Risk Advisor)
+rodava dentro do fechamento, um trade por vez, e se perdia num crash entre o
+fechamento e o fim do processamento.
+
+Durabilidade sem escrita extra no caminho crítico: o trade é gravado em
+``db.trades`` já com ``analytics_pending: True``. A fila em memória entrega
+lotes ao ``process_batch``; o flag só é removido (um ``update_many`` por lote)
+depois que o lote foi processado. No startup, ``recover`` reenfileira os
+trades que ficaram com o flag — entrega *at-least-once*.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PENDING_FIELD = "analytics_pending"
+
+
+def mark_pending(trade: dict) -> dict:
+    """Marca o trade antes do insert em ``db.trades``."""
+    trade[PENDING_FIELD] = True
+    return trade
+
+
+class PostTradeQueue:
+    """Fila em memória + flag persistido no trade; processa em lotes por uma task de fundo."""
+
+    def __init__(
+        self,
+        db,
+        process_batch: Callable[[list[dict]], Awaitable[Any]],
+        batch_size: int | None = None,
+        max_wait: float | None = None,
+        maxsize: int = 10000,
+    ):
+        self.db = db
+        self._process_batch = process_batch
+        self.batch_size = batch_size or int(os.getenv("POST_TRADE_BATCH_SIZE", "20"))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("POST_TRADE_MAX_WAIT", "2.0"))
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._task: asyncio.Task | None = None
+        self._queued_ids: set[Any] = set()
+        self.stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "replayed": 0,
+            "dropped": 0,
+            "ack_errors": 0,
+            "last_batch_size": 0,
+            "last_batch_ms": None,
+            "last_lag_ms": None,
+        }
+
+    # ── Entrada ──────────────────────────────────────────────────────
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, trade: dict) -> bool:
+        """Enfileira um trade fechado (sem await); inicia o worker se necessário."""
+        trade_id = trade.get("_id")
+        if trade_id is not None and trade_id in self._queued_ids:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait((trade, time.perf_counter()))
+        except asyncio.QueueFull:
+            # Continua com o flag no Mongo: volta no próximo recover
+            self.stats["dropped"] += 1
+            logger.error("Fila pós-trade cheia: %s fica para o próximo startup", trade.get("symbol"))
+            return False
+        if trade_id is not None:
+            self._queued_ids.add(trade_id)
+        self.stats["enqueued"] += 1
+        return True
+
+    async def recover(self) -> int:
+        """Reenfileira trades com analytics pendente (crash/parada antes do processamento)."""
+        try:
+            pending = (
+                await self.db.trades.find({PENDING_FIELD: True}).sort("closed_at", 1).to_list(None)
+            )
+        except Exception as e:
+            logger.error("Erro ao recuperar fila pós-trade: %s", e)
+            return 0
+        replayed = sum(1 for trade in pending if self.submit(trade))
+        self.stats["replayed"] += replayed
+        if replayed:
+            logger.info("Fila pós-trade: %d trade(s) pendente(s) reenfileirado(s)", replayed)
+        return replayed
+
+    # ── Worker ───────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._worker(), name="post_trade_analytics")
+
+    async def _next_batch(self) -> list[tuple[dict, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._run_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _run_batch(self, batch: list[tuple[dict, float]]) -> None:
+        trades = [trade for trade, _ in batch]
+        started = time.perf_counter()
+        self.stats["last_lag_ms"] = round((started - batch[0][1]) * 1000, 1)
+        try:
+            await self._process_batch(trades)
+        except Exception as e:
+            # Flag continua no Mongo: o lote volta no próximo recover
+            self.stats["failed_batches"] += 1
+            logger.error("Erro no processamento pós-trade (%d trades): %s", len(trades), e)
+        else:
+            self.stats["batches"] += 1
+            self.stats["processed"] += len(trades)
+            await self._ack(trades)
+        finally:
+            for trade in trades:
+                self._queued_ids.discard(trade.get("_id"))
+            self.stats["last_batch_size"] = len(trades)
+            self.stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def _ack(self, trades: list[dict]) -> None:
+        ids = [trade["_id"] for trade in trades if trade.get("_id") is not None]
+        for trade in trades:
+            trade.pop(PENDING_FIELD, None)
+        if not ids:
+            return
+        try:
+            await self.db.trades.update_many({"_id": {"$in": ids}}, {"$unset": {PENDING_FIELD: ""}})
+        except Exception as e:
+            self.stats["ack_errors"] += 1
+            logger.warning("Erro ao confirmar lote pós-trade (%d): %s", len(ids), e)
+
+    async def drain(self, grace: float = 30.0) -> bool:
+        """Espera a fila esvaziar por até ``grace`` segundos."""
+        if self._task is None:
+            return self._queue.empty()
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=grace)
+            return True
+        except TimeoutError:
+            logger.warning(
+                "Fila pós-trade: %d trade(s) pendente(s) após %.0fs (ficam para o próximo startup)",
+                self._queue.qsize(),
+                grace,
+            )
+            return False
+
+    async def stop(self, grace: float = 30.0) -> None:
+        await self.drain(grace)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        oldest = None
+        if not self._queue.empty():
+            # Fila FIFO: o primeiro item é o mais antigo
+            oldest = round((time.perf_counter() - self._queue._queue[0][1]) * 1000, 1)
+        return {
+            **self.stats,
+            "depth": self.depth,
+            "oldest_pending_ms": oldest,
+            "running": self._task is not None and not self._task.done(),
+        }
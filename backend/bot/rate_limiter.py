@@ -0,0 +1,334 @@
+"""
+Token bucket e orçamento de request weight da exchange.
+
+A Binance limita o REST por peso (REQUEST_WEIGHT, 6000/min no spot): cada
+endpoint custa N unidades. O bucket é compartilhado entre threads; quem não
+tem saldo dorme até o refill cobrir o peso pedido, então o throughput total
+acompanha o limite e não o número de workers.
+
+``RequestBudget`` é o orçamento do bot ao vivo: janela deslizante de 60s com
+o peso de cada endpoint e faixas de prioridade. Ordens e checagens de saída
+(faixa critical) podem usar o orçamento inteiro; scans esperam e o dashboard
+é descartado quando a janela se aproxima do limite.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """Thread-safe token bucket (``capacity`` tokens, refill de ``rate`` tokens/s)."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate deve ser positivo")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "weight": 0.0, "waits": 0, "waited_seconds": 0.0}
+
+    @classmethod
+    def per_minute(cls, weight_per_minute: float, burst: float | None = None) -> TokenBucket:
+        return cls(weight_per_minute / 60.0, burst)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, weight: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= weight:
+                self._tokens -= weight
+                self.stats["acquired"] += 1
+                self.stats["weight"] += weight
+                return True
+            return False
+
+    def acquire(self, weight: float = 1.0, timeout: float | None = None) -> float:
+        """Bloqueia até haver ``weight`` tokens. Retorna segundos esperados.
+
+        Levanta TimeoutError se ``timeout`` expirar antes.
+        """
+        weight = min(weight, self.capacity)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        slept = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    waited = now - started if slept else 0.0
+                    self.stats["acquired"] += 1
+                    self.stats["weight"] += weight
+                    if slept:
+                        self.stats["waits"] += 1
+                        self.stats["waited_seconds"] += waited
+                    return waited
+                delay = (weight - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Sem orçamento para peso {weight} em {timeout}s")
+            time.sleep(delay)
+            slept = True
+
+    def drain(self, seconds: float = 0.0) -> None:
+        """Zera o saldo (ex: após HTTP 429) e opcionalmente adia o refill."""
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = time.monotonic() + seconds
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+# ── Orçamento de request weight (bot ao vivo) ──────────────────────────
+
+LANE_CRITICAL = "critical"    # ordens, cancelamentos, preços de saída
+LANE_SCAN = "scan"            # seletor / estratégia (threads de análise)
+LANE_DASHBOARD = "dashboard"  # rotas da API
+
+# Fração do limite que cada faixa pode ocupar e espera máxima antes do descarte
+LANE_POLICIES = {
+    LANE_CRITICAL: {"share": 1.0, "max_wait": 5.0},
+    LANE_SCAN: {"share": 0.85, "max_wait": 30.0},
+    LANE_DASHBOARD: {"share": 0.7, "max_wait": 0.0},
+}
+
+# Peso por ação do ExchangeManager (Binance spot; ações desconhecidas custam 1)
+ENDPOINT_WEIGHTS = {
+    "fetch_ticker": 2,
+    "fetch_tickers": 80,
+    "fetch_order_book": 5,
+    "fetch_ohlcv": 2,
+    "fetch_balance": 20,
+    "fetch_open_orders": 6,
+    "place_order": 1,
+    "cancel_order": 1,
+    "load_markets": 20,
+}
+ALL_SYMBOLS_WEIGHTS = {"fetch_open_orders": 80}
+
+# Ações que sempre entram na faixa critical, qualquer que seja o contexto
+CRITICAL_ACTIONS = {"place_order", "cancel_order"}
+
+WINDOW_SECONDS = 60.0
+USED_WEIGHT_HEADER = "x-mbx-used-weight-1m"
+
+_current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("request_lane", default=LANE_SCAN)
+
+
+@contextmanager
+def request_lane(lane: str):
+    """Define a faixa das chamadas feitas neste contexto (propaga via asyncio.to_thread)."""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class RequestShed(Exception):
+    """Chamada descartada: sem orçamento para a faixa dentro da espera máxima."""
+
+    def __init__(self, action: str, lane: str):
+        self.action = action
+        self.lane = lane
+        super().__init__(f"{action}: orçamento de request weight esgotado para faixa {lane}")
+
+
+def _on_event_loop() -> bool:
+    """True quando a thread atual está rodando um event loop (dormir aqui trava o loop)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def endpoint_weight(action: str) -> int:
+    """Peso de uma ação no formato do ExchangeManager (``fetch_ticker:BTCUSDT``)."""
+    name, _, target = action.partition(":")
+    if not target and name in ALL_SYMBOLS_WEIGHTS:
+        return ALL_SYMBOLS_WEIGHTS[name]
+    return ENDPOINT_WEIGHTS.get(name, 1)
+
+
+class RequestBudget:
+    """Janela deslizante de request weight com faixas de prioridade (thread-safe)."""
+
+    def __init__(self, weight_per_minute: float, window: float = WINDOW_SECONDS):
+        self.limit = float(weight_per_minute)
+        self.window = float(window)
+        self._events: deque[tuple[float, float]] = deque()
+        self._used = 0.0
+        self._blocked_until = 0.0
+        # Peso informado pela exchange (x-mbx-used-weight-1m) e quando foi lido
+        self._reported = (0.0, 0.0)
+        self._lock = threading.Lock()
+        self.stats = {
+            lane: {"admitted": 0, "weight": 0.0, "delayed": 0, "delayed_seconds": 0.0, "shed": 0}
+            for lane in LANE_POLICIES
+        }
+        self.by_endpoint: dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls) -> RequestBudget:
+        return cls(float(os.getenv("EXCHANGE_WEIGHT_PER_MINUTE", "4800")))
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._events and self._events[0][0] <= cutoff:
+            self._used -= self._events.popleft()[1]
+
+    def _usage(self, now: float) -> float:
+        reported_at, reported = self._reported
+        if now - reported_at < self.window:
+            return max(self._used, reported)
+        return self._used
+
+    def lane_for(self, action: str) -> str:
+        if action.partition(":")[0] in CRITICAL_ACTIONS:
+            return LANE_CRITICAL
+        return _current_lane.get()
+
+    def reserve(self, action: str, lane: str | None = None) -> float:
+        """Registra o peso se a faixa tiver orçamento (retorna 0) ou retorna a espera necessária."""
+        lane = lane or self.lane_for(action)
+        weight = endpoint_weight(action)
+        ceiling = self.limit * LANE_POLICIES[lane]["share"]
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if now < self._blocked_until and lane != LANE_CRITICAL:
+                return self._blocked_until - now
+            # Peso maior que o teto inteiro só passa com a janela vazia
+            if self._usage(now) + weight <= ceiling or (not self._events and weight > ceiling):
+                self._events.append((now, weight))
+                self._used += weight
+                stats = self.stats[lane]
+                stats["admitted"] += 1
+                stats["weight"] += weight
+                name = action.partition(":")[0]
+                self.by_endpoint[name] = self.by_endpoint.get(name, 0.0) + weight
+                return 0.0
+            # Espera até eventos antigos saírem da janela e liberarem o peso
+            excess = self._usage(now) + weight - ceiling
+            freed = 0.0
+            for ts, w in self._events:
+                freed += w
+                if freed >= excess:
+                    return max(ts + self.window - now, 0.01)
+            return self.window
+
+    def _record_wait(self, lane: str, waited: float) -> None:
+        with self._lock:
+            self.stats[lane]["delayed"] += 1
+            self.stats[lane]["delayed_seconds"] += waited
+
+    def _shed(self, action: str, lane: str) -> RequestShed:
+        with self._lock:
+            self.stats[lane]["shed"] += 1
+        return RequestShed(action, lane)
+
+    def acquire(self, action: str) -> float:
+        """Bloqueia (time.sleep) até a faixa ter orçamento; levanta RequestShed após max_wait.
+
+        Chamada síncrona feita de dentro do event loop não dorme: é descartada na
+        hora (quem precisa esperar deve usar ``acquire_async`` ou ``asyncio.to_thread``).
+        """
+        lane = self.lane_for(action)
+        max_wait = LANE_POLICIES[lane]["max_wait"]
+        if _on_event_loop():
+            max_wait = 0.0
+        started = time.monotonic()
+        slept = False
+        while True:
+            delay = self.reserve(action, lane)
+            waited = time.monotonic() - started if slept else 0.0
+            if delay == 0.0:
+                if slept:
+                    self._record_wait(lane, waited)
+                return waited
+            if waited + delay > max_wait:
+                raise self._shed(action, lane)
+            time.sleep(delay)
+            slept = True
+
+    async def acquire_async(self, action: str) -> float:
+        """Mesma política de ``acquire`` esperando com asyncio.sleep."""
+        lane = self.lane_for(action)
+        max_wait = LANE_POLICIES[lane]["max_wait"]
+        started = time.monotonic()
+        slept = False
+        while True:
+            delay = self.reserve(action, lane)
+            waited = time.monotonic() - started if slept else 0.0
+            if delay == 0.0:
+                if slept:
+                    self._record_wait(lane, waited)
+                return waited
+            if waited + delay > max_wait:
+                raise self._shed(action, lane)
+            await asyncio.sleep(delay)
+            slept = True
+
+    def observe_used_weight(self, used: float) -> None:
+        """Peso já consumido segundo a exchange (inclui outros processos na mesma conta/IP)."""
+        with self._lock:
+            self._reported = (time.monotonic(), float(used))
+
+    def observe_headers(self, headers: dict | None) -> None:
+        """Lê ``x-mbx-used-weight-1m`` da última resposta do ccxt, se houver."""
+        if not isinstance(headers, Mapping):
+            return
+        for key, value in headers.items():
+            if key.lower() == USED_WEIGHT_HEADER:
+                try:
+                    self.observe_used_weight(float(value))
+                except (TypeError, ValueError):
+                    pass
+                return
+
+    def penalize(self, seconds: float) -> None:
+        """Após 429/418: só a faixa critical passa durante ``seconds``."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            used = self._usage(now)
+            return {
+                "limit_per_minute": self.limit,
+                "used": round(used, 1),
+                "available": round(max(self.limit - used, 0.0), 1),
+                "utilization_pct": round(used / self.limit * 100, 1) if self.limit else 0.0,
+                "reported_used": self._reported[1] if now - self._reported[0] < self.window else None,
+                "blocked_seconds": round(max(self._blocked_until - now, 0.0), 1),
+                "lanes": {
+                    lane: {**stats, "delayed_seconds": round(stats["delayed_seconds"], 2),
+                           "ceiling": self.limit * LANE_POLICIES[lane]["share"]}
+                    for lane, stats in self.stats.items()
+                },
+                "by_endpoint": dict(self.by_endpoint),
+            }
+
+
+# Orçamento compartilhado pelos clientes sync e async do bot
+request_budget = RequestBudget.from_env()
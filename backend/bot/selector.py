@@ -1,4 +1,5 @@
 import concurrent.futures
+import functools
 import logging
 import time
 
@@ -6,6 +7,7 @@ import pandas as pd
 
 from bot.config import DEFAULT_SELECTOR_BASE_SYMBOLS
 from bot.market_cache import get_price_cache, get_stats_cache
+from bot.market_context import BTC_SYMBOL, CORRELATION_LOOKBACK, MarketContext
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +47,7 @@ class CryptoSelector:
         self._price_cache = get_price_cache()
         self.strategy = strategy
         self.strategy_engine = getattr(strategy, '_engine', None)  # set externally
+        self.ml_filter = None  # set externally (MLSignalFilter)
 
         # Base universe (alta liquidez)
         self.base_symbols = list(base_symbols or DEFAULT_SELECTOR_BASE_SYMBOLS)
@@ -140,21 +143,25 @@ class CryptoSelector:
         if max_spread_percent is not None:
             self.max_spread_percent = max(0.0, float(max_spread_percent))
 
-    def _analyze_candidate(self, symbol: str) -> dict | None:
+    def _analyze_candidate(self, symbol: str, context: MarketContext | None = None) -> dict | None:
         """Analisa um único símbolo; retorna None se filtrado ou HOLD."""
         # SKIP liquidity filter temporarily — let strategy decide
         # if not self._passes_liquidity_filters(symbol):
         #     logger.info("%s filtrado por spread/volume insuficiente", symbol)
         #     return None
 
-        analysis = self.strategy.analyze_symbol(symbol)
+        if symbol == BTC_SYMBOL and context is not None and isinstance(context.btc_analysis, dict):
+            # BTC já foi analisado ao montar o contexto do ciclo
+            analysis = dict(context.btc_analysis)
+        else:
+            analysis = self.strategy.analyze_symbol(symbol, context=context)
         if not analysis or analysis["signal"] == "HOLD":
             # Fallback: try StrategyEngine for non-trending strategies
             if self.strategy_engine is not None:
                 try:
                     df = self.strategy.get_historical_data(symbol)
                     if df is not None and len(df) >= 50:
-                        df = self.strategy.calculate_indicators(df)
+                        df = self.strategy.calculate_indicators(df, symbol=symbol)
                         signals = self.strategy_engine.analyze_symbol(symbol, df)
                         if signals:
                             best = signals[0]
@@ -207,11 +214,14 @@ class CryptoSelector:
             analysis["score"] += min(trending_info[0], 5)  # cap bonus
         return analysis
 
-    def select_best_crypto(self, excluded_symbols: list[str] | None = None) -> dict | None:
+    def select_best_crypto(
+        self, excluded_symbols: list[str] | None = None, context: MarketContext | None = None
+    ) -> dict | None:
         """Select the best cryptocurrency to trade.
 
         Analisa os símbolos em paralelo (ThreadPoolExecutor, max 4 workers)
-        respeitando os limites de hardware do Dell E7450.
+        respeitando os limites de hardware do Dell E7450. O snapshot do BTC
+        (``context``) é montado uma vez por scan e compartilhado pelas análises.
         """
         try:
             if excluded_symbols is None:
@@ -219,12 +229,19 @@ class CryptoSelector:
 
             self._refresh_trending_symbols()
 
+            if context is None:
+                try:
+                    context = self.strategy.build_market_context()
+                except Exception as e:
+                    logger.warning("Falha ao montar contexto de mercado: %s", e)
+
             symbols_to_check = [s for s in self.symbols if s not in excluded_symbols]
 
             # Análise paralela — max_workers=4 respeita os 4 threads do E7450
             candidates: list[dict] = []
             with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
-                for result in pool.map(self._analyze_candidate, symbols_to_check):
+                analyze = functools.partial(self._analyze_candidate, context=context)
+                for result in pool.map(analyze, symbols_to_check):
                     if result is not None:
                         candidates.append(result)
 
@@ -233,6 +250,7 @@ class CryptoSelector:
                 return None
 
             candidates.sort(key=lambda x: x["score"], reverse=True)
+            candidates = self._apply_ml_filter(candidates)
             best = candidates[0]
             logger.info("Best opportunity: %s with score %.2f", best["symbol"], best["score"])
             return best
@@ -241,6 +259,33 @@ class CryptoSelector:
             logger.error("Error selecting crypto: %s", e)
             return None
 
+    def _apply_ml_filter(self, candidates: list[dict]) -> list[dict]:
+        """Pontua todos os candidatos numa única chamada ao modelo ML.
+
+        Anota ml_approved/ml_confidence/ml_reason em cada candidato e coloca
+        os aprovados na frente (mantendo a ordem por score). Se nenhum passar,
+        o melhor por score segue adiante já marcado como rejeitado.
+        """
+        ml_filter = self.ml_filter
+        if ml_filter is None or not getattr(ml_filter, "loaded", False):
+            return candidates
+
+        decisions = ml_filter.score_batch(candidates)
+        for candidate in candidates:
+            decision = decisions.get(candidate["symbol"])
+            if decision is None:
+                continue
+            candidate["ml_approved"], candidate["ml_confidence"], candidate["ml_reason"] = decision
+
+        stats = ml_filter.stats
+        logger.info(
+            "[ML Filter] %d/%d candidatos aprovados em %.1fms",
+            sum(1 for c in candidates if c.get("ml_approved")),
+            len(candidates),
+            stats.get("last_batch_ms") or 0.0,
+        )
+        return sorted(candidates, key=lambda c: not c.get("ml_approved", True))
+
     def _calculate_score(self, analysis: dict) -> float:
         """Calculate opportunity score"""
         score = 0.0
@@ -264,7 +309,7 @@ class CryptoSelector:
 
         return score
 
-    def _passes_liquidity_filters(self, symbol: str) -> bool:
+    def _passes_liquidity_filters(self, symbol: str, context: MarketContext | None = None) -> bool:
         """Filtra pares com spread alto ou volume baixo no timeframe configurado.
 
         MELHORIA: Filtro dinâmico que ajusta limites baseado na volatilidade do mercado.
@@ -279,7 +324,10 @@ class CryptoSelector:
                     return False
 
             # MELHORIA: Detectar regime de mercado para ajustar filtros
-            regime = self.strategy.detect_market_regime()
+            if context is not None:
+                regime = context.btc_regime
+            else:
+                regime = self.strategy.detect_market_regime()
             volatility_multiplier = 1.0
 
             if regime.get("regime") == "volatile":
@@ -339,22 +387,29 @@ class CryptoSelector:
 
             # MELHORIA: Verificar correlação com BTC se for alt
             if "BTC" not in symbol:
-                btc_correlation = self.strategy.calculate_btc_correlation(symbol)
-                regime_data = self.strategy.detect_market_regime(symbol="BTCUSDT")
+                if context is not None:
+                    btc_correlation = context.correlation(
+                        symbol, self.strategy.get_historical_data(symbol, limit=CORRELATION_LOOKBACK)
+                    )
+                    btc_falling = context.btc_bearish
+                else:
+                    btc_correlation = self.strategy.calculate_btc_correlation(symbol)
+                    regime_data = self.strategy.detect_market_regime(symbol="BTCUSDT")
+                    btc_falling = False
+                    if regime_data.get("regime") == "trending":
+                        # Analisar direção do BTC
+                        btc_df = self.strategy.get_historical_data("BTCUSDT", limit=20)
+                        if btc_df is not None:
+                            btc_falling = btc_df["close"].iloc[-1] < btc_df["close"].iloc[-5]  # Caindo
 
                 # Se BTC está bearish e alta correlação, penalizar (mas não rejeitar)
-                if btc_correlation > 0.7 and regime_data.get("regime") == "trending":
-                    # Analisar direção do BTC
-                    btc_df = self.strategy.get_historical_data("BTCUSDT", limit=20)
-                    if btc_df is not None:
-                        btc_trend = btc_df["close"].iloc[-1] < btc_df["close"].iloc[-5]  # Caindo
-                        if btc_trend:
-                            logger.info(
-                                "%s: Alta correlação BTC (%.2f) e BTC caindo - cuidado",
-                                symbol,
-                                btc_correlation,
-                            )
-                            # Não rejeita, mas o score será penalizado
+                if btc_correlation > 0.7 and btc_falling:
+                    logger.info(
+                        "%s: Alta correlação BTC (%.2f) e BTC caindo - cuidado",
+                        symbol,
+                        btc_correlation,
+                    )
+                    # Não rejeita, mas o score será penalizado
 
             return True
         except Exception as exc:
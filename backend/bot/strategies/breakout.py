@@ -190,6 +190,12 @@ class BreakoutStrategy(BaseStrategy):
             logger.error("BreakoutStrategy error on %s: %s", symbol, e)
             return None
 
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self._add_donchian(super().precompute(df))
+
+    def precompute_key(self) -> tuple:
+        return (self.donchian_period,)
+
     def _add_donchian(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add Donchian channel columns."""
         if "donchian_upper" not in df.columns:
@@ -15,6 +15,8 @@ from __future__ import annotations
 import logging
 import os
 import pickle
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -22,11 +24,13 @@ import numpy as np
 import pandas as pd
 
 from bot.strategy_engine import BaseStrategy, MarketRegime, StrategySignal
+from ml.model_registry import ModelRegistry
 
 logger = logging.getLogger(__name__)
 
 MODEL_DIR = Path(__file__).resolve().parent.parent.parent / "ml" / "models"
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
+MODEL_NAME = "ml_primary_strategy"
 
 
 class MLPrimaryStrategy(BaseStrategy):
@@ -52,11 +56,22 @@ class MLPrimaryStrategy(BaseStrategy):
         self.feature_lookback = feature_lookback
         self._model = None
         self._last_train_time: datetime | None = None
+        # Versions live in the local registry (manifest.json, no Mongo needed)
+        self._registry = ModelRegistry()
+        self._model_digest: str | None = None
+        self._reload_thread: threading.Thread | None = None
+        self.batch_stats = {"batches": 0, "rows": 0, "last_size": 0, "last_ms": None, "max_ms": 0.0}
         self._load_or_init_model()
 
     def _load_or_init_model(self):
-        """Load existing model or initialize a new one."""
-        model_path = MODEL_DIR / "ml_primary_strategy.pkl"
+        """Load the latest registry version (or the legacy pickle) if there is one."""
+        try:
+            if self._load_latest():
+                return
+        except Exception as e:
+            logger.warning("Failed to load ML model from registry: %s", e)
+
+        model_path = MODEL_DIR / f"{MODEL_NAME}.pkl"
         if model_path.exists():
             try:
                 with open(model_path, "rb") as f:
@@ -70,97 +85,162 @@ class MLPrimaryStrategy(BaseStrategy):
         else:
             logger.info("No existing ML model — will use heuristic until trained")
 
-    def analyze(self, symbol: str, df: pd.DataFrame, regime: MarketRegime) -> StrategySignal | None:
-        try:
-            if len(df) < self.feature_lookback:
-                return None
+    def _load_latest(self) -> bool:
+        """Deserialize the newest registry version and swap it in; False if none or unchanged."""
+        version = self._registry.latest(MODEL_NAME)
+        if version is None or version.digest == self._model_digest:
+            return False
+        data = pickle.loads(self._registry.load(version)["model"])
+        # Single attribute assignments: in-flight batches keep the model they started with
+        self._model, self._last_train_time = data.get("model"), data.get("trained_at")
+        self._model_digest = version.digest
+        logger.info("Loaded ML model v%d trained at %s", version.version, self._last_train_time)
+        return True
+
+    def reload_model(self) -> bool:
+        """Load a newer registry version in a background thread; False if one is already running."""
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return False
 
-            df = self._ensure_indicators(df)
-            latest = df.iloc[-1]
-            price = float(latest["close"])
-            atr = float(latest.get("atr", 0)) or price * 0.01
+        def _reload():
+            try:
+                self._load_latest()
+            except Exception as e:
+                logger.warning("ML model reload failed: %s", e)
 
-            # Extract features
-            features = self._extract_features(df)
-            if features is None:
-                return None
+        self._reload_thread = threading.Thread(target=_reload, name="ml-primary-reload", daemon=True)
+        self._reload_thread.start()
+        return True
 
-            # Get prediction
-            if self._model is not None:
-                try:
-                    X = np.array(list(features.values())).reshape(1, -1)
-                    proba = self._model.predict_proba(X)[0]
-                    # Map probabilities to classes
-                    classes = self._model.classes_
-                    prediction = classes[np.argmax(proba)]
-                    confidence = float(np.max(proba))
-                except Exception as e:
-                    logger.warning("ML prediction failed: %s", e)
-                    prediction, confidence = self._heuristic_prediction(df)
-            else:
-                prediction, confidence = self._heuristic_prediction(df)
+    def analyze(self, symbol: str, df: pd.DataFrame, regime: MarketRegime) -> StrategySignal | None:
+        return self.analyze_batch([(symbol, df, regime)]).get(symbol)
+
+    def analyze_batch(
+        self, items: list[tuple[str, pd.DataFrame, MarketRegime]]
+    ) -> dict[str, StrategySignal | None]:
+        """Analyze many symbols with a single predict_proba call over the stacked features."""
+        results: dict[str, StrategySignal | None] = {}
+        prepared = []
+        for symbol, df, regime in items:
+            results[symbol] = None
+            try:
+                if len(df) < self.feature_lookback:
+                    continue
+                df = self._ensure_indicators(df)
+                features = self._extract_features(df)
+                if features is None:
+                    continue
+                prepared.append((symbol, df, regime, features))
+            except Exception as e:
+                logger.error("MLPrimaryStrategy error on %s: %s", symbol, e)
 
-            if prediction == 0 or confidence < self.model_confidence_threshold:
-                return None
+        if not prepared:
+            return results
 
-            signal = "BUY" if prediction == 1 else "SELL"
+        predictions = self._predict_batch([p[3] for p in prepared], [p[1] for p in prepared])
+        for (symbol, df, regime, features), (prediction, confidence) in zip(prepared, predictions, strict=True):
+            try:
+                results[symbol] = self._build_signal(symbol, df, regime, features, prediction, confidence)
+            except Exception as e:
+                logger.error("MLPrimaryStrategy error on %s: %s", symbol, e)
+        return results
+
+    def _predict_batch(self, features: list[dict], frames: list[pd.DataFrame]) -> list[tuple[int, float]]:
+        """(prediction, confidence) per row; heuristic fallback when no model or on failure."""
+        model = self._model  # snapshot: a reload may swap self._model mid-batch
+        if model is not None:
+            started = time.perf_counter()
+            try:
+                X = np.array([list(f.values()) for f in features])
+                proba = model.predict_proba(X)
+                # Map probabilities to classes
+                classes = model.classes_
+                best = np.argmax(proba, axis=1)
+                out = [(classes[b], float(p[b])) for b, p in zip(best, proba, strict=True)]
+                self._record_batch(len(features), (time.perf_counter() - started) * 1000)
+                return out
+            except Exception as e:
+                logger.warning("ML prediction failed: %s", e)
+        return [self._heuristic_prediction(df) for df in frames]
+
+    def _record_batch(self, size: int, elapsed_ms: float) -> None:
+        stats = self.batch_stats
+        stats["batches"] += 1
+        stats["rows"] += size
+        stats["last_size"] = size
+        stats["last_ms"] = round(elapsed_ms, 2)
+        stats["max_ms"] = round(max(stats["max_ms"], elapsed_ms), 2)
+
+    def _build_signal(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        regime: MarketRegime,
+        features: dict,
+        prediction: int,
+        confidence: float,
+    ) -> StrategySignal | None:
+        if prediction == 0 or confidence < self.model_confidence_threshold:
+            return None
 
-            # Score = confidence * 100 + technical alignment bonus
-            score = confidence * 60
+        latest = df.iloc[-1]
+        price = float(latest["close"])
+        atr = float(latest.get("atr", 0)) or price * 0.01
 
-            # Technical alignment
-            rsi = float(latest.get("rsi", 50)) if not pd.isna(latest.get("rsi", np.nan)) else 50.0
-            ema_fast = latest.get("ema_fast")
-            ema_slow = latest.get("ema_slow")
+        signal = "BUY" if prediction == 1 else "SELL"
 
-            if signal == "BUY" and rsi < 50: score += 15
-            elif signal == "SELL" and rsi > 50: score += 15
+        # Score = confidence * 100 + technical alignment bonus
+        score = confidence * 60
 
-            if ema_fast and ema_slow and not pd.isna(ema_fast) and not pd.isna(ema_slow):
-                if signal == "BUY" and ema_fast > ema_slow: score += 10
-                elif signal == "SELL" and ema_fast < ema_slow: score += 10
+        # Technical alignment
+        rsi = float(latest.get("rsi", 50)) if not pd.isna(latest.get("rsi", np.nan)) else 50.0
+        ema_fast = latest.get("ema_fast")
+        ema_slow = latest.get("ema_slow")
 
-            # Volume confirmation
-            vol_ratio = features.get("volume_ratio", 1.0)
-            if vol_ratio > 1.2: score += 10
+        if signal == "BUY" and rsi < 50: score += 15
+        elif signal == "SELL" and rsi > 50: score += 15
 
-            # Regime alignment
-            if signal == "BUY" and regime.direction == "up": score += 5
-            elif signal == "SELL" and regime.direction == "down": score += 5
-            elif regime.regime == "volatile": score += 5  # ML shines in volatility
+        if ema_fast and ema_slow and not pd.isna(ema_fast) and not pd.isna(ema_slow):
+            if signal == "BUY" and ema_fast > ema_slow: score += 10
+            elif signal == "SELL" and ema_fast < ema_slow: score += 10
 
-            if score < self.min_score:
-                return None
+        # Volume confirmation
+        vol_ratio = features.get("volume_ratio", 1.0)
+        if vol_ratio > 1.2: score += 10
 
-            # Stop loss / take profit
-            if signal == "BUY":
-                sl = price - atr * 2.0
-                tp = price + atr * 3.5
-            else:
-                sl = price + atr * 2.0
-                tp = price - atr * 3.5
-
-            return StrategySignal(
-                strategy_name=self.name,
-                symbol=symbol,
-                signal=signal,
-                score=min(score, 100),
-                confidence=confidence,
-                entry_price=price,
-                stop_loss=sl,
-                take_profit=tp,
-                regime=regime,
-                metadata={
-                    "ml_confidence": round(confidence, 3),
-                    "ml_prediction": prediction,
-                    "feature_count": len(features),
-                },
-            )
+        # Regime alignment
+        if signal == "BUY" and regime.direction == "up": score += 5
+        elif signal == "SELL" and regime.direction == "down": score += 5
+        elif regime.regime == "volatile": score += 5  # ML shines in volatility
 
-        except Exception as e:
-            logger.error("MLPrimaryStrategy error on %s: %s", symbol, e)
+        if score < self.min_score:
             return None
 
+        # Stop loss / take profit
+        if signal == "BUY":
+            sl = price - atr * 2.0
+            tp = price + atr * 3.5
+        else:
+            sl = price + atr * 2.0
+            tp = price - atr * 3.5
+
+        return StrategySignal(
+            strategy_name=self.name,
+            symbol=symbol,
+            signal=signal,
+            score=min(score, 100),
+            confidence=confidence,
+            entry_price=price,
+            stop_loss=sl,
+            take_profit=tp,
+            regime=regime,
+            metadata={
+                "ml_confidence": round(confidence, 3),
+                "ml_prediction": prediction,
+                "feature_count": len(features),
+            },
+        )
+
     def _extract_features(self, df: pd.DataFrame) -> dict | None:
         """Extract 20+ features for ML model."""
         try:
@@ -307,12 +387,15 @@ class MLPrimaryStrategy(BaseStrategy):
             self._model = ensemble
             self._last_train_time = datetime.now(timezone.utc)
 
-            # Save model
-            model_path = MODEL_DIR / "ml_primary_strategy.pkl"
-            with open(model_path, "wb") as f:
-                pickle.dump({"model": ensemble, "trained_at": self._last_train_time}, f)
+            # Publish a new registry version
+            version = self._registry.publish(
+                MODEL_NAME,
+                {"model": pickle.dumps({"model": ensemble, "trained_at": self._last_train_time})},
+                metrics={"trained_at": self._last_train_time.isoformat(), "samples": len(X)},
+            )
+            self._model_digest = version.digest
 
-            logger.info("ML model trained on %d trades — saved to %s", len(X), model_path)
+            logger.info("ML model trained on %d trades — saved as v%d", len(X), version.version)
             return True
 
         except Exception as e:
@@ -5,7 +5,10 @@ import pandas as pd
 import talib
 from binance.client import Client
 
+from bot.indicator_engine import IndicatorEngine
+from bot.kline_store import KlineStore
 from bot.market_cache import get_cache
+from bot.market_context import BTC_SYMBOL, CORRELATION_LOOKBACK, MarketContext, returns_correlation
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,10 @@ class TradingStrategy:
         self.confirmation_timeframe = confirmation_timeframe or "1h"
         self.limit = max(10, int(limit or 200))
         self.cache = get_cache()  # Cache com TTL de 5 segundos
+        # Estado incremental dos indicadores por (symbol, timeframe)
+        self.indicator_engine = IndicatorEngine()
+        # Histórico de candles por (symbol, timeframe) com fetch incremental
+        self.kline_store = KlineStore(client)
         self.min_signal_strength = max(0, min(100, int(min_signal_strength)))
         self.activation_threshold = max(3.0, float(activation_threshold))
 
@@ -46,42 +53,23 @@ class TradingStrategy:
         O cache armazena sempre _KLINES_CACHE_SIZE candles. Chamadas com limit
         menor (ex: limit=20 para LLM, limit=30 para ATR) reutilizam a mesma
         entrada de cache e recebem df.tail(limit), evitando chamadas duplicadas à API.
+        No cache miss, o KlineStore baixa apenas o delta desde o último candle.
         """
         try:
             timeframe = timeframe or self.timeframe
             requested_limit = limit or self.limit
             # Chave de cache sem limit — sempre usamos o tamanho máximo
             cache_key = f"klines_{symbol}_{timeframe}"
-            cached_data = self.cache.get(cache_key)
-
-            if cached_data is not None:
-                logger.debug("Cache HIT para %s", symbol)
-                return cached_data.tail(requested_limit).reset_index(drop=True)
-
-            # Cache miss - buscar da API com tamanho máximo
             fetch_limit = max(requested_limit, self._KLINES_CACHE_SIZE)
-            logger.debug("Cache MISS para %s - buscando da API (limit=%d)", symbol, fetch_limit)
-            klines = self.client.get_klines(symbol, timeframe=timeframe, limit=fetch_limit)
-
-            df = pd.DataFrame(
-                klines,
-                columns=[
-                    "timestamp",
-                    "open",
-                    "high",
-                    "low",
-                    "close",
-                    "volume",
-                ],
-            )
 
-            df["close"] = pd.to_numeric(df["close"])
-            df["high"] = pd.to_numeric(df["high"])
-            df["low"] = pd.to_numeric(df["low"])
-            df["volume"] = pd.to_numeric(df["volume"])
-
-            # Armazenar o DataFrame completo no cache (TTL: 5 segundos)
-            self.cache.set(cache_key, df)
+            # Cache miss - KlineStore busca só os candles novos desde o último armazenado.
+            # get_or_set é single-flight: threads do seletor que erram a mesma chave
+            # ao mesmo tempo compartilham um único fetch (TTL: 5 segundos)
+            df = self.cache.get_or_set(
+                cache_key, lambda: self.kline_store.get_frame(symbol, timeframe, fetch_limit)
+            )
+            if df is None:
+                return None
 
             return df.tail(requested_limit).reset_index(drop=True)
 
@@ -89,12 +77,18 @@ class TradingStrategy:
             logger.error("Error getting historical data for %s: %s", symbol, e)
             return None
 
-    def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+    def calculate_indicators(
+        self, df: pd.DataFrame, symbol: str | None = None, timeframe: str | None = None
+    ) -> pd.DataFrame:
         """Calculate technical indicators (idempotente).
 
         Retorna o DataFrame com indicadores calculados.
         Em caso de dados insuficientes para algum indicador,
         loga warning específico e continua com os demais.
+
+        Com ``symbol`` informado (e coluna timestamp), usa o IndicatorEngine:
+        só os candles novos / o candle em formação são processados. Sem symbol,
+        ou se o engine não puder atender o df, recalcula tudo via TA-Lib.
         """
         try:
             required_cols = [
@@ -125,6 +119,11 @@ class TradingStrategy:
                 )
                 return df
 
+            if symbol and self._apply_incremental_indicators(
+                df, symbol, timeframe or self.timeframe
+            ):
+                return df
+
             close = df["close"].values
             high = df["high"].values
             low = df["low"].values
@@ -191,28 +190,7 @@ class TradingStrategy:
                 logger.warning("Erro ao calcular Momentum: %s", e)
                 df["momentum"] = np.nan
 
-            # MELHORIA: Calcular % de volume de compradores (taker buy)
-            try:
-                if "taker_buy_quote" in df.columns and "quote_volume" in df.columns:
-                    taker_buy = pd.to_numeric(df["taker_buy_quote"], errors="coerce")
-                    quote_vol = pd.to_numeric(df["quote_volume"], errors="coerce").replace(
-                        0, np.nan
-                    )
-                    df["buy_volume_pct"] = (taker_buy / quote_vol).fillna(0.5)
-                    df["buy_volume_ma"] = df["buy_volume_pct"].rolling(10).mean()
-                else:
-                    df["buy_volume_pct"] = 0.5
-                    df["buy_volume_ma"] = 0.5
-            except Exception as e:
-                logger.warning("Erro ao calcular buy volume pct: %s", e)
-                df["buy_volume_pct"] = 0.5
-                df["buy_volume_ma"] = 0.5
-
-            # VWAP (não usa TA-Lib)
-            typical_price = (df["high"] + df["low"] + df["close"]) / 3
-            cumulative_volume = df["volume"].cumsum()
-            cumulative_price_volume = (typical_price * df["volume"]).cumsum()
-            df["vwap"] = (cumulative_price_volume / cumulative_volume.replace(0, np.nan)).ffill()
+            self._add_window_indicators(df)
 
             return df
 
@@ -220,6 +198,49 @@ class TradingStrategy:
             logger.error("Error calculating indicators: %s", e)
             return df
 
+    def _apply_incremental_indicators(self, df: pd.DataFrame, symbol: str, timeframe: str) -> bool:
+        """Preenche df com os indicadores do IndicatorEngine. False = usar batch."""
+        if "timestamp" not in df.columns:
+            return False
+        try:
+            columns = self.indicator_engine.sync(symbol, timeframe, df)
+        except Exception as e:
+            logger.warning("Indicadores incrementais falharam para %s %s: %s", symbol, timeframe, e)
+            self.indicator_engine.reset(symbol, timeframe)
+            return False
+        if columns is None:
+            return False
+
+        for name, values in columns.items():
+            df[name] = values
+        self._add_window_indicators(df)
+        return True
+
+    def _add_window_indicators(self, df: pd.DataFrame) -> None:
+        """Indicadores relativos à janela do df (buy volume, VWAP acumulado)."""
+        # MELHORIA: Calcular % de volume de compradores (taker buy)
+        try:
+            if "taker_buy_quote" in df.columns and "quote_volume" in df.columns:
+                taker_buy = pd.to_numeric(df["taker_buy_quote"], errors="coerce")
+                quote_vol = pd.to_numeric(df["quote_volume"], errors="coerce").replace(
+                    0, np.nan
+                )
+                df["buy_volume_pct"] = (taker_buy / quote_vol).fillna(0.5)
+                df["buy_volume_ma"] = df["buy_volume_pct"].rolling(10).mean()
+            else:
+                df["buy_volume_pct"] = 0.5
+                df["buy_volume_ma"] = 0.5
+        except Exception as e:
+            logger.warning("Erro ao calcular buy volume pct: %s", e)
+            df["buy_volume_pct"] = 0.5
+            df["buy_volume_ma"] = 0.5
+
+        # VWAP (não usa TA-Lib)
+        typical_price = (df["high"] + df["low"] + df["close"]) / 3
+        cumulative_volume = df["volume"].cumsum()
+        cumulative_price_volume = (typical_price * df["volume"]).cumsum()
+        df["vwap"] = (cumulative_price_volume / cumulative_volume.replace(0, np.nan)).ffill()
+
     # Cache de correlações: {symbol: (valor, timestamp)}
     _btc_correlation_cache: dict[str, tuple] = {}
     _BTC_CORRELATION_TTL = 300  # 5 minutos — correlação muda lentamente
@@ -252,17 +273,8 @@ class TradingStrategy:
             if symbol_df is None or btc_df is None or len(symbol_df) < 10 or len(btc_df) < 10:
                 return 0.5  # Default neutro
 
-            # Calcular returns
-            symbol_returns = symbol_df["close"].pct_change().dropna()
             btc_returns = btc_df["close"].pct_change().dropna()
-
-            # Alinhar tamanhos
-            min_len = min(len(symbol_returns), len(btc_returns))
-            symbol_returns = symbol_returns.tail(min_len)
-            btc_returns = btc_returns.tail(min_len)
-
-            correlation = symbol_returns.corr(btc_returns)
-            result = float(correlation) if not pd.isna(correlation) else 0.5
+            result = returns_correlation(symbol_df["close"], btc_returns)
 
             self._btc_correlation_cache[symbol] = (result, now)
             return result
@@ -271,6 +283,25 @@ class TradingStrategy:
             logger.warning("Erro ao calcular correlação BTC para %s: %s", symbol, e)
             return 0.5
 
+    def build_market_context(self, lookback: int = CORRELATION_LOOKBACK) -> MarketContext:
+        """Snapshot do BTC (regime, tendência, retornos, análise) para um ciclo de scan."""
+        regime = self.detect_market_regime(symbol=BTC_SYMBOL)
+        btc_df = self.get_historical_data(BTC_SYMBOL, limit=max(lookback, 20))
+
+        btc_bearish = False
+        btc_returns = None
+        if btc_df is not None and len(btc_df) >= 5:
+            if regime.get("regime") == "trending":
+                btc_bearish = bool(btc_df["close"].iloc[-1] < btc_df["close"].iloc[-5])
+            btc_returns = btc_df["close"].tail(lookback).pct_change().dropna()
+
+        return MarketContext(
+            btc_regime=regime,
+            btc_bearish=btc_bearish,
+            btc_returns=btc_returns,
+            btc_analysis=self.analyze_symbol(BTC_SYMBOL),
+        )
+
     def detect_market_regime(self, df: pd.DataFrame = None, symbol: str = "BTCUSDT") -> dict:
         """
         Detecta regime atual do mercado.
@@ -282,13 +313,14 @@ class TradingStrategy:
             - 'volatile': Alta volatilidade, aumentar SL
         """
         try:
-            if df is None:
+            fetched = df is None
+            if fetched:
                 df = self.get_historical_data(symbol, limit=50)
 
             if df is None or len(df) < 30:
                 return {"regime": "unknown", "can_trade": True}
 
-            df = self.calculate_indicators(df)
+            df = self.calculate_indicators(df, symbol=symbol if fetched else None)
 
             # ADX para força da tendência
             adx = talib.ADX(df["high"].values, df["low"].values, df["close"].values, timeperiod=14)
@@ -1008,14 +1040,18 @@ class TradingStrategy:
             logger.error("Error generating signal: %s", e)
             return {"signal": "HOLD", "strength": 0}
 
-    def analyze_symbol(self, symbol: str) -> dict | None:
-        """Complete analysis of a symbol"""
+    def analyze_symbol(self, symbol: str, context: MarketContext | None = None) -> dict | None:
+        """Complete analysis of a symbol.
+
+        Com ``context`` (montado uma vez por scan), regime/tendência/retornos do
+        BTC vêm do snapshot em vez de serem recalculados para cada símbolo.
+        """
         try:
             df = self.get_historical_data(symbol)
             if df is None or len(df) == 0:
                 return None
 
-            df = self.calculate_indicators(df)
+            df = self.calculate_indicators(df, symbol=symbol)
             volume_ma = df["volume"].rolling(window=20).mean().iloc[-1]
             current_volume = df["volume"].iloc[-1]
             volume_ma_value = float(volume_ma) if not np.isnan(volume_ma) else 0.0
@@ -1025,7 +1061,9 @@ class TradingStrategy:
                 symbol, timeframe=self.confirmation_timeframe, limit=300
             )
             if higher_df is not None and len(higher_df) > 0:
-                higher_df = self.calculate_indicators(higher_df)
+                higher_df = self.calculate_indicators(
+                    higher_df, symbol=symbol, timeframe=self.confirmation_timeframe
+                )
             else:
                 higher_df = None
 
@@ -1034,7 +1072,10 @@ class TradingStrategy:
             # MELHORIA: Calcular score unificado com penalidade BTC
             btc_correlation = 0.0
             btc_bearish = False
-            if "BTC" not in symbol:
+            if "BTC" not in symbol and context is not None:
+                btc_correlation = context.correlation(symbol, df)
+                btc_bearish = context.btc_bearish
+            elif "BTC" not in symbol:
                 btc_correlation = self.calculate_btc_correlation(symbol)
                 regime_data = self.detect_market_regime(symbol="BTCUSDT")
                 if regime_data.get("regime") == "trending":
@@ -1078,6 +1119,7 @@ class TradingStrategy:
                 "risk_reward": signal_data.get("risk_reward"),
                 "atr": signal_data.get("atr"),
                 "momentum": momentum_value,
+                "btc_correlation": btc_correlation if "BTC" not in symbol else 1.0,
                 "timeframe": self.timeframe,
                 "confirmation_timeframe": self.confirmation_timeframe,
             }
@@ -155,6 +155,19 @@ class BaseStrategy(ABC):
         """Subclasses can override to add custom indicators. Default: pass-through."""
         return df
 
+    def precompute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add, once for the whole series, every column analyze() derives from df.
+
+        Used by the vectorized backtest: columns must be causal (row i only
+        depends on rows <= i) so a prefix view sees the same values analyze()
+        would compute on that prefix. Existing columns are left untouched.
+        """
+        return self._ensure_indicators(df)
+
+    def precompute_key(self) -> tuple:
+        """Constructor params that change precompute() output (cache key)."""
+        return ()
+
     def _ensure_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Ensure standard indicators exist on the DataFrame."""
         if len(df) < 26:
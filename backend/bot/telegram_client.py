@@ -8,6 +8,8 @@ import requests
 from aiohttp import ClientConnectorCertificateError
 from requests.exceptions import SSLError
 
+from bot.telegram_dispatcher import KIND_ALERT, KIND_OBSERVING, KIND_STATUS, TelegramDispatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +19,10 @@ class TelegramNotifier:
         self.chat_id = os.getenv("TELEGRAM_CHAT_ID", "").strip()
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
         self._session = None
+        self._http = None
         self.verify_ssl = True
+        # Envio async passa por uma fila (enfileirar nunca bloqueia o bot)
+        self.dispatcher = TelegramDispatcher(self._post_async)
 
     # ------------------------------------------------------------------
     # Message builders (shared by sync/async senders to avoid duplication)
@@ -197,7 +202,14 @@ class TelegramNotifier:
         return message
 
     async def close(self):
-        """Dispose internal HTTP session (useful for reloads/shutdown)"""
+        """Flush pending messages and dispose HTTP sessions (reloads/shutdown)"""
+        await self.dispatcher.close()
+        await self._close_session()
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    async def _close_session(self):
         if self._session:
             await self._session.close()
             self._session = None
@@ -227,7 +239,10 @@ class TelegramNotifier:
             url = f"{self.base_url}/sendMessage"
             payload = {"chat_id": self.chat_id, "text": message, "parse_mode": "HTML"}
 
-            response = requests.post(url, json=payload, timeout=10, verify=self.verify_ssl)
+            # Sessão requests reaproveitada (keep-alive) entre chamadas síncronas
+            if self._http is None:
+                self._http = requests.Session()
+            response = self._http.post(url, json=payload, timeout=10, verify=self.verify_ssl)
             if response.status_code != 200:
                 logger.warning(
                     "Telegram HTTP %s - Body: %s", response.status_code, response.text[:200]
@@ -259,12 +274,18 @@ class TelegramNotifier:
         connector = aiohttp.TCPConnector(ssl=ssl_context)
         return aiohttp.ClientSession(connector=connector)
 
-    async def send_message_async(self, message, _retry_on_ssl_error=True):
-        """Send a message to Telegram (async non-blocking)"""
+    async def send_message_async(self, message, kind=KIND_ALERT):
+        """Enqueue a message to Telegram (returns at once; sent by the dispatcher)"""
+        if not self.bot_token or not self.chat_id:
+            logger.debug("Telegram not configured, skipping notification")
+            return False
+        return self.dispatcher.enqueue(message, kind)
+
+    async def _post_async(self, message, _retry_on_ssl_error=True):
+        """POST sendMessage na sessão aiohttp de longa duração -> ``(ok, retry_after)``"""
         try:
             if not self.bot_token or not self.chat_id:
-                logger.debug("Telegram not configured, skipping notification")
-                return False
+                return False, None
 
             url = f"{self.base_url}/sendMessage"
             payload = {"chat_id": self.chat_id, "text": message, "parse_mode": "HTML"}
@@ -278,11 +299,18 @@ class TelegramNotifier:
             ) as response:
                 if response.status == 200:
                     logger.info("Telegram message sent successfully")
-                    return True
-                else:
-                    body = await response.text()
-                    logger.warning("Telegram HTTP %s - Body: %s", response.status, body[:200])
-                    return False
+                    return True, None
+                body = await response.text()
+                logger.warning("Telegram HTTP %s - Body: %s", response.status, body[:200])
+                if response.status == 429:
+                    retry_after = 5.0
+                    try:
+                        data = await response.json(content_type=None)
+                        retry_after = float(data.get("parameters", {}).get("retry_after", retry_after))
+                    except Exception:
+                        pass
+                    return False, retry_after
+                return False, None
 
         except ClientConnectorCertificateError as exc:
             if self.verify_ssl and _retry_on_ssl_error:
@@ -290,14 +318,14 @@ class TelegramNotifier:
                     "Telegram SSL verification failed (%s). Retrying without certificate validation.",
                     exc,
                 )
-                await self.close()
+                await self._close_session()
                 self.verify_ssl = False
-                return await self.send_message_async(message, _retry_on_ssl_error=False)
+                return await self._post_async(message, _retry_on_ssl_error=False)
             logger.error("Error sending async Telegram message due to SSL issue: %s", exc)
-            return False
+            return False, None
         except Exception as e:
             logger.error(f"Error sending async Telegram message: {e}")
-            return False
+            return False, None
 
     def notify_position_opened(
         self,
@@ -376,7 +404,7 @@ class TelegramNotifier:
         return await self.send_message_async(self._bot_stopped_message())
 
     async def notify_monitoring_async(self, note=None):
-        return await self.send_message_async(self._bot_observing_message(note))
+        return await self.send_message_async(self._bot_observing_message(note), kind=KIND_OBSERVING)
 
     async def notify_ai_decision_async(
         self, decision_type: str, symbol: str, reasoning: str, data: dict | None = None
@@ -384,7 +412,7 @@ class TelegramNotifier:
         """Enviar decisão da IA para o Telegram (async)"""
         try:
             message = self._format_ai_decision(decision_type, symbol, reasoning, data)
-            return await self.send_message_async(message)
+            return await self.send_message_async(message, kind=KIND_STATUS)
         except Exception as e:
             logger.error(f"Erro ao enviar notificação da IA: {e}")
             return False
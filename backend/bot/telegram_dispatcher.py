@@ -0,0 +1,244 @@
+"""
+Telegram Dispatcher — fila de saída não bloqueante para o TelegramNotifier.
+
+Cada ``await telegram_notifier.send_message_async(...)`` fazia o POST na hora
+(timeout de 5s): um Telegram lento travava abertura/fechamento de posições.
+Aqui o enfileiramento é síncrono e nunca espera; uma única task envia em
+ordem, respeitando o limite por chat (intervalo mínimo + teto por minuto +
+``retry_after`` do HTTP 429).
+
+Tipos de mensagem:
+
+- ``alert`` (padrão): enviada individualmente, em ordem;
+- ``status``: acumulada e enviada como um resumo (digest) a cada
+  ``digest_window`` segundos;
+- ``observing``: estado "em observação" — só a mais recente vai no digest.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+KIND_ALERT = "alert"
+KIND_STATUS = "status"
+KIND_OBSERVING = "observing"
+
+# Limite de texto do sendMessage
+MAX_MESSAGE_CHARS = 4096
+
+
+class TelegramDispatcher:
+    """Fila limitada + worker único; ``send`` devolve ``(ok, retry_after)``."""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[tuple[bool, float | None]]],
+        maxsize: int | None = None,
+        min_interval: float | None = None,
+        max_per_minute: int | None = None,
+        digest_window: float | None = None,
+        max_attempts: int = 3,
+    ):
+        self._send = send
+        self.maxsize = maxsize or int(os.getenv("TELEGRAM_QUEUE_SIZE", "100"))
+        self.min_interval = (
+            min_interval if min_interval is not None else float(os.getenv("TELEGRAM_MIN_INTERVAL", "1.0"))
+        )
+        self.max_per_minute = max_per_minute or int(os.getenv("TELEGRAM_MAX_PER_MINUTE", "20"))
+        self.digest_window = (
+            digest_window if digest_window is not None else float(os.getenv("TELEGRAM_DIGEST_WINDOW", "15"))
+        )
+        self.max_attempts = max_attempts
+
+        self._alerts: deque[tuple[str, int]] = deque()
+        self._status: list[str] = []
+        self._observing: str | None = None
+        self._digest_since: float | None = None
+        self._flush_digest = False
+
+        self._sent_at: deque[float] = deque()
+        self._blocked_until = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._idle: asyncio.Event | None = None  # setado pelo worker quando não há nada pendente
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "digests": 0,
+            "rate_limited": 0,
+        }
+
+    # ── Entrada (síncrona, nunca bloqueia) ───────────────────────────
+
+    @property
+    def depth(self) -> int:
+        return len(self._alerts) + len(self._status) + (1 if self._observing else 0)
+
+    def enqueue(self, text: str, kind: str = KIND_ALERT) -> bool:
+        if not text:
+            return False
+        self.stats["enqueued"] += 1
+        if kind == KIND_OBSERVING:
+            if self._observing is not None:
+                self.stats["coalesced"] += 1
+            self._observing = text
+            self._mark_digest()
+        elif kind == KIND_STATUS:
+            if text in self._status:
+                self.stats["coalesced"] += 1
+            else:
+                self._status.append(text)
+            self._mark_digest()
+        else:
+            if len(self._alerts) >= self.maxsize:
+                # Fila cheia: descarta a mais antiga (a mais nova costuma ser a mais relevante)
+                self._alerts.popleft()
+                self.stats["dropped"] += 1
+            self._alerts.append((text, 0))
+        self._ensure_worker()
+        return True
+
+    def _mark_digest(self) -> None:
+        if self._digest_since is None:
+            self._digest_since = time.monotonic()
+
+    def _ensure_worker(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # sem loop: fica na fila até o próximo enqueue/flush com loop
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._task = loop.create_task(self._worker(), name="telegram_dispatcher")
+        self._idle.clear()
+        self._wakeup.set()
+
+    # ── Digest ───────────────────────────────────────────────────────
+
+    def _digest_due(self, now: float) -> bool:
+        if self._digest_since is None:
+            return False
+        return self._flush_digest or now - self._digest_since >= self.digest_window
+
+    def _take_digest(self) -> str:
+        items = list(self._status)
+        if self._observing:
+            items.append(self._observing)
+        self._status = []
+        self._observing = None
+        self._digest_since = None
+        if len(items) == 1:
+            return items[0]
+        self.stats["digests"] += 1
+        header = f"<b>Resumo</b> ({len(items)} atualizações)\n\n"
+        body = ""
+        for index, item in enumerate(items):
+            chunk = ("\n\n" if body else "") + item
+            if len(header) + len(body) + len(chunk) > MAX_MESSAGE_CHARS - 40:
+                body += f"\n\n… +{len(items) - index} omitidas"
+                break
+            body += chunk
+        return header + body
+
+    def _next_message(self, now: float) -> tuple[str, int] | None:
+        if self._alerts:
+            return self._alerts.popleft()
+        if self._digest_due(now):
+            return self._take_digest(), 0
+        return None
+
+    # ── Worker ───────────────────────────────────────────────────────
+
+    def _pace_delay(self, now: float) -> float:
+        delay = max(0.0, self._blocked_until - now)
+        if self._sent_at:
+            delay = max(delay, self._sent_at[-1] + self.min_interval - now)
+        while self._sent_at and now - self._sent_at[0] >= 60:
+            self._sent_at.popleft()
+        if len(self._sent_at) >= self.max_per_minute:
+            delay = max(delay, self._sent_at[0] + 60 - now)
+        return delay
+
+    async def _worker(self) -> None:
+        while True:
+            now = time.monotonic()
+            item = self._next_message(now)
+            if item is None:
+                if not self.depth:
+                    self._idle.set()
+                self._wakeup.clear()
+                wait = None
+                if self._digest_since is not None:
+                    wait = max(0.0, self._digest_since + self.digest_window - now)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except TimeoutError:
+                    pass
+                continue
+
+            text, attempts = item
+            try:
+                delay = self._pace_delay(now)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                ok, retry_after = await self._send(text)
+            except Exception as e:
+                logger.error("Erro no envio Telegram: %s", e)
+                ok, retry_after = False, None
+            self._sent_at.append(time.monotonic())
+
+            if ok:
+                self.stats["sent"] += 1
+            elif retry_after is not None and attempts + 1 < self.max_attempts:
+                # 429: pausa o chat e reenvia na frente da fila
+                self.stats["rate_limited"] += 1
+                self._blocked_until = time.monotonic() + retry_after
+                self._alerts.appendleft((text, attempts + 1))
+                logger.warning("Telegram 429: aguardando %.0fs", retry_after)
+            else:
+                self.stats["failed"] += 1
+
+    async def flush(self, grace: float = 10.0) -> bool:
+        """Envia tudo o que está pendente (incluindo digest) e espera até ``grace`` segundos."""
+        self._flush_digest = True
+        self._ensure_worker()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=grace)
+        except TimeoutError:
+            pass
+        finally:
+            self._flush_digest = False
+        if self.depth:
+            logger.warning("Telegram: %d mensagem(ns) não enviada(s) no encerramento", self.depth)
+            return False
+        return True
+
+    async def close(self, grace: float = 10.0) -> None:
+        if self._task is None:
+            return
+        await self.flush(grace)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "depth": self.depth,
+            "alerts_pending": len(self._alerts),
+            "digest_pending": len(self._status) + (1 if self._observing else 0),
+            "running": self._task is not None and not self._task.done(),
+        }
@@ -1,10 +1,11 @@
 import asyncio
+import functools
 import json
 import logging
 import os
 import time
 from collections import deque
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from typing import Any
 
 import pandas as pd
@@ -16,20 +17,29 @@ DEFAULT_CIRCUIT_BREAKER_COOLDOWN = 120  # Reduzido de 5 min para 2 min
 logger = logging.getLogger(__name__)
 
 from bot.advanced_learning import AdvancedLearningSystem
+from bot.async_exchange_client import async_exchange_manager
 from bot.binance_client import (
     BinanceCriticalError,
     BinanceTransientError,
     binance_manager,
 )
 from bot.config import BotConfig, load_bot_config
+from bot.exit_executor import BookkeepingQueue, ExitExecutor
+from bot.market_context import MarketContext
+from bot.performance_aggregates import PerformanceAggregates
+from bot.pnl_ledger import PnLLedger
+from bot.positions_repository import PositionsRepository
+from bot.post_trade_queue import PostTradeQueue, mark_pending
+from bot.rate_limiter import LANE_CRITICAL, request_lane
 from bot.risk_manager import RiskManager
 from bot.selector import CryptoSelector
 from bot.strategy import TradingStrategy
 from bot.telegram_client import telegram_notifier
+from bot.telegram_dispatcher import KIND_STATUS
 
 # ML Signal Filter - modelo treinado com dados historicos
 try:
-    from ml.ml_signal_filter import get_ml_filter
+    from ml.ml_signal_filter import get_ml_filter, indicators_from_opportunity
 
     ML_FILTER_AVAILABLE = True
 except ImportError:
@@ -82,7 +92,8 @@ class TradingBot:
     def __init__(self, db):
         self.db = db
         self.is_running = False
-        self.positions: list[dict] = []
+        # Posições abertas: memória autoritativa com write-through no MongoDB
+        self.positions_repo = PositionsRepository(db.positions)
         self.config = BotConfig.from_env()
         self.risk_manager = RiskManager(
             risk_percentage=self.config.risk_percentage,
@@ -95,6 +106,10 @@ class TradingBot:
             use_position_cap=getattr(self.config, "risk_use_position_cap", True),
         )
         self.learning_system = AdvancedLearningSystem(db)
+        self.performance_aggregates = PerformanceAggregates(db)
+
+        # Snapshot do BTC do ultimo ciclo de scan (bot.market_context)
+        self.market_context: MarketContext | None = None
 
         # ML Signal Filter - modelo treinado com dados historicos
         self.ml_filter = None
@@ -110,6 +125,8 @@ class TradingBot:
                     )
                 else:
                     logger.warning("[ML] Modelo nao encontrado - filtro ML desabilitado")
+                # Versoes novas publicadas pelo retreino entram sem reiniciar o bot
+                self.ml_filter.start_watcher()
             except Exception as e:
                 logger.warning("[ML] Erro ao carregar filtro ML: %s", e)
         else:
@@ -192,11 +209,19 @@ class TradingBot:
         self.strategy = None
         self.check_interval = self.config.loop_interval_seconds
         self._loop_task: asyncio.Task | None = None
+        # Monitor de posições (saídas) independente do ciclo de scan
+        self._monitor_task: asyncio.Task | None = None
+        self._price_tick = asyncio.Event()
+        self._price_tick_listener = None
+        self.position_monitor_interval = float(os.getenv("POSITION_MONITOR_INTERVAL", "1.0"))
+        self.position_monitor_rest_interval = float(
+            os.getenv("POSITION_MONITOR_REST_INTERVAL", "5.0")
+        )
+        self._position_monitor_min_gap = 0.2
         self._balance_cache = {"value": 0.0, "timestamp": 0.0}
         self.balance_cache_ttl = self.config.balance_cache_ttl
         self.observation_alert_interval = self.config.observation_alert_interval
         self._last_observation_notice = 0.0
-        self._positions_cache_limit = 500
         self.last_error: str | None = None
         self.last_risk_snapshot: dict[str, Any] | None = None
 
@@ -206,8 +231,15 @@ class TradingBot:
         self.weekly_drawdown_limit_pct = getattr(self.config, "weekly_drawdown_limit_pct", 0.0)
         self.api_latency_threshold = float(os.getenv("API_LATENCY_THRESHOLD", "2.0"))
         self._current_drawdown_pct: float = 0.0  # Atualizado em _check_drawdown_limits
-        # Cache para _check_drawdown_limits — evita 2 queries MongoDB a cada ciclo de 15s
-        self._drawdown_cache: dict[str, Any] = {"result": True, "ts": 0.0, "ttl": 60.0}
+        # PnL realizado do dia/semana em memória (semeado no initialize)
+        self.pnl_ledger = PnLLedger()
+        # Saídas concorrentes + pós-trade (agregados, Telegram, saldo) em fila de fundo
+        self.exit_executor = ExitExecutor(
+            self._close_position, max_concurrency=int(os.getenv("EXIT_MAX_CONCURRENCY", "4"))
+        )
+        self.bookkeeping = BookkeepingQueue(on_idle=self._refresh_balance_after_closes)
+        # Learners em lote, com trades pendentes persistidos (replay no initialize)
+        self.post_trade_queue = PostTradeQueue(db, self._process_trade_analytics)
         # Contador de sinais na última hora (para regime adaptation)
         # deque sem maxlen: entradas antigas são removidas via popleft
         # (limpeza lazy por tempo, não por quantidade — sinais por hora variam)
@@ -220,6 +252,13 @@ class TradingBot:
             "last_loop_ms": None,
             "last_order_symbol": None,
             "last_order_timestamp": None,
+            # Monitor de posições
+            "position_checks": 0,
+            "last_position_check_ms": None,
+            "avg_position_check_ms": None,
+            "max_position_check_ms": 0.0,
+            "last_position_check_at": None,
+            "position_monitor_source": None,
         }
 
         # Circuit breaker: pausa bot após falhas consecutivas
@@ -236,6 +275,32 @@ class TradingBot:
         self._positions_lock = asyncio.Lock()
         self._balance_lock = asyncio.Lock()
 
+    @property
+    def positions(self) -> list[dict]:
+        """Open positions (live list owned by ``positions_repo``)."""
+        return self.positions_repo.positions
+
+    async def _exchange_call(self, method: str, *args):
+        """Exchange I/O: coroutine on the async client when enabled, else sync client in a thread.
+
+        Runs in the critical request lane (orders, balance, exit prices), so it
+        keeps budget when scans and the dashboard are being throttled.
+        """
+        with request_lane(LANE_CRITICAL):
+            if not async_exchange_manager.is_initialized:
+                return await self._run_blocking(getattr(binance_manager, method), *args)
+            start = time.perf_counter()
+            result = await getattr(async_exchange_manager, method)(*args)
+        duration = time.perf_counter() - start
+        if duration > self.api_latency_threshold:
+            logger.warning(
+                "Latencia alta em chamada de API: %.2fs (limite %.2fs) func=%s (async)",
+                duration,
+                self.api_latency_threshold,
+                method,
+            )
+        return result
+
     async def _run_blocking(self, func, *args, **kwargs):
         """Run blocking code in a background thread to keep the event loop responsive"""
         start = time.perf_counter()
@@ -294,7 +359,7 @@ class TradingBot:
                 return self._balance_cache["value"]
 
             try:
-                balance = await self._run_blocking(binance_manager.get_account_balance)
+                balance = await self._exchange_call("get_account_balance")
                 self._reset_circuit_breaker()  # Sucesso: resetar contador
             except BinanceTransientError as exc:
                 logger.warning("Problema temporario ao buscar saldo: %s", exc)
@@ -321,7 +386,7 @@ class TradingBot:
         if not symbols:
             return {}
         try:
-            result = await self._run_blocking(binance_manager.get_price_map, symbols)
+            result = await self._exchange_call("get_price_map", symbols)
             self._reset_circuit_breaker()  # Sucesso: resetar contador
             return result
         except BinanceTransientError as exc:
@@ -341,8 +406,10 @@ class TradingBot:
     async def _check_drawdown_limits(self, balance: float) -> bool:
         """Check daily/weekly drawdown limits; pause if exceeded.
 
-        Resultado cacheado por 60s para evitar queries MongoDB a cada ciclo de 15s.
-        Cache é invalidado imediatamente quando o bot é pausado.
+        Lê o PnL do ``pnl_ledger`` em memória (sem consulta ao MongoDB), então
+        roda a cada ciclo sem janela de cache. Enquanto o ledger não foi semeado
+        (seed falhou no initialize) tenta de novo a cada ciclo e recusa novas
+        entradas até conseguir.
         """
         if balance is None or balance <= 0:
             return True
@@ -352,29 +419,19 @@ class TradingBot:
         if day_limit <= 0 and week_limit <= 0:
             return True
 
-        # Verificar cache (TTL 60s)
-        import time as _time
-
-        now_ts = _time.monotonic()
-        cache = self._drawdown_cache
-        if (now_ts - cache["ts"]) < cache["ttl"]:
-            return cache["result"]
+        if not self.pnl_ledger.seeded and not await self._seed_pnl_ledger():
+            logger.warning("PnL ledger sem seed: novas entradas bloqueadas até carregar os trades da semana")
+            return False
 
         now = datetime.now(UTC)
-        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_start = day_start - timedelta(days=day_start.weekday())
-
-        async def _pnl_since(start_dt):
-            trades = await self.db.trades.find(
-                {"closed_at": {"$gte": start_dt.isoformat()}}, {"pnl": 1, "_id": 0}
-            ).to_list(1000)
-            return sum(t.get("pnl", 0) for t in trades)
 
         if day_limit > 0:
-            day_pnl = await _pnl_since(day_start)
+            day_pnl = self.pnl_ledger.day_pnl(now)
             # Salvar drawdown percentual para uso em outros módulos (ex: LLM risk advisor)
             if balance > 0 and day_pnl < 0:
                 self._current_drawdown_pct = abs(day_pnl) / balance * 100
+            else:
+                self._current_drawdown_pct = 0.0
             day_limit_value = -(day_limit / 100) * balance
             if day_pnl <= day_limit_value:
                 logger.error(
@@ -388,11 +445,10 @@ class TradingBot:
                 )
                 self.is_running = False
                 self.last_error = "Limite de perda diaria atingido"
-                self._drawdown_cache = {"result": False, "ts": now_ts, "ttl": 60.0}
                 return False
 
         if week_limit > 0:
-            week_pnl = await _pnl_since(week_start)
+            week_pnl = self.pnl_ledger.week_pnl(now)
             week_limit_value = -(week_limit / 100) * balance
             if week_pnl <= week_limit_value:
                 logger.error(
@@ -406,12 +462,18 @@ class TradingBot:
                 )
                 self.is_running = False
                 self.last_error = "Limite de perda semanal atingido"
-                self._drawdown_cache = {"result": False, "ts": now_ts, "ttl": 60.0}
                 return False
 
-        self._drawdown_cache = {"result": True, "ts": now_ts, "ttl": 60.0}
         return True
 
+    async def _seed_pnl_ledger(self) -> bool:
+        try:
+            await self.pnl_ledger.seed(self.db)
+            return True
+        except Exception as e:
+            logger.error("Erro ao semear PnL ledger: %s", e)
+            return False
+
     async def initialize(self, config: BotConfig | None = None):
         """Initialize bot components"""
         try:
@@ -442,12 +504,41 @@ class TradingBot:
             )
             logger.info("%s initialization: %s", exchange_id.upper(), "Success" if success else "Failed")
 
+            if success and self.config.market_data_stream:
+                stream_ok = binance_manager.start_market_stream(
+                    symbols=self.config.selector_base_symbols,
+                    timeframes=[
+                        self.config.strategy_timeframe,
+                        self.config.strategy_confirmation_timeframe,
+                    ],
+                )
+                logger.info("Market data stream: %s", "ativo" if stream_ok else "REST apenas")
+            elif binance_manager.stream is not None:
+                binance_manager.stop_market_stream()
+
+            # Cliente asyncio lado a lado com o sync (strategy/selector seguem no sync em threads)
+            if success and self.config.exchange_async:
+                async_ok = await async_exchange_manager.initialize(
+                    exchange=exchange_id,
+                    api_key=api_key,
+                    api_secret=api_secret,
+                    testnet=self.config.binance_testnet,
+                    paper_trade=self.config.paper_trade,
+                    markets_from=binance_manager.client,
+                )
+                async_exchange_manager.attach_stream(binance_manager.stream)
+                logger.info("Async exchange client: %s", "ativo" if async_ok else "falhou - usando sync")
+            elif async_exchange_manager.is_initialized:
+                await async_exchange_manager.close()
+
             telegram_notifier.initialize(
                 bot_token=self.config.telegram_bot_token,
                 chat_id=self.config.telegram_chat_id,
                 verify_ssl=self.config.telegram_verify_ssl,
             )
 
+            await self._seed_pnl_ledger()
+
             if binance_manager.client:
                 self.strategy = TradingStrategy(
                     binance_manager,
@@ -472,6 +563,11 @@ class TradingBot:
                 if self.strategy_engine is not None:
                     self.selector.strategy_engine = self.strategy_engine
 
+                # Filtro ML pontua todos os candidatos do scan em lote
+                # (o seletor checa ml_filter.loaded a cada scan: vale apos troca a quente)
+                if self.ml_filter:
+                    self.selector.ml_filter = self.ml_filter
+
                 # Inject client into strategy engine strategies
                 if self.strategy_engine is not None:
                     for name in self.strategy_engine.strategy_names:
@@ -484,6 +580,7 @@ class TradingBot:
             # Initialize Learning System
             await self.learning_system.initialize()
             self._sync_strategy_learning_params()
+            await self.post_trade_queue.recover()
 
             # Verify LLM Analyzer availability (já foi instanciado no __init__)
             if self.llm_analyzer is not None:
@@ -532,7 +629,9 @@ class TradingBot:
 
             # VERIFICACAO E LIMPEZA INICIAL
             logger.info(f"Verificando posicoes existentes na {self.config.exchange.upper()} antes de iniciar...")
-            await telegram_notifier.send_message_async("Verificando posicoes abertas na conta...")
+            await telegram_notifier.send_message_async(
+                "Verificando posicoes abertas na conta...", kind=KIND_STATUS
+            )
 
             cleanup_result = await self._cleanup_existing_positions()
             if cleanup_result and cleanup_result.get("status") not in {"clean", "cleaned"}:
@@ -559,8 +658,12 @@ class TradingBot:
             logger.info("Trading bot started")
             self.last_error = None
 
-            # Start main loop
+            # Start main loop + monitor de saídas (task separada)
             self._loop_task = _ = asyncio.create_task(self._trading_loop(), name="trading_loop")
+            self.positions_repo.start()
+            self.bookkeeping.start()
+            self.post_trade_queue.start()
+            self._start_position_monitor()
 
             return True
 
@@ -579,6 +682,8 @@ class TradingBot:
             )
 
             self.is_running = False
+            # Monitor precisa parar antes de fechar tudo (evita fechamento duplo)
+            await self._stop_position_monitor()
             await self._refresh_positions_cache()
 
             # Close all open positions before stopping with retry queue
@@ -639,6 +744,10 @@ class TradingBot:
                 await telegram_notifier.send_message_async("Bot parado (sem posicoes abertas)")
 
             await self._refresh_positions_cache()
+            await self.positions_repo.stop()
+            # Pós-trade pendente (notificações de fechamento) antes de fechar o Telegram
+            await self.bookkeeping.stop()
+            await self.post_trade_queue.stop()
             await telegram_notifier.notify_bot_stopped_async()
             await telegram_notifier.close()
             if self._loop_task:
@@ -716,10 +825,7 @@ class TradingBot:
                     await asyncio.sleep(min(self.check_interval, remaining))
                     continue
 
-                # Check existing positions (cache é populado uma única vez por ciclo)
-                await self._refresh_positions_cache()
-                await self._check_positions()
-
+                # Saídas são tratadas por _position_monitor_loop; posições já estão em memória
                 # Look for new opportunities if not at max positions
                 async with self._positions_lock:
                     current_count = len(self.positions)
@@ -737,6 +843,84 @@ class TradingBot:
                 elapsed = time.perf_counter() - loop_start
                 await asyncio.sleep(max(0.0, self.check_interval - elapsed))
 
+    # ========== POSITION MONITOR ==========
+    def _start_position_monitor(self) -> None:
+        """Inicia a task de saídas; acorda a cada tick do stream quando disponível."""
+        loop = asyncio.get_running_loop()
+        self._price_tick.clear()
+        stream = binance_manager.stream
+        if stream is not None:
+
+            def _on_tick():
+                loop.call_soon_threadsafe(self._price_tick.set)
+
+            self._price_tick_listener = _on_tick
+            stream.add_listener(_on_tick)
+        self._monitor_task = asyncio.create_task(
+            self._position_monitor_loop(), name="position_monitor"
+        )
+
+    async def _stop_position_monitor(self) -> None:
+        stream = binance_manager.stream
+        if stream is not None and self._price_tick_listener is not None:
+            stream.remove_listener(self._price_tick_listener)
+        self._price_tick_listener = None
+        self._price_tick.set()
+        if self._monitor_task:
+            try:
+                await self._monitor_task
+            except Exception as e:
+                logger.error("Erro ao encerrar monitor de posicoes: %s", e)
+            self._monitor_task = None
+
+    async def _position_monitor_loop(self):
+        """Exit management loop, independent of the market scan.
+
+        Runs _check_positions (trailing, time stop, SL/TP) on every stream
+        price tick (at most every _position_monitor_min_gap seconds), or every
+        position_monitor_interval / position_monitor_rest_interval seconds
+        depending on whether the WebSocket feed is fresh.
+        """
+        while self.is_running:
+            stream = binance_manager.stream
+            streaming = stream is not None and stream.is_fresh()
+            interval = (
+                self.position_monitor_interval if streaming else self.position_monitor_rest_interval
+            )
+            try:
+                await asyncio.wait_for(self._price_tick.wait(), timeout=interval)
+            except TimeoutError:
+                pass
+            self._price_tick.clear()
+            if not self.is_running:
+                break
+            if self._is_circuit_open():
+                continue
+
+            check_start = time.perf_counter()
+            try:
+                await self._check_positions()
+            except Exception as e:
+                logger.error("Erro no monitor de posicoes: %s", e)
+            self._record_position_check(
+                (time.perf_counter() - check_start) * 1000, "stream" if streaming else "rest"
+            )
+            await asyncio.sleep(self._position_monitor_min_gap)
+
+    def _record_position_check(self, elapsed_ms: float, source: str) -> None:
+        """Atualiza métricas de latência do monitor de posições."""
+        m = self.metrics
+        m["position_checks"] += 1
+        m["last_position_check_ms"] = round(elapsed_ms, 2)
+        avg = m["avg_position_check_ms"]
+        # Média móvel exponencial (~últimos 20 checks)
+        m["avg_position_check_ms"] = round(
+            elapsed_ms if avg is None else avg + (elapsed_ms - avg) * 0.1, 2
+        )
+        m["max_position_check_ms"] = round(max(m["max_position_check_ms"], elapsed_ms), 2)
+        m["last_position_check_at"] = datetime.now(UTC).isoformat()
+        m["position_monitor_source"] = source
+
     def _is_near_candle_close(self, timeframe: str = "15m", threshold_seconds: int = 45) -> bool:
         """
         Verifica se estamos próximos do fechamento da vela.
@@ -790,11 +974,12 @@ class TradingBot:
         else:
             return 0.3  # Máximo lock - 70% mais apertado
 
-    async def _check_btc_health(self) -> bool:
+    async def _check_btc_health(self, context: MarketContext | None = None) -> bool:
         """
         Verifica se BTC está em condição favorável para longs.
         Retorna False se BTC está em queda (evita entradas em BTC e alts).
         MELHORIA: Verifica queda recente de preço (>2% em 15min) e bloqueia TUDO.
+        Com ``context``, reutiliza a análise do BTC feita ao montar o snapshot do ciclo.
         """
         try:
             if not self.strategy:
@@ -825,7 +1010,10 @@ class TradingBot:
                 current_price = None
                 price_15min_ago = None
 
-            btc_analysis = await self._run_blocking(self.strategy.analyze_symbol, "BTCUSDT")
+            if context is not None:
+                btc_analysis = context.btc_analysis
+            else:
+                btc_analysis = await self._run_blocking(self.strategy.analyze_symbol, "BTCUSDT")
 
             if not btc_analysis:
                 logger.debug("Não foi possível analisar BTC - continuando")
@@ -923,8 +1111,16 @@ class TradingBot:
                 logger.error("Selector or strategy not initialized")
                 return
 
+            # Snapshot do BTC (regime, tendência, retornos) calculado uma vez por ciclo
+            try:
+                self.market_context = await self._run_blocking(self.strategy.build_market_context)
+            except Exception as e:
+                logger.warning("Falha ao montar contexto de mercado: %s", e)
+                self.market_context = None
+            context = self.market_context
+
             # MELHORIA 1: Verificar se BTC está saudável antes de qualquer entrada
-            if not await self._check_btc_health():
+            if not await self._check_btc_health(context):
                 await self._notify_observing(
                     "BTC em queda - aguardando estabilização para entrar em alts."
                 )
@@ -949,16 +1145,13 @@ class TradingBot:
             else:
                 logger.debug("Sessão de trading: %s", session_info)
 
-            # Refresh positions from DB to avoid race conditions
-            await self._refresh_positions_cache()
-
-            # Get list of symbols already in positions (from fresh cache)
+            # Símbolos já em posição (repositório em memória, sincronizado com o Mongo)
             async with self._positions_lock:
-                excluded_symbols = [pos["symbol"] for pos in self.positions]
+                excluded_symbols = self.positions_repo.symbols()
 
             #  Use CryptoSelector to find best opportunity
             opportunity = await self._run_blocking(
-                self.selector.select_best_crypto, excluded_symbols
+                self.selector.select_best_crypto, excluded_symbols, context
             )
 
             if not opportunity:
@@ -990,10 +1183,10 @@ class TradingBot:
             # ── Multi-Strategy Engine (new path) ──
             if self.strategy_engine is not None:
                 symbol = opportunity["symbol"]
-                df = self.strategy.get_historical_data(symbol)
+                df = await self._run_blocking(self.strategy.get_historical_data, symbol)
                 if df is not None and len(df) >= 50:
-                    df = self.strategy.calculate_indicators(df)
-                    signals = self.strategy_engine.analyze_symbol(symbol, df)
+                    df = await self._run_blocking(self.strategy.calculate_indicators, df, symbol=symbol)
+                    signals = await self._run_blocking(self.strategy_engine.analyze_symbol, symbol, df)
 
                     if signals:
                         best = signals[0]
@@ -1061,7 +1254,10 @@ class TradingBot:
                     current_regime = opportunity.get("market_regime")
                     if not current_regime or current_regime == "unknown":
                         try:
-                            if self.strategy and hasattr(self.strategy, 'detect_market_regime'):
+                            if context is not None:
+                                regime_data = context.btc_regime
+                                current_regime = regime_data.get("regime", "unknown")
+                            elif self.strategy and hasattr(self.strategy, 'detect_market_regime'):
                                 regime_data = self.strategy.detect_market_regime(symbol="BTCUSDT")
                                 current_regime = regime_data.get("regime", "unknown") if isinstance(regime_data, dict) else "unknown"
                             else:
@@ -1217,27 +1413,16 @@ class TradingBot:
 
             # NOVO: Filtro ML treinado com dados historicos
             if self.ml_filter and self.ml_filter.loaded:
-                # Preparar indicadores para o filtro ML
-                ml_indicators = {
-                    "rsi": opportunity.get("rsi", 50),
-                    "macd": opportunity.get("macd", 0),
-                    "macd_signal": opportunity.get("macd_signal", 0),
-                    "macd_hist": opportunity.get("macd_hist", 0),
-                    "close": opportunity.get("price", opportunity.get("close", 0)),
-                    "ema_fast": opportunity.get("ema_fast", 0),
-                    "ema_slow": opportunity.get("ema_slow", 0),
-                    "ema_50": opportunity.get("ema_50", 0),
-                    "ema_200": opportunity.get("ema_200", 0),
-                    "bb_upper": opportunity.get("bb_upper", 0),
-                    "bb_lower": opportunity.get("bb_lower", 0),
-                    "atr": opportunity.get("atr", 0),
-                    "vwap": opportunity.get("vwap", 0),
-                    "volume_ratio": opportunity.get("volume_ratio", 1),
-                }
-
-                ml_should_trade, ml_confidence, ml_reason = self.ml_filter.should_take_trade(
-                    opportunity, ml_indicators
-                )
+                if "ml_approved" in opportunity:
+                    # Já pontuado em lote pelo seletor
+                    ml_should_trade = opportunity["ml_approved"]
+                    ml_confidence = opportunity["ml_confidence"]
+                    ml_reason = opportunity["ml_reason"]
+                    self.ml_filter.record_decision(ml_should_trade)
+                else:
+                    ml_should_trade, ml_confidence, ml_reason = self.ml_filter.should_take_trade(
+                        opportunity, indicators_from_opportunity(opportunity)
+                    )
 
                 logger.info(f"[ML Filter] {opportunity['symbol']}: {ml_reason}")
 
@@ -1322,7 +1507,9 @@ class TradingBot:
                     recommendation = await self.market_analyzer.recommend_trade(
                         symbol=opportunity["symbol"],
                         technical_score=opportunity.get("score", 0),
-                        indicators=ml_indicators if "ml_indicators" in locals() else {},
+                        indicators=(
+                            indicators_from_opportunity(opportunity) if ML_FILTER_AVAILABLE else {}
+                        ),
                         market_context=market_context,
                     )
 
@@ -1512,9 +1699,9 @@ class TradingBot:
                         has_divergence=opportunity.get("has_divergence", False),
                         volume_confirmed=opportunity.get("volume_confirmed", True),
                         trend_strength=opportunity.get("trend_strength", 50),
-                        btc_correlation=self.strategy.calculate_btc_correlation(
-                            opportunity["symbol"]
-                        ),
+                        btc_correlation=opportunity.get("btc_correlation")
+                        if opportunity.get("btc_correlation") is not None
+                        else self.strategy.calculate_btc_correlation(opportunity["symbol"]),
                     )
 
                     if intelligent_size.confidence_score >= 6:  # Confiança razoável
@@ -1646,8 +1833,8 @@ class TradingBot:
 
             # Place order (apenas operacoes de compra para Spot)
             try:
-                order = await self._run_blocking(
-                    binance_manager.place_order,
+                await self._exchange_call(
+                    "place_order",
                     opportunity["symbol"],
                     side,
                     position_params["quantity"],
@@ -1725,10 +1912,10 @@ class TradingBot:
                 },
             }
 
-            # Double-check for duplicates directly in DB before insert (race condition guard)
-            existing = await self.db.positions.find_one(
-                {"symbol": opportunity["symbol"], "status": "open"}
-            )
+            # Double-check for duplicates (memória + DB, caso outro processo tenha aberto)
+            existing = self.positions_repo.has_symbol(
+                opportunity["symbol"]
+            ) or await self.db.positions.find_one({"symbol": opportunity["symbol"], "status": "open"})
             if existing:
                 logger.warning(
                     "Position already exists for %s (race condition avoided)", opportunity["symbol"]
@@ -1736,10 +1923,8 @@ class TradingBot:
                 await self._notify_observing(f"Posicao ja existe para {opportunity['symbol']}.")
                 return
 
-            # Save to database
-            result = await self.db.positions.insert_one(position)
-            position["_id"] = result.inserted_id
-            self.positions.append(position)
+            # Save to database (write-through)
+            await self.positions_repo.add(position)
 
             # 🛡️ PROTEÇÃO: Enviar ordem OCO ao Binance (SL + TP protegidos no servidor)
             # Se o bot cair, as ordens OCO continuam ativas na exchange.
@@ -1768,11 +1953,9 @@ class TradingBot:
                                 for r in oco_result.get("orderReports", [])
                                 if r.get("orderId")
                             ]
-                            await self.db.positions.update_one(
-                                {"_id": position["_id"]},
-                                {"$set": {"oco_order_ids": oco_order_ids}},
+                            await self.positions_repo.update(
+                                position, {"oco_order_ids": oco_order_ids}
                             )
-                            position["oco_order_ids"] = oco_order_ids
                             logger.info(
                                 "[OCO] %s: ordens de proteção criadas %s",
                                 opportunity["symbol"],
@@ -1841,8 +2024,8 @@ class TradingBot:
             try:
                 # Get current price for proper closing
                 try:
-                    current_price = await self._run_blocking(
-                        binance_manager.get_symbol_price, position["symbol"]
+                    current_price = await self._exchange_call(
+                        "get_symbol_price", position["symbol"]
                     )
                 except BinanceTransientError as exc:
                     logger.warning(
@@ -1879,9 +2062,8 @@ class TradingBot:
     async def _check_positions(self):
         """Check and manage open positions.
 
-        NOTA: O trailing stop é verificado a cada ciclo (default 15s).
-        Para mercados muito voláteis, considerar implementar websocket
-        para atualizações de preço em tempo real (melhoria futura).
+        Chamado por _position_monitor_loop: a cada tick do WebSocket quando
+        o stream está ativo, ou a cada POSITION_MONITOR_REST_INTERVAL via REST.
 
         MELHORIA: Trailing progressivo - quanto maior o lucro, mais apertado o trail.
         """
@@ -1894,9 +2076,10 @@ class TradingBot:
             symbols = {pos["symbol"] for pos in positions_snapshot}
             price_map = await self._get_price_map(list(symbols))
 
+            exits: list[tuple[dict, float, str]] = []
             for position in positions_snapshot:
                 current_price = price_map.get(position["symbol"])
-                if current_price is None:
+                if current_price is None or self.exit_executor.is_closing(position):
                     continue
 
                 # Calcular lucro atual para trailing progressivo
@@ -1941,26 +2124,16 @@ class TradingBot:
 
                 if stop_updated:
                     trailing_cfg["last_update"] = datetime.now(UTC).isoformat()
-                    try:
-                        await self.db.positions.update_one(
-                            {"_id": position["_id"]},
-                            {
-                                "$set": {
-                                    "stop_loss": position["stop_loss"],
-                                    "trailing": trailing_cfg,
-                                }
-                            },
-                        )
-                        logger.info(
-                            "Trailing stop ajustado %s -> %.4f (profit: %.2f%%, factor: %.1f)",
-                            position["symbol"],
-                            position["stop_loss"],
-                            profit_pct,
-                            trailing_cfg.get("trail_factor", 1.0),
-                        )
-                    except Exception as e:
-                        logger.error(f"Erro ao atualizar trailing stop no banco: {e}")
                     position["trailing"] = trailing_cfg
+                    # Gravação em lote pelo repositório (coalesce passos seguidos)
+                    self.positions_repo.mark_dirty(position, "stop_loss", "trailing")
+                    logger.info(
+                        "Trailing stop ajustado %s -> %.4f (profit: %.2f%%, factor: %.1f)",
+                        position["symbol"],
+                        position["stop_loss"],
+                        profit_pct,
+                        trailing_cfg.get("trail_factor", 1.0),
+                    )
 
                 # FASE 6: Verificar time stop (4h)
                 max_hold_hours = int(os.getenv("RISK_MAX_HOLD_HOURS", "4"))
@@ -1972,7 +2145,7 @@ class TradingBot:
                         position["symbol"],
                         max_hold_hours,
                     )
-                    await self._close_position(position, current_price, "TIME_STOP")
+                    exits.append((position, current_price, "TIME_STOP"))
                     continue  # Pular para próxima posição
 
                 # Check if should close
@@ -1985,7 +2158,11 @@ class TradingBot:
                 )
 
                 if should_close:
-                    await self._close_position(position, current_price, reason)
+                    exits.append((position, current_price, reason))
+
+            # Todas as saídas do tick em paralelo (limite EXIT_MAX_CONCURRENCY)
+            if exits:
+                await self.exit_executor.execute(exits)
 
         except Exception as e:
             logger.error("Error checking positions: %s", e)
@@ -2004,8 +2181,8 @@ class TradingBot:
             if oco_ids:
                 for oco_id in oco_ids:
                     try:
-                        await self._run_blocking(
-                            binance_manager.cancel_order, position["symbol"], oco_id
+                        await self._exchange_call(
+                            "cancel_order", position["symbol"], oco_id
                         )
                         logger.info("[OCO] Cancelada ordem %s para %s", oco_id, position["symbol"])
                     except Exception as cancel_exc:
@@ -2015,8 +2192,8 @@ class TradingBot:
                         )
 
             try:
-                order = await self._run_blocking(
-                    binance_manager.place_order,
+                order = await self._exchange_call(
+                    "place_order",
                     position["symbol"],
                     close_side,
                     position["quantity"],
@@ -2057,47 +2234,126 @@ class TradingBot:
             position["closed_at"] = datetime.now(UTC).isoformat()
             position["close_reason"] = reason
             position["status"] = "closed"
+            self.pnl_ledger.record(position["pnl"], position["closed_at"])
 
-            # Update in database
+            # Update in database (sai da lista ativa mesmo se a escrita falhar)
             try:
-                await self.db.positions.update_one({"_id": position["_id"]}, {"$set": position})
+                await self.positions_repo.close(position)
                 logger.info("Posicao atualizada no banco de dados")
             except Exception as e:
                 logger.error(f"Erro ao atualizar posicao no banco: {e}")
 
             # Save to trades history
+            # (analytics_pending: aprendizado durável via post_trade_queue)
+            trade_saved = False
             try:
-                await self.db.trades.insert_one(position)
+                await self.db.trades.insert_one(mark_pending(position))
+                trade_saved = True
                 logger.info("Trade salvo no historico")
             except Exception as e:
                 logger.error(f"Erro ao salvar trade no historico: {e}")
+            self.post_trade_queue.submit(position)
 
-            #  MACHINE LEARNING: Learn from this trade
+            # Cooldown pós stop loss: registrar símbolo para não recomprar imediatamente
+            if reason == "STOP_LOSS" and self._sl_cooldown_minutes > 0:
+                self._sl_cooldown[position["symbol"]] = time.time()
+                logger.info(
+                    "⏳ Cooldown %dmin ativado para %s após STOP_LOSS",
+                    self._sl_cooldown_minutes, position["symbol"],
+                )
+
+            logger.info(
+                "Posicao fechada: %s %s | PnL: %.2f USDT",
+                position["side"],
+                position["symbol"],
+                pnl_data["pnl"],
+            )
+
+            # Agregados, notificações e saldo saem do caminho crítico da saída
+            self.bookkeeping.submit(
+                f"close:{position['symbol']}",
+                functools.partial(
+                    self._post_trade_bookkeeping, position, pnl_data, exit_price, reason, trade_saved
+                ),
+            )
+
+        except Exception as e:
+            logger.error("ERRO CRITICO ao fechar posicao: %s", e)
+
+            import traceback
+
+            logger.error(traceback.format_exc())
+
+    async def _post_trade_bookkeeping(
+        self, position: dict, pnl_data: dict, exit_price: float, reason: str, trade_saved: bool
+    ):
+        """Pós-trade de ``_close_position`` (roda na ``bookkeeping`` queue, em ordem).
+
+        Os learners ficam na ``post_trade_queue`` (durável, em lote).
+        """
+        if trade_saved:
             try:
-                await self.learning_system.learn_from_trade(position)
-                logger.info("Sistema de aprendizado atualizado")
+                await self.performance_aggregates.record_trade(position)
             except Exception as e:
-                logger.error(f"Erro no sistema de aprendizado: {e}")
+                logger.error(f"Erro ao atualizar agregados de performance: {e}")
 
+        # Notify
+        try:
+            reason_label = {
+                "STOP_LOSS": "Stop Loss atingido",
+                "TAKE_PROFIT": "Take Profit atingido",
+                "TIME_STOP": "Tempo limite atingido (8h)",
+            }.get(reason, reason)
+
+            await telegram_notifier.notify_position_closed_async(
+                position["symbol"],
+                position["side"],
+                position["entry_price"],
+                exit_price,
+                pnl_data["pnl"],
+                pnl_data["roe"],
+                reason_label,
+            )
+            logger.info("Notificacao Telegram enviada")
+        except Exception as e:
+            logger.error(f"Erro ao enviar notificacao Telegram: {e}")
+
+        if not self.positions:
+            await self._notify_observing(
+                "Sem posicoes abertas. Em observacao aguardando novo setup.", force=True
+            )
+
+    async def _process_trade_analytics(self, trades: list[dict]):
+        """Learners pós-trade de um lote de trades fechados (``post_trade_queue``).
+
+        Falha do sistema de aprendizado propaga: o lote fica com o flag pendente e
+        volta no próximo recover. Market analyzer e risk advisor são só memória e
+        rodam depois, então um replay não os alimenta duas vezes.
+        """
+        #  MACHINE LEARNING: Learn from these trades (métricas/estado uma vez por lote)
+        await self.learning_system.learn_from_trades(trades)
+        logger.info("Sistema de aprendizado atualizado (%d trade(s))", len(trades))
+
+        for trade in trades:
             # NOVO: LLM Market Analyzer - Adicionar ao histórico para aprendizado
-            if self.market_analyzer and "market_regime" in position:
+            if self.market_analyzer and "market_regime" in trade:
                 try:
                     # Calcular duração em minutos
                     from dateutil import parser as date_parser
 
-                    opened_at = date_parser.isoparse(position["opened_at"])
-                    closed_at = date_parser.isoparse(position["closed_at"])
+                    opened_at = date_parser.isoparse(trade["opened_at"])
+                    closed_at = date_parser.isoparse(trade["closed_at"])
                     duration_minutes = int((closed_at - opened_at).total_seconds() / 60)
 
                     self.market_analyzer.add_trade_to_history(
-                        symbol=position["symbol"],
-                        pnl_pct=pnl_data["roe"],
+                        symbol=trade["symbol"],
+                        pnl_pct=trade["roe"],
                         duration_minutes=duration_minutes,
-                        regime=position["market_regime"],
+                        regime=trade["market_regime"],
                     )
                     logger.info(
                         f"[LLM Market] Trade adicionado ao histórico: "
-                        f"{position['symbol']} {pnl_data['roe']:+.2f}% em {duration_minutes}min"
+                        f"{trade['symbol']} {trade['roe']:+.2f}% em {duration_minutes}min"
                     )
                 except Exception as e:
                     logger.error(f"[LLM Market] Erro ao adicionar ao histórico: {e}")
@@ -2107,102 +2363,46 @@ class TradingBot:
                 try:
                     from dateutil import parser as date_parser
 
-                    opened_at = date_parser.isoparse(position["opened_at"])
-                    closed_at = date_parser.isoparse(position["closed_at"])
+                    opened_at = date_parser.isoparse(trade["opened_at"])
+                    closed_at = date_parser.isoparse(trade["closed_at"])
                     duration_minutes = int((closed_at - opened_at).total_seconds() / 60)
 
                     self.risk_advisor.add_trade_feedback(
-                        symbol=position["symbol"],
+                        symbol=trade["symbol"],
                         entry_time=opened_at,
-                        regime=position.get("market_regime", "unknown"),
-                        score=position.get("score", 0),
-                        pnl_percent=pnl_data["roe"],
+                        regime=trade.get("market_regime", "unknown"),
+                        score=trade.get("score", 0),
+                        pnl_percent=trade["roe"],
                         duration_minutes=duration_minutes,
-                        hit_stop=(reason == "STOP_LOSS"),
+                        hit_stop=(trade.get("close_reason") == "STOP_LOSS"),
                     )
 
                     logger.info(
-                        f"[AI Feedback] Trade registrado: {position['symbol']} "
-                        f"{'+' if pnl_data['roe'] > 0 else ''}{pnl_data['roe']:.2f}% "
-                        f"em {duration_minutes}min ({reason})"
+                        f"[AI Feedback] Trade registrado: {trade['symbol']} "
+                        f"{'+' if trade['roe'] > 0 else ''}{trade['roe']:.2f}% "
+                        f"em {duration_minutes}min ({trade.get('close_reason')})"
                     )
                 except Exception as e:
                     logger.error(f"[AI Feedback] Erro ao registrar feedback: {e}")
 
-            # Remove from active positions (protegido por lock)
-            try:
-                async with self._positions_lock:
-                    if position in self.positions:
-                        self.positions.remove(position)
-                logger.info("Posicao removida da lista ativa")
-            except Exception as e:
-                logger.error("Erro ao remover posicao da lista: %s", e)
-
-            # Notify
-            try:
-                reason_label = {
-                    "STOP_LOSS": "Stop Loss atingido",
-                    "TAKE_PROFIT": "Take Profit atingido",
-                    "TIME_STOP": "Tempo limite atingido (8h)",
-                }.get(reason, reason)
-
-                await telegram_notifier.notify_position_closed_async(
-                    position["symbol"],
-                    position["side"],
-                    position["entry_price"],
-                    exit_price,
-                    pnl_data["pnl"],
-                    pnl_data["roe"],
-                    reason_label,
-                )
-                logger.info("Notificacao Telegram enviada")
-            except Exception as e:
-                logger.error(f"Erro ao enviar notificacao Telegram: {e}")
-
-            # Cooldown pós stop loss: registrar símbolo para não recomprar imediatamente
-            if reason == "STOP_LOSS" and self._sl_cooldown_minutes > 0:
-                self._sl_cooldown[position["symbol"]] = time.time()
-                logger.info(
-                    "⏳ Cooldown %dmin ativado para %s após STOP_LOSS",
-                    self._sl_cooldown_minutes, position["symbol"],
-                )
-
-            if not self.positions:
-                await self._notify_observing(
-                    "Sem posicoes abertas. Em observacao aguardando novo setup.", force=True
-                )
-
-            await self._get_account_balance(force_refresh=True)
-            logger.info(
-                "Posicao fechada: %s %s | PnL: %.2f USDT",
-                position["side"],
-                position["symbol"],
-                pnl_data["pnl"],
-            )
-
-        except Exception as e:
-            logger.error("ERRO CRITICO ao fechar posicao: %s", e)
-            import traceback
-
-            logger.error(traceback.format_exc())
+    async def _refresh_balance_after_closes(self):
+        """Um refresh de saldo quando a fila de bookkeeping esvazia (coalesce saídas em lote)."""
+        await self._get_account_balance(force_refresh=True)
 
     async def _refresh_positions_cache(self) -> list[dict]:
-        """Reload open positions from MongoDB so the DB stays the source of truth."""
+        """Reconcile the in-memory positions with MongoDB (external edits)."""
         try:
-            cursor = self.db.positions.find({"status": "open"}).sort("opened_at", 1)
-            positions = await cursor.to_list(self._positions_cache_limit)
+            await self.positions_repo.flush()
             async with self._positions_lock:
-                self.positions = positions
-            return positions
+                await self.positions_repo.reconcile()
         except Exception as e:
             logger.error("Error refreshing open positions cache: %s", e)
-            async with self._positions_lock:
-                return list(self.positions)
+        return self.positions_repo.snapshot()
 
     async def _load_positions(self):
         """Load open positions from database"""
         try:
-            positions = await self._refresh_positions_cache()
+            positions = await self.positions_repo.load()
             logger.info("Loaded %d open positions", len(positions))
         except Exception as e:
             logger.error("Error loading positions: %s", e)
@@ -2241,11 +2441,12 @@ class TradingBot:
 
             if not open_orders:
                 logger.info("Nenhuma ordem aberta na exchange. Conta limpa!")
-                await telegram_notifier.send_message_async("Conta limpa - Nenhuma ordem aberta")
+                await telegram_notifier.send_message_async(
+                    "Conta limpa - Nenhuma ordem aberta", kind=KIND_STATUS
+                )
 
                 # Limpar MongoDB tambem (caso tenha lixo)
-                await self.db.positions.delete_many({"status": "open"})
-                await self._refresh_positions_cache()
+                await self.positions_repo.delete_open()
                 return {"status": "clean", "found_orders": 0, "canceled_orders": 0}
 
             # 2. Tem ordens abertas - CANCELAR TODAS
@@ -2276,14 +2477,15 @@ class TradingBot:
 
                     # Cancelar ordem
                     try:
-                        await self._run_blocking(binance_manager.cancel_order, symbol, order_id)
+                        await self._exchange_call("cancel_order", symbol, order_id)
                         canceled_count += 1
                         logger.info("Ordem %s cancelada", symbol)
                         await telegram_notifier.send_message_async(
                             f"Ordem cancelada:\n"
                             f"   {symbol} {side} {order_type}\n"
                             f"   Qty: {quantity}\n"
-                            f"   Price: ${price:.2f}"
+                            f"   Price: ${price:.2f}",
+                            kind=KIND_STATUS,
                         )
                         await asyncio.sleep(0.5)  # Delay entre cancelamentos
                     except BinanceTransientError as exc:
@@ -2308,8 +2510,7 @@ class TradingBot:
                     logger.error("Erro cancelando ordem %s: %s", order.get("symbol", "UNKNOWN"), e)
 
             # 3. Limpar MongoDB
-            await self.db.positions.delete_many({"status": "open"})
-            await self._refresh_positions_cache()
+            await self.positions_repo.delete_open()
 
             logger.info(
                 "Limpeza concluida! %d/%d ordens canceladas", canceled_count, len(open_orders)
@@ -2317,7 +2518,8 @@ class TradingBot:
             await telegram_notifier.send_message_async(
                 f"Limpeza concluida!\n"
                 f"   {canceled_count} ordens canceladas\n"
-                f"   Conta pronta para operar!"
+                f"   Conta pronta para operar!",
+                kind=KIND_STATUS,
             )
 
             # Pequeno delay para garantir que ordens foram processadas
@@ -2358,8 +2560,7 @@ class TradingBot:
     async def get_status(self) -> dict:
         """Get bot status"""
         try:
-            await self._refresh_positions_cache()
-            
+
             paper_trade = getattr(binance_manager, "_paper_trade", False)
             balance = 0
             
@@ -0,0 +1,290 @@
+"""
+Arquivo Colunar de Velas OHLCV
+Substitui os documentos por vela da colecao ohlcv_data por arquivos colunares
+particionados por simbolo/timeframe/mes:
+
+    <root>/BTCUSDT/15m/2025-06.arrow   (Arrow IPC, se pyarrow estiver instalado)
+    <root>/BTCUSDT/15m/2025-06.npy     (fallback: matriz float64 [n, 8])
+
+Leituras abrem as particoes memory-mapped e recortam o intervalo pedido com
+busca binaria, sem decodificar BSON vela a vela. Escritas fazem merge por
+timestamp (a vela nova substitui a antiga) e troca atomica do arquivo.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = None
+    pa_ipc = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = Path(__file__).resolve().parent / 'data' / 'candles'
+
+# Colunas armazenadas (alem do timestamp em ms)
+CANDLE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']
+
+_EPOCH = pd.Timestamp(0, tz='UTC')
+
+
+def _to_ms(values) -> np.ndarray:
+    """Timestamps (datetime, string ou ms inteiros) -> int64 em ms UTC."""
+    series = pd.Series(values)
+    if pd.api.types.is_integer_dtype(series):
+        return series.to_numpy(dtype=np.int64)
+    ts = pd.to_datetime(series, utc=True)
+    return ((ts - _EPOCH) // pd.Timedelta(1, 'ms')).to_numpy(dtype=np.int64)
+
+
+def _month_keys(ms: np.ndarray) -> np.ndarray:
+    return ms.astype('datetime64[ms]').astype('datetime64[M]').astype(str)
+
+
+class CandleArchive:
+    """Arquivo colunar de velas com append e leitura por intervalo."""
+
+    def __init__(self, root: str | os.PathLike | None = None, fmt: str | None = None):
+        self.root = Path(root or os.getenv('CANDLE_ARCHIVE_DIR') or ARCHIVE_DIR)
+        if fmt is None:
+            fmt = 'arrow' if PYARROW_AVAILABLE else 'npy'
+        if fmt == 'arrow' and not PYARROW_AVAILABLE:
+            raise ValueError("Formato 'arrow' requer pyarrow instalado")
+        self.fmt = fmt
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ── Particoes ─────────────────────────────────────────────────────
+
+    def _dir(self, symbol: str, timeframe: str) -> Path:
+        return self.root / symbol / timeframe
+
+    def _lock(self, symbol: str, timeframe: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def _partitions(self, symbol: str, timeframe: str) -> dict[str, Path]:
+        """mes (YYYY-MM) -> arquivo; .arrow tem prioridade sobre .npy."""
+        directory = self._dir(symbol, timeframe)
+        if not directory.is_dir():
+            return {}
+        parts: dict[str, Path] = {}
+        for path in sorted(directory.iterdir()):
+            if path.suffix == '.npy' or (path.suffix == '.arrow' and PYARROW_AVAILABLE):
+                if path.stem not in parts or path.suffix == '.arrow':
+                    parts[path.stem] = path
+        return dict(sorted(parts.items()))
+
+    @staticmethod
+    def _read_partition(path: Path) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """(timestamps_ms, colunas) memory-mapped quando possivel."""
+        if path.suffix == '.arrow':
+            table = pa_ipc.open_file(pa.memory_map(str(path))).read_all()
+            ts = table.column('timestamp').to_numpy()
+            return ts, {c: table.column(c).to_numpy() for c in CANDLE_COLUMNS}
+        matrix = np.load(path, mmap_mode='r')
+        ts = matrix[:, 0].astype(np.int64)
+        return ts, {c: matrix[:, i + 1] for i, c in enumerate(CANDLE_COLUMNS)}
+
+    def _write_partition(self, directory: Path, month: str, ts: np.ndarray, cols: dict[str, np.ndarray]) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{month}.{self.fmt}'
+        tmp = directory / f'.{month}.{self.fmt}.tmp'
+        if self.fmt == 'arrow':
+            arrays = [pa.array(ts, pa.int64())] + [
+                pa.array(np.nan_to_num(cols[c]).astype(np.int64)) if c == 'trades' else pa.array(cols[c], pa.float64())
+                for c in CANDLE_COLUMNS
+            ]
+            table = pa.Table.from_arrays(arrays, names=['timestamp', *CANDLE_COLUMNS])
+            with pa.OSFile(str(tmp), 'wb') as sink, pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            matrix = np.column_stack([ts.astype(np.float64)] + [np.asarray(cols[c], dtype=np.float64) for c in CANDLE_COLUMNS])
+            with open(tmp, 'wb') as f:
+                np.save(f, matrix)
+        os.replace(tmp, path)
+        # A versao .npy ja foi incorporada no merge; deixaria de ser lida
+        if self.fmt == 'arrow' and path.with_suffix('.npy').exists():
+            path.with_suffix('.npy').unlink()
+
+    # ── Escrita ───────────────────────────────────────────────────────
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """Grava velas (merge por timestamp). Retorna quantas velas foram gravadas."""
+        if df is None or df.empty:
+            return 0
+
+        ts_new = _to_ms(df['timestamp'])
+        cols_new = {}
+        for c in CANDLE_COLUMNS:
+            if c in df.columns:
+                cols_new[c] = pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                cols_new[c] = np.full(len(df), 0.0 if c == 'trades' else np.nan)
+
+        months = _month_keys(ts_new)
+        directory = self._dir(symbol, timeframe)
+
+        with self._lock(symbol, timeframe):
+            existing = self._partitions(symbol, timeframe)
+            for month in np.unique(months):
+                mask = months == month
+                ts = ts_new[mask]
+                cols = {c: v[mask] for c, v in cols_new.items()}
+
+                if month in existing:
+                    old_ts, old_cols = self._read_partition(existing[month])
+                    keep = ~np.isin(old_ts, ts)
+                    ts = np.concatenate([old_ts[keep], ts])
+                    cols = {c: np.concatenate([np.asarray(old_cols[c], dtype=np.float64)[keep], cols[c]]) for c in CANDLE_COLUMNS}
+
+                # Ordenar e remover timestamps repetidos no proprio lote (fica o ultimo)
+                order = np.argsort(ts, kind='stable')
+                ts = ts[order]
+                last = np.append(ts[1:] != ts[:-1], True)
+                ts = ts[last]
+                cols = {c: v[order][last] for c, v in cols.items()}
+                self._write_partition(directory, month, ts, cols)
+
+        return len(df)
+
+    def import_from_mongo(
+        self,
+        collection,
+        symbols: list[str] | None = None,
+        timeframes: list[str] | None = None,
+        chunk_size: int = 50_000
+    ) -> dict:
+        """Migra velas da colecao ohlcv_data para o arquivo (uma vez por par).
+
+        Pares que ja tem particoes no arquivo sao ignorados, entao chamar de novo
+        so custa uma consulta indexada por par.
+        """
+        result = {'pairs': 0, 'candles': 0}
+        for symbol in symbols if symbols is not None else collection.distinct('symbol'):
+            pair_timeframes = (
+                timeframes if timeframes is not None else collection.distinct('timeframe', {'symbol': symbol})
+            )
+            for timeframe in pair_timeframes:
+                if self._partitions(symbol, timeframe):
+                    continue
+                cursor = collection.find(
+                    {'symbol': symbol, 'timeframe': timeframe},
+                    {'_id': 0, 'timestamp': 1, **{c: 1 for c in CANDLE_COLUMNS}}
+                ).sort('timestamp', 1)
+                imported = 0
+                batch: list[dict] = []
+                for doc in cursor:
+                    batch.append(doc)
+                    if len(batch) >= chunk_size:
+                        imported += self.append(symbol, timeframe, pd.DataFrame(batch))
+                        batch = []
+                if batch:
+                    imported += self.append(symbol, timeframe, pd.DataFrame(batch))
+                if imported:
+                    result['pairs'] += 1
+                    result['candles'] += imported
+                    logger.info(f"[Archive] {symbol} {timeframe}: {imported} velas importadas de ohlcv_data")
+        return result
+
+    # ── Leitura ───────────────────────────────────────────────────────
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: datetime | str | int | None = None,
+        end: datetime | str | int | None = None,
+    ) -> pd.DataFrame:
+        """Velas em [start, end] como DataFrame (timestamp UTC + CANDLE_COLUMNS)."""
+        start_ms = int(_to_ms([start])[0]) if start is not None else None
+        end_ms = int(_to_ms([end])[0]) if end is not None else None
+        first_month = str(_month_keys(np.array([start_ms]))[0]) if start_ms is not None else None
+        last_month = str(_month_keys(np.array([end_ms]))[0]) if end_ms is not None else None
+
+        ts_parts, col_parts = [], {c: [] for c in CANDLE_COLUMNS}
+        for month, path in self._partitions(symbol, timeframe).items():
+            if (first_month and month < first_month) or (last_month and month > last_month):
+                continue
+            try:
+                ts, cols = self._read_partition(path)
+            except Exception as e:
+                logger.warning(f"[Archive] Particao ilegivel {path}: {e}")
+                continue
+            lo = int(np.searchsorted(ts, start_ms, 'left')) if start_ms is not None else 0
+            hi = int(np.searchsorted(ts, end_ms, 'right')) if end_ms is not None else len(ts)
+            if hi <= lo:
+                continue
+            ts_parts.append(ts[lo:hi])
+            for c in CANDLE_COLUMNS:
+                col_parts[c].append(cols[c][lo:hi])
+
+        if not ts_parts:
+            return pd.DataFrame(columns=['timestamp', *CANDLE_COLUMNS])
+
+        df = pd.DataFrame({c: np.concatenate(parts) for c, parts in col_parts.items()})
+        df['trades'] = np.nan_to_num(df['trades']).astype(np.int64)
+        df.insert(0, 'timestamp', pd.to_datetime(np.concatenate(ts_parts), unit='ms', utc=True))
+        return df
+
+    def first_timestamp(self, symbol: str, timeframe: str) -> pd.Timestamp | None:
+        """Primeira vela armazenada (le apenas a particao mais antiga)."""
+        parts = self._partitions(symbol, timeframe)
+        if not parts:
+            return None
+        ts, _ = self._read_partition(next(iter(parts.values())))
+        return pd.Timestamp(int(ts[0]), unit='ms', tz='UTC') if len(ts) else None
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> pd.Timestamp | None:
+        """Ultima vela armazenada (le apenas a particao mais recente)."""
+        parts = self._partitions(symbol, timeframe)
+        if not parts:
+            return None
+        ts, _ = self._read_partition(list(parts.values())[-1])
+        return pd.Timestamp(int(ts[-1]), unit='ms', tz='UTC') if len(ts) else None
+
+    def symbols(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and any(p.iterdir()))
+
+    def timeframes(self, symbol: str) -> list[str]:
+        directory = self.root / symbol
+        if not directory.is_dir():
+            return []
+        return sorted(p.name for p in directory.iterdir() if p.is_dir())
+
+    def get_stats(self) -> dict:
+        """{symbol: {timeframe: {count, from, to}}} no mesmo formato do coletor."""
+        stats: dict[str, dict] = {}
+        for symbol in self.symbols():
+            for tf in self.timeframes(symbol):
+                count, first, last = 0, None, None
+                for path in self._partitions(symbol, tf).values():
+                    ts, _ = self._read_partition(path)
+                    if not len(ts):
+                        continue
+                    count += len(ts)
+                    first = ts[0] if first is None else first
+                    last = ts[-1]
+                if count:
+                    stats.setdefault(symbol, {})[tf] = {
+                        'count': count,
+                        'from': pd.Timestamp(int(first), unit='ms', tz='UTC').isoformat(),
+                        'to': pd.Timestamp(int(last), unit='ms', tz='UTC').isoformat(),
+                    }
+        return stats
@@ -3,14 +3,23 @@ Coletor de Dados OHLCV Historicos
 Baixa dados da Binance e salva para treinamento ML
 """
 
+import json
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import UTC, datetime, timedelta
+from pathlib import Path
 
 import pandas as pd
 from binance.client import Client
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from bot.rate_limiter import TokenBucket
+from ml.candle_archive import CandleArchive
 
 load_dotenv()
 
@@ -26,6 +35,103 @@ DEFAULT_SYMBOLS = [
 # Timeframes para coleta
 TIMEFRAMES = ['15m', '1h', '4h']
 
+# GET /api/v3/klines: ate 1000 velas por pagina, peso 2
+KLINES_PAGE_LIMIT = 1000
+KLINES_WEIGHT = 2
+
+# Fatia do orcamento REQUEST_WEIGHT (6000/min) reservada para a coleta;
+# o restante fica livre para o bot operando no mesmo IP
+DEFAULT_WEIGHT_PER_MINUTE = 1200
+
+PROGRESS_FILE = Path(__file__).resolve().parent / 'data' / 'collector_progress.json'
+
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
+    'taker_buy_quote', 'ignore'
+]
+
+
+def _klines_to_frame(klines: list) -> pd.DataFrame:
+    """Resposta crua de klines -> DataFrame OHLCV tipado"""
+    df = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+
+    # Converter tipos
+    numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'quote_volume']
+    for col in numeric_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+    df['trades'] = pd.to_numeric(df['trades'], errors='coerce').astype(int)
+
+    # Limpar
+    df = df.dropna(subset=['close', 'high', 'low', 'volume'])
+    return df[['timestamp', 'open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']]
+
+
+def _interval_ms(timeframe: str) -> int:
+    """Duracao de uma vela ('15m', '1h', '4h') em ms; 0 se desconhecida"""
+    try:
+        return int(pd.Timedelta(timeframe).total_seconds() * 1000)
+    except ValueError:
+        return 0
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """HTTP 429 (limite excedido) ou 418 (IP banido temporariamente)"""
+    return getattr(error, 'status_code', None) in (418, 429) or getattr(error, 'code', None) == -1003
+
+
+class CollectionProgress:
+    """Checkpoint em JSON do intervalo contiguo ja gravado por (backend, simbolo, timeframe).
+
+    Guarda a primeira e a ultima vela (ms) de cada serie: uma coleta interrompida
+    retoma do fim salvo e um periodo maior (days_back) baixa so o inicio que falta.
+    A chave inclui o backend (archive/mongo), entao trocar OHLCV_STORAGE nao
+    reaproveita o checkpoint do outro armazenamento.
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None, backend: str = 'archive'):
+        self.path = Path(path) if path else None
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._ranges: dict[str, list[int]] = {}
+        if self.path and self.path.exists():
+            try:
+                raw = json.loads(self.path.read_text())
+                # Formato antigo (so o cursor final, sem backend) e descartado: baixa tudo uma vez
+                self._ranges = {
+                    k: [int(v[0]), int(v[1])] for k, v in raw.items() if isinstance(v, list) and len(v) == 2
+                }
+            except Exception as e:
+                logger.warning(f"[Collector] Progresso ilegivel em {self.path}: {e}")
+
+    def key(self, symbol: str, timeframe: str) -> str:
+        return f'{self.backend}:{symbol}:{timeframe}'
+
+    def get(self, symbol: str, timeframe: str) -> tuple[int, int] | None:
+        """(primeira, ultima) vela coberta em ms, ou None"""
+        with self._lock:
+            covered = self._ranges.get(self.key(symbol, timeframe))
+            return (covered[0], covered[1]) if covered else None
+
+    def update(self, symbol: str, timeframe: str, first_ms: int, last_ms: int) -> None:
+        with self._lock:
+            self._ranges[self.key(symbol, timeframe)] = [int(first_ms), int(last_ms)]
+            if self.path is None:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix('.tmp')
+                tmp.write_text(json.dumps(self._ranges, sort_keys=True))
+                os.replace(tmp, self.path)
+            except Exception as e:
+                logger.debug(f"[Collector] Erro ao gravar progresso: {e}")
+
+    def clear(self, symbol: str, timeframe: str) -> None:
+        with self._lock:
+            self._ranges.pop(self.key(symbol, timeframe), None)
+
 
 class OHLCVCollector:
     """Coleta e armazena dados OHLCV da Binance"""
@@ -35,12 +141,33 @@ class OHLCVCollector:
         symbols: list[str] | None = None,
         timeframes: list[str] | None = None,
         days_back: int = 14,
-        use_testnet: bool | None = None
+        use_testnet: bool | None = None,
+        storage: str | None = None,
+        archive: CandleArchive | None = None,
+        mongo_batch_size: int | None = None,
+        skip_existing: bool = True,
+        max_workers: int | None = None,
+        weight_per_minute: int | None = None,
+        bucket: TokenBucket | None = None,
+        progress_path: str | os.PathLike | None = None,
+        resume: bool = True
     ):
         self.symbols = symbols or DEFAULT_SYMBOLS
         self.timeframes = timeframes or TIMEFRAMES
         self.days_back = days_back
 
+        # Coleta concorrente sob um token bucket compartilhado (request weight)
+        self.max_workers = max_workers or int(os.getenv('COLLECTOR_MAX_WORKERS', '4'))
+        weight_per_minute = weight_per_minute or int(
+            os.getenv('COLLECTOR_WEIGHT_PER_MINUTE', str(DEFAULT_WEIGHT_PER_MINUTE))
+        )
+        self.bucket = bucket or TokenBucket.per_minute(weight_per_minute, burst=weight_per_minute / 10)
+        self.resume = resume
+
+        # Escrita em lote no MongoDB (bulk_write)
+        self.mongo_batch_size = mongo_batch_size or int(os.getenv('OHLCV_MONGO_BATCH_SIZE', '1000'))
+        self.skip_existing = skip_existing
+
         # Detectar modo testnet
         if use_testnet is None:
             use_testnet = os.getenv('TESTNET_MODE', 'true').lower() == 'true'
@@ -66,8 +193,17 @@ class OHLCVCollector:
         # Colecao para dados OHLCV
         self.ohlcv_collection = self.db['ohlcv_data']
 
-        # Criar indice para consultas rapidas
-        self._ensure_indexes()
+        # Onde as velas ficam: arquivo colunar (padrao) ou colecao ohlcv_data
+        self.storage = (storage or os.getenv('OHLCV_STORAGE', 'archive')).lower()
+        self.archive = archive or (CandleArchive() if self.storage == 'archive' else None)
+        self.progress = CollectionProgress(
+            progress_path or os.getenv('COLLECTOR_PROGRESS_FILE') or PROGRESS_FILE,
+            backend='archive' if self.archive is not None else 'mongo'
+        )
+
+        if self.storage == 'mongo':
+            # Criar indice para consultas rapidas
+            self._ensure_indexes()
 
     def _ensure_indexes(self):
         """Cria indices necessarios"""
@@ -107,73 +243,249 @@ class OHLCVCollector:
             if not klines:
                 return pd.DataFrame()
 
-            columns = [
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ]
-
-            df = pd.DataFrame(klines, columns=columns)
-
-            # Converter tipos
-            numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'quote_volume']
-            for col in numeric_cols:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
-            df['trades'] = pd.to_numeric(df['trades'], errors='coerce').astype(int)
-
-            # Limpar
-            df = df.dropna(subset=['close', 'high', 'low', 'volume'])
-            df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']]
-
-            return df
+            return _klines_to_frame(klines)
 
         except Exception as e:
             logger.error(f"[Collector] Erro ao baixar {symbol} {interval}: {e}")
             return pd.DataFrame()
 
+    def save(self, df: pd.DataFrame, symbol: str, timeframe: str) -> int:
+        """Salva velas no armazenamento configurado"""
+        if self.archive is not None:
+            return self.archive.append(symbol, timeframe, df)
+        return self.save_to_mongo(df, symbol, timeframe)
+
+    def _stored_timestamps(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> set:
+        """Timestamps ja gravados no intervalo (consulta coberta pelo indice unico)"""
+        cursor = self.ohlcv_collection.find(
+            {'symbol': symbol, 'timeframe': timeframe, 'timestamp': {'$gte': start, '$lte': end}},
+            {'_id': 0, 'timestamp': 1}
+        )
+        stored = set()
+        for doc in cursor:
+            ts = pd.Timestamp(doc['timestamp'])
+            stored.add(ts.tz_convert('UTC').tz_localize(None) if ts.tzinfo else ts)
+        return stored
+
     def save_to_mongo(self, df: pd.DataFrame, symbol: str, timeframe: str) -> int:
-        """Salva dados no MongoDB"""
+        """Salva dados no MongoDB via bulk_write (upserts nao ordenados em lotes)"""
         if df.empty:
             return 0
 
-        documents = []
-        for _, row in df.iterrows():
-            doc = {
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'timestamp': row['timestamp'].to_pydatetime(),
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close']),
-                'volume': float(row['volume']),
-                'quote_volume': float(row['quote_volume']),
-                'trades': int(row['trades']),
-                'collected_at': datetime.now(UTC)
-            }
-            documents.append(doc)
+        timestamps = pd.DatetimeIndex(df['timestamp'])
+        if timestamps.tz is not None:
+            timestamps = timestamps.tz_convert('UTC').tz_localize(None)
+
+        # Pular velas ja gravadas, exceto a partir da ultima (pode ter sido salva em formacao)
+        if self.skip_existing:
+            try:
+                stored = self._stored_timestamps(
+                    symbol, timeframe, timestamps.min().to_pydatetime(), timestamps.max().to_pydatetime()
+                )
+            except Exception as e:
+                logger.debug(f"[Collector] Pre-checagem de intervalo falhou: {e}")
+                stored = set()
+            if stored:
+                last_stored = max(stored)
+                keep = ~timestamps.isin(list(stored)) | (timestamps >= last_stored)
+                if not keep.any():
+                    return 0
+                df = df[keep]
+                timestamps = timestamps[keep]
+
+        # Documentos montados por coluna (sem iterrows)
+        columns = zip(
+            timestamps.to_pydatetime(),
+            df['open'].to_numpy(dtype=float).tolist(),
+            df['high'].to_numpy(dtype=float).tolist(),
+            df['low'].to_numpy(dtype=float).tolist(),
+            df['close'].to_numpy(dtype=float).tolist(),
+            df['volume'].to_numpy(dtype=float).tolist(),
+            df['quote_volume'].to_numpy(dtype=float).tolist(),
+            df['trades'].to_numpy(dtype=int).tolist(),
+            strict=True
+        )
+        collected_at = datetime.now(UTC)
+        operations = [
+            UpdateOne(
+                {'symbol': symbol, 'timeframe': timeframe, 'timestamp': ts},
+                {'$set': {
+                    'symbol': symbol,
+                    'timeframe': timeframe,
+                    'timestamp': ts,
+                    'open': o,
+                    'high': h,
+                    'low': lo,
+                    'close': c,
+                    'volume': v,
+                    'quote_volume': q,
+                    'trades': n,
+                    'collected_at': collected_at
+                }},
+                upsert=True
+            )
+            for ts, o, h, lo, c, v, q, n in columns
+        ]
 
         # Upsert para evitar duplicatas
         saved = 0
-        for doc in documents:
+        for i in range(0, len(operations), self.mongo_batch_size):
+            batch = operations[i:i + self.mongo_batch_size]
             try:
-                self.ohlcv_collection.update_one(
-                    {
-                        'symbol': doc['symbol'],
-                        'timeframe': doc['timeframe'],
-                        'timestamp': doc['timestamp']
-                    },
-                    {'$set': doc},
-                    upsert=True
-                )
-                saved += 1
+                result = self.ohlcv_collection.bulk_write(batch, ordered=False)
+                saved += result.upserted_count + result.matched_count
+            except BulkWriteError as e:
+                details = e.details or {}
+                saved += details.get('nUpserted', 0) + details.get('nMatched', 0)
+                logger.debug(f"[Collector] {len(details.get('writeErrors', []))} erros no lote: {e}")
             except Exception as e:
-                logger.debug(f"[Collector] Erro ao salvar documento: {e}")
+                logger.debug(f"[Collector] Erro ao salvar lote: {e}")
 
         return saved
 
+    def _get_klines_page(self, symbol: str, interval: str, start_ms: int, end_ms: int, retries: int = 3) -> tuple[list, float]:
+        """Uma pagina de klines sob o token bucket. Retorna (klines, segundos em espera)"""
+        waited = 0.0
+        for attempt in range(retries + 1):
+            waited += self.bucket.acquire(KLINES_WEIGHT)
+            try:
+                klines = self.client.get_klines(
+                    symbol=symbol,
+                    interval=interval,
+                    startTime=start_ms,
+                    endTime=end_ms,
+                    limit=KLINES_PAGE_LIMIT
+                )
+                return klines, waited
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt == retries:
+                    raise
+                # Limite estourado (ex: outro processo no mesmo IP): esvaziar o bucket e recuar
+                backoff = 2 ** attempt * 5
+                logger.warning(f"[Collector] Rate limit em {symbol} {interval}, aguardando {backoff}s")
+                self.bucket.drain(backoff)
+        return [], waited
+
+    def _import_legacy(self, symbols: list[str]) -> None:
+        """Traz para o arquivo as velas que ainda so existem em ohlcv_data (antes de baixar)"""
+        if self.archive is None:
+            return
+        try:
+            imported = self.archive.import_from_mongo(self.ohlcv_collection, symbols, self.timeframes)
+        except Exception as e:
+            logger.warning(f"[Collector] Erro ao importar ohlcv_data para o arquivo: {e}")
+            return
+        if imported['candles']:
+            logger.info(f"[Collector] {imported['candles']} velas de {imported['pairs']} pares migradas de ohlcv_data")
+
+    def _stored_range(self, symbol: str, timeframe: str) -> tuple[int, int] | None:
+        """(primeira, ultima) vela presente no armazenamento, em ms"""
+        if self.archive is not None:
+            first = self.archive.first_timestamp(symbol, timeframe)
+            last = self.archive.last_timestamp(symbol, timeframe)
+        else:
+            query = {'symbol': symbol, 'timeframe': timeframe}
+            projection = {'_id': 0, 'timestamp': 1}
+            first_doc = self.ohlcv_collection.find_one(query, projection, sort=[('timestamp', 1)])
+            last_doc = self.ohlcv_collection.find_one(query, projection, sort=[('timestamp', -1)])
+            first = pd.Timestamp(first_doc['timestamp']) if first_doc else None
+            last = pd.Timestamp(last_doc['timestamp']) if last_doc else None
+        if first is None or last is None:
+            return None
+        first = first.tz_localize('UTC') if first.tzinfo is None else first
+        last = last.tz_localize('UTC') if last.tzinfo is None else last
+        return first.value // 1_000_000, last.value // 1_000_000
+
+    def _covered_range(self, symbol: str, timeframe: str) -> tuple[int, int] | None:
+        """Intervalo do checkpoint que ainda existe no armazenamento (arquivo apagado, ohlcv_data podado)"""
+        covered = self.progress.get(symbol, timeframe)
+        if covered is None:
+            return None
+        try:
+            stored = self._stored_range(symbol, timeframe)
+        except Exception as e:
+            logger.debug(f"[Collector] Erro ao ler intervalo armazenado de {symbol} {timeframe}: {e}")
+            return covered
+        if stored is None or stored[0] > covered[1] or stored[1] < covered[0]:
+            self.progress.clear(symbol, timeframe)
+            return None
+        # O inicio coberto e o inicio pedido: a primeira vela fica ate um intervalo depois
+        first = covered[0] if stored[0] <= covered[0] + _interval_ms(timeframe) else stored[0]
+        return first, min(covered[1], stored[1])
+
+    def _download_range(
+        self, symbol: str, timeframe: str, start_ms: int, end_ms: int, info: dict, on_page=None
+    ) -> None:
+        """Baixa [start_ms, end_ms] pagina a pagina; ``on_page`` recebe a abertura da ultima vela"""
+        while start_ms <= end_ms:
+            klines, waited = self._get_klines_page(symbol, timeframe, start_ms, end_ms)
+            info['requests'] += 1
+            info['waited_seconds'] += waited
+            if not klines:
+                break
+
+            df = _klines_to_frame(klines)
+            if not df.empty:
+                info['saved'] += self.save(df, symbol, timeframe)
+                info['candles'] += len(df)
+                first, last = df['timestamp'].iloc[0], df['timestamp'].iloc[-1]
+                info['first'] = first if info['first'] is None else min(info['first'], first)
+                info['last'] = last if info['last'] is None else max(info['last'], last)
+
+            last_open = int(klines[-1][0])
+            if on_page is not None:
+                on_page(last_open)
+            if len(klines) < KLINES_PAGE_LIMIT:
+                break
+            start_ms = last_open + 1
+
+    def collect_timeframe(self, symbol: str, timeframe: str, start_time: datetime, end_time: datetime) -> dict:
+        """Baixa e grava um (simbolo, timeframe) pagina a pagina, com checkpoint por pagina
+
+        Com checkpoint, baixa primeiro o inicio que falta (days_back maior) e depois
+        retoma o fim a partir da ultima vela coberta.
+        """
+        started = time.perf_counter()
+        start_ms = int(start_time.timestamp() * 1000)
+        end_ms = int(end_time.timestamp() * 1000)
+
+        info = {'candles': 0, 'saved': 0, 'requests': 0, 'waited_seconds': 0.0, 'first': None, 'last': None}
+
+        covered = self._covered_range(symbol, timeframe) if self.resume else None
+        if covered is not None and start_ms <= covered[1] <= end_ms:
+            first_ms, last_ms = covered
+            if start_ms < first_ms:
+                # Cabeca: so entra no checkpoint quando chegar ao intervalo ja coberto
+                self._download_range(symbol, timeframe, start_ms, first_ms - 1, info)
+                info['backfilled_from'] = pd.Timestamp(start_ms, unit='ms', tz='UTC').isoformat()
+                first_ms = start_ms
+                self.progress.update(symbol, timeframe, first_ms, last_ms)
+
+            # Rebaixa a ultima vela gravada (pode ter sido salva em formacao)
+            info['resumed_from'] = pd.Timestamp(last_ms, unit='ms', tz='UTC').isoformat()
+            self._download_range(
+                symbol, timeframe, last_ms, end_ms, info,
+                on_page=lambda last: self.progress.update(symbol, timeframe, first_ms, last)
+            )
+        else:
+            self._download_range(
+                symbol, timeframe, start_ms, end_ms, info,
+                on_page=lambda last: self.progress.update(symbol, timeframe, start_ms, last)
+            )
+
+        info['seconds'] = round(time.perf_counter() - started, 3)
+        info['waited_seconds'] = round(info['waited_seconds'], 3)
+
+        first, last = info.pop('first'), info.pop('last')
+        if info['candles']:
+            info['start'] = first.isoformat()
+            info['end'] = last.isoformat()
+            logger.info(f"[Collector] {symbol} {timeframe}: {info['candles']} velas salvas em {info['seconds']:.1f}s")
+        else:
+            info['error'] = 'no data'
+
+        return info
+
     def collect_symbol(self, symbol: str) -> dict:
         """Coleta todos os timeframes de um simbolo"""
         now = datetime.now(UTC)
@@ -185,29 +497,19 @@ class OHLCVCollector:
             'total_candles': 0
         }
 
+        started = time.perf_counter()
+        self._import_legacy([symbol])
         for tf in self.timeframes:
             logger.info(f"[Collector] Baixando {symbol} {tf}...")
-
-            df = self.fetch_klines(symbol, tf, start_time, now)
-
-            if not df.empty:
-                saved = self.save_to_mongo(df, symbol, tf)
-                result['timeframes'][tf] = {
-                    'candles': len(df),
-                    'saved': saved,
-                    'start': df['timestamp'].min().isoformat(),
-                    'end': df['timestamp'].max().isoformat()
-                }
-                result['total_candles'] += len(df)
-
-                logger.info(f"[Collector] {symbol} {tf}: {len(df)} velas salvas")
-            else:
-                result['timeframes'][tf] = {'candles': 0, 'error': 'no data'}
+            info = self.collect_timeframe(symbol, tf, start_time, now)
+            result['timeframes'][tf] = info
+            result['total_candles'] += info['candles']
+        result['seconds'] = round(time.perf_counter() - started, 3)
 
         return result
 
     def collect_all(self) -> dict:
-        """Coleta dados de todos os simbolos"""
+        """Coleta dados de todos os simbolos em paralelo (pool limitado + token bucket)"""
         logger.info(f"[Collector] Iniciando coleta de {len(self.symbols)} simbolos...")
         logger.info(f"[Collector] Timeframes: {self.timeframes}")
         logger.info(f"[Collector] Periodo: ultimos {self.days_back} dias")
@@ -219,22 +521,62 @@ class OHLCVCollector:
             'errors': []
         }
 
-        for i, symbol in enumerate(self.symbols, 1):
-            logger.info(f"[Collector] [{i}/{len(self.symbols)}] Processando {symbol}...")
-
-            try:
-                result = self.collect_symbol(symbol)
-                results['symbols'][symbol] = result
-                results['total_candles'] += result['total_candles']
-            except Exception as e:
-                logger.error(f"[Collector] Erro em {symbol}: {e}")
-                results['errors'].append({'symbol': symbol, 'error': str(e)})
-
+        now = datetime.now(UTC)
+        start_time = now - timedelta(days=self.days_back)
+        started = time.perf_counter()
+        weight_before = self.bucket.stats['weight']
+
+        self._import_legacy(self.symbols)
+        tasks = [(symbol, tf) for symbol in self.symbols for tf in self.timeframes]
+        done: dict[tuple[str, str], dict] = {}
+        failed: dict[str, str] = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tasks) or 1))) as pool:
+            futures = {
+                pool.submit(self.collect_timeframe, symbol, tf, start_time, now): (symbol, tf)
+                for symbol, tf in tasks
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                symbol, tf = futures[future]
+                try:
+                    done[(symbol, tf)] = future.result()
+                    logger.info(f"[Collector] [{i}/{len(tasks)}] {symbol} {tf} concluido")
+                except Exception as e:
+                    logger.error(f"[Collector] Erro em {symbol} {tf}: {e}")
+                    failed.setdefault(symbol, f'{tf}: {e}')
+
+        # Resultado por simbolo na ordem original (tempo = soma dos timeframes)
+        for symbol in self.symbols:
+            if symbol in failed:
+                results['errors'].append({'symbol': symbol, 'error': failed[symbol]})
+                continue
+            timeframes = {tf: done[(symbol, tf)] for tf in self.timeframes}
+            result = {
+                'symbol': symbol,
+                'timeframes': timeframes,
+                'total_candles': sum(info['candles'] for info in timeframes.values()),
+                'seconds': round(sum(info['seconds'] for info in timeframes.values()), 3),
+                'requests': sum(info['requests'] for info in timeframes.values()),
+                'waited_seconds': round(sum(info['waited_seconds'] for info in timeframes.values()), 3)
+            }
+            results['symbols'][symbol] = result
+            results['total_candles'] += result['total_candles']
+
+        results['stats'] = {
+            'seconds': round(time.perf_counter() - started, 3),
+            'workers': self.max_workers,
+            'requests': sum(info['requests'] for info in done.values()),
+            'weight_used': self.bucket.stats['weight'] - weight_before,
+            'waited_seconds': round(sum(info['waited_seconds'] for info in done.values()), 3)
+        }
         results['finished_at'] = datetime.now(UTC).isoformat()
 
         # Resumo
         logger.info("[Collector] Coleta concluida!")
-        logger.info(f"[Collector] Total: {results['total_candles']} velas de {len(self.symbols)} simbolos")
+        logger.info(
+            f"[Collector] Total: {results['total_candles']} velas de {len(self.symbols)} simbolos "
+            f"em {results['stats']['seconds']:.1f}s ({results['stats']['requests']} requests)"
+        )
 
         return results
 
@@ -245,7 +587,10 @@ class OHLCVCollector:
         start_time: datetime | None = None,
         end_time: datetime | None = None
     ) -> pd.DataFrame:
-        """Recupera dados do MongoDB"""
+        """Recupera dados do arquivo colunar ou do MongoDB"""
+        if self.archive is not None:
+            return self.archive.read(symbol, timeframe, start_time, end_time)
+
         query = {
             'symbol': symbol,
             'timeframe': timeframe
@@ -273,6 +618,9 @@ class OHLCVCollector:
 
     def get_stats(self) -> dict:
         """Retorna estatisticas dos dados coletados"""
+        if self.archive is not None:
+            return self.archive.get_stats()
+
         pipeline = [
             {
                 '$group': {
@@ -317,6 +665,8 @@ def run_collection():
     parser.add_argument('--symbols', nargs='+', help='Simbolos especificos')
     parser.add_argument('--timeframes', nargs='+', help='Timeframes especificos')
     parser.add_argument('--stats', action='store_true', help='Mostrar apenas estatisticas')
+    parser.add_argument('--workers', type=int, help='Downloads simultaneos')
+    parser.add_argument('--no-resume', action='store_true', help='Ignorar checkpoint e baixar o periodo inteiro')
 
     args = parser.parse_args()
 
@@ -328,7 +678,9 @@ def run_collection():
     collector = OHLCVCollector(
         symbols=args.symbols,
         timeframes=args.timeframes,
-        days_back=args.days
+        days_back=args.days,
+        max_workers=args.workers,
+        resume=not args.no_resume
     )
 
     if args.stats:
@@ -352,6 +704,7 @@ def run_collection():
         print("RESUMO:")
         print(f"  Total de velas: {results['total_candles']}")
         print(f"  Simbolos processados: {len(results['symbols'])}")
+        print(f"  Tempo: {results['stats']['seconds']:.1f}s ({results['stats']['requests']} requests)")
         if results['errors']:
             print(f"  Erros: {len(results['errors'])}")
 
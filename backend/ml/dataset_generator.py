@@ -8,6 +8,7 @@ import os
 import sys
 from datetime import UTC, datetime
 
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from pymongo import MongoClient
@@ -16,11 +17,25 @@ from pymongo import MongoClient
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from bot.strategy import TradingStrategy
+from ml.candle_archive import CandleArchive
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Velas puladas no inicio (warmup dos indicadores) e horizonte maximo do trade
+WARMUP_CANDLES = 200
+MAX_HOLD_CANDLES = 100
+
+# Janela da media de volume do volume_ratio
+VOLUME_WINDOW = 20
+
+# Amostras por bloco na busca de barreiras (matriz bloco x MAX_HOLD_CANDLES)
+OUTCOME_CHUNK = 8192
+
+# Ordem das features exatamente como _extract_features as insere no dict
+EMA_COLUMNS = ['ema_fast', 'ema_slow', 'ema_50', 'ema_200']
+
 
 class DatasetGenerator:
     """Gera dataset rotulado para treinamento de ML"""
@@ -31,7 +46,9 @@ class DatasetGenerator:
         take_profit_pct: float = 4.0,
         fee_pct: float = 0.1,       # Fee da Binance
         slippage_pct: float = 0.05,  # Slippage estimado
-        min_signal_strength: int = 40
+        min_signal_strength: int = 40,
+        storage: str | None = None,
+        archive: CandleArchive | None = None
     ):
         self.stop_loss_pct = stop_loss_pct
         self.take_profit_pct = take_profit_pct
@@ -48,9 +65,21 @@ class DatasetGenerator:
         self.mongo_client = MongoClient(mongo_url)
         self.db = self.mongo_client[db_name]
 
+        # Fonte das velas: arquivo colunar (padrao) ou colecao ohlcv_data
+        self.storage = (storage or os.getenv('OHLCV_STORAGE', 'archive')).lower()
+        self.archive = archive or (CandleArchive() if self.storage == 'archive' else None)
+
         # Strategy para calcular indicadores
         self.strategy = TradingStrategy(None, min_signal_strength=min_signal_strength)
 
+    def _import_legacy(self, symbols: list[str] | None = None, timeframes: list[str] | None = None) -> int:
+        """Migra para o arquivo pares que so existem em ohlcv_data; retorna velas importadas"""
+        try:
+            return self.archive.import_from_mongo(self.db.ohlcv_data, symbols, timeframes)['candles']
+        except Exception as e:
+            logger.warning(f"[Generator] Erro ao importar ohlcv_data para o arquivo: {e}")
+            return 0
+
     def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calcula todos os indicadores tecnicos"""
         return self.strategy.calculate_indicators(df)
@@ -233,7 +262,7 @@ class DatasetGenerator:
             take_profit = entry_price * (1 - self.take_profit_pct / 100)
 
         # Simular velas futuras
-        max_candles = min(100, len(df) - entry_idx - 1)
+        max_candles = min(MAX_HOLD_CANDLES, len(df) - entry_idx - 1)
 
         for i in range(1, max_candles + 1):
             candle = df.iloc[entry_idx + i]
@@ -270,16 +299,276 @@ class DatasetGenerator:
 
         return 'TIMEOUT', pnl, max_candles
 
-    def generate_from_ohlcv(
+    # ── Versao vetorizada (mesmas amostras que o loop por vela) ────────
+
+    @staticmethod
+    def _values(df: pd.DataFrame, col: str, default=None) -> np.ndarray | None:
+        """Coluna como float64; ``default`` (escalar ou array) se nao existir"""
+        if col in df.columns:
+            return df[col].to_numpy(dtype=np.float64)
+        if default is None:
+            return None
+        return np.broadcast_to(np.asarray(default, dtype=np.float64), len(df))
+
+    def _signals_vectorized(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """Equivalente a _generate_simple_signal em todas as velas.
+
+        Retorna (lado, forca): lado 1 = BUY, -1 = SELL, 0 = NONE.
+        """
+        close = df['close'].to_numpy(dtype=np.float64)
+        rsi = self._values(df, 'rsi', 50.0)
+        macd = self._values(df, 'macd', 0.0)
+        macd_signal = self._values(df, 'macd_signal', 0.0)
+        ema_fast = self._values(df, 'ema_fast', close)
+        ema_slow = self._values(df, 'ema_slow', close)
+
+        valid = ~(np.isnan(rsi) | np.isnan(macd))
+
+        buy_rsi = rsi < 40
+        buy_macd = macd > macd_signal
+        buy_price = close > ema_fast
+        buy_trend = ema_fast > ema_slow
+        buy_signals = buy_rsi.astype(np.int64) + buy_macd + buy_price + buy_trend
+        buy_strength = 50 + 10 * buy_rsi.astype(np.int64) + 10 * buy_macd + 5 * buy_price + 5 * buy_trend
+
+        sell_signals = (
+            (rsi > 60).astype(np.int64) + (macd < macd_signal) + (close < ema_fast) + (ema_fast < ema_slow)
+        )
+
+        is_buy = valid & (buy_signals >= 2) & (buy_signals > sell_signals)
+        is_sell = valid & (sell_signals >= 2) & (sell_signals > buy_signals)
+
+        side = np.where(is_buy, 1, np.where(is_sell, -1, 0)).astype(np.int8)
+        strength = np.where(
+            is_buy, np.minimum(100, buy_strength), np.where(is_sell, np.minimum(100, 50 + sell_signals * 10), 0)
+        )
+        return side, strength
+
+    def _features_vectorized(self, df: pd.DataFrame, idx: np.ndarray) -> dict:
+        """Equivalente a _extract_features nas velas ``idx`` (idx >= VOLUME_WINDOW).
+
+        Retorna {feature: (valores, presente)} na ordem de insercao do dict original;
+        ``presente`` None = definida em todas as amostras.
+        """
+        features: dict[str, tuple[np.ndarray, np.ndarray | None]] = {}
+
+        close = df['close'].to_numpy(dtype=np.float64)
+        open_ = df['open'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        c, o, h, lo, v = close[idx], open_[idx], high[idx], low[idx], volume[idx]
+
+        # === FEATURES DE PRECO ===
+        features['close'] = (c, None)
+        features['open'] = (o, None)
+        features['high'] = (h, None)
+        features['low'] = (lo, None)
+        features['volume'] = (v, None)
+
+        features['body_pct'] = (np.abs(c - o) / o * 100, None)
+        features['upper_wick_pct'] = ((h - np.maximum(o, c)) / c * 100, None)
+        features['lower_wick_pct'] = ((np.minimum(o, c) - lo) / c * 100, None)
+        features['is_bullish'] = ((c > o).astype(np.int64), None)
+
+        def column(col):
+            values = self._values(df, col)
+            return (None, None) if values is None else (values[idx], ~np.isnan(values[idx]))
+
+        # === FEATURES DE INDICADORES ===
+        for col in EMA_COLUMNS:
+            values, present = column(col)
+            if values is not None:
+                features[col] = (values, present)
+                features[f'{col}_dist'] = ((c - values) / values * 100, present)
+
+        rsi, rsi_ok = column('rsi')
+        if rsi is not None:
+            features['rsi'] = (rsi, rsi_ok)
+            features['rsi_oversold'] = ((rsi < 30).astype(np.int64), rsi_ok)
+            features['rsi_overbought'] = ((rsi > 70).astype(np.int64), rsi_ok)
+
+        macd = {col: column(col) for col in ['macd', 'macd_signal', 'macd_hist']}
+        for col, (values, present) in macd.items():
+            if values is not None:
+                features[col] = (values, present)
+        if macd['macd'][0] is not None and macd['macd_signal'][0] is not None:
+            features['macd_cross_up'] = (
+                (macd['macd'][0] > macd['macd_signal'][0]).astype(np.int64),
+                macd['macd'][1] & macd['macd_signal'][1]
+            )
+
+        bb = {col: column(col) for col in ['bb_upper', 'bb_middle', 'bb_lower']}
+        for col, (values, present) in bb.items():
+            if values is not None:
+                features[col] = (values, present)
+        if bb['bb_upper'][0] is not None and bb['bb_lower'][0] is not None:
+            upper, lower = bb['bb_upper'][0], bb['bb_lower'][0]
+            present = bb['bb_upper'][1] & bb['bb_lower'][1]
+            bb_width = upper - lower
+            features['bb_width_pct'] = (bb_width / c * 100, present)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                features['bb_position'] = (np.where(bb_width > 0, (c - lower) / bb_width, 0.5), present)
+
+        atr, atr_ok = column('atr')
+        if atr is not None:
+            features['atr'] = (atr, atr_ok)
+            features['atr_pct'] = (atr / c * 100, atr_ok)
+
+        vwap, vwap_ok = column('vwap')
+        if vwap is not None:
+            features['vwap'] = (vwap, vwap_ok)
+            features['vwap_dist'] = ((c - vwap) / vwap * 100, vwap_ok)
+
+        obv, obv_ok = column('obv')
+        if obv is not None:
+            features['obv'] = (obv, obv_ok)
+
+        # === FEATURES TEMPORAIS ===
+        if 'timestamp' in df.columns and pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+            ts = pd.DatetimeIndex(df['timestamp'].to_numpy()[idx])
+            day_of_week = ts.dayofweek.to_numpy().astype(np.int64)
+            features['hour'] = (ts.hour.to_numpy().astype(np.int64), None)
+            features['day_of_week'] = (day_of_week, None)
+            features['is_weekend'] = ((day_of_week >= 5).astype(np.int64), None)
+
+        # === FEATURES DE MOMENTUM ===
+        for n in [1, 3, 5]:
+            past_close = close[idx - n]
+            features[f'return_{n}'] = ((c - past_close) / past_close * 100, None)
+
+        # Media das VOLUME_WINDOW velas anteriores, somada linha a linha como Series.mean()
+        window = volume[idx[:, None] + np.arange(-VOLUME_WINDOW, 0)]
+        ok = ~np.isnan(window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol_mean = np.where(ok, window, 0.0).sum(axis=1) / ok.sum(axis=1)
+            volume_ratio = v / vol_mean
+        features['volume_ratio'] = (volume_ratio, vol_mean > 0)
+
+        return features
+
+    def _simulate_outcomes(
+        self,
+        df: pd.DataFrame,
+        idx: np.ndarray,
+        side: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Equivalente a _simulate_trade_outcome para varias entradas de uma vez.
+
+        Busca da primeira barreira (stop antes do alvo na mesma vela, como no loop)
+        sobre janelas deslizantes das MAX_HOLD_CANDLES velas seguintes.
+        Retorna (resultado, pnl_pct, duracao_candles).
+        """
+        n = len(df)
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        # Linha k das janelas = velas k+1 .. k+MAX_HOLD_CANDLES (NaN apos o fim nunca toca)
+        pad = np.full(MAX_HOLD_CANDLES, np.nan)
+        high_windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([high[1:], pad]), MAX_HOLD_CANDLES)
+        low_windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([low[1:], pad]), MAX_HOLD_CANDLES)
+
+        outcomes = np.empty(len(idx), dtype=object)
+        pnls = np.empty(len(idx), dtype=np.float64)
+        durations = np.empty(len(idx), dtype=np.int64)
+
+        stop_pnl = -self.stop_loss_pct - self.total_cost_pct
+        take_pnl = self.take_profit_pct - self.total_cost_pct
+
+        for lo_i in range(0, len(idx), OUTCOME_CHUNK):
+            rows = idx[lo_i:lo_i + OUTCOME_CHUNK]
+            is_buy = side[lo_i:lo_i + OUTCOME_CHUNK] == 1
+            entry = close[rows]
+
+            stop_loss = np.where(
+                is_buy, entry * (1 - self.stop_loss_pct / 100), entry * (1 + self.stop_loss_pct / 100)
+            )[:, None]
+            take_profit = np.where(
+                is_buy, entry * (1 + self.take_profit_pct / 100), entry * (1 - self.take_profit_pct / 100)
+            )[:, None]
+
+            highs = high_windows[rows]
+            lows = low_windows[rows]
+            buy_col = is_buy[:, None]
+            stop_hit = np.where(buy_col, lows <= stop_loss, highs >= stop_loss)
+            take_hit = np.where(buy_col, highs >= take_profit, lows <= take_profit)
+
+            hit = stop_hit | take_hit
+            touched = hit.any(axis=1)
+            first = hit.argmax(axis=1)
+            stopped = stop_hit[np.arange(len(rows)), first]
+
+            # Timeout - fechar no ultimo preco
+            max_candles = np.minimum(MAX_HOLD_CANDLES, n - rows - 1)
+            last_price = close[np.minimum(rows + max_candles, n - 1)]
+            timeout_pnl = np.where(
+                is_buy,
+                (last_price - entry) / entry * 100 - self.total_cost_pct,
+                (entry - last_price) / entry * 100 - self.total_cost_pct
+            )
+
+            out = slice(lo_i, lo_i + len(rows))
+            outcomes[out] = np.where(touched, np.where(stopped, 'STOP_LOSS', 'TAKE_PROFIT'), 'TIMEOUT')
+            pnls[out] = np.where(touched, np.where(stopped, stop_pnl, take_pnl), timeout_pnl)
+            durations[out] = np.where(touched, first + 1, max_candles)
+
+        return outcomes, pnls, durations
+
+    def _build_samples(self, df: pd.DataFrame, symbol: str, timeframe: str) -> pd.DataFrame:
+        """Amostras rotuladas de um df com indicadores, sem loop por vela"""
+        side, strength = self._signals_vectorized(df)
+        side[:WARMUP_CANDLES] = 0
+        side[max(WARMUP_CANDLES, len(df) - MAX_HOLD_CANDLES):] = 0  # Deixar espaco para simulacao
+
+        idx = np.flatnonzero(side)
+        if len(idx) == 0:
+            return pd.DataFrame()
+        side = side[idx]
+
+        columns = self._features_vectorized(df, idx)
+        columns['symbol'] = (np.full(len(idx), symbol, dtype=object), None)
+        columns['timeframe'] = (np.full(len(idx), timeframe, dtype=object), None)
+        columns['signal'] = (np.where(side == 1, 'BUY', 'SELL').astype(object), None)
+        columns['signal_strength'] = (strength[idx].astype(np.int64), None)
+
+        # Labels
+        outcome, pnl, duration = self._simulate_outcomes(df, idx, side)
+        columns['outcome'] = (outcome, None)
+        columns['pnl_pct'] = (pnl, None)
+        columns['duration_candles'] = (duration, None)
+        columns['is_win'] = ((pnl > 0).astype(np.int64), None)
+        columns['is_good_trade'] = ((pnl > 1.0).astype(np.int64), None)  # Trade que vale a pena
+
+        # Mesma forma do DataFrame(list[dict]): feature ausente vira NaN (int -> float)
+        # e as colunas seguem a ordem em que aparecem pela primeira vez nas amostras
+        data, first_seen = {}, {}
+        for pos, (name, (values, present)) in enumerate(columns.items()):
+            if present is None or present.all():
+                data[name], first_seen[name] = values, (0, pos)
+            elif present.any():
+                data[name] = np.where(present, values, np.nan)
+                first_seen[name] = (int(present.argmax()), pos)
+        order = sorted(data, key=first_seen.__getitem__)
+
+        return pd.DataFrame({name: data[name] for name in order})
+
+    def _load_ohlcv(
         self,
         symbol: str,
-        timeframe: str = '15m',
+        timeframe: str,
         start_date: datetime | None = None,
         end_date: datetime | None = None
     ) -> pd.DataFrame:
-        """Gera dataset a partir de dados OHLCV salvos"""
+        """Carrega velas (timestamp + OHLCV) do arquivo colunar ou do MongoDB"""
+        columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+        if self.archive is not None:
+            df = self.archive.read(symbol, timeframe, start_date, end_date)
+            if df.empty and self._import_legacy([symbol], [timeframe]):
+                df = self.archive.read(symbol, timeframe, start_date, end_date)
+            return df[columns] if not df.empty else pd.DataFrame()
 
-        # Buscar dados
         query = {'symbol': symbol, 'timeframe': timeframe}
 
         if start_date:
@@ -290,61 +579,42 @@ class DatasetGenerator:
             else:
                 query['timestamp'] = {'$lte': end_date}
 
-        cursor = self.db.ohlcv_data.find(query).sort('timestamp', 1)
-        data = list(cursor)
-
-        if len(data) < 200:
-            logger.warning(f"[Generator] Dados insuficientes para {symbol}: {len(data)} velas")
+        data = list(self.db.ohlcv_data.find(query).sort('timestamp', 1))
+        if not data:
             return pd.DataFrame()
 
-        # Converter para DataFrame
         df = pd.DataFrame(data)
-        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+        df = df[columns]
         df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        return df
 
-        logger.info(f"[Generator] Processando {symbol} {timeframe}: {len(df)} velas")
-
-        # Calcular indicadores
-        df = self._calculate_indicators(df)
-
-        # Encontrar primeiro indice valido (apos indicadores)
-        start_idx = 200  # Pular warmup dos indicadores
-
-        samples = []
-
-        for idx in range(start_idx, len(df) - 100):  # Deixar espaco para simulacao
-            row = df.iloc[idx]
-
-            # Gerar sinal baseado em indicadores simples (nao depende da estrategia)
-            signal = self._generate_simple_signal(row, df, idx)
+    def generate_from_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = '15m',
+        start_date: datetime | None = None,
+        end_date: datetime | None = None
+    ) -> pd.DataFrame:
+        """Gera dataset a partir de dados OHLCV salvos"""
 
-            if signal['signal'] not in ['BUY', 'SELL']:
-                continue
+        # Buscar dados
+        df = self._load_ohlcv(symbol, timeframe, start_date, end_date)
 
-            # Extrair features
-            features = self._extract_features(row, df, idx)
-            features['symbol'] = symbol
-            features['timeframe'] = timeframe
-            features['signal'] = signal['signal']
-            features['signal_strength'] = signal.get('strength', 50)
+        if len(df) < 200:
+            logger.warning(f"[Generator] Dados insuficientes para {symbol}: {len(df)} velas")
+            return pd.DataFrame()
 
-            # Simular resultado
-            outcome, pnl, duration = self._simulate_trade_outcome(
-                df, idx, signal['signal'], row['close']
-            )
+        logger.info(f"[Generator] Processando {symbol} {timeframe}: {len(df)} velas")
 
-            # Labels
-            features['outcome'] = outcome
-            features['pnl_pct'] = pnl
-            features['duration_candles'] = duration
-            features['is_win'] = 1 if pnl > 0 else 0
-            features['is_good_trade'] = 1 if pnl > 1.0 else 0  # Trade que vale a pena
+        # Calcular indicadores
+        df = self._calculate_indicators(df)
 
-            samples.append(features)
+        # Sinais, features e rotulos calculados por coluna
+        samples = self._build_samples(df, symbol, timeframe)
 
         logger.info(f"[Generator] {symbol}: {len(samples)} amostras geradas")
 
-        return pd.DataFrame(samples)
+        return samples
 
     def generate_full_dataset(
         self,
@@ -354,8 +624,12 @@ class DatasetGenerator:
         """Gera dataset completo para todos os simbolos"""
 
         if symbols is None:
-            # Pegar simbolos disponiveis no banco
-            symbols = self.db.ohlcv_data.distinct('symbol')
+            # Pegar simbolos disponiveis no armazenamento
+            if self.archive is not None:
+                self._import_legacy()
+                symbols = self.archive.symbols()
+            else:
+                symbols = self.db.ohlcv_data.distinct('symbol')
 
         logger.info(f"[Generator] Gerando dataset para {len(symbols)} simbolos...")
 
@@ -0,0 +1,215 @@
+"""
+Ensemble de Arvores em Arrays Planos
+Exporta RandomForestClassifier / GradientBoostingClassifier (+ StandardScaler)
+para arrays NumPy contiguos e avalia sem o maquinario generico do sklearn.
+
+Todos os nos de todas as arvores ficam em arrays unicos (feature, threshold,
+left, right, value). A avaliacao desce todas as arvores ao mesmo tempo para
+todas as linhas: max_depth passos de indexacao vetorizada.
+
+O resultado e serializado com np.savez (sem pickle) e publicado junto do
+modelo no registro (ml/model_registry.py) como flat_model.npz.
+"""
+
+from __future__ import annotations
+
+import io
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+class FlatEnsemble:
+    """Ensemble de arvores + normalizacao em arrays planos"""
+
+    def __init__(
+        self,
+        kind: str,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: np.ndarray,
+        scaler_mean: np.ndarray | None = None,
+        scaler_scale: np.ndarray | None = None,
+        init_raw: float = 0.0,
+        learning_rate: float = 1.0,
+    ):
+        if kind not in ('forest', 'gbdt'):
+            raise ValueError(f"Tipo de ensemble desconhecido: {kind}")
+        self.kind = kind
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.classes = np.asarray(classes)
+        self.scaler_mean = None if scaler_mean is None else np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_scale = None if scaler_scale is None else np.asarray(scaler_scale, dtype=np.float64)
+        self.init_raw = float(init_raw)
+        self.learning_rate = float(learning_rate)
+        # Filhos intercalados: children[2 * no + vai_para_direita]
+        self._children = np.stack([self.left, self.right], axis=1).ravel()
+
+    # ── Avaliacao ─────────────────────────────────────────────────────
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.classes
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.feature, self.threshold, self.left, self.right, self.value, self.roots]
+        return sum(a.nbytes for a in arrays)
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.scaler_mean is not None:
+            X -= self.scaler_mean
+        if self.scaler_scale is not None:
+            X /= self.scaler_scale
+        return X
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Indice da folha alcancada em cada arvore: (n_linhas, n_arvores)"""
+        # As arvores do sklearn comparam em float32
+        X = self._scale(X).astype(np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        row_base = (np.arange(n_rows) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            x = np.take(flat_x, row_base + np.take(self.feature, node))
+            go_right = ~(x <= np.take(self.threshold, node))
+            node = np.take(self._children, node * 2 + go_right)
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidades por classe (mesma semantica do predict_proba do sklearn)"""
+        leaves = self.apply(X)
+        if self.kind == 'forest':
+            return self.value[leaves].mean(axis=1)
+        raw = self.init_raw + self.learning_rate * self.value[leaves, 0].sum(axis=1)
+        p1 = 1.0 / (1.0 + np.exp(-raw))
+        return np.column_stack([1.0 - p1, p1])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ── Serializacao ──────────────────────────────────────────────────
+
+    def to_bytes(self) -> bytes:
+        buf = io.BytesIO()
+        optional = {}
+        if self.scaler_mean is not None:
+            optional['scaler_mean'] = self.scaler_mean
+        if self.scaler_scale is not None:
+            optional['scaler_scale'] = self.scaler_scale
+        np.savez(
+            buf,
+            version=FORMAT_VERSION,
+            kind=self.kind,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            classes=self.classes,
+            init_raw=self.init_raw,
+            learning_rate=self.learning_rate,
+            **optional,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> FlatEnsemble:
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            if int(npz['version']) != FORMAT_VERSION:
+                raise ValueError(f"Versao de ensemble plano nao suportada: {int(npz['version'])}")
+            return cls(
+                kind=str(npz['kind']),
+                feature=npz['feature'],
+                threshold=npz['threshold'],
+                left=npz['left'],
+                right=npz['right'],
+                value=npz['value'],
+                roots=npz['roots'],
+                max_depth=int(npz['max_depth']),
+                classes=npz['classes'],
+                scaler_mean=npz['scaler_mean'] if 'scaler_mean' in npz else None,
+                scaler_scale=npz['scaler_scale'] if 'scaler_scale' in npz else None,
+                init_raw=float(npz['init_raw']),
+                learning_rate=float(npz['learning_rate']),
+            )
+
+
+def _flatten_trees(trees: list, value_of) -> tuple[np.ndarray, ...]:
+    """Concatena as arvores em arrays unicos com indices absolutos.
+
+    Folhas apontam para si mesmas (feature 0, threshold +inf), entao descer
+    max_depth passos sempre termina numa folha, qualquer que seja a profundidade.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for tree in trees:
+        t = tree.tree_
+        ids = np.arange(t.node_count)
+        leaf = t.children_left == -1
+        features.append(np.where(leaf, 0, t.feature))
+        thresholds.append(np.where(leaf, np.inf, t.threshold))
+        lefts.append(np.where(leaf, ids, t.children_left) + offset)
+        rights.append(np.where(leaf, ids, t.children_right) + offset)
+        values.append(value_of(t))
+        roots.append(offset)
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+    return (
+        np.concatenate(features), np.concatenate(thresholds),
+        np.concatenate(lefts), np.concatenate(rights),
+        np.concatenate(values), np.array(roots), max_depth,
+    )
+
+
+def export_ensemble(model, scaler=None) -> FlatEnsemble:
+    """RandomForestClassifier / GradientBoostingClassifier (+ StandardScaler) -> FlatEnsemble"""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+    scaler_mean = getattr(scaler, 'mean_', None) if scaler is not None else None
+    scaler_scale = getattr(scaler, 'scale_', None) if scaler is not None else None
+
+    if isinstance(model, RandomForestClassifier):
+        def proba(t):
+            # tree_.value pode estar em contagens (sklearn < 1.4) ou fracoes
+            v = t.value[:, 0, :]
+            return v / v.sum(axis=1, keepdims=True)
+
+        arrays = _flatten_trees(list(model.estimators_), proba)
+        return FlatEnsemble('forest', *arrays, classes=model.classes_,
+                            scaler_mean=scaler_mean, scaler_scale=scaler_scale)
+
+    if isinstance(model, GradientBoostingClassifier):
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("GradientBoosting multiclasse nao suportado na exportacao plana")
+        n_features = model.n_features_in_
+        if model.init_ == 'zero':
+            init_raw = 0.0
+        else:
+            init_raw = float(model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0])
+        arrays = _flatten_trees(list(model.estimators_[:, 0]), lambda t: t.value[:, 0, :1])
+        return FlatEnsemble('gbdt', *arrays, classes=model.classes_,
+                            scaler_mean=scaler_mean, scaler_scale=scaler_scale,
+                            init_raw=init_raw, learning_rate=model.learning_rate)
+
+    raise ValueError(f"Modelo {type(model).__name__} nao suportado na exportacao plana")
@@ -6,6 +6,8 @@ Integra modelo treinado ao bot de trading
 import logging
 import os
 import pickle
+import threading
+import time
 from datetime import UTC, datetime
 
 import numpy as np
@@ -13,71 +15,229 @@ import pandas as pd
 from dotenv import load_dotenv
 from pymongo import MongoClient
 
+from ml.flat_ensemble import FlatEnsemble
+from ml.model_registry import ModelRegistry
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 
+def indicators_from_opportunity(opportunity: dict) -> dict:
+    """Indicadores do filtro a partir dos campos de uma oportunidade do seletor"""
+    return {
+        'rsi': opportunity.get('rsi', 50),
+        'macd': opportunity.get('macd', 0),
+        'macd_signal': opportunity.get('macd_signal', 0),
+        'macd_hist': opportunity.get('macd_hist', 0),
+        'close': opportunity.get('price', opportunity.get('close', 0)),
+        'ema_fast': opportunity.get('ema_fast', 0),
+        'ema_slow': opportunity.get('ema_slow', 0),
+        'ema_50': opportunity.get('ema_50', 0),
+        'ema_200': opportunity.get('ema_200', 0),
+        'bb_upper': opportunity.get('bb_upper', 0),
+        'bb_lower': opportunity.get('bb_lower', 0),
+        'atr': opportunity.get('atr', 0),
+        'vwap': opportunity.get('vwap', 0),
+        'volume_ratio': opportunity.get('volume_ratio', 1),
+    }
+
+
 class MLSignalFilter:
     """Filtro de sinais usando modelo ML treinado"""
 
-    def __init__(self, model_name: str = 'signal_filter', min_confidence: float = 0.5):
+    def __init__(
+        self,
+        model_name: str = 'signal_filter',
+        min_confidence: float = 0.5,
+        db=None,
+        registry: ModelRegistry | None = None
+    ):
         self.model_name = model_name
         self.min_confidence = min_confidence
 
-        # MongoDB
-        mongo_url = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
-        db_name = os.getenv('DB_NAME', 'trading_bot')
-        self.mongo_client = MongoClient(mongo_url)
-        self.db = self.mongo_client[db_name]
+        # MongoDB (conexao propria apenas se o chamador nao fornecer db)
+        self.mongo_client = None
+        if db is None:
+            mongo_url = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
+            db_name = os.getenv('DB_NAME', 'trading_bot')
+            self.mongo_client = MongoClient(mongo_url)
+            db = self.mongo_client[db_name]
+        self.db = db
+        self.registry = registry or ModelRegistry(self.db)
 
         # Modelo
         self.model = None
         self.scaler = None
+        # Ensemble exportado em arrays planos (scaler embutido); substitui model+scaler
+        self.flat_model: FlatEnsemble | None = None
+        self.use_flat_model = os.getenv('ML_FLAT_INFERENCE', 'true').lower() == 'true'
         self.feature_columns = []
         self.metrics = {}
         self.loaded = False
+        # Versao ativa (numero do registro + hash do conteudo)
+        self.version: int | None = None
+        self.digest: str | None = None
+
+        # Troca a quente: o lock so cobre a predicao e a atribuicao do novo
+        # modelo; leitura e desserializacao acontecem fora dele
+        self._model_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._reload_thread: threading.Thread | None = None
+        self._watcher: threading.Thread | None = None
+        self._stop_watcher = threading.Event()
 
         # Estatisticas de uso
         self.stats = {
             'total_signals': 0,
             'approved': 0,
             'rejected': 0,
-            'errors': 0
+            'errors': 0,
+            # Inferencia em lote (uma chamada ao modelo por ciclo de scan);
+            # total_signals/approved/rejected contam so o candidato usado pelo bot
+            'batches': 0,
+            'batch_rows': 0,
+            'batch_approved': 0,
+            'batch_rejected': 0,
+            'last_batch_size': 0,
+            'last_batch_ms': None,
+            'avg_batch_ms': None,
+            'max_batch_ms': 0.0,
+            'reloads': 0,
+            'last_reload_ms': None
         }
 
         # Tentar carregar modelo
         self._load_model()
 
-    def _load_model(self) -> bool:
-        """Carrega modelo do MongoDB"""
-        try:
-            doc = self.db.ml_models.find_one({'name': self.model_name})
+    # ── Carga e troca a quente ────────────────────────────────────────
+
+    def _fetch_latest(self) -> dict | None:
+        """Le e desserializa a versao mais recente (sem tocar no modelo ativo)
 
+        Retorna None se nao houver modelo ou se a versao ja estiver ativa.
+        """
+        version = self.registry.latest(self.model_name)
+        if version is not None:
+            if version.digest == self.digest:
+                return None
+            artifacts = self.registry.load(version)
+            bundle = {
+                'version': version.version,
+                'digest': version.digest,
+                'feature_columns': version.feature_columns,
+                'metrics': version.metrics,
+            }
+        else:
+            # Documento unico de antes do registro versionado
+            doc = self.db.ml_models.find_one({'name': self.model_name})
             if not doc:
-                logger.warning(f"[MLFilter] Modelo '{self.model_name}' nao encontrado. Filtro desabilitado.")
+                return None
+            digest = f"legacy-{doc.get('created_at')}"
+            if digest == self.digest:
+                return None
+            artifacts = {
+                'model': doc.get('model_bytes'),
+                'scaler': doc.get('scaler_bytes'),
+                'flat_model': doc.get('flat_model_bytes'),
+            }
+            bundle = {
+                'version': None,
+                'digest': digest,
+                'feature_columns': doc['feature_columns'],
+                'metrics': doc.get('metrics', {}),
+            }
+
+        if self.use_flat_model and artifacts.get('flat_model'):
+            # Sem unpickle do sklearn: so os arrays de nos ficam residentes
+            flat_model = FlatEnsemble.from_bytes(artifacts['flat_model'])
+            bundle.update(model=flat_model, scaler=None, flat_model=flat_model)
+        else:
+            model = pickle.loads(artifacts['model'])
+            # RandomForest treinado com n_jobs=-1: para poucas linhas o pool de
+            # threads do joblib custa mais que a predicao em si
+            if hasattr(model, 'n_jobs'):
+                model.n_jobs = 1
+            bundle.update(model=model, scaler=pickle.loads(artifacts['scaler']), flat_model=None)
+        return bundle
+
+    def _swap(self, bundle: dict) -> None:
+        """Ativa um modelo ja desserializado"""
+        with self._model_lock:
+            self.model = bundle['model']
+            self.scaler = bundle['scaler']
+            self.flat_model = bundle['flat_model']
+            self.feature_columns = bundle['feature_columns']
+            self.metrics = bundle['metrics']
+            self.version = bundle['version']
+            self.digest = bundle['digest']
+            self.loaded = True
+
+    def _load_model(self) -> bool:
+        """Carrega a versao mais recente do registro; True se o modelo ativo mudou"""
+        with self._reload_lock:
+            started = time.perf_counter()
+            try:
+                bundle = self._fetch_latest()
+            except Exception as e:
+                logger.error(f"[MLFilter] Erro ao carregar modelo: {e}")
                 return False
 
-            self.model = pickle.loads(doc['model_bytes'])
-            self.scaler = pickle.loads(doc['scaler_bytes'])
-            self.feature_columns = doc['feature_columns']
-            self.metrics = doc.get('metrics', {})
-            self.loaded = True
+            if bundle is None:
+                if not self.loaded:
+                    logger.warning(f"[MLFilter] Modelo '{self.model_name}' nao encontrado. Filtro desabilitado.")
+                return False
 
-            logger.info(f"[MLFilter] Modelo carregado: {self.model_name}")
-            logger.info(f"[MLFilter] Accuracy: {self.metrics.get('accuracy', 0):.2%}")
-            logger.info(f"[MLFilter] Features: {len(self.feature_columns)}")
+            self._swap(bundle)
+            self.stats['reloads'] += 1
+            self.stats['last_reload_ms'] = round((time.perf_counter() - started) * 1000, 2)
 
-            return True
+        logger.info(
+            f"[MLFilter] Modelo carregado: {self.model_name}"
+            + (f" v{self.version}" if self.version is not None else "")
+            + (f" (plano, {self.flat_model.n_trees} arvores)" if self.flat_model else "")
+        )
+        logger.info(f"[MLFilter] Accuracy: {self.metrics.get('accuracy', 0):.2%}")
+        logger.info(f"[MLFilter] Features: {len(self.feature_columns)}")
+        return True
 
-        except Exception as e:
-            logger.error(f"[MLFilter] Erro ao carregar modelo: {e}")
-            return False
+    def reload_model(self, wait: bool = False) -> bool:
+        """Recarrega modelo (util apos retreino)
 
-    def reload_model(self) -> bool:
-        """Recarrega modelo (util apos retreino)"""
-        self.loaded = False
-        return self._load_model()
+        Por padrao a carga roda em thread de fundo e o modelo atual continua
+        atendendo ate a troca. Com wait=True, bloqueia e retorna se houve troca.
+        """
+        if wait:
+            return self._load_model()
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return False
+        self._reload_thread = threading.Thread(
+            target=self._load_model, name=f'ml-reload-{self.model_name}', daemon=True
+        )
+        self._reload_thread.start()
+        return True
+
+    def start_watcher(self, interval: float | None = None) -> None:
+        """Verifica periodicamente se ha versao nova no registro e troca a quente"""
+        if interval is None:
+            interval = float(os.getenv('ML_MODEL_POLL_SECONDS', '60'))
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop_watcher.clear()
+
+        def _watch():
+            while not self._stop_watcher.wait(interval):
+                self._load_model()
+
+        self._watcher = threading.Thread(target=_watch, name=f'ml-watch-{self.model_name}', daemon=True)
+        self._watcher.start()
+        logger.info(f"[MLFilter] Monitorando novas versoes a cada {interval:.0f}s")
+
+    def stop_watcher(self) -> None:
+        self._stop_watcher.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
 
     def extract_features(self, opportunity: dict, indicators: dict) -> dict:
         """Extrai features de uma oportunidade de trade"""
@@ -138,6 +298,37 @@ class MLSignalFilter:
 
         return features
 
+    def _feature_row(self, opportunity: dict, indicators: dict) -> list[float]:
+        """Vetor de features na ordem de feature_columns (NaN/inf -> 0)"""
+        features = self.extract_features(opportunity, indicators)
+        row = []
+        for col in self.feature_columns:
+            val = features.get(col, 0)
+            if pd.isna(val) or np.isinf(val):
+                val = 0
+            row.append(val)
+        return row
+
+    def _predict(self, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(classe prevista, probabilidade da classe 1) com um unico predict_proba"""
+        if self.flat_model is not None:
+            proba = self.flat_model.predict_proba(X)  # normalizacao embutida
+        else:
+            proba = self.model.predict_proba(self.scaler.transform(X))
+        # Mesmo criterio do predict() dos classificadores sklearn
+        preds = np.asarray(self.model.classes_)[np.argmax(proba, axis=1)]
+        return preds, proba[:, 1]
+
+    def _decide(self, pred, prob: float) -> tuple[bool, float, str]:
+        if prob >= self.min_confidence and pred == 1:
+            return True, prob, f"ML aprovado (confianca: {prob:.2%})"
+        return False, prob, f"ML rejeitado (confianca: {prob:.2%}, minimo: {self.min_confidence:.2%})"
+
+    def record_decision(self, approved: bool) -> None:
+        """Conta um sinal efetivamente considerado pelo bot (decisao vinda do lote)"""
+        self.stats['total_signals'] += 1
+        self.stats['approved' if approved else 'rejected'] += 1
+
     def should_take_trade(
         self,
         opportunity: dict,
@@ -149,10 +340,9 @@ class MLSignalFilter:
         Returns:
             (should_trade, confidence, reason)
         """
-        self.stats['total_signals'] += 1
-
         # Se modelo nao carregado, aceitar todos
         if not self.loaded or self.model is None:
+            self.stats['total_signals'] += 1
             return True, 0.5, "Modelo ML nao carregado - usando regras base"
 
         try:
@@ -160,36 +350,74 @@ class MLSignalFilter:
             if indicators is None:
                 indicators = opportunity.get('indicators', {})
 
-            features = self.extract_features(opportunity, indicators)
-
-            # Preparar para predicao
-            X = []
-            for col in self.feature_columns:
-                val = features.get(col, 0)
-                if pd.isna(val) or np.isinf(val):
-                    val = 0
-                X.append(val)
-
-            X = np.array([X])
-            X_scaled = self.scaler.transform(X)
-
-            # Predicao
-            pred = self.model.predict(X_scaled)[0]
-            prob = self.model.predict_proba(X_scaled)[0][1]
+            with self._model_lock:
+                X = np.array([self._feature_row(opportunity, indicators)])
+                preds, probs = self._predict(X)
 
             # Decisao
-            if prob >= self.min_confidence and pred == 1:
-                self.stats['approved'] += 1
-                return True, prob, f"ML aprovado (confianca: {prob:.2%})"
-            else:
-                self.stats['rejected'] += 1
-                return False, prob, f"ML rejeitado (confianca: {prob:.2%}, minimo: {self.min_confidence:.2%})"
+            decision = self._decide(preds[0], float(probs[0]))
+            self.record_decision(decision[0])
+            return decision
 
         except Exception as e:
+            self.stats['total_signals'] += 1
             self.stats['errors'] += 1
             logger.error(f"[MLFilter] Erro na predicao: {e}")
             return True, 0.5, f"Erro no ML: {e}"
 
+    def score_batch(self, candidates: list[dict]) -> dict[str, tuple[bool, float, str]]:
+        """
+        Decide todos os candidatos de um scan com uma unica chamada ao modelo
+
+        Os indicadores vem de candidate['indicators'] ou dos proprios campos do
+        candidato (como no should_take_trade chamado pelo bot).
+
+        Returns:
+            {symbol: (should_trade, confidence, reason)}
+        """
+        if not candidates:
+            return {}
+
+        symbols = [c['symbol'] for c in candidates]
+
+        if not self.loaded or self.model is None:
+            return {s: (True, 0.5, "Modelo ML nao carregado - usando regras base") for s in symbols}
+
+        started = time.perf_counter()
+        try:
+            with self._model_lock:
+                X = np.array([
+                    self._feature_row(c, c.get('indicators') or indicators_from_opportunity(c))
+                    for c in candidates
+                ])
+                preds, probs = self._predict(X)
+            decisions = {
+                symbol: self._decide(pred, float(prob))
+                for symbol, pred, prob in zip(symbols, preds, probs, strict=True)
+            }
+            approved = sum(1 for d in decisions.values() if d[0])
+            self.stats['batch_approved'] += approved
+            self.stats['batch_rejected'] += len(decisions) - approved
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"[MLFilter] Erro na predicao em lote: {e}")
+            return {s: (True, 0.5, f"Erro no ML: {e}") for s in symbols}
+
+        self._record_batch(len(candidates), (time.perf_counter() - started) * 1000)
+        return decisions
+
+    def _record_batch(self, size: int, elapsed_ms: float) -> None:
+        """Atualiza metricas de latencia da inferencia em lote"""
+        s = self.stats
+        s['batches'] += 1
+        s['batch_rows'] += size
+        s['last_batch_size'] = size
+        s['last_batch_ms'] = round(elapsed_ms, 2)
+        avg = s['avg_batch_ms']
+        # Media movel exponencial (~ultimos 20 lotes)
+        s['avg_batch_ms'] = round(elapsed_ms if avg is None else avg + (elapsed_ms - avg) * 0.1, 2)
+        s['max_batch_ms'] = round(max(s['max_batch_ms'], elapsed_ms), 2)
+
     def get_stats(self) -> dict:
         """Retorna estatisticas de uso"""
         total = self.stats['total_signals']
@@ -201,8 +429,23 @@ class MLSignalFilter:
             'approval_rate': self.stats['approved'] / total * 100 if total > 0 else 0,
             'model_loaded': self.loaded,
             'model_name': self.model_name,
+            'model_version': self.version,
+            'model_digest': self.digest[:12] if self.digest else None,
+            'reloads': self.stats['reloads'],
+            'last_reload_ms': self.stats['last_reload_ms'],
             'min_confidence': self.min_confidence,
-            'model_accuracy': self.metrics.get('accuracy', 0)
+            'model_accuracy': self.metrics.get('accuracy', 0),
+            'flat_model': self.flat_model is not None,
+            'batch': {
+                'batches': self.stats['batches'],
+                'rows': self.stats['batch_rows'],
+                'approved': self.stats['batch_approved'],
+                'rejected': self.stats['batch_rejected'],
+                'last_size': self.stats['last_batch_size'],
+                'last_ms': self.stats['last_batch_ms'],
+                'avg_ms': self.stats['avg_batch_ms'],
+                'max_ms': self.stats['max_batch_ms']
+            }
         }
 
     def get_model_info(self) -> dict:
@@ -213,6 +456,7 @@ class MLSignalFilter:
         return {
             'loaded': True,
             'name': self.model_name,
+            'version': self.version,
             'accuracy': self.metrics.get('accuracy'),
             'precision': self.metrics.get('precision'),
             'recall': self.metrics.get('recall'),
@@ -227,7 +471,9 @@ class MLSignalFilter:
         }
 
     def close(self):
-        self.mongo_client.close()
+        self.stop_watcher()
+        if self.mongo_client is not None:
+            self.mongo_client.close()
 
 
 # Singleton para uso global
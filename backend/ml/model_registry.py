@@ -0,0 +1,170 @@
+"""
+Registro Versionado de Modelos ML
+Artefatos ficam em disco, enderecados pelo hash do conteudo:
+
+    <root>/signal_filter/3f9a1c.../model.pkl
+    <root>/signal_filter/3f9a1c.../scaler.pkl
+    <root>/signal_filter/3f9a1c.../flat_model.npz
+
+Metadados (versao, hash, features, metricas) vao para a colecao
+ml_model_versions do MongoDB, ou para <root>/<nome>/manifest.json quando
+nao ha banco (ex: MLPrimaryStrategy). Publicar o mesmo conteudo duas vezes
+nao cria versao nova.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_DIR = Path(__file__).resolve().parent / 'models' / 'registry'
+
+# Nome do arquivo de cada artefato conhecido
+ARTIFACT_FILES = {
+    'model': 'model.pkl',
+    'scaler': 'scaler.pkl',
+    'flat_model': 'flat_model.npz',
+}
+
+
+@dataclass
+class ModelVersion:
+    """Metadados de uma versao publicada"""
+    name: str
+    version: int
+    digest: str
+    artifacts: list[str]
+    feature_columns: list[str] = field(default_factory=list)
+    metrics: dict = field(default_factory=dict)
+    created_at: str = ''
+
+    @property
+    def dirname(self) -> str:
+        return self.digest[:16]
+
+
+def content_digest(artifacts: dict[str, bytes]) -> str:
+    """sha256 sobre (nome, tamanho, bytes) de cada artefato, em ordem de nome"""
+    h = hashlib.sha256()
+    for key in sorted(artifacts):
+        data = artifacts[key]
+        h.update(key.encode())
+        h.update(len(data).to_bytes(8, 'big'))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """Publica e carrega versoes de modelos (disco + metadados)"""
+
+    def __init__(self, db=None, root: str | os.PathLike | None = None):
+        self.root = Path(root or os.getenv('ML_REGISTRY_DIR') or REGISTRY_DIR)
+        self.collection = db['ml_model_versions'] if db is not None else None
+        self._lock = threading.Lock()
+
+        if self.collection is not None:
+            try:
+                self.collection.create_index([('name', 1), ('version', -1)], unique=True)
+            except Exception as e:
+                logger.warning(f"[Registry] Erro ao criar indices: {e}")
+
+    # ── Metadados ─────────────────────────────────────────────────────
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.root / name / 'manifest.json'
+
+    def _read_manifest(self, name: str) -> list[dict]:
+        path = self._manifest_path(name)
+        if not path.exists():
+            return []
+        return json.loads(path.read_text())
+
+    def versions(self, name: str) -> list[ModelVersion]:
+        """Todas as versoes publicadas, da mais antiga para a mais nova"""
+        if self.collection is not None:
+            docs = list(self.collection.find({'name': name}, {'_id': 0}).sort('version', 1))
+        else:
+            docs = self._read_manifest(name)
+        return [ModelVersion(**doc) for doc in docs]
+
+    def latest(self, name: str) -> ModelVersion | None:
+        if self.collection is not None:
+            doc = self.collection.find_one({'name': name}, {'_id': 0}, sort=[('version', -1)])
+            return ModelVersion(**doc) if doc else None
+        versions = self._read_manifest(name)
+        return ModelVersion(**versions[-1]) if versions else None
+
+    # ── Publicacao ────────────────────────────────────────────────────
+
+    def publish(
+        self,
+        name: str,
+        artifacts: dict[str, bytes],
+        feature_columns: list[str] | None = None,
+        metrics: dict | None = None,
+    ) -> ModelVersion:
+        """Grava os artefatos (troca atomica do diretorio) e registra nova versao"""
+        artifacts = {k: v for k, v in artifacts.items() if v is not None}
+        digest = content_digest(artifacts)
+
+        with self._lock:
+            current = self.latest(name)
+            if current is not None and current.digest == digest:
+                return current
+
+            directory = self.root / name / digest[:16]
+            if not directory.exists():
+                tmp = self.root / name / f'.{digest[:16]}.{uuid.uuid4().hex[:8]}.tmp'
+                tmp.mkdir(parents=True)
+                for key, data in artifacts.items():
+                    (tmp / ARTIFACT_FILES.get(key, key)).write_bytes(data)
+                try:
+                    os.replace(tmp, directory)
+                except OSError:
+                    # Outro processo publicou o mesmo conteudo primeiro
+                    shutil.rmtree(tmp, ignore_errors=True)
+
+            version = ModelVersion(
+                name=name,
+                version=(current.version + 1) if current else 1,
+                digest=digest,
+                artifacts=sorted(artifacts),
+                feature_columns=list(feature_columns or []),
+                metrics=dict(metrics or {}),
+                created_at=datetime.now(UTC).isoformat(),
+            )
+
+            if self.collection is not None:
+                self.collection.insert_one(asdict(version))
+            else:
+                manifest = [*self._read_manifest(name), asdict(version)]
+                path = self._manifest_path(name)
+                tmp = path.with_suffix('.tmp')
+                tmp.write_text(json.dumps(manifest, indent=2, default=str))
+                os.replace(tmp, path)
+
+        logger.info(f"[Registry] {name} v{version.version} publicado ({digest[:12]})")
+        return version
+
+    # ── Leitura ───────────────────────────────────────────────────────
+
+    def load(self, version: ModelVersion) -> dict[str, bytes]:
+        """Le os artefatos de uma versao e confere o hash"""
+        directory = self.root / version.name / version.dirname
+        artifacts = {
+            key: (directory / ARTIFACT_FILES.get(key, key)).read_bytes()
+            for key in version.artifacts
+        }
+        if content_digest(artifacts) != version.digest:
+            raise ValueError(f"Hash divergente em {directory}")
+        return artifacts
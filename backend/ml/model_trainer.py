@@ -23,6 +23,9 @@ from sklearn.metrics import (
 # Sklearn
 from sklearn.preprocessing import StandardScaler
 
+from ml.flat_ensemble import export_ensemble
+from ml.model_registry import ModelRegistry
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -231,45 +234,50 @@ class ModelTrainer:
         return self.metrics
 
     def save_model(self, name: str = 'signal_filter'):
-        """Salva modelo no MongoDB"""
+        """Publica nova versao do modelo no registro (artefatos em disco, metadados no MongoDB)"""
         if self.model is None:
             logger.error("[Trainer] Nenhum modelo para salvar")
             return
 
         # Serializar modelo
-        model_bytes = pickle.dumps(self.model)
-        scaler_bytes = pickle.dumps(self.scaler)
-
-        doc = {
-            'name': name,
-            'model_bytes': model_bytes,
-            'scaler_bytes': scaler_bytes,
-            'feature_columns': self.feature_columns,
-            'metrics': self.metrics,
-            'created_at': datetime.now(UTC)
+        artifacts = {
+            'model': pickle.dumps(self.model),
+            'scaler': pickle.dumps(self.scaler),
         }
 
-        # Upsert
-        self.db.ml_models.update_one(
-            {'name': name},
-            {'$set': doc},
-            upsert=True
+        # Versao plana (arrays NumPy) para inferencia ao vivo sem sklearn
+        try:
+            artifacts['flat_model'] = export_ensemble(self.model, self.scaler).to_bytes()
+        except Exception as e:
+            logger.warning(f"[Trainer] Exportacao plana indisponivel: {e}")
+
+        version = ModelRegistry(self.db).publish(
+            name, artifacts, feature_columns=self.feature_columns, metrics=self.metrics
         )
 
-        logger.info(f"[Trainer] Modelo '{name}' salvo")
+        logger.info(f"[Trainer] Modelo '{name}' salvo (v{version.version})")
+        return version
 
     def load_model(self, name: str = 'signal_filter') -> bool:
-        """Carrega modelo do MongoDB"""
-        doc = self.db.ml_models.find_one({'name': name})
-
-        if not doc:
-            logger.error(f"[Trainer] Modelo '{name}' nao encontrado")
-            return False
-
-        self.model = pickle.loads(doc['model_bytes'])
-        self.scaler = pickle.loads(doc['scaler_bytes'])
-        self.feature_columns = doc['feature_columns']
-        self.metrics = doc.get('metrics', {})
+        """Carrega ultima versao do registro (ou o documento legado em ml_models)"""
+        registry = ModelRegistry(self.db)
+        version = registry.latest(name)
+        if version is not None:
+            artifacts = registry.load(version)
+            model_bytes, scaler_bytes = artifacts['model'], artifacts['scaler']
+            feature_columns, metrics = version.feature_columns, version.metrics
+        else:
+            doc = self.db.ml_models.find_one({'name': name})
+            if not doc:
+                logger.error(f"[Trainer] Modelo '{name}' nao encontrado")
+                return False
+            model_bytes, scaler_bytes = doc['model_bytes'], doc['scaler_bytes']
+            feature_columns, metrics = doc['feature_columns'], doc.get('metrics', {})
+
+        self.model = pickle.loads(model_bytes)
+        self.scaler = pickle.loads(scaler_bytes)
+        self.feature_columns = feature_columns
+        self.metrics = metrics
 
         logger.info(f"[Trainer] Modelo '{name}' carregado")
         return True
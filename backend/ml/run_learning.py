@@ -59,6 +59,8 @@ def run_status():
     """Mostra status do sistema ML"""
     from pymongo import MongoClient
 
+    from ml.model_registry import ModelRegistry
+
     mongo_url = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
     db_name = os.getenv('DB_NAME', 'trading_bot')
     client = MongoClient(mongo_url)
@@ -69,11 +71,22 @@ def run_status():
     print("=" * 60)
 
     # Dados OHLCV
-    ohlcv_count = db.ohlcv_data.count_documents({})
-    ohlcv_symbols = db.ohlcv_data.distinct('symbol')
+    if os.getenv('OHLCV_STORAGE', 'archive').lower() == 'archive':
+        from ml.candle_archive import CandleArchive
+
+        archive_stats = CandleArchive().get_stats()
+        ohlcv_count = sum(tf['count'] for tfs in archive_stats.values() for tf in tfs.values())
+        ohlcv_symbols = list(archive_stats)
+        legacy_count = db.ohlcv_data.estimated_document_count()
+    else:
+        ohlcv_count = db.ohlcv_data.count_documents({})
+        ohlcv_symbols = db.ohlcv_data.distinct('symbol')
+        legacy_count = 0
     print("\n[Dados OHLCV]")
     print(f"  Total de velas: {ohlcv_count}")
     print(f"  Simbolos: {len(ohlcv_symbols)}")
+    if legacy_count:
+        print(f"  Em ohlcv_data: {legacy_count} (pares sem arquivo sao migrados no proximo collect/generate)")
 
     # Dataset de treinamento
     training_count = db.ml_training_data.count_documents({})
@@ -81,11 +94,14 @@ def run_status():
     print(f"  Amostras: {training_count}")
 
     # Modelo
-    model = db.ml_models.find_one({'name': 'signal_filter'})
+    latest = ModelRegistry(db).latest('signal_filter')
+    model = vars(latest) if latest else db.ml_models.find_one({'name': 'signal_filter'})
     print("\n[Modelo ML]")
     if model:
         metrics = model.get('metrics', {})
         print("  Status: CARREGADO")
+        if latest:
+            print(f"  Versao: v{latest.version} ({latest.digest[:12]})")
         print(f"  Accuracy: {metrics.get('accuracy', 0):.2%}")
         print(f"  Win Rate melhoria: {metrics.get('win_rate_with_model', 0) - metrics.get('win_rate_without_model', 0):.1f}%")
         print(f"  Treinado em: {metrics.get('trained_at', 'N/A')}")
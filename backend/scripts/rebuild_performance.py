@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir os agregados de performance a partir de db.trades.
+Use após migrações, edições manuais de trades ou na primeira instalação.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from bot.performance_aggregates import PerformanceAggregates, summarize
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+
+
+async def rebuild():
+    mongo_url = os.getenv('MONGO_URL', 'mongodb://localhost:27017')
+    db_name = os.getenv('DB_NAME', 'trading_bot')
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    aggregates = await PerformanceAggregates(db).rebuild()
+
+    for scope, agg in aggregates.items():
+        summary = summarize(agg)
+        print(
+            f"✅ {scope}: {summary['total_trades']} trades | "
+            f"PnL ${summary['total_pnl']:.2f} | Win rate {summary['win_rate']:.1f}% | "
+            f"Max DD ${summary['max_drawdown']:.2f}"
+        )
+
+    client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(rebuild())
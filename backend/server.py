@@ -79,6 +79,8 @@ async def ensure_indexes():
         # Trades collection - queries mais frequentes
         await db.trades.create_index([("closed_at", -1)])
         await db.trades.create_index([("simulated", 1), ("closed_at", -1)])
+        # Fila pós-trade: replay dos trades com analytics pendente
+        await db.trades.create_index([("analytics_pending", 1)], sparse=True)
 
         # Learning data - filtros por tipo e ordenação
         await db.learning_data.create_index([("timestamp", -1)])
@@ -173,6 +175,9 @@ async def on_startup():
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Cleanup ao desligar."""
+    from bot.async_exchange_client import async_exchange_manager
+
+    await async_exchange_manager.close()
     client.close()
     logger.info("Server shutdown complete")
 
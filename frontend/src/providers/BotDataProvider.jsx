@@ -9,6 +9,29 @@ import {
 
 const DEFAULT_STREAM_STATE = 'idle';
 
+// Aplica o JSON Patch (add/remove/replace) enviado pelo /api/stream?patch=1
+const applyPatch = (document, ops) => {
+  let result = structuredClone(document);
+  for (const op of ops) {
+    if (op.path === '') {
+      result = op.value;
+      continue;
+    }
+    const keys = op.path.split('/').slice(1).map((key) => key.replace(/~1/g, '/').replace(/~0/g, '~'));
+    let target = result;
+    for (const key of keys.slice(0, -1)) {
+      target = target[key];
+    }
+    const last = keys[keys.length - 1];
+    if (op.op === 'remove') {
+      delete target[last];
+    } else {
+      target[last] = op.value;
+    }
+  }
+  return result;
+};
+
 const BotStreamContext = createContext({
   streamState: DEFAULT_STREAM_STATE,
 });
@@ -18,6 +41,7 @@ export const BotDataProvider = ({ children }) => {
   const [streamState, setStreamState] = useState(DEFAULT_STREAM_STATE);
   const eventSourceRef = useRef(null);
   const reconnectTimerRef = useRef(null);
+  const snapshotRef = useRef(null);
 
   useEffect(() => {
     if (typeof window === 'undefined') {
@@ -49,7 +73,8 @@ export const BotDataProvider = ({ children }) => {
       setStreamState('connecting');
       queryClient.setQueryData(BOT_STREAM_STATE_KEY, 'connecting');
 
-      const streamUrl = `${baseUrl}/api/stream`;
+      snapshotRef.current = null;
+      const streamUrl = `${baseUrl}/api/stream?patch=1`;
       const es = new EventSource(streamUrl, { withCredentials: false });
       eventSourceRef.current = es;
 
@@ -64,7 +89,17 @@ export const BotDataProvider = ({ children }) => {
         }
 
         try {
-          const payload = JSON.parse(event.data);
+          let payload = JSON.parse(event.data);
+
+          if (payload?.type === 'patch') {
+            if (!snapshotRef.current) {
+              return;
+            }
+            payload = applyPatch(snapshotRef.current, payload.ops || []);
+          }
+          if (payload?.type === 'snapshot') {
+            snapshotRef.current = payload;
+          }
 
           if (payload?.status) {
             queryClient.setQueryData(BOT_STATUS_QUERY_KEY, payload.status);
@@ -0,0 +1,44 @@
+"""
+Fixtures compartilhadas pelos testes.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope='session')
+def make_ohlcv():
+    """Fábrica de candles sintéticos de 15m (random walk geométrico).
+
+    - ``vol``/``spread``: desvio dos retornos e da amplitude high/low;
+    - ``regimes``: alterna blocos de 50 candles com tendência de alta, baixa e
+      lateralização, com picos de volume ocasionais;
+    - ``tz``: fuso dos timestamps (ex: 'UTC');
+    - ``epoch_ms``: timestamps em ms (int64) como nas klines da Binance.
+    """
+
+    def factory(n=400, seed=7, vol=0.012, spread=0.008, regimes=False, tz=None, epoch_ms=False):
+        rng = np.random.default_rng(seed)
+        drift = 0.0
+        if regimes:
+            drift = np.repeat(rng.choice([-0.004, 0.0, 0.004], size=n // 50 + 1), 50)[:n]
+        close = 100 * np.exp(np.cumsum(drift + rng.normal(0, vol, n)))
+        amplitude = np.abs(rng.normal(0, spread, n)) * close
+        volume = rng.uniform(100, 1000, n)
+        if regimes:
+            volume = volume * (1 + (rng.random(n) > 0.9) * 2)
+
+        timestamps = pd.date_range('2025-01-01', periods=n, freq='15min', tz=tz)
+        if epoch_ms:
+            timestamps = timestamps.asi8 // 1_000_000
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'open': np.roll(close, 1),
+            'high': close + amplitude,
+            'low': close - amplitude,
+            'close': close,
+            'volume': volume,
+        })
+
+    return factory
@@ -0,0 +1,126 @@
+"""
+Testes para o AsyncExchangeManager (ccxt async, retries sem bloquear threads).
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import ccxt
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.async_exchange_client import AsyncExchangeManager
+from bot.exchange_client import ExchangeCriticalError, ExchangeTransientError
+from bot.market_cache import get_price_cache
+
+
+class FakeAsyncClient:
+    """Cliente ccxt async minimo com falhas programaveis"""
+
+    def __init__(self, failures=None):
+        self.markets = {'BTC/USDT': {}, 'ETH/USDT': {}}
+        self.failures = list(failures or [])
+        self.calls = []
+
+    async def _maybe_fail(self, name):
+        self.calls.append(name)
+        await asyncio.sleep(0)
+        if self.failures:
+            raise self.failures.pop(0)
+
+    async def fetch_tickers(self):
+        await self._maybe_fail('fetch_tickers')
+        return {'BTC/USDT': {'symbol': 'BTC/USDT', 'last': 50000.0}, 'ETH/USDT': {'symbol': 'ETH/USDT', 'last': 3000.0}}
+
+    async def fetch_ticker(self, symbol):
+        await self._maybe_fail('fetch_ticker')
+        return {'symbol': symbol, 'last': 42.0}
+
+    def market(self, symbol):
+        return {'precision': {'amount': 4, 'price': 2}, 'limits': {'amount': {'min': 0.0001, 'step': 0.0001}}}
+
+    async def create_order(self, **kwargs):
+        await self._maybe_fail('create_order')
+        return {'id': '1', **kwargs}
+
+
+def _manager(failures=None):
+    manager = AsyncExchangeManager()
+    manager._ccxt_client = FakeAsyncClient(failures)
+    manager.retry_backoff = 0.01
+    get_price_cache().clear()
+    return manager
+
+
+class TestAsyncExchangeManager:
+    """Mesma superficie do ExchangeManager, com coroutines"""
+
+    @pytest.mark.asyncio
+    async def test_price_map_uses_single_fetch_tickers(self):
+        manager = _manager()
+        prices = await manager.get_price_map(['BTCUSDT', 'ETHUSDT'])
+
+        assert prices == {'BTCUSDT': 50000.0, 'ETHUSDT': 3000.0}
+        assert manager._ccxt_client.calls == ['fetch_tickers']
+        # Segunda chamada atendida pelo snapshot em cache
+        assert await manager.get_price_map(['ETHUSDT']) == {'ETHUSDT': 3000.0}
+        assert manager._ccxt_client.calls == ['fetch_tickers']
+
+    @pytest.mark.asyncio
+    async def test_retry_backoff_does_not_block_loop(self):
+        manager = _manager(failures=[ccxt.NetworkError('reset'), ccxt.NetworkError('reset')])
+        manager.retry_backoff = 0.05
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        background = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        price = await manager.get_symbol_price('BTCUSDT')
+        elapsed = time.perf_counter() - started
+        background.cancel()
+
+        assert price == 42.0
+        assert elapsed >= 0.15  # 0.05 + 0.10 de backoff
+        assert ticks >= 10  # o loop continuou rodando durante o backoff
+        assert manager.stats['retries'] == 2
+
+    @pytest.mark.asyncio
+    async def test_exchange_error_is_critical(self):
+        manager = _manager(failures=[ccxt.InsufficientFunds('no money')])
+        with pytest.raises(ExchangeCriticalError):
+            await manager.place_order('BTCUSDT', 'BUY', 0.01)
+
+    @pytest.mark.asyncio
+    async def test_exhausted_retries_are_transient(self):
+        manager = _manager(failures=[ccxt.NetworkError('down')] * 3)
+        manager.max_retries = 3
+        with pytest.raises(ExchangeTransientError):
+            await manager.get_symbol_price('BTCUSDT')
+        assert manager.stats['failures'] == 1
+
+    @pytest.mark.asyncio
+    async def test_place_order_adjusts_quantity(self):
+        manager = _manager()
+        order = await manager.place_order('BTCUSDT', 'BUY', 0.123456)
+
+        assert order['symbol'] == 'BTC/USDT'
+        assert order['side'] == 'buy' and order['type'] == 'market'
+        assert order['amount'] == pytest.approx(0.1234)
+
+    @pytest.mark.asyncio
+    async def test_paper_trade_never_hits_exchange(self):
+        manager = _manager()
+        manager._paper_trade = True
+        order = await manager.place_order('BTCUSDT', 'BUY', 0.5)
+
+        assert order['_paper_trade'] is True
+        assert manager._ccxt_client.calls == []
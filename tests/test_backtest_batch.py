@@ -0,0 +1,99 @@
+"""
+Testes para o runner de backtests em lote (process pool + frames memory-mapped).
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backtesting import BacktestConfig, BacktestEngine
+from backtesting.batch import (
+    BacktestJob,
+    BatchBacktestRunner,
+    SharedFrameStore,
+    comparison_table,
+    expand_jobs,
+    load_frame,
+)
+from bot.strategies import GridDCAStrategy
+
+
+class TestExpandJobs:
+
+    def test_grid_cartesian_product(self):
+        jobs = expand_jobs(
+            ['BTCUSDT', 'ETHUSDT'], ['15m'],
+            {'breakout': {'donchian_period': [20, 40], 'min_score': [50, 60]}, 'grid_dca': None},
+        )
+        assert len(jobs) == 2 * (4 + 1)
+        assert BacktestJob('ETHUSDT', '15m', 'breakout', {'donchian_period': 40, 'min_score': 50}) in jobs
+
+    def test_names_only_use_defaults(self):
+        jobs = expand_jobs(['BTCUSDT'], ['15m', '1h'], ['grid_dca', 'mean_reversion'])
+        assert len(jobs) == 4
+        assert all(job.params == {} for job in jobs)
+
+
+class TestSharedFrameStore:
+
+    def test_round_trip_memory_mapped(self, tmp_path, make_ohlcv):
+        df = make_ohlcv(50, seed=3)
+        with SharedFrameStore(tmp_path) as store:
+            ref = store.put(('BTCUSDT', '15m'), df)
+            loaded = load_frame(ref)
+
+        pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+        assert isinstance(loaded['timestamp'].iloc[0], pd.Timestamp)
+        assert not loaded['close'].to_numpy().flags.writeable
+
+
+class TestBatchRunner:
+
+    def test_parallel_matches_single_engine(self, make_ohlcv):
+        """Resultado do pool igual ao BacktestEngine direto."""
+        data = {('BTCUSDT', '15m'): make_ohlcv(300, seed=3), ('ETHUSDT', '15m'): make_ohlcv(300, seed=4)}
+        jobs = expand_jobs(['BTCUSDT', 'ETHUSDT'], ['15m'], {'grid_dca': {'grid_levels': [3, 5]}})
+
+        results = BatchBacktestRunner(data, max_workers=2).run(jobs)
+
+        assert [r.job for r in results] == jobs
+        for jr in results:
+            assert jr.error is None
+            expected = BacktestEngine(BacktestConfig(
+                symbol=jr.job.symbol,
+                strategies=[GridDCAStrategy(**jr.job.params)],
+                data=data[jr.job.frame_key],
+            )).run()['grid_dca']
+            assert jr.result.trades == expected.trades
+            assert jr.result.final_equity == expected.final_equity
+
+    def test_failed_job_reported_in_table(self, make_ohlcv):
+        data = {('BTCUSDT', '15m'): make_ohlcv(300, seed=3)}
+        jobs = [
+            BacktestJob('BTCUSDT', '15m', 'grid_dca'),
+            BacktestJob('BTCUSDT', '15m', 'does_not_exist'),
+        ]
+        results = BatchBacktestRunner(data, max_workers=1).run(jobs)
+        table = comparison_table(results)
+
+        assert len(table) == 2
+        assert table['error'].isna().iloc[0]
+        assert table['strategy'].iloc[-1] == 'does_not_exist'
+        assert table['error'].iloc[-1]
+
+    def test_loader_callable(self, make_ohlcv):
+        calls = []
+
+        def loader(symbol, timeframe):
+            calls.append((symbol, timeframe))
+            return make_ohlcv(300, seed=3)
+
+        jobs = expand_jobs(['BTCUSDT'], ['15m'], {'grid_dca': {'grid_levels': [3, 5]}})
+        results = BatchBacktestRunner(loader, max_workers=1).run(jobs)
+
+        assert calls == [('BTCUSDT', '15m')]  # frame carregado uma vez por (symbol, timeframe)
+        assert all(r.result is not None for r in results)
@@ -0,0 +1,90 @@
+"""
+Testes para o otimizador walk-forward (janelas, amostragem e cache de indicadores).
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from backtesting import BacktestConfig, BacktestEngine
+from backtesting.batch import expand_grid
+from backtesting.optimizer import (
+    WalkForwardOptimizer,
+    Window,
+    sample_params,
+    walk_forward_windows,
+)
+from bot.strategies import GridDCAStrategy
+
+GRID = {'grid_levels': [3, 5], 'rsi_trigger': [35, 45]}
+
+
+class TestWindowsAndSampling:
+
+    def test_rolling_windows(self):
+        windows = walk_forward_windows(1000, train_bars=400, test_bars=200)
+        assert windows == [Window(0, 400, 600), Window(200, 600, 800), Window(400, 800, 1000)]
+
+    def test_custom_step(self):
+        assert len(walk_forward_windows(1000, 400, 200, step_bars=100)) == 5
+
+    def test_sample_params_seeded_and_bounded(self):
+        space = {'donchian_period': (10, 40), 'atr_expansion_threshold': (1.0, 1.5), 'min_score': [45, 55]}
+        first = sample_params(space, 20, seed=1)
+        assert first == sample_params(space, 20, seed=1)
+        assert len(first) == 20
+        for p in first:
+            assert isinstance(p['donchian_period'], int) and 10 <= p['donchian_period'] <= 40
+            assert 1.0 <= p['atr_expansion_threshold'] <= 1.5
+            assert p['min_score'] in (45, 55)
+
+
+class TestWalkForwardOptimizer:
+
+    def test_indicators_computed_once_per_precompute_key(self, make_ohlcv):
+        """Indicadores padrão não dependem dos parâmetros: um único conjunto."""
+        opt = WalkForwardOptimizer(make_ohlcv(700, seed=5), 'grid_dca', train_bars=300, test_bars=150, max_workers=1)
+        result = opt.run(expand_grid(GRID))
+        assert result.stats['indicator_sets'] == 1
+        assert result.stats['backtests'] == 2 * 4 * len(opt.windows)
+
+        breakout = WalkForwardOptimizer(make_ohlcv(700, seed=5), 'breakout', train_bars=300, test_bars=150, max_workers=1)
+        result = breakout.run(expand_grid({'donchian_period': [20, 30], 'min_score': [45, 55]}))
+        assert result.stats['indicator_sets'] == 2  # Donchian depende do período
+
+    def test_cached_run_matches_engine(self, make_ohlcv):
+        """Primeira janela de treino (sem warm-up anterior) igual a um backtest direto."""
+        df = make_ohlcv(700, seed=5)
+        opt = WalkForwardOptimizer(df, 'grid_dca', train_bars=300, test_bars=150, max_workers=1)
+        result = opt.run([{'grid_levels': 5}])
+
+        expected = BacktestEngine(BacktestConfig(
+            strategies=[GridDCAStrategy(grid_levels=5)], data=df.iloc[:300],
+        )).run()['grid_dca']
+        assert result.candidates[0].train[0].trades == expected.trades
+
+    def test_ranked_table_and_folds(self, make_ohlcv):
+        opt = WalkForwardOptimizer(make_ohlcv(700, seed=5), 'grid_dca', train_bars=300, test_bars=150, max_workers=1)
+        result = opt.run(expand_grid(GRID))
+
+        assert len(result.table) == 4
+        oos = result.table['oos_sharpe_ratio'].dropna()
+        assert oos.is_monotonic_decreasing
+        assert len(result.folds) == len(opt.windows)
+        for fold in result.folds:
+            assert fold.best_params in expand_grid(GRID)
+            # Trades do teste ficam dentro da janela de teste
+            start = str(opt.data['timestamp'].iloc[fold.window.test_start])
+            assert all(t.entry_time >= start for t in fold.test.trades)
+
+    def test_parallel_matches_inline(self, make_ohlcv):
+        df = make_ohlcv(700, seed=5)
+        inline = WalkForwardOptimizer(df, 'grid_dca', 300, 150, max_workers=1).run(expand_grid(GRID))
+        parallel = WalkForwardOptimizer(df, 'grid_dca', 300, 150, max_workers=2).run(expand_grid(GRID))
+
+        pd.testing.assert_frame_equal(inline.table, parallel.table)
+        assert inline.oos_return_pct == parallel.oos_return_pct
@@ -0,0 +1,146 @@
+"""
+Testes para o CandleArchive (arquivo colunar de velas particionado por mês).
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from ml.candle_archive import PYARROW_AVAILABLE, CandleArchive
+
+
+def _candles(start='2025-01-30', n=300, freq='1h', close0=100.0):
+    ts = pd.date_range(start, periods=n, freq=freq, tz='UTC')
+    close = close0 + np.arange(n, dtype=float)
+    return pd.DataFrame({
+        'timestamp': ts,
+        'open': close - 0.5,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': np.full(n, 10.0),
+        'quote_volume': close * 10,
+        'trades': np.arange(n),
+    })
+
+
+FORMATS = ['npy'] + (['arrow'] if PYARROW_AVAILABLE else [])
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+class TestCandleArchive:
+
+    def test_round_trip_partitioned_by_month(self, tmp_path, fmt):
+        archive = CandleArchive(tmp_path, fmt=fmt)
+        df = _candles()  # 30/jan -> 11/fev
+        assert archive.append('BTCUSDT', '1h', df) == 300
+
+        files = sorted(p.name for p in (tmp_path / 'BTCUSDT' / '1h').iterdir())
+        assert files == [f'2025-01.{fmt}', f'2025-02.{fmt}']
+
+        loaded = archive.read('BTCUSDT', '1h')
+        pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+        assert str(loaded['timestamp'].dt.tz) == 'UTC'
+
+    def test_range_read(self, tmp_path, fmt):
+        archive = CandleArchive(tmp_path, fmt=fmt)
+        archive.append('BTCUSDT', '1h', _candles())
+
+        part = archive.read('BTCUSDT', '1h', start='2025-02-01', end='2025-02-01 05:00')
+        assert len(part) == 6
+        assert part['timestamp'].iloc[0] == pd.Timestamp('2025-02-01', tz='UTC')
+        assert archive.read('BTCUSDT', '1h', start='2026-01-01').empty
+
+    def test_append_merges_by_timestamp(self, tmp_path, fmt):
+        """Vela com mesmo timestamp é substituída; novas são acrescentadas em ordem."""
+        archive = CandleArchive(tmp_path, fmt=fmt)
+        archive.append('ETHUSDT', '1h', _candles(n=100))
+        update = _candles(start='2025-02-03 03:00', n=10, close0=999.0)
+        archive.append('ETHUSDT', '1h', update)
+
+        loaded = archive.read('ETHUSDT', '1h')
+        assert len(loaded) == 100 + 10 - 1  # sobreposição de 1 vela (03:00)
+        assert loaded['timestamp'].is_monotonic_increasing
+        assert loaded.set_index('timestamp').loc[pd.Timestamp('2025-02-03 03:00', tz='UTC'), 'close'] == 999.0
+
+    def test_stats_and_last_timestamp(self, tmp_path, fmt):
+        archive = CandleArchive(tmp_path, fmt=fmt)
+        archive.append('BTCUSDT', '1h', _candles())
+        archive.append('SOLUSDT', '15m', _candles(n=10, freq='15min'))
+
+        assert archive.symbols() == ['BTCUSDT', 'SOLUSDT']
+        stats = archive.get_stats()
+        assert stats['BTCUSDT']['1h']['count'] == 300
+        assert stats['SOLUSDT']['15m']['from'].startswith('2025-01-30')
+        assert archive.last_timestamp('BTCUSDT', '1h') == _candles()['timestamp'].iloc[-1]
+        assert archive.last_timestamp('XRPUSDT', '1h') is None
+
+
+class TestArchiveConsumers:
+    """Coletor, gerador de dataset e backtester lendo/gravando no arquivo."""
+
+    def test_collector_saves_to_archive(self, tmp_path):
+        from ml.data_collector import OHLCVCollector
+
+        collector = OHLCVCollector.__new__(OHLCVCollector)
+        collector.archive = CandleArchive(tmp_path)
+        collector.save_to_mongo = Mock()
+
+        assert collector.save(_candles(n=50), 'BTCUSDT', '1h') == 50
+        collector.save_to_mongo.assert_not_called()
+        assert len(collector.get_data('BTCUSDT', '1h')) == 50
+        assert collector.get_stats()['BTCUSDT']['1h']['count'] == 50
+
+    def test_dataset_generator_loads_from_archive(self, tmp_path):
+        from ml.dataset_generator import DatasetGenerator
+
+        archive = CandleArchive(tmp_path)
+        archive.append('BTCUSDT', '15m', _candles(n=80, freq='15min'))
+        generator = DatasetGenerator.__new__(DatasetGenerator)
+        generator.archive = archive
+
+        df = generator._load_ohlcv('BTCUSDT', '15m')
+        assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        assert len(df) == 80
+
+    def test_dataset_generator_imports_legacy_mongo_pair(self, tmp_path):
+        from ml.dataset_generator import DatasetGenerator
+
+        legacy = _candles(n=80, freq='15min')
+        legacy['timestamp'] = legacy['timestamp'].dt.tz_localize(None)  # Mongo devolve datetime naive
+        cursor = Mock()
+        cursor.sort.return_value = iter(legacy.to_dict('records'))
+        generator = DatasetGenerator.__new__(DatasetGenerator)
+        generator.archive = CandleArchive(tmp_path)
+        generator.db = Mock()
+        generator.db.ohlcv_data.find.return_value = cursor
+
+        df = generator._load_ohlcv('BTCUSDT', '15m')
+        assert len(df) == 80
+        assert df['timestamp'].iloc[0] == pd.Timestamp('2025-01-30', tz='UTC')
+        query = generator.db.ohlcv_data.find.call_args[0][0]
+        assert query == {'symbol': 'BTCUSDT', 'timeframe': '15m'}
+
+        # Próximas leituras saem do arquivo, sem consultar o Mongo
+        generator._load_ohlcv('BTCUSDT', '15m')
+        assert generator.db.ohlcv_data.find.call_count == 1
+
+    def test_backtest_loads_from_archive(self, tmp_path, monkeypatch):
+        from backtesting import BacktestConfig, BacktestEngine
+
+        monkeypatch.setenv('CANDLE_ARCHIVE_DIR', str(tmp_path))
+        CandleArchive().append('BTCUSDT', '1h', _candles())
+
+        engine = BacktestEngine(BacktestConfig(
+            symbol='BTCUSDT', timeframe='1h', start_date='2025-02-01', end_date='2025-02-05',
+        ))
+        df = engine.load_data()
+        assert df['timestamp'].iloc[0] == pd.Timestamp('2025-02-01', tz='UTC')
+        assert df['timestamp'].iloc[-1] <= pd.Timestamp('2025-02-05', tz='UTC')
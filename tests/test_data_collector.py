@@ -0,0 +1,257 @@
+"""
+Testes para o OHLCVCollector: save_to_mongo em lote e coleta concorrente.
+"""
+
+import os
+import shutil
+import sys
+import threading
+from datetime import UTC, datetime
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.rate_limiter import TokenBucket
+from ml.candle_archive import CandleArchive
+from ml.data_collector import KLINES_WEIGHT, CollectionProgress, OHLCVCollector
+
+
+def _candles(n=25, start='2025-03-01'):
+    close = 100 + np.arange(n, dtype=float)
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq='15min', tz='UTC'),
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.full(n, 5.0), 'quote_volume': close * 5, 'trades': np.arange(n),
+    })
+
+
+def _collector(stored=(), batch_size=10):
+    collector = OHLCVCollector.__new__(OHLCVCollector)
+    collector.mongo_batch_size = batch_size
+    collector.skip_existing = True
+    collection = Mock()
+    collection.find.return_value = [{'timestamp': ts} for ts in stored]
+    collection.bulk_write.side_effect = lambda ops, ordered: Mock(upserted_count=len(ops), matched_count=0)
+    collector.ohlcv_collection = collection
+    return collector
+
+
+class TestBulkSaveToMongo:
+
+    def test_batches_unordered_upserts(self):
+        collector = _collector(batch_size=10)
+        saved = collector.save_to_mongo(_candles(25), 'BTCUSDT', '15m')
+
+        calls = collector.ohlcv_collection.bulk_write.call_args_list
+        assert saved == 25
+        assert [len(c.args[0]) for c in calls] == [10, 10, 5]
+        assert all(c.kwargs['ordered'] is False for c in calls)
+
+        op = calls[0].args[0][0]
+        assert isinstance(op, UpdateOne)
+        doc = op._doc['$set']
+        assert op._filter == {'symbol': 'BTCUSDT', 'timeframe': '15m', 'timestamp': datetime(2025, 3, 1)}
+        assert doc['close'] == 100.0 and isinstance(doc['trades'], int)
+        assert op._upsert is True
+
+    def test_skips_already_stored_range(self):
+        """Velas já gravadas são puladas, menos a última (candle em formação)."""
+        df = _candles(25)
+        stored = [ts.to_pydatetime().replace(tzinfo=None) for ts in df['timestamp'].iloc[:20]]
+        collector = _collector(stored=stored, batch_size=100)
+
+        saved = collector.save_to_mongo(df, 'BTCUSDT', '15m')
+
+        ops = collector.ohlcv_collection.bulk_write.call_args.args[0]
+        assert saved == 6  # 5 novas + última gravada reescrita
+        assert ops[0]._filter['timestamp'] == stored[-1]
+
+        query = collector.ohlcv_collection.find.call_args.args
+        assert query[1] == {'_id': 0, 'timestamp': 1}  # consulta coberta pelo índice
+
+    def test_everything_stored_is_noop(self):
+        df = _candles(5)
+        stored = [ts.to_pydatetime().replace(tzinfo=None) for ts in df['timestamp']]
+        stored.append(datetime(2025, 3, 2))  # há velas mais novas no banco
+        collector = _collector(stored=stored)
+
+        assert collector.save_to_mongo(df, 'BTCUSDT', '15m') == 0
+        collector.ohlcv_collection.bulk_write.assert_not_called()
+
+    def test_partial_bulk_error_counts_successes(self):
+        collector = _collector(batch_size=100)
+        collector.ohlcv_collection.bulk_write.side_effect = BulkWriteError(
+            {'nUpserted': 20, 'nMatched': 3, 'writeErrors': [{'index': 0}, {'index': 1}]}
+        )
+        assert collector.save_to_mongo(_candles(25), 'BTCUSDT', '15m') == 23
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Coleta concorrente / retomável
+# ═══════════════════════════════════════════════════════════════════
+
+HOUR_MS = 3_600_000
+
+
+class FakeKlinesClient:
+    """get_klines paginado sobre velas horárias sintéticas."""
+
+    def __init__(self, first_ms, fail_symbols=()):
+        self.first_ms = first_ms
+        self.fail_symbols = set(fail_symbols)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_klines(self, symbol, interval, startTime, endTime, limit):
+        with self._lock:
+            self.calls.append((symbol, interval, startTime))
+        if symbol in self.fail_symbols:
+            raise RuntimeError('boom')
+        first = max(startTime, self.first_ms)
+        first += (-(first - self.first_ms)) % HOUR_MS
+        opens = range(first, endTime + 1, HOUR_MS)
+        return [
+            [t, '1', '2', '0.5', '1.5', '10', t + HOUR_MS - 1, '15', 3, '0', '0', '0']
+            for t in list(opens)[:limit]
+        ]
+
+
+class FakeOhlcvCollection:
+    """ohlcv_data mínimo para a migração para o arquivo."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def distinct(self, field, query=None):
+        query = query or {}
+        docs = [d for d in self.docs if all(d[k] == v for k, v in query.items())]
+        return sorted({d[field] for d in docs})
+
+    def find(self, query, projection=None):
+        docs = [d for d in self.docs if all(d[k] == v for k, v in query.items())]
+        cursor = Mock()
+        cursor.sort.return_value = iter(sorted(docs, key=lambda d: d['timestamp']))
+        return cursor
+
+
+def _concurrent_collector(tmp_path, client, symbols=('BTCUSDT', 'ETHUSDT'), days=90, **kwargs):
+    collector = OHLCVCollector.__new__(OHLCVCollector)
+    collector.symbols = list(symbols)
+    collector.timeframes = ['1h']
+    collector.days_back = days
+    collector.max_workers = 4
+    collector.bucket = TokenBucket(rate=10_000, capacity=100)
+    collector.resume = kwargs.get('resume', True)
+    collector.progress = CollectionProgress(tmp_path / 'progress.json')
+    collector.client = client
+    collector.archive = CandleArchive(tmp_path / 'candles')
+    collector.ohlcv_collection = FakeOhlcvCollection([])
+    return collector
+
+
+class TestConcurrentCollector:
+
+    def test_paginates_all_symbols_with_timing_stats(self, tmp_path):
+        now_ms = int(datetime.now(UTC).timestamp() * 1000)
+        client = FakeKlinesClient(first_ms=now_ms - 100 * 24 * HOUR_MS)
+        collector = _concurrent_collector(tmp_path, client)
+
+        results = collector.collect_all()
+
+        assert list(results['symbols']) == ['BTCUSDT', 'ETHUSDT']
+        btc = results['symbols']['BTCUSDT']
+        tf = btc['timeframes']['1h']
+        assert tf['candles'] in (90 * 24, 90 * 24 + 1)  # inclui a vela em formação
+        assert tf['requests'] == 3  # páginas de 1000 + 1000 + resto
+        assert {'seconds', 'waited_seconds', 'start', 'end'} <= tf.keys()
+        assert btc['seconds'] >= 0 and btc['requests'] == 3
+        assert results['total_candles'] == 2 * tf['candles']
+        assert results['stats']['requests'] == 6
+        assert results['stats']['weight_used'] == 6 * KLINES_WEIGHT
+        assert len(collector.archive.read('ETHUSDT', '1h')) == tf['candles']
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        now_ms = int(datetime.now(UTC).timestamp() * 1000)
+        client = FakeKlinesClient(first_ms=now_ms - 100 * 24 * HOUR_MS)
+        _concurrent_collector(tmp_path, client, symbols=['BTCUSDT']).collect_all()
+        covered = CollectionProgress(tmp_path / 'progress.json').get('BTCUSDT', '1h')
+        assert covered is not None
+        last = covered[1]
+
+        # Novo processo: lê o checkpoint do disco e só baixa a partir da última vela
+        client.calls.clear()
+        collector = _concurrent_collector(tmp_path, client, symbols=['BTCUSDT'])
+        info = collector.collect_all()['symbols']['BTCUSDT']['timeframes']['1h']
+        assert client.calls == [('BTCUSDT', '1h', last)]
+        assert info['candles'] == 1 and 'resumed_from' in info
+
+        client.calls.clear()
+        _concurrent_collector(tmp_path, client, symbols=['BTCUSDT'], resume=False).collect_all()
+        assert client.calls[0][2] < last
+
+    def test_wider_days_back_backfills_head_before_tail(self, tmp_path):
+        now_ms = int(datetime.now(UTC).timestamp() * 1000)
+        client = FakeKlinesClient(first_ms=now_ms - 100 * 24 * HOUR_MS)
+        _concurrent_collector(tmp_path, client, symbols=['BTCUSDT'], days=5).collect_all()
+        first, last = CollectionProgress(tmp_path / 'progress.json').get('BTCUSDT', '1h')
+
+        # Mesmo checkpoint, período maior: baixa o início que falta e depois o fim
+        client.calls.clear()
+        collector = _concurrent_collector(tmp_path, client, symbols=['BTCUSDT'], days=10)
+        info = collector.collect_all()['symbols']['BTCUSDT']['timeframes']['1h']
+        assert client.calls[-1] == ('BTCUSDT', '1h', last)
+        assert client.calls[0][2] < first
+        assert 'backfilled_from' in info and 'resumed_from' in info
+
+        stored = collector.archive.read('BTCUSDT', '1h')
+        assert len(stored) in (10 * 24, 10 * 24 + 1)
+        assert stored['timestamp'].diff().dropna().nunique() == 1  # sem buracos
+        new_first, _ = CollectionProgress(tmp_path / 'progress.json').get('BTCUSDT', '1h')
+        assert new_first < first
+
+    def test_checkpoint_ignored_when_storage_is_gone(self, tmp_path):
+        now_ms = int(datetime.now(UTC).timestamp() * 1000)
+        client = FakeKlinesClient(first_ms=now_ms - 100 * 24 * HOUR_MS)
+        _concurrent_collector(tmp_path, client, symbols=['BTCUSDT'], days=5).collect_all()
+        assert CollectionProgress(tmp_path / 'progress.json', backend='mongo').get('BTCUSDT', '1h') is None
+
+        # Arquivo apagado: o checkpoint não vale mais e o período inteiro volta
+        shutil.rmtree(tmp_path / 'candles')
+        client.calls.clear()
+        collector = _concurrent_collector(tmp_path, client, symbols=['BTCUSDT'], days=5)
+        info = collector.collect_all()['symbols']['BTCUSDT']['timeframes']['1h']
+        assert 'resumed_from' not in info
+        assert len(collector.archive.read('BTCUSDT', '1h')) == info['candles'] >= 5 * 24
+
+    def test_legacy_mongo_candles_imported_before_download(self, tmp_path):
+        now_ms = int(datetime.now(UTC).timestamp() * 1000)
+        client = FakeKlinesClient(first_ms=now_ms - 100 * 24 * HOUR_MS)
+        legacy = [
+            {'symbol': 'BTCUSDT', 'timeframe': '1h', 'timestamp': ts.to_pydatetime().replace(tzinfo=None),
+             'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 10.0, 'quote_volume': 15.0, 'trades': 3}
+            for ts in pd.date_range('2025-01-01', periods=48, freq='1h', tz='UTC')
+        ]
+        collector = _concurrent_collector(tmp_path, client, symbols=['BTCUSDT'], days=5)
+        collector.ohlcv_collection = FakeOhlcvCollection(legacy)
+
+        info = collector.collect_all()['symbols']['BTCUSDT']['timeframes']['1h']
+        stored = collector.archive.read('BTCUSDT', '1h')
+        assert len(stored) == 48 + info['candles']
+        assert stored['timestamp'].iloc[0] == pd.Timestamp('2025-01-01', tz='UTC')
+
+        # Par já presente no arquivo: não importa de novo
+        assert collector.archive.import_from_mongo(collector.ohlcv_collection) == {'pairs': 0, 'candles': 0}
+
+    def test_failed_symbol_reported_without_stopping_others(self, tmp_path):
+        now_ms = int(datetime.now(UTC).timestamp() * 1000)
+        client = FakeKlinesClient(first_ms=now_ms - 10 * 24 * HOUR_MS, fail_symbols={'ETHUSDT'})
+        results = _concurrent_collector(tmp_path, client, days=5).collect_all()
+
+        assert list(results['symbols']) == ['BTCUSDT']
+        assert results['errors'] == [{'symbol': 'ETHUSDT', 'error': '1h: boom'}]
@@ -0,0 +1,81 @@
+"""
+Testes para o DatasetGenerator vetorizado (paridade com o loop por vela).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.strategy import TradingStrategy
+from ml.dataset_generator import DatasetGenerator
+
+
+def _generator(df, **kwargs):
+    generator = DatasetGenerator.__new__(DatasetGenerator)
+    generator.stop_loss_pct = kwargs.get('stop_loss_pct', 1.5)
+    generator.take_profit_pct = kwargs.get('take_profit_pct', 4.0)
+    generator.total_cost_pct = (0.1 + 0.05) * 2
+    generator.strategy = TradingStrategy(None, min_signal_strength=40)
+    generator._load_ohlcv = lambda *args: df.copy()
+    return generator
+
+
+def _legacy_samples(generator, df, symbol, timeframe):
+    """Loop original vela a vela (referencia)."""
+    df = generator._calculate_indicators(df.copy())
+    samples = []
+    for idx in range(200, len(df) - 100):
+        row = df.iloc[idx]
+        signal = generator._generate_simple_signal(row, df, idx)
+        if signal['signal'] not in ['BUY', 'SELL']:
+            continue
+        features = generator._extract_features(row, df, idx)
+        features['symbol'] = symbol
+        features['timeframe'] = timeframe
+        features['signal'] = signal['signal']
+        features['signal_strength'] = signal.get('strength', 50)
+        outcome, pnl, duration = generator._simulate_trade_outcome(df, idx, signal['signal'], row['close'])
+        features['outcome'] = outcome
+        features['pnl_pct'] = pnl
+        features['duration_candles'] = duration
+        features['is_win'] = 1 if pnl > 0 else 0
+        features['is_good_trade'] = 1 if pnl > 1.0 else 0
+        samples.append(features)
+    return pd.DataFrame(samples)
+
+
+class TestVectorizedDataset:
+
+    @pytest.mark.parametrize('seed,vol', [(11, 0.012), (3, 0.004), (7, 0.02)])
+    def test_matches_per_candle_loop(self, seed, vol, make_ohlcv):
+        df = make_ohlcv(900, seed=seed, vol=vol, spread=vol, tz='UTC')
+        generator = _generator(df)
+
+        result = generator.generate_from_ohlcv('BTCUSDT', '15m')
+        expected = _legacy_samples(generator, df, 'BTCUSDT', '15m')
+
+        assert len(result) > 100
+        assert set(result['outcome']) >= {'STOP_LOSS', 'TAKE_PROFIT'}
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_timeouts_and_missing_features(self, make_ohlcv):
+        """Alvos largos (timeout) e volume com NaN (volume_ratio ausente em parte das amostras)."""
+        df = make_ohlcv(900, seed=5, vol=0.003, spread=0.003, tz='UTC')
+        df.loc[400:430, 'volume'] = np.nan
+        generator = _generator(df, stop_loss_pct=8.0, take_profit_pct=12.0)
+
+        result = generator.generate_from_ohlcv('ETHUSDT', '15m')
+        expected = _legacy_samples(generator, df, 'ETHUSDT', '15m')
+
+        assert (result['outcome'] == 'TIMEOUT').any()
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    def test_insufficient_data(self, make_ohlcv):
+        generator = _generator(make_ohlcv(150, seed=11, spread=0.012, tz='UTC'))
+        assert generator.generate_from_ohlcv('BTCUSDT').empty
@@ -0,0 +1,152 @@
+"""
+Testes para o ExitExecutor (saídas concorrentes) e a BookkeepingQueue (pós-trade em fundo).
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.exit_executor import BookkeepingQueue, ExitExecutor
+from bot.positions_repository import PositionsRepository
+from bot.trading_bot import TradingBot
+
+
+class SlowExchange:
+    """Fechamento fake com latência fixa; registra o pico de concorrência"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.closed = []
+
+    async def close(self, position, price, reason):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.latency)
+        self.active -= 1
+        self.closed.append((position['symbol'], reason))
+
+
+def _position(symbol, position_id):
+    return {'_id': position_id, 'symbol': symbol, 'side': 'BUY', 'entry_price': 100.0,
+            'stop_loss': 95.0, 'take_profit': 110.0, 'opened_at': '2026-10-17T10:00:00+00:00'}
+
+
+class TestExitExecutor:
+
+    @pytest.mark.asyncio
+    async def test_closes_in_parallel_with_bound(self):
+        exchange = SlowExchange(latency=0.05)
+        executor = ExitExecutor(exchange.close, max_concurrency=3)
+        exits = [(_position(f'C{i}USDT', i), 90.0, 'STOP_LOSS') for i in range(6)]
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await executor.execute(exits)
+        elapsed = loop.time() - started
+
+        assert results == [True] * 6
+        assert exchange.peak == 3
+        assert elapsed < 0.05 * 6 * 0.75  # dois lotes de 3, não seis fechamentos em série
+        assert executor.stats['exits'] == 6 and executor.stats['batches'] == 1
+
+    @pytest.mark.asyncio
+    async def test_skips_position_already_closing(self):
+        exchange = SlowExchange(latency=0.05)
+        executor = ExitExecutor(exchange.close, max_concurrency=4)
+        position = _position('BTCUSDT', 1)
+
+        # Dois ticks sobrepostos acionam a mesma posição: só um fechamento
+        await asyncio.gather(
+            executor.execute([(position, 90.0, 'STOP_LOSS')]),
+            executor.execute([(position, 89.0, 'STOP_LOSS')]),
+        )
+        assert exchange.closed == [('BTCUSDT', 'STOP_LOSS')]
+        assert executor.stats['skipped_in_flight'] == 1
+        assert not executor.is_closing(position)
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_block_other_exits(self):
+        async def close(position, price, reason):
+            if position['symbol'] == 'BADUSDT':
+                raise RuntimeError('boom')
+
+        executor = ExitExecutor(close, max_concurrency=2)
+        results = await executor.execute([
+            (_position('BADUSDT', 1), 1.0, 'STOP_LOSS'),
+            (_position('ETHUSDT', 2), 1.0, 'STOP_LOSS'),
+        ])
+        assert results == [False, True]
+        assert executor.stats['failures'] == 1
+
+
+class TestBookkeepingQueue:
+
+    @pytest.mark.asyncio
+    async def test_runs_in_order_and_coalesces_idle_callback(self):
+        done = []
+        on_idle = AsyncMock()
+        queue = BookkeepingQueue(on_idle=on_idle)
+
+        async def job(name):
+            await asyncio.sleep(0.01)
+            done.append(name)
+
+        for name in ('a', 'b', 'c'):
+            assert queue.submit(name, lambda name=name: job(name))
+        assert done == []  # submit não espera o trabalho
+
+        assert await queue.drain(grace=1)
+        assert done == ['a', 'b', 'c']
+        await queue.stop()
+        on_idle.assert_awaited_once()  # um refresh de saldo para o lote inteiro
+        assert queue.get_stats()['done'] == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_job_is_counted_and_worker_continues(self):
+        done = []
+        queue = BookkeepingQueue()
+
+        async def fail():
+            raise RuntimeError('telegram fora')
+
+        async def ok():
+            done.append('ok')
+
+        queue.submit('fail', fail)
+        queue.submit('ok', ok)
+        await queue.stop(grace=1)
+        assert done == ['ok']
+        assert queue.stats['failed'] == 1
+
+
+class TestCheckPositionsExits:
+    """_check_positions coleta as saídas do tick e fecha todas em paralelo"""
+
+    @pytest.mark.asyncio
+    async def test_multiple_stops_close_concurrently(self):
+        bot = TradingBot.__new__(TradingBot)
+        bot.positions_repo = PositionsRepository(Mock(), flush_interval=1, reconcile_interval=60)
+        for i, symbol in enumerate(('BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT')):
+            bot.positions_repo._insert_local(_position(symbol, i))
+        bot._positions_lock = asyncio.Lock()
+        bot._get_price_map = AsyncMock(return_value={p['symbol']: 90.0 for p in bot.positions})
+        bot.risk_manager = Mock()
+        bot.risk_manager.should_close_by_time.return_value = False
+        bot.risk_manager.should_close_position.return_value = (True, 'STOP_LOSS')
+
+        exchange = SlowExchange(latency=0.05)
+        bot.exit_executor = ExitExecutor(exchange.close, max_concurrency=4)
+
+        await bot._check_positions()
+
+        assert len(exchange.closed) == 4
+        assert exchange.peak == 4
+        bot._get_price_map.assert_awaited_once()
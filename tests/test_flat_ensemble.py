@@ -0,0 +1,110 @@
+"""
+Testes para o ensemble de árvores em arrays planos (paridade com o sklearn).
+"""
+
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from ml.flat_ensemble import FlatEnsemble, export_ensemble
+from ml.ml_signal_filter import MLSignalFilter
+
+
+def _data(n=1500, d=23, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, d)) * rng.uniform(0.5, 20, d) + rng.uniform(-50, 50, d)
+    score = X[:, 0] / 10 + np.sin(X[:, 3]) - X[:, 5] * X[:, 7] / 300
+    y = (score + rng.normal(0, 0.5, n) > np.median(score)).astype(int)
+    return X, y
+
+
+# Mesmas configurações do ModelTrainer.train
+MODELS = {
+    'random_forest': lambda: RandomForestClassifier(
+        n_estimators=100, max_depth=10, min_samples_split=20, min_samples_leaf=10,
+        class_weight='balanced', random_state=42, n_jobs=1,
+    ),
+    'gradient_boosting': lambda: GradientBoostingClassifier(
+        n_estimators=100, max_depth=5, learning_rate=0.1, random_state=42,
+    ),
+}
+
+
+@pytest.fixture(scope='module', params=list(MODELS))
+def trained(request):
+    X, y = _data()
+    scaler = StandardScaler().fit(X)
+    model = MODELS[request.param]().fit(scaler.transform(X), y)
+    return model, scaler
+
+
+class TestFlatEnsembleParity:
+
+    def test_predict_proba_matches_sklearn(self, trained):
+        model, scaler = trained
+        flat = export_ensemble(model, scaler)
+        X_new, _ = _data(n=3000, seed=1)
+
+        expected = model.predict_proba(scaler.transform(X_new))
+        np.testing.assert_allclose(flat.predict_proba(X_new), expected, rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(flat.predict(X_new), model.predict(scaler.transform(X_new)))
+
+    def test_single_row_and_threshold_ties(self, trained):
+        """Valores exatamente no threshold seguem para a esquerda, como no sklearn."""
+        model, scaler = trained
+        flat = export_ensemble(model, scaler)
+        tree = (model.estimators_[0] if hasattr(model.estimators_[0], 'tree_') else model.estimators_[0, 0]).tree_
+        row_scaled = np.zeros((1, scaler.n_features_in_))
+        row_scaled[0, tree.feature[0]] = tree.threshold[0]
+        row = scaler.inverse_transform(row_scaled)
+
+        np.testing.assert_allclose(
+            flat.predict_proba(row[0]), model.predict_proba(scaler.transform(row)), rtol=0, atol=1e-12
+        )
+
+    def test_serialization_round_trip_is_compact(self, trained):
+        model, scaler = trained
+        data = export_ensemble(model, scaler).to_bytes()
+        loaded = FlatEnsemble.from_bytes(data)
+
+        X_new, _ = _data(n=200, seed=2)
+        np.testing.assert_allclose(
+            loaded.predict_proba(X_new), model.predict_proba(scaler.transform(X_new)), rtol=0, atol=1e-12
+        )
+        assert len(data) < len(pickle.dumps(model))
+
+    def test_unsupported_model(self):
+        with pytest.raises(ValueError):
+            export_ensemble(object())
+
+
+class TestFilterUsesFlatModel:
+
+    def test_filter_decisions_match_sklearn_path(self, trained):
+        model, scaler = trained
+        columns = [f'f{i}' for i in range(scaler.n_features_in_)]
+
+        def make(flat):
+            f = MLSignalFilter.__new__(MLSignalFilter)
+            f.feature_columns = columns
+            f.min_confidence = 0.5
+            f.loaded = True
+            f.stats = {'total_signals': 0, 'approved': 0, 'rejected': 0, 'errors': 0}
+            f.flat_model = export_ensemble(model, scaler) if flat else None
+            f.model = f.flat_model if flat else model
+            f.scaler = None if flat else scaler
+            return f
+
+        X_new, _ = _data(n=50, seed=3)
+        sk_pred, sk_prob = make(False)._predict(X_new)
+        flat_pred, flat_prob = make(True)._predict(X_new)
+        np.testing.assert_array_equal(flat_pred, sk_pred)
+        np.testing.assert_allclose(flat_prob, sk_prob, rtol=0, atol=1e-12)
@@ -0,0 +1,233 @@
+"""
+Testes para o IndicatorEngine incremental.
+Valida paridade com TA-Lib batch e o tratamento do candle em formação.
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import numpy as np
+import talib
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.indicator_engine import (
+    INDICATOR_COLUMNS,
+    IncrementalIndicators,
+    IndicatorEngine,
+)
+
+RTOL = 1e-9
+
+# Colunas re-ancoradas na janela do sync e colunas que seguem o seed do engine
+WINDOW_COLUMNS = ('ema_fast', 'ema_slow', 'ema_50', 'ema_200', 'obv')
+WILDER_COLUMNS = ('rsi', 'macd', 'macd_signal', 'macd_hist', 'atr', 'adx')
+
+
+def _talib_reference(df):
+    close, high, low = df['close'].values, df['high'].values, df['low'].values
+    macd, signal, hist = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+    upper, middle, lower = talib.BBANDS(close, timeperiod=20)
+    return {
+        'ema_fast': talib.EMA(close, timeperiod=12),
+        'ema_slow': talib.EMA(close, timeperiod=26),
+        'ema_50': talib.EMA(close, timeperiod=50),
+        'ema_200': talib.EMA(close, timeperiod=200),
+        'rsi': talib.RSI(close, timeperiod=14),
+        'macd': macd,
+        'macd_signal': signal,
+        'macd_hist': hist,
+        'bb_upper': upper,
+        'bb_middle': middle,
+        'bb_lower': lower,
+        'atr': talib.ATR(high, low, close, timeperiod=14),
+        'adx': talib.ADX(high, low, close, timeperiod=14),
+        'obv': talib.OBV(close, df['volume'].values),
+        'momentum': talib.MOM(close, timeperiod=10),
+    }
+
+
+def _assert_matches(actual, expected, columns=INDICATOR_COLUMNS):
+    for name in columns:
+        np.testing.assert_allclose(
+            actual[name], expected[name], rtol=RTOL, atol=1e-9, equal_nan=True, err_msg=name
+        )
+
+
+class TestIncrementalIndicators:
+    """Paridade candle a candle com TA-Lib."""
+
+    def test_streaming_matches_talib(self, make_ohlcv):
+        """Atualizar um candle por vez deve reproduzir o TA-Lib sobre a série completa."""
+        df = make_ohlcv(400, epoch_ms=True)
+        series = IncrementalIndicators(history=500)
+        for row in df.itertuples():
+            series.update(row.timestamp, row.high, row.low, row.close, row.volume)
+
+        _, values = series.tail(len(df))
+        actual = {name: values[:, j] for j, name in enumerate(INDICATOR_COLUMNS)}
+        _assert_matches(actual, _talib_reference(df))
+
+    def test_revised_candle_replaces_last(self, make_ohlcv):
+        """Candle com mesmo timestamp substitui o anterior (candle em formação)."""
+        df = make_ohlcv(120, epoch_ms=True)
+        series = IncrementalIndicators(history=500)
+        for row in df.itertuples():
+            # versão provisória seguida da versão final
+            series.update(row.timestamp, row.high + 2, row.low - 1, row.close + 1, row.volume / 2)
+            series.update(row.timestamp, row.high, row.low, row.close, row.volume)
+
+        _, values = series.tail(len(df))
+        actual = {name: values[:, j] for j, name in enumerate(INDICATOR_COLUMNS)}
+        _assert_matches(actual, _talib_reference(df))
+
+    def test_out_of_order_candle_rejected(self):
+        """Candle mais antigo que o último deve levantar erro."""
+        series = IncrementalIndicators()
+        series.update(2, 1.0, 1.0, 1.0, 1.0)
+        try:
+            series.update(1, 1.0, 1.0, 1.0, 1.0)
+        except ValueError:
+            return
+        raise AssertionError("ValueError esperado")
+
+
+class TestIndicatorEngine:
+    """Sincronização de janelas de klines."""
+
+    def test_sliding_window_only_applies_delta(self, make_ohlcv):
+        """Janela deslizante aplica só o candle novo e mantém paridade."""
+        full = make_ohlcv(260, epoch_ms=True)
+        engine = IndicatorEngine(history=500)
+
+        engine.sync('ETHUSDT', '15m', full.iloc[:200].reset_index(drop=True))
+        applied = engine.stats['candles_applied']
+
+        window = full.iloc[1:201].reset_index(drop=True)
+        columns = engine.sync('ETHUSDT', '15m', window)
+
+        # último candle conhecido (revisado) + o novo
+        assert engine.stats['candles_applied'] - applied == 2
+        assert engine.stats['seeds'] == 1
+
+        # Wilder e MACD seguem o TA-Lib sobre toda a série vista
+        reference = {k: v[1:201] for k, v in _talib_reference(full.iloc[:201]).items()}
+        _assert_matches(columns, reference, columns=WILDER_COLUMNS)
+
+        # EMAs e OBV são re-ancorados na janela; janelas finitas batem após o aquecimento
+        window_ref = _talib_reference(window)
+        _assert_matches(columns, window_ref, columns=WINDOW_COLUMNS)
+        _assert_matches(
+            {k: v[20:] for k, v in columns.items()},
+            {k: v[20:] for k, v in window_ref.items()},
+            columns=('bb_upper', 'bb_middle', 'bb_lower', 'momentum'),
+        )
+
+    def test_sliding_500_window_matches_batch_per_window(self, make_ohlcv):
+        """Cada janela deslizante de 500 candles bate com o batch sobre a própria janela."""
+        full = make_ohlcv(900, seed=3, epoch_ms=True)
+        engine = IndicatorEngine(history=500)
+
+        for start in range(0, 401, 25):
+            window = full.iloc[start:start + 500].reset_index(drop=True)
+            columns = engine.sync('BTCUSDT', '15m', window)
+            reference = _talib_reference(window)
+
+            # ema_200 e OBV (memória longa/infinita) batem na janela inteira
+            _assert_matches(columns, reference, columns=WINDOW_COLUMNS)
+            # Wilder/MACD esquecem o seed: os candles recentes batem com o batch
+            _assert_matches(
+                {k: v[-100:] for k, v in columns.items()},
+                {k: v[-100:] for k, v in reference.items()},
+                columns=WILDER_COLUMNS,
+            )
+
+        assert engine.stats['seeds'] == 1
+
+    def test_reseed_on_gap(self, make_ohlcv):
+        """Se faltarem candles entre chamadas, o estado é recriado."""
+        full = make_ohlcv(300, epoch_ms=True)
+        engine = IndicatorEngine(history=500)
+        engine.sync('SOLUSDT', '15m', full.iloc[:100].reset_index(drop=True))
+
+        later = full.iloc[150:300].reset_index(drop=True)
+        columns = engine.sync('SOLUSDT', '15m', later)
+
+        assert engine.stats['seeds'] == 2
+        _assert_matches(columns, _talib_reference(later))
+
+    def test_older_window_falls_back(self, make_ohlcv):
+        """Janela mais antiga que o estado não é atendida."""
+        full = make_ohlcv(150, epoch_ms=True)
+        engine = IndicatorEngine(history=500)
+        engine.sync('BNBUSDT', '15m', full)
+        assert engine.sync('BNBUSDT', '15m', full.iloc[:100].reset_index(drop=True)) is None
+
+    def test_short_tail_after_long_window_falls_back(self, make_ohlcv):
+        """Janela curta depois de uma longa não é atendida com o seed antigo."""
+        full = make_ohlcv(500, seed=11, epoch_ms=True)
+        engine = IndicatorEngine(history=500)
+        engine.sync('XRPUSDT', '15m', full)
+
+        assert engine.sync('XRPUSDT', '15m', full.iloc[-50:].reset_index(drop=True)) is None
+        assert engine.stats['fallbacks'] == 1
+        # O estado continua válido para a janela longa seguinte
+        assert engine.sync('XRPUSDT', '15m', full) is not None
+        assert engine.stats['seeds'] == 1
+
+    def test_short_window_from_seed_is_served(self, make_ohlcv):
+        """Janela curta que começa no seed bate exatamente com o batch."""
+        df = make_ohlcv(50, epoch_ms=True)
+        engine = IndicatorEngine(history=500)
+        _assert_matches(engine.sync('XRPUSDT', '15m', df), _talib_reference(df))
+
+
+
+class TestStrategyIntegration:
+    """calculate_indicators com symbol usa o engine incremental."""
+
+    def test_matches_batch_path(self, make_ohlcv):
+        """Caminho incremental produz as mesmas colunas do caminho batch."""
+        from bot.strategy import TradingStrategy
+
+        strategy = TradingStrategy(client=Mock())
+        df = make_ohlcv(200, epoch_ms=True)
+
+        batch = strategy.calculate_indicators(df.copy())
+        incremental = strategy.calculate_indicators(df.copy(), symbol='BTCUSDT')
+
+        assert strategy.indicator_engine.stats['seeds'] == 1
+        assert set(batch.columns) == set(incremental.columns)
+        for name in (*INDICATOR_COLUMNS, 'vwap', 'buy_volume_pct', 'buy_volume_ma'):
+            np.testing.assert_allclose(
+                incremental[name].astype(float), batch[name].astype(float),
+                rtol=RTOL, atol=1e-9, equal_nan=True, err_msg=name,
+            )
+
+    def test_without_timestamp_uses_batch(self, make_ohlcv):
+        """Sem coluna timestamp o engine não é usado."""
+        from bot.strategy import TradingStrategy
+
+        strategy = TradingStrategy(client=Mock())
+        df = make_ohlcv(100, epoch_ms=True).drop(columns=['timestamp'])
+        result = strategy.calculate_indicators(df, symbol='BTCUSDT')
+
+        assert 'rsi' in result.columns
+        assert strategy.indicator_engine.stats['seeds'] == 0
+
+    def test_short_tail_matches_talib(self, make_ohlcv):
+        """detect_market_regime (50 candles) após a janela de 500 usa os valores do batch."""
+        from bot.strategy import TradingStrategy
+
+        strategy = TradingStrategy(client=Mock())
+        full = make_ohlcv(500, seed=11, epoch_ms=True)
+        strategy.calculate_indicators(full.copy(), symbol='BTCUSDT')
+
+        tail = full.iloc[-50:].reset_index(drop=True)
+        result = strategy.calculate_indicators(tail.copy(), symbol='BTCUSDT')
+
+        expected = _talib_reference(tail)
+        actual = {name: result[name].to_numpy(dtype=float) for name in INDICATOR_COLUMNS}
+        _assert_matches(actual, expected)
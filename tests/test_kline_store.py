@@ -0,0 +1,129 @@
+"""
+Testes para o KlineStore.
+Valida fetch incremental (since), substituição do candle em formação e persistência.
+"""
+
+import os
+import sys
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.kline_store import KlineStore, timeframe_to_ms
+
+TF_MS = 900_000
+START = 1_700_000_000_000
+
+
+class FakeExchange:
+    """Exchange falsa: candles de 15m até ``now``; último candle ainda em formação."""
+
+    def __init__(self, candles=400):
+        self.candles = candles
+        self.calls = []
+
+    def candle(self, i, forming_close=None):
+        close = forming_close if forming_close is not None else 100.0 + i
+        return [START + i * TF_MS, 100.0 + i, close + 1, close - 1, close, 10.0 + i]
+
+    def get_klines(self, symbol, timeframe='15m', limit=200, since=None):
+        self.calls.append({'symbol': symbol, 'limit': limit, 'since': since})
+        rows = [self.candle(i) for i in range(self.candles)]
+        if since is not None:
+            rows = [r for r in rows if r[0] >= since][:limit]
+        else:
+            rows = rows[-limit:]
+        return rows
+
+
+def _store(exchange, **kwargs):
+    store = KlineStore(exchange, **kwargs)
+    store._now_ms = lambda: START + (exchange.candles - 1) * TF_MS + 1000
+    return store
+
+
+class TestTimeframe:
+    def test_timeframe_to_ms(self):
+        assert timeframe_to_ms('1m') == 60_000
+        assert timeframe_to_ms('15m') == TF_MS
+        assert timeframe_to_ms('4h') == 4 * 3_600_000
+        assert timeframe_to_ms('1d') == 86_400_000
+
+
+class TestKlineStore:
+    """Fetch completo na primeira vez, depois apenas o delta."""
+
+    def test_first_call_full_fetch(self):
+        exchange = FakeExchange()
+        store = _store(exchange)
+        df = store.get_frame('BTCUSDT', '15m', 200)
+
+        assert len(df) == 200
+        assert exchange.calls[0]['since'] is None
+        assert df['timestamp'].iloc[-1] == START + 399 * TF_MS
+
+    def test_refresh_fetches_only_delta(self):
+        """Segunda chamada pede candles desde o último armazenado."""
+        exchange = FakeExchange()
+        store = _store(exchange)
+        store.get_frame('BTCUSDT', '15m', 200)
+
+        # Dois candles novos fecharam/abriram
+        exchange.candles = 402
+        store._now_ms = lambda: START + 401 * TF_MS + 1000
+        df = store.get_frame('BTCUSDT', '15m', 200)
+
+        call = exchange.calls[-1]
+        assert call['since'] == START + 399 * TF_MS
+        assert call['limit'] <= 5
+        assert len(df) == 200
+        assert df['timestamp'].iloc[-1] == START + 401 * TF_MS
+        assert df['timestamp'].is_monotonic_increasing
+        assert store.stats['delta_fetches'] == 1
+
+    def test_forming_bar_replaced(self):
+        """Candle em formação com mesmo timestamp é substituído, não duplicado."""
+        exchange = FakeExchange()
+        store = _store(exchange)
+        store.get_frame('ETHUSDT', '15m', 200)
+
+        original = exchange.get_klines
+        exchange.get_klines = lambda *a, **k: [
+            exchange.candle(399, forming_close=999.0) if r[0] == START + 399 * TF_MS else r
+            for r in original(*a, **k)
+        ]
+        df = store.get_frame('ETHUSDT', '15m', 200)
+
+        assert len(df) == 200
+        assert df['close'].iloc[-1] == 999.0
+        assert df['timestamp'].duplicated().sum() == 0
+
+    def test_larger_limit_triggers_full_fetch(self):
+        exchange = FakeExchange()
+        store = _store(exchange)
+        store.get_frame('BTCUSDT', '1h', 200)
+        df = store.get_frame('BTCUSDT', '1h', 300)
+
+        assert len(df) == 300
+        assert store.stats['full_fetches'] == 2
+
+    def test_empty_delta_keeps_history(self):
+        exchange = FakeExchange()
+        store = _store(exchange)
+        store.get_frame('BTCUSDT', '15m', 200)
+        exchange.get_klines = lambda *a, **k: []
+
+        df = store.get_frame('BTCUSDT', '15m', 200)
+        assert len(df) == 200
+
+    def test_disk_persistence(self, tmp_path):
+        """Histórico salvo em disco é reaproveitado por um novo store."""
+        exchange = FakeExchange()
+        _store(exchange, storage_dir=tmp_path).get_frame('SOLUSDT', '15m', 200)
+        assert (tmp_path / 'SOLUSDT_15m.npy').exists()
+
+        exchange.calls.clear()
+        df = _store(exchange, storage_dir=tmp_path).get_frame('SOLUSDT', '15m', 200)
+
+        assert len(df) == 200
+        assert exchange.calls[0]['since'] == START + 399 * TF_MS
@@ -0,0 +1,106 @@
+"""
+Testes para o MarketDataCache (TTL, LRU limitado e carga single-flight).
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.market_cache import MarketDataCache, approx_size
+
+
+class TestTTLAndLRU:
+    """Expiracao por entrada e despejo por contagem / bytes"""
+
+    def test_per_key_ttl(self):
+        cache = MarketDataCache(ttl_seconds=60)
+        cache.set('short', 1, ttl=0.01)
+        cache.set('long', 2)
+        time.sleep(0.02)
+
+        assert cache.get('short') is None
+        assert cache.get('long') == 2
+        stats = cache.stats()
+        assert stats['expirations'] == 1
+        assert stats['hits'] == 1 and stats['misses'] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = MarketDataCache(ttl_seconds=60, max_entries=3)
+        for key in 'abc':
+            cache.set(key, key)
+        cache.get('a')  # 'b' passa a ser o menos usado
+        cache.set('d', 'd')
+
+        assert cache.get('b') is None
+        assert [cache.get(k) for k in 'acd'] == ['a', 'c', 'd']
+        assert cache.stats()['evictions'] == 1
+
+    def test_bounded_by_bytes(self):
+        frame = pd.DataFrame(np.zeros((1000, 6)))
+        size = approx_size(frame)
+        cache = MarketDataCache(ttl_seconds=60, max_bytes=int(size * 2.5))
+        for i in range(5):
+            cache.set(f'klines_{i}', frame.copy())
+
+        stats = cache.stats()
+        assert stats['total_entries'] == 2
+        assert stats['approx_bytes'] <= stats['max_bytes']
+        assert cache.get('klines_4') is not None
+
+    def test_replacing_key_keeps_byte_count(self):
+        cache = MarketDataCache(ttl_seconds=60)
+        cache.set('x', np.zeros(100))
+        cache.set('x', np.zeros(10))
+        assert cache.stats()['approx_bytes'] == 80
+
+
+class TestSingleFlight:
+    """Misses simultaneos compartilham um unico fetch"""
+
+    def test_concurrent_misses_share_one_fetch(self):
+        cache = MarketDataCache(ttl_seconds=60)
+        calls = []
+        release = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {'price': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_set('BTCUSDT', fetch)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + 5
+        while cache.stats()['coalesced'] < 7 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert len(calls) == 1
+        assert results == [{'price': 42}] * 8
+        stats = cache.stats()
+        assert stats['loads'] == 1 and stats['coalesced'] == 7
+        assert stats['inflight'] == 0
+
+    def test_failed_fetch_is_not_cached(self):
+        cache = MarketDataCache(ttl_seconds=60)
+
+        def boom():
+            raise RuntimeError('exchange down')
+
+        assert cache.get_or_set('k', boom) is None
+        assert cache.get_or_set('k', lambda: 7) == 7
+        stats = cache.stats()
+        assert stats['load_errors'] == 1 and stats['loads'] == 2
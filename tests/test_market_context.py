@@ -0,0 +1,96 @@
+"""
+Testes para o MarketContext (snapshot do BTC calculado uma vez por ciclo).
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.market_context import MarketContext
+from bot.selector import CryptoSelector
+from bot.strategy import TradingStrategy
+
+
+def _frame(seed, drift, n=300):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.004, n)))
+    spread = close * 0.003
+    return pd.DataFrame({
+        'timestamp': (np.arange(n) * 900_000 + 1_700_000_000_000).astype(np.int64),
+        'open': close + rng.normal(0, 0.001, n) * close,
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(100, 200, n),
+    })
+
+
+FRAMES = {
+    'BTCUSDT': _frame(0, -0.004),  # queda forte: regime trending e bearish
+    'ETHUSDT': _frame(1, -0.003),
+    'SOLUSDT': _frame(2, 0.002),
+}
+
+
+def _strategy():
+    strategy = TradingStrategy(client=Mock())
+    strategy.calls = []
+
+    def get_historical_data(symbol, timeframe=None, limit=None):
+        strategy.calls.append(symbol)
+        return FRAMES[symbol].tail(limit or strategy.limit).reset_index(drop=True)
+
+    strategy.get_historical_data = get_historical_data
+    TradingStrategy._btc_correlation_cache.clear()
+    return strategy
+
+
+class TestMarketContext:
+    """Analise com snapshot equivale a analise sem snapshot, sem refazer o BTC"""
+
+    def test_build_snapshot(self):
+        context = _strategy().build_market_context()
+
+        assert context.btc_regime['regime'] == 'trending'
+        assert context.btc_bearish is True
+        assert len(context.btc_returns) == 29
+        assert context.btc_analysis['symbol'] == 'BTCUSDT'
+
+    def test_context_matches_legacy_analysis(self):
+        strategy = _strategy()
+        context = strategy.build_market_context()
+
+        for symbol in ('ETHUSDT', 'SOLUSDT'):
+            legacy = strategy.analyze_symbol(symbol)
+            strategy.calls.clear()
+            shared = strategy.analyze_symbol(symbol, context=context)
+
+            assert 'BTCUSDT' not in strategy.calls
+            assert shared['btc_correlation'] == legacy['btc_correlation']
+            assert shared['unified_score'] == legacy['unified_score']
+            assert shared['score_components'] == legacy['score_components']
+        assert set(context.correlations) == {'ETHUSDT', 'SOLUSDT'}
+
+    def test_selector_builds_context_once(self):
+        strategy = _strategy()
+        strategy.build_market_context = Mock(wraps=strategy.build_market_context)
+        selector = CryptoSelector(client=Mock(), strategy=strategy)
+        selector.symbols = list(FRAMES)
+        selector._refresh_trending_symbols = Mock()
+
+        selector.select_best_crypto()
+
+        strategy.build_market_context.assert_called_once()
+        # BTC: um fetch do regime e um dos retornos/tendencia; a analise do BTC e reutilizada
+        assert strategy.calls.count('BTCUSDT') <= 4
+
+    def test_btc_pairs_fully_correlated(self):
+        context = MarketContext(btc_regime={}, btc_bearish=False, btc_returns=None)
+        assert context.correlation('BTCUSDT', None) == 1.0
+        assert context.correlation('ETHUSDT', None) == 0.5
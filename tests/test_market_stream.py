@@ -0,0 +1,234 @@
+"""
+Testes para o MarketDataStream.
+Usa um servidor WebSocket local falso no formato de combined streams da Binance.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.market_stream import WEBSOCKETS_AVAILABLE, MarketDataStream
+
+T0 = 1_700_000_000_000
+
+
+def _kline(symbol, t, close, interval='15m'):
+    return {
+        'stream': f'{symbol.lower()}@kline_{interval}',
+        'data': {
+            'e': 'kline', 's': symbol,
+            'k': {'t': t, 's': symbol, 'i': interval, 'o': '1.0', 'h': str(close + 1),
+                  'l': str(close - 1), 'c': str(close), 'v': '10.5', 'x': False},
+        },
+    }
+
+
+def _book(symbol, bid, ask):
+    return {
+        'stream': f'{symbol.lower()}@bookTicker',
+        'data': {'u': 1, 's': symbol, 'b': str(bid), 'B': '2.0', 'a': str(ask), 'A': '3.0'},
+    }
+
+
+def _mini_tickers(prices):
+    return {
+        'stream': '!miniTicker@arr',
+        'data': [{'e': '24hrMiniTicker', 's': s, 'c': str(p)} for s, p in prices.items()],
+    }
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class FakeBinanceServer:
+    """Servidor WebSocket local que envia mensagens fixas e guarda os SUBSCRIBE recebidos."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.paths = []
+        self.received = []
+        self.port = None
+        self._loop = None
+        self._stop = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True)
+
+    async def _handler(self, connection):
+        self.paths.append(connection.request.path)
+        for message in self.messages:
+            await connection.send(json.dumps(message))
+        async for raw in connection:
+            self.received.append(json.loads(raw))
+
+    async def _main(self):
+        import websockets
+
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        async with websockets.serve(self._handler, '127.0.0.1', 0) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(5)
+
+    @property
+    def url(self):
+        return f'ws://127.0.0.1:{self.port}/stream'
+
+
+class TestMessageHandling:
+    """Aplicação das mensagens ao estado (sem rede)."""
+
+    def _fresh_stream(self):
+        stream = MarketDataStream(url='ws://unused')
+        stream._connected = True
+        return stream
+
+    def test_mini_ticker_prices(self):
+        stream = self._fresh_stream()
+        stream.handle_message(json.dumps(_mini_tickers({'BTCUSDT': 50000.5, 'ETHUSDT': 3000})))
+        assert stream.get_prices(['BTCUSDT', 'ETHUSDT', 'XRPUSDT']) == {
+            'BTCUSDT': 50000.5, 'ETHUSDT': 3000.0,
+        }
+
+    def test_listeners_only_woken_by_price_changes(self):
+        """bookTicker, kline e preço repetido não acordam o monitor de posições."""
+        stream = self._fresh_stream()
+        ticks = []
+        stream.add_listener(lambda: ticks.append(1))
+
+        stream.handle_message(json.dumps(_mini_tickers({'BTCUSDT': 50000.5})))
+        stream.handle_message(json.dumps(_book('BTCUSDT', 50000, 50001)))
+        stream.handle_message(json.dumps(_kline('BTCUSDT', T0, 50000.5)))
+        stream.handle_message(json.dumps(_mini_tickers({'BTCUSDT': 50000.5})))
+        assert len(ticks) == 1
+        assert stream.get_book_ticker('BTCUSDT')['askPrice'] == '50001'
+
+        stream.handle_message(json.dumps(_mini_tickers({'BTCUSDT': 50001.0, 'ETHUSDT': 3000})))
+        assert len(ticks) == 2
+
+    def test_kline_forming_bar_replaced(self):
+        """Mesmo open time substitui o candle; novo open time adiciona."""
+        stream = self._fresh_stream()
+        stream.handle_message(json.dumps(_kline('BTCUSDT', T0, 100.0)))
+        stream.handle_message(json.dumps(_kline('BTCUSDT', T0, 101.0)))
+        stream.handle_message(json.dumps(_kline('BTCUSDT', T0 + 900_000, 102.0)))
+
+        candles = stream.get_klines('BTCUSDT', '15m', limit=10, since=T0)
+        assert [c[0] for c in candles] == [T0, T0 + 900_000]
+        assert candles[0][4] == 101.0
+
+    def test_klines_not_covering_request(self):
+        """Sem o candle ``since`` ou sem ``limit`` candles, retorna None (fallback REST)."""
+        stream = self._fresh_stream()
+        stream.handle_message(json.dumps(_kline('BTCUSDT', T0, 100.0)))
+        assert stream.get_klines('BTCUSDT', '15m', limit=10, since=T0 - 900_000) is None
+        assert stream.get_klines('BTCUSDT', '15m', limit=10) is None
+
+    def test_stale_stream_serves_nothing(self):
+        stream = self._fresh_stream()
+        stream.handle_message(json.dumps(_book('BTCUSDT', 1, 2)))
+        stream._last_message -= stream.max_age + 1
+        assert stream.get_book_ticker('BTCUSDT') is None
+        assert stream.get_prices(['BTCUSDT']) == {}
+
+    def test_invalid_message_counted(self):
+        stream = self._fresh_stream()
+        stream.handle_message('not json')
+        assert stream.stats['errors'] == 1
+
+
+class TestExchangeManagerFallback:
+    """ExchangeManager usa o stream quando fresco e REST caso contrário."""
+
+    def _manager(self):
+        from bot.exchange_client import ExchangeManager
+
+        manager = ExchangeManager()
+        manager._ccxt_client = Mock()
+        manager._ccxt_client.fetch_tickers.return_value = {
+            'BTC/USDT': {'last': 1.0}, 'ETH/USDT': {'last': 2.0},
+        }
+        manager._price_cache.clear()
+        return manager
+
+    def test_price_map_from_stream(self):
+        manager = self._manager()
+        stream = MarketDataStream(url='ws://unused')
+        stream._connected = True
+        stream.handle_message(json.dumps(_mini_tickers({'BTCUSDT': 50000, 'ETHUSDT': 3000})))
+        manager._stream = stream
+
+        assert manager.get_price_map(['BTCUSDT', 'ETHUSDT']) == {'BTCUSDT': 50000.0, 'ETHUSDT': 3000.0}
+        manager._ccxt_client.fetch_tickers.assert_not_called()
+
+    def test_price_map_rest_fallback_when_stale(self):
+        manager = self._manager()
+        manager._stream = MarketDataStream(url='ws://unused')  # nunca conectou
+
+        assert manager.get_price_map(['BTCUSDT', 'ETHUSDT']) == {'BTCUSDT': 1.0, 'ETHUSDT': 2.0}
+        manager._ccxt_client.fetch_tickers.assert_called_once()
+
+    def test_klines_miss_subscribes(self):
+        manager = self._manager()
+        manager._ccxt_client.fetch_ohlcv.return_value = [[T0, 1, 2, 0.5, 1.5, 10]]
+        stream = MarketDataStream(url='ws://unused')
+        manager._stream = stream
+
+        assert manager.get_klines('SOLUSDT', '15m', limit=1) == [[T0, 1, 2, 0.5, 1.5, 10]]
+        assert 'solusdt@kline_15m' in stream._pending
+
+
+@pytest.mark.skipif(not WEBSOCKETS_AVAILABLE, reason='websockets não instalado')
+class TestFakeServer:
+    """Conexão real contra servidor WebSocket local."""
+
+    def test_stream_receives_market_state(self):
+        messages = [
+            _mini_tickers({'BTCUSDT': 65000.0}),
+            _book('BTCUSDT', 64999.5, 65000.5),
+            _kline('BTCUSDT', T0, 65000.0),
+        ]
+        with FakeBinanceServer(messages) as server:
+            stream = MarketDataStream(url=server.url, flush_interval=0.05)
+            stream.start(['BTCUSDT'], ['15m'])
+            try:
+                assert _wait_for(lambda: stream.stats['messages'] >= 3)
+                assert stream.get_price('BTCUSDT') == 65000.0
+                assert stream.get_book_ticker('BTCUSDT')['askPrice'] == '65000.5'
+                assert stream.get_klines('BTCUSDT', '15m', limit=5, since=T0)[0][4] == 65000.0
+
+                path = server.paths[0]
+                assert 'btcusdt@kline_15m' in path and 'btcusdt@bookTicker' in path
+
+                # Assinaturas novas são agrupadas num único SUBSCRIBE
+                stream.subscribe_book(['ETHUSDT', 'SOLUSDT'])
+                assert _wait_for(lambda: len(server.received) >= 1)
+                assert server.received[0]['method'] == 'SUBSCRIBE'
+                assert set(server.received[0]['params']) == {'ethusdt@bookTicker', 'solusdt@bookTicker'}
+            finally:
+                stream.stop()
+            assert not stream.is_connected
@@ -0,0 +1,225 @@
+"""
+Testes para a inferência ML em lote (filtro de sinais, seletor e MLPrimaryStrategy).
+"""
+
+import os
+import sys
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.selector import CryptoSelector
+from bot.strategies import MLPrimaryStrategy
+from bot.strategy import TradingStrategy
+from bot.strategy_engine import MarketRegime
+from bot.trading_bot import TradingBot
+from ml.ml_signal_filter import MLSignalFilter, indicators_from_opportunity
+
+FEATURES = ['rsi', 'macd_hist', 'ema_fast_dist', 'bb_position', 'atr_pct', 'volume_ratio', 'signal_strength']
+
+
+class CountingModel:
+    """Encapsula o modelo contando chamadas ao predict_proba."""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.calls = 0
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def predict_proba(self, X):
+        self.calls += 1
+        return self.model.predict_proba(X)
+
+
+def _ml_filter(min_confidence=0.5):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, len(FEATURES))) * [10, 1, 2, 0.3, 1, 0.5, 20] + [50, 0, 0, 0.5, 1, 1, 60]
+    y = (X[:, 0] < 50).astype(int) ^ (X[:, 2] > 1.5).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0).fit(scaler.transform(X), y)
+
+    ml_filter = MLSignalFilter.__new__(MLSignalFilter)
+    ml_filter.model = CountingModel(model)
+    ml_filter.scaler = scaler
+    ml_filter.flat_model = None
+    ml_filter.feature_columns = FEATURES
+    ml_filter.min_confidence = min_confidence
+    ml_filter.loaded = True
+    ml_filter.metrics = {}
+    ml_filter.model_name = 'signal_filter'
+    ml_filter.version = None
+    ml_filter.digest = None
+    ml_filter._model_lock = threading.Lock()
+    ml_filter.stats = {
+        'total_signals': 0, 'approved': 0, 'rejected': 0, 'errors': 0,
+        'batches': 0, 'batch_rows': 0, 'batch_approved': 0, 'batch_rejected': 0, 'last_batch_size': 0,
+        'last_batch_ms': None, 'avg_batch_ms': None, 'max_batch_ms': 0.0,
+        'reloads': 0, 'last_reload_ms': None,
+    }
+    return ml_filter
+
+
+def _candidates(n=30, seed=1):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'symbol': f'C{i}USDT', 'signal': 'BUY', 'score': float(rng.uniform(40, 90)),
+            'strength': int(rng.integers(40, 100)), 'price': 100.0,
+            'rsi': float(rng.uniform(20, 80)), 'macd_hist': float(rng.normal()),
+            'ema_fast': float(100 - rng.normal(0, 2)), 'bb_upper': 104.0, 'bb_lower': float(rng.uniform(94, 99)),
+            'atr': float(rng.uniform(0.5, 2)), 'volume_ratio': float(rng.uniform(0.5, 2)),
+        }
+        for i in range(n)
+    ]
+
+
+class TestMLFilterBatch:
+
+    def test_batch_matches_single_row_decisions(self):
+        ml_filter = _ml_filter()
+        candidates = _candidates()
+
+        batch = ml_filter.score_batch(candidates)
+        assert ml_filter.model.calls == 1  # uma chamada para todo o scan
+
+        for c in candidates:
+            single = ml_filter.should_take_trade(c, indicators_from_opportunity(c))
+            assert batch[c['symbol']][:2] == single[:2]
+        assert {d[0] for d in batch.values()} == {True, False}
+
+    def test_latency_stats(self):
+        ml_filter = _ml_filter()
+        ml_filter.score_batch(_candidates(10))
+        ml_filter.score_batch(_candidates(25))
+
+        stats = ml_filter.get_stats()['batch']
+        assert stats['batches'] == 2 and stats['rows'] == 35 and stats['last_size'] == 25
+        assert stats['last_ms'] > 0 and stats['max_ms'] >= stats['last_ms']
+
+    def test_batch_counts_kept_apart_from_signal_stats(self):
+        ml_filter = _ml_filter()
+        decisions = ml_filter.score_batch(_candidates(20))
+
+        stats = ml_filter.get_stats()
+        approved = sum(1 for d in decisions.values() if d[0])
+        assert stats['total_signals'] == 0  # scan não é "trade considerado"
+        assert stats['batch']['approved'] == approved
+        assert stats['batch']['rejected'] == 20 - approved
+
+        ml_filter.record_decision(True)
+        stats = ml_filter.get_stats()
+        assert (stats['total_signals'], stats['approved'], stats['rejected']) == (1, 1, 0)
+
+    def test_unloaded_model_accepts_all(self):
+        ml_filter = _ml_filter()
+        ml_filter.loaded = False
+        decisions = ml_filter.score_batch(_candidates(3))
+        assert all(d[0] for d in decisions.values())
+
+
+class TestSelectorBatchFilter:
+
+    def test_approved_candidates_ranked_first(self):
+        selector = CryptoSelector.__new__(CryptoSelector)
+        selector.ml_filter = _ml_filter()
+        candidates = sorted(_candidates(), key=lambda c: c['score'], reverse=True)
+
+        ranked = selector._apply_ml_filter(candidates)
+
+        approved = [c for c in ranked if c['ml_approved']]
+        assert ranked[:len(approved)] == approved
+        assert [c['score'] for c in approved] == sorted((c['score'] for c in approved), reverse=True)
+        assert all('ml_confidence' in c and 'ml_reason' in c for c in ranked)
+
+    def test_without_filter_keeps_order(self):
+        selector = CryptoSelector.__new__(CryptoSelector)
+        selector.ml_filter = None
+        candidates = _candidates(5)
+        assert selector._apply_ml_filter(candidates) == candidates
+
+
+@pytest.fixture
+def indicator_frame(make_ohlcv):
+    """OHLCV com os indicadores do bot."""
+
+    def factory(n=120, seed=0):
+        return TradingStrategy(None).calculate_indicators(make_ohlcv(n, seed=seed, vol=0.01, spread=0.006))
+
+    return factory
+
+
+class TestMLPrimaryBatch:
+
+    def test_analyze_batch_matches_per_symbol(self, indicator_frame):
+        strategy = MLPrimaryStrategy(model_confidence_threshold=0.4, min_score=0)
+        frames = {f'S{i}USDT': indicator_frame(seed=i) for i in range(12)}
+        regime = MarketRegime('volatile', 20.0, 1.0, 50.0, 3.0, 'neutral')
+
+        rng = np.random.default_rng(3)
+        n_features = len(strategy._extract_features(next(iter(frames.values()))))
+        X = rng.normal(size=(200, n_features))
+        y = np.sign(X[:, 0]).astype(int)
+        strategy._model = CountingModel(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y))
+        strategy._model.model.n_jobs = 1
+
+        batch = strategy.analyze_batch([(s, df, regime) for s, df in frames.items()])
+        assert strategy._model.calls == 1
+        assert strategy.batch_stats['last_size'] == 12
+
+        for symbol, df in frames.items():
+            single = strategy.analyze(symbol, df, regime)
+            assert (single is None) == (batch[symbol] is None)
+            if single is not None:
+                assert single.signal == batch[symbol].signal
+                assert single.confidence == batch[symbol].confidence
+        assert any(s is not None for s in batch.values())
+
+    def test_heuristic_fallback_without_model(self, indicator_frame):
+        strategy = MLPrimaryStrategy(min_score=0)
+        strategy._model = None
+        regime = MarketRegime('trending', 30.0, 1.0, 50.0, 3.0, 'up')
+        result = strategy.analyze_batch([('AUSDT', indicator_frame(), regime), ('BUSDT', indicator_frame(n=10), regime)])
+        assert set(result) == {'AUSDT', 'BUSDT'} and result['BUSDT'] is None
+
+
+class TestOpenPositionMarketAnalyzer:
+    """LLM Market Analyzer recebe os indicadores da oportunidade"""
+
+    @pytest.mark.asyncio
+    async def test_recommend_trade_receives_indicators(self):
+        bot = TradingBot.__new__(TradingBot)
+        bot.risk_advisor = None
+        bot.ml_filter = None
+        bot.learning_system = Mock()
+        bot.learning_system.calculate_opportunity_score.return_value = 80.0
+        bot.learning_system.should_take_trade.return_value = (True, 'ok')
+        bot.strategy = Mock(timeframe='15m')
+        bot.positions_repo = SimpleNamespace(positions=[])
+        bot._run_blocking = AsyncMock(return_value=None)
+        bot._notify_observing = AsyncMock()
+
+        analyzer = Mock()
+        analyzer.is_available = AsyncMock(return_value=True)
+        analyzer.analyze_market_regime = AsyncMock(return_value=SimpleNamespace(
+            regime=SimpleNamespace(value='trending'), volatility_percentile=50, trend_strength=60,
+        ))
+        analyzer.recommend_trade = AsyncMock(return_value=SimpleNamespace(action='SKIP', reasoning='teste'))
+        bot.market_analyzer = analyzer
+
+        opportunity = dict(_candidates(1)[0], ema_50=101.0, ema_200=98.0)
+        await bot._open_position(opportunity)
+
+        indicators = analyzer.recommend_trade.call_args.kwargs['indicators']
+        assert indicators == indicators_from_opportunity(opportunity)
+        assert indicators['rsi'] == opportunity['rsi'] and indicators['ema_200'] == 98.0
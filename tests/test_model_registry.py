@@ -0,0 +1,128 @@
+"""
+Testes para o registro versionado de modelos e a troca a quente no filtro ML.
+"""
+
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from ml.flat_ensemble import export_ensemble
+from ml.ml_signal_filter import MLSignalFilter
+from ml.model_registry import ModelRegistry, content_digest
+
+FEATURES = ['rsi', 'macd_hist', 'bb_position', 'volume_ratio']
+
+
+class FakeCollection:
+    def find_one(self, *args, **kwargs):
+        return None
+
+
+class FakeDB:
+    """Banco sem documento legado em ml_models"""
+    ml_models = FakeCollection()
+
+
+def _artifacts(seed=0, n_estimators=10):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(300, len(FEATURES))) * [10, 1, 0.3, 1] + [50, 0, 0.5, 1]
+    y = (X[:, 0] < 50).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=3, random_state=seed)
+    model.fit(scaler.transform(X), y)
+    return {
+        'model': pickle.dumps(model),
+        'scaler': pickle.dumps(scaler),
+        'flat_model': export_ensemble(model, scaler).to_bytes(),
+    }
+
+
+def _candidates():
+    return [
+        {'symbol': f'C{i}USDT', 'rsi': 30 + i * 5, 'price': 100.0, 'score': 60, 'volume_ratio': 1.2}
+        for i in range(8)
+    ]
+
+
+class TestModelRegistry:
+    """Publicacao, deduplicacao e verificacao de integridade"""
+
+    def test_publish_and_load(self, tmp_path):
+        registry = ModelRegistry(root=tmp_path)
+        artifacts = _artifacts()
+        version = registry.publish('signal_filter', artifacts, FEATURES, {'accuracy': 0.6})
+
+        assert version.version == 1
+        assert version.digest == content_digest(artifacts)
+        assert (tmp_path / 'signal_filter' / version.dirname / 'model.pkl').exists()
+        assert registry.load(registry.latest('signal_filter')) == artifacts
+        assert registry.latest('signal_filter').feature_columns == FEATURES
+
+    def test_same_content_is_not_republished(self, tmp_path):
+        registry = ModelRegistry(root=tmp_path)
+        first = registry.publish('signal_filter', _artifacts(seed=0))
+        again = registry.publish('signal_filter', _artifacts(seed=0))
+        second = registry.publish('signal_filter', _artifacts(seed=1))
+
+        assert again.version == first.version == 1
+        assert second.version == 2
+        assert [v.version for v in registry.versions('signal_filter')] == [1, 2]
+        assert registry.latest('other') is None
+
+    def test_corrupted_artifact_is_rejected(self, tmp_path):
+        registry = ModelRegistry(root=tmp_path)
+        version = registry.publish('signal_filter', _artifacts())
+        path = tmp_path / 'signal_filter' / version.dirname / 'scaler.pkl'
+        path.write_bytes(path.read_bytes()[:-1] + b'x')
+
+        with pytest.raises(ValueError):
+            registry.load(version)
+
+
+class TestHotReload:
+    """Filtro troca de versao em thread de fundo sem interromper o uso"""
+
+    def test_background_reload_swaps_version(self, tmp_path):
+        registry = ModelRegistry(root=tmp_path)
+        registry.publish('signal_filter', _artifacts(seed=0), FEATURES)
+        ml_filter = MLSignalFilter(db=FakeDB(), registry=registry)
+        assert ml_filter.loaded and ml_filter.version == 1
+
+        # Sem versao nova: nada a trocar
+        assert ml_filter.reload_model(wait=True) is False
+
+        registry.publish('signal_filter', _artifacts(seed=1, n_estimators=15), FEATURES)
+        assert ml_filter.reload_model() is True
+        # Modelo antigo continua atendendo enquanto o novo carrega
+        assert len(ml_filter.score_batch(_candidates())) == 8
+        ml_filter._reload_thread.join(timeout=10)
+
+        assert ml_filter.version == 2
+        assert ml_filter.flat_model.n_trees == 15
+        assert ml_filter.get_stats()['model_version'] == 2
+        assert len(ml_filter.score_batch(_candidates())) == 8
+        ml_filter.close()
+
+    def test_watcher_picks_up_new_version(self, tmp_path):
+        registry = ModelRegistry(root=tmp_path)
+        ml_filter = MLSignalFilter(db=FakeDB(), registry=registry)
+        assert not ml_filter.loaded
+
+        ml_filter.start_watcher(interval=0.02)
+        registry.publish('signal_filter', _artifacts(), FEATURES)
+        deadline = time.monotonic() + 10
+        while ml_filter.version is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        ml_filter.close()
+
+        assert ml_filter.loaded and ml_filter.version == 1
+        assert ml_filter._watcher is None
@@ -0,0 +1,168 @@
+"""
+Testes para os agregados de performance materializados.
+"""
+
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.performance_aggregates import (
+    SCOPE_ALL,
+    SCOPE_REAL,
+    PerformanceAggregates,
+    apply_trade,
+    empty_aggregates,
+    summarize,
+)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d.get(key) or '', reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class FakeCollection:
+    """Subconjunto async do motor usado pelos agregados"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        doc = self.docs.get(query['_id'])
+        return dict(doc, daily={k: dict(v) for k, v in doc['daily'].items()}, recent=list(doc['recent'])) if doc else None
+
+    async def replace_one(self, query, doc, upsert=False):
+        current = self.docs.get(query['_id'])
+        matched = current is not None and all(current.get(k) == v for k, v in query.items())
+        if matched or (current is None and upsert):
+            self.docs[query['_id']] = doc
+        return SimpleNamespace(matched_count=int(matched))
+
+    def find(self, query, projection=None):
+        return FakeCursor(list(self.docs.values()))
+
+
+def _trades(n, seed=7):
+    rng = random.Random(seed)
+    trades = []
+    for i in range(n):
+        day = 1 + i // 100
+        trades.append({
+            'symbol': rng.choice(['BTCUSDT', 'ETHUSDT']),
+            'side': 'BUY',
+            'pnl': round(rng.uniform(-20, 25), 2) if i % 17 else 0.0,
+            'status': 'closed',
+            'closed_at': f'2026-01-{day:02d}T{(i % 100) // 60:02d}:{i % 60:02d}:00+00:00',
+            'simulated': i % 5 == 0,
+        })
+    return trades
+
+
+def _reference(trades):
+    """Cálculo por varredura completa (o que /performance fazia antes)"""
+    pnls = [t['pnl'] for t in trades]
+    cumulative = peak = max_dd = 0
+    for pnl in pnls:
+        cumulative += pnl
+        peak = max(peak, cumulative)
+        max_dd = max(max_dd, peak - cumulative)
+    streak, kind = 0, None
+    for pnl in reversed(pnls):
+        if pnl == 0:
+            continue
+        current = 'win' if pnl > 0 else 'loss'
+        if kind is None:
+            kind = current
+        if current != kind:
+            break
+        streak += 1
+    return {'total_pnl': round(sum(pnls), 2), 'max_drawdown': round(max_dd, 2),
+            'winning_trades': sum(p > 0 for p in pnls), 'current_streak': streak, 'streak_type': kind}
+
+
+class TestApplyTrade:
+
+    def test_matches_full_scan_beyond_1000_trades(self):
+        trades = [t for t in _trades(1500) if not t['simulated']]
+        agg = empty_aggregates(SCOPE_REAL)
+        for trade in trades:
+            apply_trade(agg, trade)
+        summary = summarize(agg)
+
+        expected = _reference(trades)
+        assert summary['total_trades'] == len(trades) > 1000
+        for key, value in expected.items():
+            assert summary[key] == pytest.approx(value) if isinstance(value, float) else summary[key] == value
+        assert len(summary['trades_by_date']) == 200
+        assert sum(day['trades'] for day in summary['daily_pnl']) == len(trades)
+
+    def test_empty_summary(self):
+        summary = summarize(None)
+        assert summary['total_trades'] == 0 and summary['profit_factor'] == 0
+        assert summary['trades_by_date'] == [] and summary['streak_type'] is None
+
+
+class TestPerformanceAggregates:
+
+    @pytest.mark.asyncio
+    async def test_incremental_equals_rebuild(self):
+        db = SimpleNamespace(performance_aggregates=FakeCollection(), trades=FakeCollection())
+        aggregates = PerformanceAggregates(db)
+
+        for i, trade in enumerate(_trades(60)):
+            db.trades.docs[i] = trade
+            await aggregates.record_trade(trade)
+
+        incremental = {scope: summarize(await aggregates.get(scope)) for scope in (SCOPE_REAL, SCOPE_ALL)}
+        await aggregates.rebuild()
+        rebuilt = {scope: summarize(await aggregates.get(scope)) for scope in (SCOPE_REAL, SCOPE_ALL)}
+
+        assert incremental == rebuilt
+        assert incremental[SCOPE_ALL]['total_trades'] == 60
+        assert incremental[SCOPE_REAL]['total_trades'] == 48
+
+    @pytest.mark.asyncio
+    async def test_version_conflict_retries(self):
+        db = SimpleNamespace(performance_aggregates=FakeCollection(), trades=FakeCollection())
+        aggregates = PerformanceAggregates(db)
+        await aggregates.rebuild()
+
+        # Outro processo grava entre o read e o replace da primeira tentativa
+        original_find_one = db.performance_aggregates.find_one
+        raced = False
+
+        async def racing_find_one(query):
+            nonlocal raced
+            doc = await original_find_one(query)
+            if not raced and query['_id'] == SCOPE_REAL:
+                raced = True
+                bumped = await original_find_one(query)
+                bumped['version'] += 1
+                db.performance_aggregates.docs[SCOPE_REAL] = bumped
+            return doc
+
+        db.performance_aggregates.find_one = racing_find_one
+        await aggregates.record_trade({'pnl': 5.0, 'closed_at': '2026-02-01T00:00:00+00:00', 'status': 'closed'})
+
+        agg = await original_find_one({'_id': SCOPE_REAL})
+        assert agg['total_trades'] == 1 and agg['version'] == 3
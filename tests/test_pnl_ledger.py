@@ -0,0 +1,119 @@
+"""
+Testes para o PnLLedger (limites de perda diária/semanal em memória).
+"""
+
+import os
+import sys
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.pnl_ledger import PnLLedger
+from bot.trading_bot import TradingBot
+
+# Quarta-feira; semana começa na segunda 2026-10-12
+WEDNESDAY = datetime(2026, 10, 14, 15, 0, tzinfo=UTC)
+
+
+class TestPnLLedger:
+
+    def test_day_and_week_buckets(self):
+        ledger = PnLLedger()
+        ledger.record(-10, '2026-10-12T09:00:00+00:00', now=WEDNESDAY)
+        ledger.record(5, '2026-10-14T10:00:00+00:00', now=WEDNESDAY)
+        ledger.record(-3, datetime(2026, 10, 14, 11, tzinfo=UTC), now=WEDNESDAY)
+        ledger.record(-100, '2026-10-05T09:00:00+00:00', now=WEDNESDAY)  # semana anterior
+
+        assert ledger.day_pnl(WEDNESDAY) == pytest.approx(2)
+        assert ledger.week_pnl(WEDNESDAY) == pytest.approx(-8)
+        assert ledger.snapshot(WEDNESDAY)['trades_week'] == 3
+
+    def test_rollover_at_day_and_week_boundaries(self):
+        ledger = PnLLedger()
+        ledger.record(-10, '2026-10-14T23:59:00+00:00', now=WEDNESDAY)
+
+        thursday = datetime(2026, 10, 15, 0, 1, tzinfo=UTC)
+        assert ledger.day_pnl(thursday) == 0
+        assert ledger.week_pnl(thursday) == pytest.approx(-10)
+
+        next_monday = datetime(2026, 10, 19, 0, 1, tzinfo=UTC)
+        assert ledger.week_pnl(next_monday) == 0
+        assert ledger.snapshot(next_monday)['week_start'] == '2026-10-19'
+
+    @pytest.mark.asyncio
+    async def test_seed_single_query(self):
+        trades = [
+            {'pnl': -4.0, 'closed_at': '2026-10-13T08:00:00+00:00'},
+            {'pnl': -6.0, 'closed_at': '2026-10-14T08:00:00+00:00'},
+        ]
+        cursor = Mock()
+        cursor.to_list = AsyncMock(return_value=trades)
+        db = Mock()
+        db.trades.find.return_value = cursor
+
+        ledger = PnLLedger()
+        await ledger.seed(db, now=WEDNESDAY)
+
+        query = db.trades.find.call_args[0][0]
+        assert query == {'closed_at': {'$gte': '2026-10-12T00:00:00+00:00'}}
+        assert ledger.day_pnl(WEDNESDAY) == pytest.approx(-6)
+        assert ledger.week_pnl(WEDNESDAY) == pytest.approx(-10)
+        assert ledger.seeded
+
+
+class TestDrawdownLimits:
+    """_check_drawdown_limits lê o ledger a cada chamada, sem cache"""
+
+    def _bot(self):
+        bot = TradingBot.__new__(TradingBot)
+        bot.is_running = True
+        bot.last_error = None
+        bot.daily_drawdown_limit_pct = 5.0
+        bot.weekly_drawdown_limit_pct = 0.0
+        bot._current_drawdown_pct = 0.0
+        bot.pnl_ledger = PnLLedger()
+        bot.pnl_ledger.seeded = True
+        bot.db = Mock()
+        return bot
+
+    @pytest.mark.asyncio
+    async def test_pauses_on_next_check_after_loss(self):
+        bot = self._bot()
+        with patch('bot.trading_bot.telegram_notifier') as notifier:
+            notifier.send_message_async = AsyncMock()
+            assert await bot._check_drawdown_limits(1000.0) is True
+
+            bot.pnl_ledger.record(-30, datetime.now(UTC))
+            assert await bot._check_drawdown_limits(1000.0) is True
+            assert bot._current_drawdown_pct == pytest.approx(3.0)
+
+            # Nenhuma janela de cache: a perda seguinte já pausa o bot
+            bot.pnl_ledger.record(-25, datetime.now(UTC))
+            assert await bot._check_drawdown_limits(1000.0) is False
+
+        assert bot.is_running is False
+        assert bot.last_error == "Limite de perda diaria atingido"
+        bot.db.trades.find.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_seed_retried_and_entries_blocked_meanwhile(self):
+        bot = self._bot()
+        bot.pnl_ledger.seeded = False
+        cursor = Mock()
+        cursor.to_list = AsyncMock(side_effect=[RuntimeError('mongo fora'), []])
+        bot.db.trades.find.return_value = cursor
+
+        # Seed falhou: fecha para novas entradas sem pausar o bot
+        assert await bot._check_drawdown_limits(1000.0) is False
+        assert bot.is_running is True and not bot.pnl_ledger.seeded
+
+        # Próximo ciclo tenta de novo e libera
+        assert await bot._check_drawdown_limits(1000.0) is True
+        assert bot.pnl_ledger.seeded
+        assert bot.db.trades.find.call_count == 2
+        assert await bot._check_drawdown_limits(1000.0) is True
+        assert bot.db.trades.find.call_count == 2
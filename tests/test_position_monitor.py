@@ -0,0 +1,96 @@
+"""
+Testes para o monitor de posições (task de saídas separada do scan).
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.trading_bot import TradingBot
+
+
+def _make_bot():
+    """TradingBot mínimo sem inicializar ML/LLM/exchange."""
+    bot = TradingBot.__new__(TradingBot)
+    bot.is_running = True
+    bot.metrics = {
+        "position_checks": 0,
+        "last_position_check_ms": None,
+        "avg_position_check_ms": None,
+        "max_position_check_ms": 0.0,
+        "last_position_check_at": None,
+        "position_monitor_source": None,
+    }
+    bot._monitor_task = None
+    bot._price_tick = asyncio.Event()
+    bot._price_tick_listener = None
+    bot.position_monitor_interval = 0.05
+    bot.position_monitor_rest_interval = 0.05
+    bot._position_monitor_min_gap = 0.0
+    bot._is_circuit_open = Mock(return_value=False)
+    bot._check_positions = AsyncMock()
+    return bot
+
+
+class TestPositionMonitor:
+
+    @pytest.mark.asyncio
+    async def test_runs_independently_and_records_latency(self):
+        """Monitor chama _check_positions sozinho e registra métricas."""
+        bot = _make_bot()
+        with patch('bot.trading_bot.binance_manager') as manager:
+            manager.stream = None
+            bot._start_position_monitor()
+            await asyncio.sleep(0.3)
+            bot.is_running = False
+            await bot._stop_position_monitor()
+
+        assert bot._check_positions.await_count >= 2
+        assert bot.metrics["position_checks"] == bot._check_positions.await_count
+        assert bot.metrics["position_monitor_source"] == "rest"
+        assert bot.metrics["avg_position_check_ms"] is not None
+
+    @pytest.mark.asyncio
+    async def test_price_tick_wakes_monitor(self):
+        """Tick do stream acorda o monitor antes do intervalo."""
+        bot = _make_bot()
+        bot.position_monitor_interval = 30.0
+        bot.position_monitor_rest_interval = 30.0
+        stream = Mock()
+        stream.is_fresh.return_value = True
+        listeners = []
+        stream.add_listener.side_effect = listeners.append
+
+        with patch('bot.trading_bot.binance_manager') as manager:
+            manager.stream = stream
+            bot._start_position_monitor()
+            await asyncio.sleep(0.05)
+            assert bot._check_positions.await_count == 0
+
+            listeners[0]()  # simula tick vindo da thread do stream
+            await asyncio.sleep(0.05)
+            assert bot._check_positions.await_count == 1
+            assert bot.metrics["position_monitor_source"] == "stream"
+
+            bot.is_running = False
+            await bot._stop_position_monitor()
+            stream.remove_listener.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_circuit_open_skips_checks(self):
+        bot = _make_bot()
+        bot._is_circuit_open.return_value = True
+        with patch('bot.trading_bot.binance_manager') as manager:
+            manager.stream = None
+            bot._start_position_monitor()
+            await asyncio.sleep(0.2)
+            bot.is_running = False
+            await bot._stop_position_monitor()
+
+        bot._check_positions.assert_not_awaited()
@@ -0,0 +1,194 @@
+"""
+Testes para o PositionsRepository (posições em memória com write-through).
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.positions_repository import PositionsRepository
+
+
+class FakeCursor:
+    def __init__(self, docs, delay=0.0):
+        self.docs = docs
+        self.delay = delay
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d.get(key, ''))
+        return self
+
+    async def to_list(self, length):
+        await asyncio.sleep(self.delay)
+        return [dict(d) for d in self.docs][:length]
+
+
+class FakePositions:
+    """db.positions mínimo: registra cada operação de escrita"""
+
+    def __init__(self):
+        self.docs = {}
+        self.writes = []
+        self.read_delay = 0.0
+        self._next_id = 1
+        # Chamado durante o insert_one (simula o change stream entregando o evento antes)
+        self.on_insert = None
+
+    async def insert_one(self, doc):
+        # Como o pymongo: respeita o _id já presente no documento
+        doc_id = doc.get('_id')
+        if doc_id is None:
+            doc_id = self._next_id
+            self._next_id += 1
+        self.docs[doc_id] = dict(doc, _id=doc_id)
+        self.writes.append(('insert', doc_id))
+        if self.on_insert:
+            self.on_insert(dict(self.docs[doc_id]))
+        await asyncio.sleep(0)
+        return SimpleNamespace(inserted_id=doc_id)
+
+    async def update_one(self, query, update):
+        self.docs[query['_id']].update(update['$set'])
+        self.writes.append(('update', query['_id']))
+
+    async def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            self.docs[op._filter['_id']].update(op._doc['$set'])
+        self.writes.append(('bulk', len(ops)))
+
+    async def delete_many(self, query):
+        self.docs = {k: v for k, v in self.docs.items() if v.get('status') != 'open'}
+
+    def find(self, query):
+        open_docs = [d for d in self.docs.values() if d.get('status') == 'open']
+        return FakeCursor(open_docs, self.read_delay)
+
+
+def _position(symbol, opened_at):
+    return {'symbol': symbol, 'status': 'open', 'opened_at': opened_at, 'stop_loss': 1.0, 'trailing': {}}
+
+
+class TestPositionsRepository:
+
+    @pytest.mark.asyncio
+    async def test_trailing_updates_are_batched(self):
+        collection = FakePositions()
+        repo = PositionsRepository(collection, flush_interval=1, reconcile_interval=60)
+        btc = await repo.add(_position('BTCUSDT', '2026-10-17T10:00'))
+        eth = await repo.add(_position('ETHUSDT', '2026-10-17T09:00'))
+        assert repo.symbols() == ['ETHUSDT', 'BTCUSDT']
+
+        for stop in (1.1, 1.2, 1.3):
+            btc['stop_loss'] = stop
+            repo.mark_dirty(btc, 'stop_loss', 'trailing')
+        eth['stop_loss'] = 2.0
+        repo.mark_dirty(eth, 'stop_loss')
+
+        assert await repo.flush() == 2
+        assert collection.writes[-1] == ('bulk', 2)
+        assert collection.docs[btc['_id']]['stop_loss'] == 1.3
+        assert repo.stats['coalesced_updates'] == 2
+        assert await repo.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_close_removes_and_writes_final_doc(self):
+        collection = FakePositions()
+        repo = PositionsRepository(collection, flush_interval=1, reconcile_interval=60)
+        position = await repo.add(_position('BTCUSDT', '2026-10-17T10:00'))
+        repo.mark_dirty(position, 'stop_loss')
+
+        position['status'] = 'closed'
+        await repo.close(position)
+
+        assert len(repo) == 0
+        assert collection.docs[position['_id']]['status'] == 'closed'
+        assert await repo.flush() == 0  # escrita pendente descartada
+
+    @pytest.mark.asyncio
+    async def test_reconcile_applies_external_edits(self):
+        collection = FakePositions()
+        repo = PositionsRepository(collection, flush_interval=1, reconcile_interval=60)
+        kept = await repo.add(_position('BTCUSDT', '2026-10-17T10:00'))
+        removed = await repo.add(_position('ETHUSDT', '2026-10-17T11:00'))
+
+        # Script externo: fecha ETH, edita TP do BTC e abre SOL
+        collection.docs[removed['_id']]['status'] = 'closed'
+        collection.docs[kept['_id']]['take_profit'] = 99.0
+        collection.docs[50] = dict(_position('SOLUSDT', '2026-10-17T12:00'), _id=50)
+
+        assert await repo.reconcile() == 3
+        assert repo.symbols() == ['BTCUSDT', 'SOLUSDT']
+        assert kept['take_profit'] == 99.0  # mesmo objeto, atualizado in-place
+
+    @pytest.mark.asyncio
+    async def test_reconcile_ignores_positions_touched_during_read(self):
+        collection = FakePositions()
+        repo = PositionsRepository(collection, flush_interval=1, reconcile_interval=60)
+        position = await repo.add(_position('BTCUSDT', '2026-10-17T10:00'))
+        collection.read_delay = 0.05
+
+        async def close_meanwhile():
+            await asyncio.sleep(0.01)
+            position['status'] = 'closed'
+            await repo.close(position)
+
+        # A leitura vê a posição aberta, mas ela foi fechada durante o await
+        await asyncio.gather(repo.reconcile(), close_meanwhile())
+        assert len(repo) == 0
+
+    @pytest.mark.asyncio
+    async def test_change_stream_events(self):
+        repo = PositionsRepository(FakePositions(), flush_interval=1, reconcile_interval=60)
+        position = dict(_position('BTCUSDT', '2026-10-17T10:00'), _id=7)
+
+        repo.apply_change({'operationType': 'insert', 'fullDocument': position, 'documentKey': {'_id': 7}})
+        assert repo.symbols() == ['BTCUSDT']
+
+        repo.positions[0]['stop_loss'] = 1.5
+        repo.mark_dirty(repo.positions[0], 'stop_loss')
+        # Eco de uma escrita antiga não sobrescreve o campo com gravação pendente
+        repo.apply_change({'operationType': 'update', 'fullDocument': dict(position, stop_loss=1.0, take_profit=3.0),
+                           'documentKey': {'_id': 7}})
+        assert repo.positions[0]['stop_loss'] == 1.5 and repo.positions[0]['take_profit'] == 3.0
+
+        repo.apply_change({'operationType': 'delete', 'documentKey': {'_id': 7}})
+        assert len(repo) == 0
+
+    @pytest.mark.asyncio
+    async def test_insert_event_before_add_returns_is_not_duplicated(self):
+        collection = FakePositions()
+        repo = PositionsRepository(collection, flush_interval=1, reconcile_interval=60)
+        repo.change_stream_active = True
+        collection.on_insert = lambda doc: repo.apply_change(
+            {'operationType': 'insert', 'fullDocument': doc, 'documentKey': {'_id': doc['_id']}}
+        )
+
+        position = await repo.add(_position('BTCUSDT', '2026-10-17T10:00'))
+
+        # Uma única entrada, e é o dict devolvido por add() (o que o monitor altera)
+        assert len(repo) == 1
+        assert repo.positions[0] is position
+        assert repo.stats['external_changes'] == 0
+
+        # O eco do fechamento também é ignorado; a posição não volta
+        position['status'] = 'closed'
+        await repo.close(position)
+        repo.apply_change({'operationType': 'update', 'fullDocument': dict(position),
+                           'documentKey': {'_id': position['_id']}})
+        assert len(repo) == 0
+        assert repo.stats['external_changes'] == 0
+
+    def test_insert_local_replaces_same_id(self):
+        repo = PositionsRepository(FakePositions(), flush_interval=1, reconcile_interval=60)
+        repo.apply_change({'operationType': 'insert', 'documentKey': {'_id': 7},
+                           'fullDocument': dict(_position('BTCUSDT', '2026-10-17T10:00'), _id=7)})
+        newer = dict(_position('BTCUSDT', '2026-10-17T10:00'), _id=7, stop_loss=2.0)
+        repo._insert_local(newer)
+        assert repo.positions == [newer]
+        assert repo.positions[0] is newer
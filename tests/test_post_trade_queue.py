@@ -0,0 +1,172 @@
+"""
+Testes para a PostTradeQueue (analytics pós-trade durável e em lote).
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.advanced_learning import AdvancedLearningSystem
+from bot.post_trade_queue import PENDING_FIELD, PostTradeQueue, mark_pending
+from bot.trading_bot import TradingBot
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d.get(key, ''))
+        return self
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs]
+
+
+class FakeTrades:
+    """db.trades mínimo com suporte ao flag de pendência"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        self.docs[doc['_id']] = dict(doc)
+
+    def find(self, query):
+        return FakeCursor([d for d in self.docs.values() if d.get(PENDING_FIELD)])
+
+    async def update_many(self, query, update):
+        for trade_id in query['_id']['$in']:
+            for field in update['$unset']:
+                self.docs[trade_id].pop(field, None)
+
+    def pending_ids(self):
+        return sorted(k for k, d in self.docs.items() if d.get(PENDING_FIELD))
+
+
+def _db():
+    db = Mock()
+    db.trades = FakeTrades()
+    return db
+
+
+async def _close_trade(db, queue, trade_id):
+    trade = mark_pending({'_id': trade_id, 'symbol': f'C{trade_id}USDT', 'pnl': 1.0,
+                          'closed_at': f'2026-10-17T10:{trade_id:02d}:00+00:00'})
+    await db.trades.insert_one(trade)
+    queue.submit(trade)
+
+
+class TestPostTradeQueue:
+
+    @pytest.mark.asyncio
+    async def test_batches_and_acks(self):
+        db = _db()
+        batches = []
+
+        async def process(trades):
+            batches.append([t['_id'] for t in trades])
+
+        queue = PostTradeQueue(db, process, batch_size=3, max_wait=0.05)
+        for trade_id in range(5):
+            await _close_trade(db, queue, trade_id)
+        assert db.trades.pending_ids() == [0, 1, 2, 3, 4]
+        assert queue.get_stats()['depth'] == 5
+
+        await queue.stop(grace=1)
+        assert batches == [[0, 1, 2], [3, 4]]
+        assert db.trades.pending_ids() == []
+        stats = queue.get_stats()
+        assert stats['processed'] == 5 and stats['batches'] == 2
+        assert stats['depth'] == 0 and stats['last_lag_ms'] is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_stays_pending_and_is_replayed(self):
+        db = _db()
+
+        async def crash(trades):
+            raise RuntimeError('learner quebrou')
+
+        queue = PostTradeQueue(db, crash, batch_size=10, max_wait=0.01)
+        await _close_trade(db, queue, 1)
+        await _close_trade(db, queue, 2)
+        await queue.stop(grace=1)
+        assert queue.stats['failed_batches'] == 1
+        assert db.trades.pending_ids() == [1, 2]
+
+        # Novo processo: recover reenfileira em ordem de fechamento
+        seen = []
+
+        async def process(trades):
+            seen.extend(t['_id'] for t in trades)
+
+        restarted = PostTradeQueue(db, process, batch_size=10, max_wait=0.01)
+        assert await restarted.recover() == 2
+        await restarted.stop(grace=1)
+        assert seen == [1, 2]
+        assert db.trades.pending_ids() == []
+        assert restarted.stats['replayed'] == 2
+
+    @pytest.mark.asyncio
+    async def test_submit_ignores_trade_already_queued(self):
+        db = _db()
+        release = asyncio.Event()
+
+        async def process(trades):
+            await release.wait()
+
+        queue = PostTradeQueue(db, process, batch_size=10, max_wait=0.01)
+        await _close_trade(db, queue, 1)
+        assert await queue.recover() == 0  # já está na fila em memória
+        release.set()
+        await queue.stop(grace=1)
+        assert queue.stats['processed'] == 1
+
+
+class TestLearnerFailure:
+
+    @pytest.mark.asyncio
+    async def test_learner_error_keeps_trades_pending(self):
+        db = _db()
+        db.learning_data.insert_one = AsyncMock(side_effect=RuntimeError('mongo caiu'))
+        learning = AdvancedLearningSystem(db)
+        learning.min_trades_for_learning = 100
+
+        bot = TradingBot.__new__(TradingBot)
+        bot.learning_system = learning
+        bot.market_analyzer = None
+        bot.risk_advisor = None
+
+        queue = PostTradeQueue(db, bot._process_trade_analytics, batch_size=10, max_wait=0.01)
+        await _close_trade(db, queue, 1)
+        await queue.stop(grace=1)
+
+        assert queue.stats['failed_batches'] == 1
+        assert queue.stats['processed'] == 0
+        assert db.trades.pending_ids() == [1]
+
+
+class TestLearnFromTradesBatch:
+
+    @pytest.mark.asyncio
+    async def test_state_saved_once_per_batch(self):
+        db = Mock()
+        db.learning_data.insert_one = AsyncMock()
+        db.learning_data.insert_many = AsyncMock()
+        learning = AdvancedLearningSystem(db)
+        learning.min_trades_for_learning = 1
+        learning.observe_only = True
+
+        trades = [{'_id': i, 'symbol': 'BTCUSDT', 'side': 'BUY', 'pnl': (-1) ** i} for i in range(4)]
+        await learning.learn_from_trades(trades)
+
+        assert learning.metrics['total_trades'] == 4
+        assert learning.trade_history[0]['_id'] == 3  # mais recente primeiro
+        assert len(db.learning_data.insert_many.call_args[0][0]) == 4
+        db.learning_data.insert_one.assert_awaited_once()  # um snapshot de estado
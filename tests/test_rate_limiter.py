@@ -0,0 +1,137 @@
+"""
+Testes para o TokenBucket e o RequestBudget (orçamento de request weight).
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.rate_limiter import (
+    LANE_CRITICAL,
+    LANE_DASHBOARD,
+    LANE_SCAN,
+    RequestBudget,
+    RequestShed,
+    TokenBucket,
+    endpoint_weight,
+    request_lane,
+)
+
+
+class TestTokenBucket:
+
+    def test_burst_then_blocks_until_refill(self):
+        bucket = TokenBucket(rate=100, capacity=4)
+        assert bucket.acquire(2) == 0 and bucket.acquire(2) == 0
+        assert not bucket.try_acquire(2)
+
+        waited = bucket.acquire(2)
+        assert 0.01 <= waited < 0.2  # 2 tokens a 100/s
+        assert bucket.stats['weight'] == 6 and bucket.stats['waits'] == 1
+
+    def test_shared_across_threads_respects_rate(self):
+        bucket = TokenBucket(rate=200, capacity=10)
+        started = time.monotonic()
+        threads = [threading.Thread(target=lambda: [bucket.acquire(5) for _ in range(4)]) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 80 de peso, 10 de burst -> 70 via refill a 200/s
+        assert time.monotonic() - started >= 0.3
+        assert bucket.stats['acquired'] == 16
+
+    def test_timeout_and_drain(self):
+        bucket = TokenBucket.per_minute(60, burst=1)  # 1 token/s
+        bucket.drain()
+        assert bucket.available < 0.1
+        with pytest.raises(TimeoutError):
+            bucket.acquire(1, timeout=0.05)
+
+
+class TestRequestBudget:
+    """Janela deslizante com faixas critical/scan/dashboard"""
+
+    def test_endpoint_weights(self):
+        assert endpoint_weight('fetch_tickers') == 80
+        assert endpoint_weight('fetch_ticker:BTCUSDT') == 2
+        assert endpoint_weight('fetch_open_orders') == 80
+        assert endpoint_weight('fetch_open_orders:BTCUSDT') == 6
+        assert endpoint_weight('something_new') == 1
+
+    def test_dashboard_shed_before_critical(self):
+        budget = RequestBudget(100)
+        for _ in range(35):
+            budget.acquire('fetch_ticker:BTCUSDT')  # 70 de peso na faixa scan
+
+        with request_lane(LANE_DASHBOARD):
+            with pytest.raises(RequestShed):
+                budget.acquire('fetch_ticker:ETHUSDT')  # teto 70
+            # Ordens são sempre critical, independente do contexto
+            budget.acquire('place_order:BTCUSDT:BUY')
+
+        snap = budget.snapshot()
+        assert snap['used'] == 71
+        assert snap['lanes'][LANE_DASHBOARD]['shed'] == 1
+        assert snap['lanes'][LANE_CRITICAL]['admitted'] == 1
+        assert snap['lanes'][LANE_SCAN]['weight'] == 70
+        assert snap['by_endpoint'] == {'fetch_ticker': 70, 'place_order': 1}
+
+    def test_scan_waits_for_window_to_slide(self):
+        budget = RequestBudget(10, window=0.2)
+        for _ in range(4):
+            budget.acquire('fetch_ticker:BTCUSDT')  # 8 de peso = teto scan (8.5)
+
+        started = time.monotonic()
+        budget.acquire('fetch_ticker:BTCUSDT')
+        assert 0.1 <= time.monotonic() - started < 1.0
+        assert budget.stats[LANE_SCAN]['delayed'] == 1
+
+    def test_penalty_and_reported_weight(self):
+        budget = RequestBudget(100)
+        budget.observe_headers({'X-MBX-USED-WEIGHT-1M': '90'})
+        assert budget.snapshot()['used'] == 90
+        with pytest.raises(RequestShed):
+            with request_lane(LANE_DASHBOARD):
+                budget.acquire('fetch_ticker:BTCUSDT')
+
+        budget = RequestBudget(100)
+        budget.penalize(10)
+        assert budget.reserve('fetch_ticker:BTCUSDT', LANE_SCAN) > 9
+        assert budget.reserve('fetch_ticker:BTCUSDT', LANE_CRITICAL) == 0.0
+
+    def test_sync_acquire_on_event_loop_sheds_without_sleeping(self):
+        budget = RequestBudget(10, window=0.2)
+        for _ in range(4):
+            budget.acquire('fetch_ticker:BTCUSDT')  # teto scan atingido
+
+        async def run():
+            started = time.monotonic()
+            with pytest.raises(RequestShed):
+                budget.acquire('fetch_ticker:BTCUSDT')  # no loop: não pode dormir
+            assert time.monotonic() - started < 0.05
+            # Fora do loop (to_thread) a mesma chamada espera a janela deslizar
+            await asyncio.to_thread(budget.acquire, 'fetch_ticker:BTCUSDT')
+
+        asyncio.run(run())
+        assert budget.stats[LANE_SCAN]['shed'] == 1
+        assert budget.stats[LANE_SCAN]['delayed'] == 1
+
+    def test_lane_follows_asyncio_to_thread(self):
+        budget = RequestBudget(1000)
+
+        async def run():
+            with request_lane(LANE_CRITICAL):
+                await asyncio.to_thread(budget.acquire, 'fetch_tickers')
+            await budget.acquire_async('fetch_ticker:BTCUSDT')
+
+        asyncio.run(run())
+        assert budget.stats[LANE_CRITICAL]['weight'] == 80
+        assert budget.stats[LANE_SCAN]['weight'] == 2
@@ -0,0 +1,124 @@
+"""
+Testes para o StreamHub (broadcast do SSE /api/stream).
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from api.stream_hub import StreamHub, apply_patch, json_diff
+
+
+def _decode(message):
+    assert message.startswith('data: ') and message.endswith('\n\n')
+    return json.loads(message[len('data: '):])
+
+
+class TestJsonPatch:
+
+    def test_diff_roundtrip(self):
+        old = {'status': {'balance': 100, 'positions': [{'symbol': 'BTCUSDT'}]}, 'a/b': 1, 'gone': True}
+        new = {'status': {'balance': 101, 'positions': []}, 'a/b': 2, 'extra': None}
+
+        ops = json_diff(old, new)
+        assert {'op': 'replace', 'path': '/status/balance', 'value': 101} in ops
+        assert {'op': 'replace', 'path': '/a~1b', 'value': 2} in ops
+        assert {'op': 'remove', 'path': '/gone'} in ops
+        assert apply_patch(json.loads(json.dumps(old)), ops) == new
+
+    def test_no_changes(self):
+        assert json_diff({'x': [1, 2]}, {'x': [1, 2]}) == []
+        assert json_diff({'x': 1}, {'x': 1.0}) == [{'op': 'replace', 'path': '/x', 'value': 1.0}]
+
+
+class TestStreamHub:
+    """Produtor único com fan-out para filas por cliente"""
+
+    @pytest.mark.asyncio
+    async def test_single_producer_for_many_subscribers(self):
+        builds = 0
+
+        async def build():
+            nonlocal builds
+            builds += 1
+            return {'type': 'snapshot', 'tick': builds}
+
+        hub = StreamHub(build, interval=0.02)
+        subscribers = [hub.subscribe() for _ in range(5)]
+        messages = [await s.next(heartbeat=1.0) for s in subscribers]
+
+        assert all(_decode(m) == {'type': 'snapshot', 'tick': 1} for m in messages)
+        assert builds == 1
+
+        for s in subscribers:
+            hub.unsubscribe(s)
+        await asyncio.sleep(0.05)
+        assert hub.get_stats()['running'] is False
+        assert builds <= 2
+
+    @pytest.mark.asyncio
+    async def test_patch_subscriber_reconstructs_snapshots(self):
+        hub = StreamHub(lambda: None)
+        subscriber = hub.subscribe(patches=True)
+        hub._task.cancel()
+
+        snapshots = [
+            {'type': 'snapshot', 'status': {'balance': 100, 'positions': []}},
+            {'type': 'snapshot', 'status': {'balance': 105, 'positions': [{'symbol': 'ETHUSDT'}]}},
+            {'type': 'snapshot', 'status': {'balance': 105, 'positions': []}},
+        ]
+        for snapshot in snapshots:
+            hub.publish(snapshot)
+
+        state = None
+        received = []
+        while not subscriber.queue.empty():
+            message = _decode(subscriber.queue.get_nowait())
+            received.append(message['type'])
+            state = apply_patch(state, message['ops']) if message['type'] == 'patch' else message
+        assert received == ['snapshot', 'patch', 'patch']
+        assert state == snapshots[-1]
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_coalesced_then_dropped(self):
+        hub = StreamHub(lambda: None, queue_size=2, max_lag=2)
+        slow = hub.subscribe(patches=True)
+        fast = hub.subscribe()
+        hub._task.cancel()
+
+        for tick in range(3):
+            hub.publish({'type': 'snapshot', 'tick': tick})
+            fast.queue.get_nowait()
+
+        # Fila cheia no 3º tick: backlog descartado, próximo envio é snapshot completo
+        assert slow.queue.qsize() == 1
+        assert _decode(slow.queue.get_nowait()) == {'type': 'snapshot', 'tick': 2}
+        assert hub.stats['coalesced'] == 1
+
+        for tick in range(3, 9):
+            hub.publish({'type': 'snapshot', 'tick': tick})
+            fast.queue.get_nowait()
+
+        # Sem ler nada, o 3º coalescing passa de max_lag: só resta a sentinela
+        assert slow.queue.qsize() == 1 and slow.queue.get_nowait() is None
+        assert hub.subscriber_count == 1
+        assert hub.stats['dropped'] == 1
+
+    @pytest.mark.asyncio
+    async def test_build_error_is_broadcast(self):
+        async def build():
+            raise RuntimeError('mongo down')
+
+        hub = StreamHub(build, interval=0.01)
+        subscriber = hub.subscribe()
+        message = _decode(await subscriber.next(heartbeat=1.0))
+        hub.unsubscribe(subscriber)
+
+        assert message['type'] == 'error' and 'mongo down' in message['message']
+        assert hub.stats['errors'] >= 1
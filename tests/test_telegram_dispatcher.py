@@ -0,0 +1,134 @@
+"""
+Testes para o TelegramDispatcher (fila de saída não bloqueante com digest).
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Adicionar backend ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from bot.telegram_client import TelegramNotifier
+from bot.telegram_dispatcher import KIND_OBSERVING, KIND_STATUS, TelegramDispatcher
+
+
+class FakeTelegram:
+    """sendMessage fake: latência configurável e respostas 429 programadas"""
+
+    def __init__(self, latency=0.0, rate_limit_first=0, retry_after=0.05):
+        self.latency = latency
+        self.rate_limit_first = rate_limit_first
+        self.retry_after = retry_after
+        self.calls = []
+        self.sent = []
+
+    async def send(self, text):
+        self.calls.append((asyncio.get_running_loop().time(), text))
+        await asyncio.sleep(self.latency)
+        if self.rate_limit_first:
+            self.rate_limit_first -= 1
+            return False, self.retry_after
+        self.sent.append(text)
+        return True, None
+
+
+def _dispatcher(telegram, **kwargs):
+    params = {'maxsize': 10, 'min_interval': 0.0, 'max_per_minute': 100, 'digest_window': 0.05}
+    params.update(kwargs)
+    return TelegramDispatcher(telegram.send, **params)
+
+
+class TestTelegramDispatcher:
+
+    @pytest.mark.asyncio
+    async def test_enqueue_does_not_wait_for_slow_api(self):
+        telegram = FakeTelegram(latency=0.2)
+        dispatcher = _dispatcher(telegram)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for i in range(3):
+            assert dispatcher.enqueue(f'alerta {i}')
+        assert loop.time() - started < 0.01
+
+        await dispatcher.close(grace=2)
+        assert telegram.sent == ['alerta 0', 'alerta 1', 'alerta 2']
+
+    @pytest.mark.asyncio
+    async def test_status_and_observing_coalesce_into_digest(self):
+        telegram = FakeTelegram()
+        dispatcher = _dispatcher(telegram, digest_window=0.05)
+
+        dispatcher.enqueue('observando 1', KIND_OBSERVING)
+        dispatcher.enqueue('Ordem cancelada A', KIND_STATUS)
+        dispatcher.enqueue('Ordem cancelada A', KIND_STATUS)  # duplicada
+        dispatcher.enqueue('Ordem cancelada B', KIND_STATUS)
+        dispatcher.enqueue('observando 2', KIND_OBSERVING)  # só a última vale
+        dispatcher.enqueue('POSICAO FECHADA')
+
+        await asyncio.sleep(0.15)
+        assert telegram.sent[0] == 'POSICAO FECHADA'  # alerta não espera o digest
+        assert len(telegram.sent) == 2
+        digest = telegram.sent[1]
+        assert '3 atualizações' in digest
+        assert 'Ordem cancelada A' in digest and 'Ordem cancelada B' in digest
+        assert 'observando 2' in digest and 'observando 1' not in digest
+        assert dispatcher.stats['coalesced'] == 2
+        await dispatcher.close(grace=1)
+
+    @pytest.mark.asyncio
+    async def test_per_chat_interval_and_retry_after(self):
+        telegram = FakeTelegram(rate_limit_first=1, retry_after=0.1)
+        dispatcher = _dispatcher(telegram, min_interval=0.05)
+
+        dispatcher.enqueue('a')
+        dispatcher.enqueue('b')
+        await dispatcher.close(grace=2)
+
+        assert telegram.sent == ['a', 'b']
+        times = [t for t, _ in telegram.calls]
+        assert times[1] - times[0] >= 0.1  # respeitou o retry_after do 429
+        assert times[2] - times[1] >= 0.05  # intervalo mínimo por chat
+        assert dispatcher.stats['rate_limited'] == 1
+
+    @pytest.mark.asyncio
+    async def test_bounded_queue_drops_oldest(self):
+        telegram = FakeTelegram(latency=0.05)
+        dispatcher = _dispatcher(telegram, maxsize=3)
+
+        for i in range(6):
+            dispatcher.enqueue(f'm{i}')
+        await dispatcher.close(grace=2)
+
+        # Enfileiradas sem await: as três mais antigas saem pela fila cheia
+        assert telegram.sent == ['m3', 'm4', 'm5']
+        assert dispatcher.stats['dropped'] == 3
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_digest(self):
+        telegram = FakeTelegram()
+        dispatcher = _dispatcher(telegram, digest_window=60)
+
+        dispatcher.enqueue('observando', KIND_OBSERVING)
+        await dispatcher.close(grace=1)
+        assert telegram.sent == ['observando']
+
+
+class TestNotifierEnqueue:
+
+    @pytest.mark.asyncio
+    async def test_send_message_async_enqueues(self, monkeypatch):
+        monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'token')
+        monkeypatch.setenv('TELEGRAM_CHAT_ID', '42')
+        notifier = TelegramNotifier()
+        telegram = FakeTelegram()
+        notifier.dispatcher = _dispatcher(telegram)
+
+        assert await notifier.send_message_async('oi') is True
+        await notifier.notify_monitoring_async('nota')
+        await notifier.close()
+        assert telegram.sent[0] == 'oi'
+        assert 'nota' in telegram.sent[1]